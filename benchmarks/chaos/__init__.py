@@ -0,0 +1,24 @@
+"""
+Crash/resume chaos benchmark (no GPU needed).
+
+Runs a batch through real worker processes on the simulated engine, SIGKILLs
+the worker at random crash points (mid-generate, mid-write, before the
+index update, before the DB commit), restarts it, and checks the final
+results against a clean run: same records, same order, no duplicates or
+gaps, byte-identical content apart from per-write IDs and timestamps. It
+reports requests recomputed and time to resume for every crash, so
+durability changes to the worker are measured instead of assumed.
+
+Usage (from the repo root):
+    python -m benchmarks.chaos run                               # 200 requests, 3 crashes
+    python -m benchmarks.chaos run --requests 1000 --chunk-size 100 --crashes 5 --trials 3
+    python -m benchmarks.chaos run --point write --seed 7 --label torn-writes
+    python -m benchmarks.chaos history
+
+Exits 1 if any trial's results differ from the clean run.
+History: benchmarks/results/chaos_history.jsonl (one JSON run per line).
+"""
+
+from .harness import ChaosConfig, ChaosError, run_chaos, verify
+
+__all__ = ["ChaosConfig", "ChaosError", "run_chaos", "verify"]
@@ -0,0 +1,115 @@
+"""Command line for the crash/resume chaos benchmark (see ``benchmarks/chaos/__init__.py``)."""
+
+import argparse
+import json
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.pipeline.runner import git_revision, load_history, machine_info, save_run
+from core.batch_app.crash_points import CRASH_POINTS
+
+from .harness import ChaosConfig, ChaosError, format_report, run_chaos
+
+HISTORY_PATH = Path(__file__).resolve().parents[1] / "results" / "chaos_history.jsonl"
+
+
+def cmd_run(args) -> int:
+    config = ChaosConfig(
+        requests=args.requests,
+        chunk_size=args.chunk_size,
+        crashes=args.crashes,
+        trials=args.trials,
+        points=args.point or CRASH_POINTS,
+        seed=args.seed,
+        engine=json.loads(args.engine) if args.engine else {},
+        timeout=args.timeout,
+    )
+    print(f"Running {config.trials} chaos trial(s) on {config.requests} requests "
+          f"(crash points: {', '.join(config.points)})", flush=True)
+
+    if args.keep:
+        workdir = Path(args.keep)
+        report = run_chaos(config, workdir)
+        print(f"Workspaces kept in {workdir}")
+    else:
+        with tempfile.TemporaryDirectory(prefix="chaos-bench-") as workdir:
+            try:
+                report = run_chaos(config, Path(workdir))
+            except ChaosError as e:
+                raise ChaosError(f"{e}; rerun with --keep DIR to inspect the worker output") from e
+
+    print()
+    for line in format_report(report):
+        print(line)
+
+    if not args.no_save:
+        run = {
+            'run_id': uuid.uuid4().hex[:12],
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'label': args.label,
+            **git_revision(),
+            'machine': machine_info(),
+            **report,
+        }
+        save_run(run, Path(args.history))
+        print(f"\nSaved run {run['run_id']} to {args.history}")
+
+    if not report['ok']:
+        print("\n❌ Results after crashes differ from the clean run")
+        return 1
+    print("\n✅ Every trial matches the clean run")
+    return 0
+
+
+def cmd_history(args) -> int:
+    history = load_history(Path(args.history))
+    for run in history[-args.limit:]:
+        dirty = '+dirty' if run.get('dirty') else ''
+        resume = run.get('time_to_resume', {}).get('p50')
+        resume_text = f"{resume:.2f}s" if resume is not None else "-"
+        print(f"{run['run_id']}  {run['timestamp'][:19]}  {run.get('commit') or '-'}{dirty:<7} "
+              f"{'ok  ' if run['ok'] else 'FAIL'}  {run['crashes']:>3} crashes  "
+              f"{run['requests_recomputed']:>6} recomputed  resume p50 {resume_text:>6}  {run.get('label') or ''}")
+    if not history:
+        print(f"No runs in {args.history}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.chaos',
+                                     description='Crash/resume chaos benchmark for the batch worker')
+    parser.add_argument('--history', default=str(HISTORY_PATH), help='History file (JSONL)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run a clean batch and crashed batches, then compare them')
+    run_parser.add_argument('--requests', type=int, default=200, help='Requests in the batch (default: 200)')
+    run_parser.add_argument('--chunk-size', type=int, default=25, help='Worker chunk size (default: 25)')
+    run_parser.add_argument('--crashes', type=int, default=3, help='Worker kills per trial (default: 3)')
+    run_parser.add_argument('--trials', type=int, default=1, help='Crashed runs, each with its own seed')
+    run_parser.add_argument('--point', action='append', choices=CRASH_POINTS,
+                            help='Crash point to pick from (repeatable; default: all)')
+    run_parser.add_argument('--seed', type=int, default=0, help='Seed of the first trial (default: 0)')
+    run_parser.add_argument('--engine', help='SIMULATED_ENGINE_CONFIG overrides (JSON), e.g. \'{"time_scale": 1}\'')
+    run_parser.add_argument('--timeout', type=float, default=120.0, help='Max seconds per worker process')
+    run_parser.add_argument('--keep', metavar='DIR', help='Keep the workspaces (databases, results, logs) in DIR')
+    run_parser.add_argument('--label', help='Name for this run in the history')
+    run_parser.add_argument('--no-save', action='store_true', help="Don't write the run to the history file")
+    run_parser.set_defaults(func=cmd_run)
+
+    history_parser = commands.add_parser('history', help='List stored runs')
+    history_parser.add_argument('--limit', type=int, default=20)
+    history_parser.set_defaults(func=cmd_history)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except (ValueError, ChaosError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,448 @@
+"""
+Crash/resume harness: run a batch through real worker processes, kill them, compare.
+
+Each run gets its own workspace (SQLite database, input file, results and
+logs) and drives ``python -m core.batch_app.worker`` on the simulated
+engine. Crashes use the worker's own crash points (core/batch_app/
+crash_points.py): before each (re)start the harness picks a point and a hit
+count the remaining work will reach, and the worker SIGKILLs itself there.
+The harness waits for the kill, restarts the worker and repeats until the
+job completes.
+
+The clean run and the chaos run must end with the same records in the same
+order. Per-record IDs and timestamps are generated at write time, so they
+are left out of the comparison (VOLATILE_FIELDS). Everything else must match
+byte for byte. The job's recorded token usage must also match the usage in
+its results (a crash between saving a chunk and committing it must not drop
+that chunk's tokens).
+"""
+
+import json
+import math
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from core.batch_app.crash_points import CRASH_POINTS
+from core.batch_app.database import Base, BatchJob, File, ModelRegistry
+from core.batch_app.result_files import ResultIndex
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BATCH_ID = "batch_chaos"
+MODEL = "chaos-sim-model"
+
+# Set per record when it is written, so they differ between runs by design
+VOLATILE_FIELDS = (
+    ('id',),
+    ('response', 'request_id'),
+    ('response', 'body', 'id'),
+    ('response', 'body', 'created'),
+)
+
+# The worker logs this before every generate call (see BatchWorker.process_job)
+_GENERATE_RE = re.compile(r"Running inference on (\d+) prompts")
+
+POLL_SECONDS = 0.005
+
+
+class ChaosError(RuntimeError):
+    """Raised when a worker process fails in a way the harness didn't cause."""
+
+
+@dataclass
+class ChaosConfig:
+    requests: int = 200
+    chunk_size: int = 25
+    crashes: int = 3  # Per trial
+    trials: int = 1
+    points: Sequence[str] = CRASH_POINTS
+    seed: int = 0
+    engine: Dict[str, Any] = field(default_factory=dict)  # SIMULATED_ENGINE_CONFIG overrides
+    timeout: float = 120.0  # Per worker process
+
+    def __post_init__(self):
+        unknown = sorted(set(self.points) - set(CRASH_POINTS))
+        if unknown:
+            raise ValueError(f"Unknown crash points: {', '.join(unknown)} (expected: {', '.join(CRASH_POINTS)})")
+        if self.requests < 1 or self.chunk_size < 1:
+            raise ValueError("requests and chunk_size must be >= 1")
+
+
+@dataclass
+class WorkerRun:
+    """One worker process from start to exit."""
+    crash: Optional[str]  # Planned crash point spec ("write:7"), None for no crash
+    killed: bool
+    completed: bool
+    records_before: int
+    records_after: int
+    generated: int  # Requests sent to the engine by this process
+    seconds: float
+    time_to_progress: Optional[float]  # Start until the first new record was saved (or the job completed)
+
+    @property
+    def recomputed(self) -> int:
+        """Requests this process generated but did not keep (a later process generates them again)."""
+        return max(self.generated - (self.records_after - self.records_before), 0) if self.killed else 0
+
+
+class Workspace:
+    """Database, input file and output directories for one run."""
+
+    def __init__(self, root: Path, config: ChaosConfig):
+        self.root = root
+        self.config = config
+        root.mkdir(parents=True, exist_ok=True)
+        self.db_url = f"sqlite:///{root / 'batch.db'}"
+        self.output_dir = root / "results"
+        self.logs_dir = root / "logs"
+        self.input_path = root / f"{BATCH_ID}_input.jsonl"
+        self.log_path = self.logs_dir / f"{BATCH_ID}.log"
+        self.results_path = self.output_dir / f"{BATCH_ID}_results.jsonl"
+        self.engine = create_engine(self.db_url)
+        self._runs = 0
+
+    def create_job(self) -> None:
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
+        write_input(self.input_path, self.config.requests)
+        Base.metadata.create_all(self.engine)
+        now = int(time.time())
+        with sessionmaker(bind=self.engine)() as db:
+            db.add(ModelRegistry(model_id=MODEL, name="Chaos simulation", size_gb=1, estimated_memory_gb=2,
+                                 chunk_size=self.config.chunk_size))
+            db.add(File(file_id=f"file-{BATCH_ID}", bytes=self.input_path.stat().st_size, created_at=now,
+                        filename=self.input_path.name, purpose="batch", file_path=str(self.input_path)))
+            db.add(BatchJob(batch_id=BATCH_ID, input_file_id=f"file-{BATCH_ID}", status="validating",
+                            created_at=now, expires_at=now + 86400, model=MODEL,
+                            total_requests=self.config.requests, log_file=str(self.log_path)))
+            db.commit()
+
+    def job_status(self) -> Optional[str]:
+        with self.engine.connect() as conn:
+            return conn.execute(text("SELECT status FROM batch_jobs WHERE batch_id = :id"),
+                                {"id": BATCH_ID}).scalar()
+
+    def job_tokens(self) -> Tuple[Optional[int], Optional[int]]:
+        """(prompt_tokens, completion_tokens) recorded on the job."""
+        with self.engine.connect() as conn:
+            row = conn.execute(text("SELECT prompt_tokens, completion_tokens FROM batch_jobs WHERE batch_id = :id"),
+                               {"id": BATCH_ID}).one()
+        return row[0], row[1]
+
+    def saved_records(self) -> int:
+        """Complete records in the results file (a torn last line doesn't count)."""
+        if not self.results_path.exists():
+            return 0
+        with open(self.results_path, 'rb') as f:
+            return f.read().count(b'\n')
+
+    def generated_since(self, log_offset: int) -> int:
+        if not self.log_path.exists():
+            return 0
+        with open(self.log_path, encoding='utf-8', errors='replace') as f:
+            f.seek(log_offset)
+            return sum(int(n) for n in _GENERATE_RE.findall(f.read()))
+
+    def log_size(self) -> int:
+        return self.log_path.stat().st_size if self.log_path.exists() else 0
+
+    def worker_env(self, crash: Optional[str]) -> Dict[str, str]:
+        env = dict(os.environ)
+        env.update({
+            'PYTHONPATH': os.pathsep.join(filter(None, [str(REPO_ROOT), env.get('PYTHONPATH')])),
+            'DATABASE_URL': self.db_url,
+            'INFERENCE_BACKEND': 'simulated',
+            'SIMULATED_ENGINE_CONFIG': json.dumps(self.config.engine),
+            'OUTPUT_DIR': str(self.output_dir),
+            'LOGS_DIR': str(self.logs_dir),
+            'EVENT_SOCKET_PATH': str(self.root / "events.sock"),
+            'WORKER_IPC_SOCKET_PATH': '',
+            'PREFETCH_ENABLED': 'false',
+            'GPU_TELEMETRY_BACKEND': 'none',
+            'SENTRY_DSN': '',
+            'WORKER_CRASH_POINT': crash or '',
+        })
+        return env
+
+    def run_worker(self, crash: Optional[str]) -> WorkerRun:
+        """Start a worker and wait until it is killed at ``crash`` or the job completes."""
+        self._runs += 1
+        records_before = self.saved_records()
+        log_offset = self.log_size()
+        output = open(self.root / f"worker-{self._runs}.out", 'wb')
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-m', 'core.batch_app.worker'], cwd=self.root,
+                                   env=self.worker_env(crash), stdout=output, stderr=subprocess.STDOUT)
+        time_to_progress = None
+        try:
+            while True:
+                elapsed = time.perf_counter() - started
+                completed = self.job_status() == 'completed'
+                if time_to_progress is None and (completed or self.saved_records() > records_before):
+                    time_to_progress = elapsed
+                if completed:
+                    process.kill()  # Idle from here on
+                    process.wait()
+                    killed = False
+                    break
+                if process.poll() is not None:
+                    killed = process.returncode == -signal.SIGKILL
+                    if not killed:
+                        raise ChaosError(f"Worker exited with code {process.returncode} "
+                                         f"(see {self.root / f'worker-{self._runs}.out'})")
+                    break
+                if elapsed > self.config.timeout:
+                    process.kill()
+                    process.wait()
+                    raise ChaosError(f"Job did not complete within {self.config.timeout:.0f}s "
+                                     f"(see {self.root / f'worker-{self._runs}.out'})")
+                time.sleep(POLL_SECONDS)
+        finally:
+            output.close()
+
+        return WorkerRun(
+            crash=crash,
+            killed=killed,
+            completed=completed,
+            records_before=records_before,
+            records_after=self.saved_records(),
+            generated=self.generated_since(log_offset),
+            seconds=round(time.perf_counter() - started, 3),
+            time_to_progress=round(time_to_progress, 3) if time_to_progress is not None else None,
+        )
+
+    def close(self) -> None:
+        self.engine.dispose()
+
+
+def write_input(path: Path, num_requests: int) -> None:
+    """Batch input with varied prompt and output lengths."""
+    rng = random.Random(42)
+    with open(path, 'w') as f:
+        for i in range(num_requests):
+            words = " ".join(rng.choice(("alpha", "beta", "gamma", "delta")) for _ in range(rng.randint(5, 60)))
+            f.write(json.dumps({"custom_id": f"req-{i}", "body": {
+                "messages": [{"role": "user", "content": f"Question {i}: {words}"}],
+                "max_tokens": rng.randint(8, 128)}}) + "\n")
+
+
+def plan_crash(rng: random.Random, points: Sequence[str], remaining: int, chunk_size: int) -> str:
+    """A crash point and a hit count the worker reaches before finishing ``remaining`` requests."""
+    point = rng.choice(list(points))
+    if point == 'write':
+        return f"write:{rng.randint(1, remaining)}"
+    return f"{point}:{rng.randint(1, math.ceil(remaining / chunk_size))}"
+
+
+def normalize_record(line: bytes) -> Tuple[Optional[str], bytes]:
+    """(custom_id, canonical JSON without the volatile fields) of one results line ((None, line) if corrupt)."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None, line
+    for path in VOLATILE_FIELDS:
+        parent = record
+        for key in path[:-1]:
+            parent = parent.get(key) or {}
+        parent.pop(path[-1], None)
+    return record.get('custom_id'), json.dumps(record, sort_keys=True).encode('utf-8')
+
+
+def load_records(results_path: Path) -> List[Tuple[Optional[str], bytes]]:
+    with open(results_path, 'rb') as f:
+        return [normalize_record(line) for line in f if line.strip()]
+
+
+def results_tokens(results_path: Path) -> Tuple[int, int]:
+    """(prompt_tokens, completion_tokens) summed over the ``usage`` of a results file's records."""
+    prompt = completion = 0
+    for _, line in load_records(results_path):
+        try:
+            usage = json.loads(line)['response']['body']['usage']
+        except (ValueError, KeyError, TypeError):
+            continue
+        prompt += usage['prompt_tokens']
+        completion += usage['completion_tokens']
+    return prompt, completion
+
+
+def verify(expected: List[Tuple[Optional[str], bytes]], workspace: Workspace) -> Dict[str, Any]:
+    """Compare a run's results with the clean run's: order, duplicates, gaps, content and usage totals."""
+    actual = load_records(workspace.results_path)
+    expected_ids = [custom_id for custom_id, _ in expected]
+    actual_ids = [custom_id for custom_id, _ in actual]
+    saved_ids = [custom_id for custom_id in actual_ids if custom_id is not None]
+    expected_set = set(expected_ids)
+    expected_by_id = dict(expected)
+
+    index = ResultIndex.load(workspace.results_path)
+    index_ok = len(index) == len(actual) and all(
+        index.lookup(custom_id) is not None for custom_id in saved_ids)
+
+    result = {
+        'status': workspace.job_status(),
+        'records': len(actual),
+        'corrupt': actual_ids.count(None),
+        'duplicates': len(saved_ids) - len(set(saved_ids)),
+        'missing': len(expected_set - set(actual_ids)),
+        'unexpected': len(set(saved_ids) - expected_set),
+        'out_of_order': actual_ids != expected_ids and set(actual_ids) == expected_set
+        and len(actual_ids) == len(expected_ids),
+        'mismatched': sum(1 for custom_id, record in actual
+                          if custom_id in expected_by_id and expected_by_id[custom_id] != record),
+        'index_ok': index_ok,
+        'usage_ok': workspace.job_tokens() == results_tokens(workspace.results_path),
+    }
+    result['ok'] = (result['status'] == 'completed' and actual == expected and index_ok and result['usage_ok'])
+    return result
+
+
+def run_job(workspace: Workspace, rng: Optional[random.Random], crashes: int) -> List[WorkerRun]:
+    """Run the workspace's job to completion, killing the worker up to ``crashes`` times."""
+    config = workspace.config
+    workspace.create_job()
+    runs: List[WorkerRun] = []
+    while True:
+        remaining = config.requests - workspace.saved_records()
+        crash = None
+        if rng is not None and len(runs) < crashes and remaining > 0:
+            crash = plan_crash(rng, config.points, remaining, config.chunk_size)
+        run = workspace.run_worker(crash)
+        runs.append(run)
+        if run.completed:
+            return runs
+        if len(runs) > crashes + 1:
+            raise ChaosError(f"Job not completed after {len(runs)} worker runs")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)), 1) - 1]
+
+
+def run_chaos(config: ChaosConfig, workdir: Path) -> Dict[str, Any]:
+    """Clean run plus ``config.trials`` chaos runs, with verification and recovery stats."""
+    started = time.perf_counter()
+    clean_workspace = Workspace(workdir / "clean", config)
+    try:
+        clean_runs = run_job(clean_workspace, rng=None, crashes=0)
+        expected = load_records(clean_workspace.results_path)
+    finally:
+        clean_workspace.close()
+    if len(expected) != config.requests:
+        raise ChaosError(f"Clean run saved {len(expected)} of {config.requests} records")
+
+    trials: List[Dict[str, Any]] = []
+    for trial in range(config.trials):
+        workspace = Workspace(workdir / f"trial-{trial + 1}", config)
+        try:
+            runs = run_job(workspace, random.Random(config.seed + trial), config.crashes)
+            verification = verify(expected, workspace)
+        finally:
+            workspace.close()
+
+        crashes = []
+        for killed, restart in zip(runs, runs[1:]):
+            if killed.killed and killed.crash:
+                point = killed.crash.partition(':')[0]
+                crashes.append({
+                    'crash': killed.crash,
+                    'point': point,
+                    'records_at_crash': killed.records_after,
+                    'recomputed': killed.recomputed,
+                    'time_to_resume': restart.time_to_progress,
+                })
+        trials.append({
+            'trial': trial + 1,
+            'seed': config.seed + trial,
+            'worker_runs': len(runs),
+            'missed_crashes': sum(1 for run in runs if run.crash and not run.killed),
+            'crashes': crashes,
+            'requests_recomputed': sum(run.recomputed for run in runs),
+            'verification': verification,
+            'runs': [asdict(run) for run in runs],
+        })
+
+    all_crashes = [crash for trial in trials for crash in trial['crashes']]
+    resume_times = [c['time_to_resume'] for c in all_crashes if c['time_to_resume'] is not None]
+    by_point = {}
+    for point in config.points:
+        point_crashes = [c for c in all_crashes if c['point'] == point]
+        if point_crashes:
+            by_point[point] = {
+                'crashes': len(point_crashes),
+                'recomputed': sum(c['recomputed'] for c in point_crashes),
+                'max_time_to_resume': max((c['time_to_resume'] or 0) for c in point_crashes),
+            }
+
+    return {
+        'config': {**asdict(config), 'points': list(config.points)},
+        'ok': all(trial['verification']['ok'] for trial in trials),
+        'clean': {
+            'seconds': clean_runs[-1].seconds,
+            'time_to_first_record': clean_runs[-1].time_to_progress,
+        },
+        'crashes': len(all_crashes),
+        'requests_recomputed': sum(trial['requests_recomputed'] for trial in trials),
+        'time_to_resume': {
+            'p50': percentile(resume_times, 50),
+            'max': max(resume_times) if resume_times else None,
+        },
+        'by_point': by_point,
+        'trials': trials,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> List[str]:
+    """Summary lines for the command line."""
+    config = report['config']
+    lines = [
+        f"Batch: {config['requests']} requests, chunks of {config['chunk_size']}, "
+        f"{config['trials']} trial(s) x {config['crashes']} crash(es)",
+        f"Clean run: {report['clean']['seconds']:.2f}s "
+        f"(first record after {report['clean']['time_to_first_record'] or 0:.2f}s)",
+        "",
+        f"{'Trial':<7}{'Crashes':<37}{'Recomputed':>11}{'Result':>10}",
+    ]
+    for trial in report['trials']:
+        crashes = ", ".join(c['crash'] for c in trial['crashes']) or "-"
+        verification = trial['verification']
+        if verification['ok']:
+            result = "✅ match"
+        else:
+            problems = [f"{key}={verification[key]}" for key in ('corrupt', 'duplicates', 'missing', 'unexpected', 'mismatched')
+                        if verification[key]]
+            if verification['out_of_order']:
+                problems.append("out of order")
+            if not verification['index_ok']:
+                problems.append("index")
+            if not verification['usage_ok']:
+                problems.append("usage")
+            if verification['status'] != 'completed':
+                problems.append(f"status={verification['status']}")
+            result = "❌ " + " ".join(problems)
+        lines.append(f"{trial['trial']:<7}{crashes[:36]:<37}{trial['requests_recomputed']:>11}  {result}")
+
+    lines.append("")
+    for point, stats in report['by_point'].items():
+        lines.append(f"{point:<10} {stats['crashes']:>3} crash(es)  {stats['recomputed']:>6} recomputed  "
+                     f"resume <= {stats['max_time_to_resume']:.2f}s")
+    resume = report['time_to_resume']
+    if resume['p50'] is not None:
+        lines.append(f"Time to resume: p50 {resume['p50']:.2f}s, max {resume['max']:.2f}s "
+                     f"(restart until the first new record)")
+    lines.append(f"Requests recomputed: {report['requests_recomputed']}")
+    return lines
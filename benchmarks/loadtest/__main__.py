@@ -0,0 +1,143 @@
+"""Command line for the API load test (see ``benchmarks/loadtest/__init__.py``)."""
+
+import argparse
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.pipeline.runner import find_run, git_revision, load_history, machine_info, save_run
+
+from .generator import ACTIONS, check_slos, compare_reports, format_report
+from .scenarios import list_scenarios, load_scenario
+
+HISTORY_PATH = Path(__file__).resolve().parents[1] / "results" / "loadtest_history.jsonl"
+
+
+def cmd_list(args) -> int:
+    for path in list_scenarios():
+        scenario = load_scenario(str(path), list(ACTIONS))
+        print(f"{scenario.name:<16} {scenario.total_clients:>5} clients  {scenario.duration_seconds:>5.0f}s  "
+              f"{scenario.description}")
+    return 0
+
+
+def cmd_run(args) -> int:
+    scenario = load_scenario(args.scenario, list(ACTIONS))
+    if args.duration:
+        scenario.duration_seconds = args.duration
+    if args.database == 'postgres' and not args.database_url:
+        raise ValueError("--database postgres needs --database-url (a database the load test may fill)")
+
+    history_path = Path(args.history)
+    baseline = find_run(load_history(history_path), args.compare_to) if args.compare_to else None
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+        database_url = args.database_url or f"sqlite:///{Path(workdir).resolve() / 'loadtest.db'}"
+        # Settings are read on first import of core, so the environment goes first
+        from .server import configure_environment
+        configure_environment(Path(workdir), database_url, scenario.rate_limiting)
+        from .server import run_scenario
+
+        print(f"Running scenario {scenario.name!r}: {scenario.total_clients} clients for "
+              f"{scenario.duration_seconds:.0f}s (+{scenario.warmup_seconds:.0f}s warmup) on {args.database}",
+              flush=True)
+        report = run_scenario(scenario, Path(workdir), database_url, seed=args.seed)
+
+    print()
+    for line in format_report(report):
+        print(line)
+    stub = report['stub_worker']
+    print(f"\nStub worker: {stub['jobs_completed']} jobs completed, {stub['errors']} tick errors; "
+          f"{report['batches']['submitted']} batches submitted")
+
+    violations = check_slos(report, scenario.slo)
+    regressions = []
+    if baseline is not None:
+        rows = compare_reports(baseline, report, args.threshold)
+        print(f"\np95 vs {baseline['run_id']} ({baseline.get('label') or baseline['timestamp'][:19]}):")
+        for row in rows:
+            flag = '  ❌ regression' if row['regression'] else ''
+            print(f"  {row['endpoint']:<40}{row['baseline_p95_ms']:>9.1f} -> {row['p95_ms']:>9.1f} ms "
+                  f"({row['change']:+.1%}){flag}")
+        regressions = [row for row in rows if row['regression']]
+
+    if not args.no_save:
+        run = {
+            'run_id': uuid.uuid4().hex[:12],
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'label': args.label,
+            'scenario': scenario.name,
+            'database': args.database,
+            **git_revision(),
+            'machine': machine_info(),
+            **report,
+            'slo_violations': violations,
+        }
+        save_run(run, history_path)
+        print(f"\nSaved run {run['run_id']} to {history_path}")
+
+    if violations or regressions:
+        for violation in violations:
+            print(f"❌ SLO: {violation}")
+        if regressions:
+            print(f"❌ p95 regressed more than {args.threshold:.0%} on {len(regressions)} endpoint(s)")
+        return 1
+    print("\n✅ All SLOs met")
+    return 0
+
+
+def cmd_history(args) -> int:
+    history = load_history(Path(args.history))
+    for run in history[-args.limit:]:
+        dirty = '+dirty' if run.get('dirty') else ''
+        status = 'FAIL' if run.get('slo_violations') else 'ok  '
+        print(f"{run['run_id']}  {run['timestamp'][:19]}  {run.get('commit') or '-'}{dirty:<7} {status}  "
+              f"{run['scenario']:<14} {run['database']:<9} {run['rps']:>8.1f} rps  "
+              f"{run['error_rate']:>6.1%} errors  {run.get('label') or ''}")
+    if not history:
+        print(f"No runs in {args.history}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.loadtest',
+                                     description='API load test with a stub worker and latency SLOs')
+    parser.add_argument('--history', default=str(HISTORY_PATH), help='History file (JSONL)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help='List scenarios')
+    list_parser.set_defaults(func=cmd_list)
+
+    run_parser = commands.add_parser('run', help='Run a scenario and check its SLOs')
+    run_parser.add_argument('--scenario', default='polling', help='Scenario name or JSON file (default: polling)')
+    run_parser.add_argument('--database', choices=('sqlite', 'postgres'), default='sqlite')
+    run_parser.add_argument('--database-url', default=os.environ.get('LOADTEST_DATABASE_URL'),
+                            help='Database to use (default: a temporary SQLite file; env: LOADTEST_DATABASE_URL)')
+    run_parser.add_argument('--duration', type=float, help='Override the measured duration (seconds)')
+    run_parser.add_argument('--seed', type=int, default=0, help='Seed for batch choice and think times')
+    run_parser.add_argument('--compare-to', metavar='RUN',
+                            help='Stored run to compare p95 against (run ID, label, commit or latest~N)')
+    run_parser.add_argument('--threshold', type=float, default=0.2,
+                            help='p95 increase that counts as a regression (default: 0.2 = 20%%)')
+    run_parser.add_argument('--label', help='Name for this run in the history')
+    run_parser.add_argument('--no-save', action='store_true', help="Don't write the run to the history file")
+    run_parser.set_defaults(func=cmd_run)
+
+    history_parser = commands.add_parser('history', help='List stored runs')
+    history_parser.add_argument('--limit', type=int, default=20)
+    history_parser.set_defaults(func=cmd_history)
+
+    args = parser.parse_args(argv)
+    try:
+        status: int = args.func(args)
+        return status
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
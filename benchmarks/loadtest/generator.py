@@ -0,0 +1,304 @@
+"""
+Asyncio load generator: virtual users, per-endpoint latency stats and SLO checks.
+
+Each client group in a scenario runs ``clients`` virtual users concurrently
+on one event loop. A virtual user calls its action, waits for the response,
+sleeps its think time and repeats until the scenario ends. Every request is
+timed by endpoint label (the path with IDs replaced, e.g.
+``GET /v1/batches/{id}``). Requests started during warmup are not counted.
+
+An error is a transport failure (connect, timeout) or a 5xx response. 4xx
+responses (404 for a batch not finished yet, 429 from rate limiting) are
+counted per status but are not errors.
+
+Actions are registered with ``@action``; they get the HTTP client, the shared
+LoadState (batches submitted so far) and the group's ``params``.
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import httpx
+
+from .scenarios import Scenario, SetupSpec
+
+
+@dataclass
+class LoadState:
+    """What the virtual users share: batches to poll and which of them are done."""
+    model: str
+    requests_per_batch: int
+    rng: random.Random = field(default_factory=random.Random)
+    batch_ids: List[str] = field(default_factory=list)
+    completed_ids: Set[str] = field(default_factory=set)
+
+
+class Recorder:
+    """Latencies and statuses per endpoint label, for requests started inside the measured window."""
+
+    def __init__(self, measure_from: float = 0.0, measure_until: float = math.inf):
+        self.measure_from = measure_from
+        self.measure_until = measure_until
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+
+    async def request(self, client: httpx.AsyncClient, label: str, method: str, url: str,
+                      **kwargs: Any) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await client.request(method, url, **kwargs)
+            status: Any = response.status_code
+            # Read the whole body: streaming endpoints aren't done until it's sent
+            await response.aread()
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - started
+
+        if self.measure_from <= started < self.measure_until:
+            self.latencies[label].append(elapsed)
+            self.statuses[label][str(status)] += 1
+            if response is None or response.status_code >= 500:
+                self.errors[label] += 1
+        return response
+
+
+ActionFunc = Callable[[httpx.AsyncClient, LoadState, Recorder, Dict[str, Any]], Awaitable[None]]
+
+ACTIONS: Dict[str, ActionFunc] = {}
+
+
+def action(name: str):
+    """Register a virtual user action."""
+    def register(func: ActionFunc) -> ActionFunc:
+        ACTIONS[name] = func
+        return func
+    return register
+
+
+def batch_input(model: str, num_requests: int, rng: random.Random) -> bytes:
+    """Batch input JSONL with ``req-N`` custom_ids."""
+    lines = []
+    for i in range(num_requests):
+        words = " ".join(rng.choice(("status", "invoice", "refund", "order", "shipping")) for _ in range(20))
+        lines.append(json.dumps({
+            "custom_id": f"req-{i}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": model, "messages": [{"role": "user", "content": f"Summarize: {words}"}],
+                     "max_tokens": 64},
+        }))
+    return ("\n".join(lines) + "\n").encode('utf-8')
+
+
+async def upload(client: httpx.AsyncClient, state: LoadState, recorder: Recorder,
+                 num_requests: int) -> Optional[str]:
+    response = await recorder.request(
+        client, "POST /v1/files", "POST", "/v1/files",
+        files={"file": ("load.jsonl", batch_input(state.model, num_requests, state.rng), "application/jsonl")},
+        data={"purpose": "batch"})
+    if response is None or response.status_code != 200:
+        return None
+    file_id: str = response.json()["id"]
+    return file_id
+
+
+async def submit(client: httpx.AsyncClient, state: LoadState, recorder: Recorder,
+                 num_requests: int) -> Optional[str]:
+    file_id = await upload(client, state, recorder, num_requests)
+    if file_id is None:
+        return None
+    response = await recorder.request(client, "POST /v1/batches", "POST", "/v1/batches", json={
+        "input_file_id": file_id, "endpoint": "/v1/chat/completions", "completion_window": "24h"})
+    if response is None or response.status_code != 200:
+        return None
+    batch_id: str = response.json()["id"]
+    state.batch_ids.append(batch_id)
+    return batch_id
+
+
+@action("poll_batch")
+async def poll_batch(client, state, recorder, params):
+    """GET one of the submitted batches (what status-polling clients do)."""
+    if not state.batch_ids:
+        return
+    batch_id = state.rng.choice(state.batch_ids)
+    response = await recorder.request(client, "GET /v1/batches/{id}", "GET", f"/v1/batches/{batch_id}")
+    if response is not None and response.status_code == 200 and response.json().get("status") == "completed":
+        state.completed_ids.add(batch_id)
+
+
+@action("list_batches")
+async def list_batches(client, state, recorder, params):
+    await recorder.request(client, "GET /v1/batches", "GET", "/v1/batches",
+                           params={"limit": params.get("limit", 20)})
+
+
+@action("queue")
+async def queue(client, state, recorder, params):
+    await recorder.request(client, "GET /v1/queue", "GET", "/v1/queue")
+
+
+@action("metrics")
+async def scrape_metrics(client, state, recorder, params):
+    """Prometheus scrape."""
+    await recorder.request(client, "GET /metrics", "GET", "/metrics")
+
+
+@action("health")
+async def health(client, state, recorder, params):
+    await recorder.request(client, "GET /health", "GET", "/health")
+
+
+@action("upload_file")
+async def upload_file(client, state, recorder, params):
+    await upload(client, state, recorder, params.get("requests", state.requests_per_batch))
+
+
+@action("submit_batch")
+async def submit_batch(client, state, recorder, params):
+    """Upload a file and create a batch from it (the stub worker then runs it)."""
+    await submit(client, state, recorder, params.get("requests", state.requests_per_batch))
+
+
+@action("download_results")
+async def download_results(client, state, recorder, params):
+    """Page through a completed batch's results."""
+    if not state.completed_ids:
+        return
+    batch_id = state.rng.choice(sorted(state.completed_ids))
+    await recorder.request(client, "GET /v1/batches/{id}/results", "GET", f"/v1/batches/{batch_id}/results",
+                           params={"offset": 0, "limit": params.get("limit", 100)})
+
+
+@action("get_result")
+async def get_result(client, state, recorder, params):
+    """Look up one result record by custom_id."""
+    if not state.completed_ids:
+        return
+    batch_id = state.rng.choice(sorted(state.completed_ids))
+    custom_id = f"req-{state.rng.randrange(state.requests_per_batch)}"
+    await recorder.request(client, "GET /v1/batches/{id}/results/{custom_id}", "GET",
+                           f"/v1/batches/{batch_id}/results/{custom_id}")
+
+
+async def setup_batches(client: httpx.AsyncClient, state: LoadState, setup: SetupSpec) -> int:
+    """Submit the scenario's initial batches (not measured). Returns how many were accepted."""
+    recorder = Recorder(measure_from=math.inf)
+    for _ in range(setup.batches):
+        await submit(client, state, recorder, setup.requests_per_batch)
+    return len(state.batch_ids)
+
+
+async def virtual_user(client: httpx.AsyncClient, func: ActionFunc, params: Dict[str, Any], think: float,
+                       jitter: float, state: LoadState, recorder: Recorder, deadline: float) -> None:
+    # Spread the first requests over one think time instead of a thundering herd
+    await asyncio.sleep(state.rng.random() * think)
+    while time.perf_counter() < deadline:
+        await func(client, state, recorder, params)
+        await asyncio.sleep(max(think * (1 + state.rng.uniform(-jitter, jitter)), 0.0))
+
+
+async def run_load(scenario: Scenario, client: httpx.AsyncClient, state: LoadState) -> Dict[str, Any]:
+    """Run the scenario's virtual users against ``client`` and return the report."""
+    unknown = [group.action for group in scenario.clients if group.action not in ACTIONS]
+    if unknown:
+        raise ValueError(f"Unknown actions: {', '.join(unknown)}")
+
+    started = time.perf_counter()
+    measure_from = started + scenario.warmup_seconds
+    deadline = measure_from + scenario.duration_seconds
+    recorder = Recorder(measure_from, deadline)
+    users = [
+        virtual_user(client, ACTIONS[group.action], group.params, group.think_time_ms / 1000, group.jitter,
+                     state, recorder, deadline)
+        for group in scenario.clients
+        for _ in range(group.clients)
+    ]
+    await asyncio.gather(*users)
+    return build_report(recorder, scenario.duration_seconds)
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(math.ceil(pct / 100 * len(sorted_values)), 1) - 1]
+
+
+def build_report(recorder: Recorder, seconds: float) -> Dict[str, Any]:
+    endpoints: Dict[str, Dict[str, Any]] = {}
+    for label in sorted(recorder.latencies):
+        latencies = sorted(recorder.latencies[label])
+        count = len(latencies)
+        endpoints[label] = {
+            'requests': count,
+            'rps': round(count / seconds, 2),
+            'p50_ms': round((percentile(latencies, 50) or 0.0) * 1000, 2),
+            'p95_ms': round((percentile(latencies, 95) or 0.0) * 1000, 2),
+            'p99_ms': round((percentile(latencies, 99) or 0.0) * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2),
+            'errors': recorder.errors[label],
+            'error_rate': round(recorder.errors[label] / count, 4),
+            'statuses': dict(recorder.statuses[label]),
+        }
+    total = sum(e['requests'] for e in endpoints.values())
+    errors = sum(e['errors'] for e in endpoints.values())
+    return {
+        'seconds': seconds,
+        'requests': total,
+        'rps': round(total / seconds, 2) if seconds else 0.0,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'endpoints': endpoints,
+    }
+
+
+def check_slos(report: Dict[str, Any], slo: Dict[str, Dict[str, float]]) -> List[str]:
+    """SLO violations, one line each (empty if every target holds)."""
+    violations = []
+    for endpoint, stats in report['endpoints'].items():
+        targets = {**slo.get('*', {}), **slo.get(endpoint, {})}
+        for key, limit in targets.items():
+            if key == 'max_error_rate':
+                value, broken = stats['error_rate'], stats['error_rate'] > limit
+            elif key == 'min_rps':
+                value, broken = stats['rps'], stats['rps'] < limit
+            else:
+                value, broken = stats[key], stats[key] > limit
+            if broken:
+                violations.append(f"{endpoint}: {key} {value} (target {limit})")
+    missing = [endpoint for endpoint in slo if endpoint != '*' and endpoint not in report['endpoints']]
+    violations += [f"{endpoint}: no requests measured" for endpoint in missing]
+    return violations
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """p95 latency change per endpoint measured in both reports."""
+    rows = []
+    for endpoint, stats in current['endpoints'].items():
+        base = baseline['endpoints'].get(endpoint)
+        if not base or not base['p95_ms']:
+            continue
+        change = stats['p95_ms'] / base['p95_ms'] - 1
+        rows.append({'endpoint': endpoint, 'baseline_p95_ms': base['p95_ms'], 'p95_ms': stats['p95_ms'],
+                     'change': round(change, 4), 'regression': change > threshold})
+    return rows
+
+
+def format_report(report: Dict[str, Any]) -> List[str]:
+    lines = [f"{'Endpoint':<40}{'Requests':>9}{'RPS':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+             f"{'max ms':>9}{'Errors':>8}"]
+    for endpoint, stats in report['endpoints'].items():
+        lines.append(f"{endpoint:<40}{stats['requests']:>9}{stats['rps']:>9.1f}{stats['p50_ms']:>9.1f}"
+                     f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['max_ms']:>9.1f}{stats['errors']:>8}")
+    lines.append(f"{'Total':<40}{report['requests']:>9}{report['rps']:>9.1f}"
+                 f"{'':>36}{report['errors']:>8}")
+    return lines
@@ -0,0 +1,129 @@
+"""
+Load test scenarios: who calls what, how often, for how long, and the SLOs to hold.
+
+A scenario is a JSON file in ``benchmarks/loadtest/scenario_files/``::
+
+    {
+      "name": "polling",
+      "description": "Hundreds of clients polling batch status",
+      "duration_seconds": 30,
+      "warmup_seconds": 5,
+      "setup": {"batches": 20, "requests_per_batch": 50},
+      "stub_worker": {"tick_seconds": 0.2, "requests_per_second": 200},
+      "clients": [
+        {"action": "poll_batch", "clients": 300, "think_time_ms": 500},
+        {"action": "metrics", "clients": 2, "think_time_ms": 1000}
+      ],
+      "slo": {
+        "GET /v1/batches/{id}": {"p95_ms": 50, "p99_ms": 150},
+        "*": {"max_error_rate": 0.0}
+      }
+    }
+
+``clients`` are closed-loop virtual users: each sends a request, waits for the
+response, sleeps ``think_time_ms`` (+/- ``jitter``) and repeats. Actions are
+listed in generator.py (ACTIONS). SLO keys are endpoint labels as reported,
+or ``*`` for every endpoint.
+"""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SCENARIO_DIR = Path(__file__).resolve().parent / "scenario_files"
+
+SLO_FIELDS = ('p50_ms', 'p95_ms', 'p99_ms', 'max_error_rate', 'min_rps')
+
+
+@dataclass
+class ClientGroup:
+    action: str
+    clients: int = 1
+    think_time_ms: float = 1000.0
+    jitter: float = 0.5  # Think time varies by +/- this fraction
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class SetupSpec:
+    batches: int = 10  # Submitted through the API before the clock starts
+    requests_per_batch: int = 50
+    model: str = "loadtest-model"
+
+
+@dataclass
+class StubWorkerSpec:
+    enabled: bool = True
+    tick_seconds: float = 0.2
+    requests_per_second: float = 500.0  # Progress per running job
+
+
+@dataclass
+class Scenario:
+    name: str
+    clients: List[ClientGroup]
+    description: str = ""
+    duration_seconds: float = 30.0
+    warmup_seconds: float = 5.0  # Requests before this aren't measured
+    setup: SetupSpec = field(default_factory=SetupSpec)
+    stub_worker: StubWorkerSpec = field(default_factory=StubWorkerSpec)
+    slo: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    rate_limiting: bool = False
+
+    @property
+    def total_clients(self) -> int:
+        return sum(group.clients for group in self.clients)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], actions: Optional[List[str]] = None) -> "Scenario":
+        """Build and validate a scenario (``actions``: known action names, if checking them)."""
+        data = dict(data)
+        if not data.get('name'):
+            raise ValueError("Scenario needs a name")
+        if not data.get('clients'):
+            raise ValueError(f"Scenario {data['name']!r} has no clients")
+
+        try:
+            clients = [ClientGroup(**group) for group in data.pop('clients')]
+            setup = SetupSpec(**data.pop('setup', {}))
+            stub_worker = StubWorkerSpec(**data.pop('stub_worker', {}))
+            scenario = cls(clients=clients, setup=setup, stub_worker=stub_worker, **data)
+        except TypeError as e:
+            raise ValueError(f"Invalid scenario {data.get('name')!r}: {e}") from e
+
+        for group in scenario.clients:
+            if actions is not None and group.action not in actions:
+                raise ValueError(f"Unknown action {group.action!r} (expected one of: {', '.join(actions)})")
+            if group.clients < 1 or group.think_time_ms < 0 or not 0 <= group.jitter <= 1:
+                raise ValueError(f"Invalid client group for {group.action!r}: clients >= 1, think_time_ms >= 0, "
+                                 f"0 <= jitter <= 1")
+        for endpoint, targets in scenario.slo.items():
+            unknown = sorted(set(targets) - set(SLO_FIELDS))
+            if unknown:
+                raise ValueError(f"Unknown SLO fields for {endpoint!r}: {', '.join(unknown)} "
+                                 f"(expected: {', '.join(SLO_FIELDS)})")
+        if scenario.duration_seconds <= 0 or scenario.warmup_seconds < 0:
+            raise ValueError("duration_seconds must be > 0 and warmup_seconds >= 0")
+        return scenario
+
+
+def scenario_path(name_or_path: str) -> Path:
+    """Path of a scenario given its name (in SCENARIO_DIR) or a file path."""
+    path = Path(name_or_path)
+    if path.suffix == '.json' and path.exists():
+        return path
+    path = SCENARIO_DIR / f"{name_or_path}.json"
+    if not path.exists():
+        available = ', '.join(p.stem for p in sorted(SCENARIO_DIR.glob('*.json')))
+        raise ValueError(f"No scenario {name_or_path!r} (available: {available})")
+    return path
+
+
+def load_scenario(name_or_path: str, actions: Optional[List[str]] = None) -> Scenario:
+    with open(scenario_path(name_or_path)) as f:
+        return Scenario.from_dict(json.load(f), actions)
+
+
+def list_scenarios() -> List[Path]:
+    return sorted(SCENARIO_DIR.glob('*.json'))
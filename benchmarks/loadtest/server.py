@@ -0,0 +1,138 @@
+"""
+Runs the real API in-process (uvicorn in a thread) against a throwaway database.
+
+Settings are read when ``core`` is first imported, so ``configure_environment``
+must run before anything imports ``core.config``; ``run_scenario`` checks
+this rather than silently loading against the wrong database. The rest of
+this module imports ``core`` lazily for that reason.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .generator import LoadState, run_load, setup_batches
+from .scenarios import Scenario
+
+
+def sqlite_url(workdir: Path) -> str:
+    return f"sqlite:///{(Path(workdir) / 'loadtest.db').resolve()}"
+
+
+def configure_environment(workdir: Path, database_url: str, rate_limiting: bool = False) -> None:
+    """Point settings at ``workdir`` and ``database_url`` (before core is imported)."""
+    data = Path(workdir).resolve() / "data"
+    os.environ.update({
+        'DATABASE_URL': database_url,
+        'DATA_DIR': str(data),
+        'BATCHES_DIR': str(data / "batches"),
+        'INPUT_DIR': str(data / "batches" / "input"),
+        'OUTPUT_DIR': str(data / "batches" / "output"),
+        'LOGS_DIR': str(data / "batches" / "logs"),
+        'FILES_DIR': str(data / "files"),
+        'DATABASE_DIR': str(data / "database"),
+        'EVENT_SOCKET_PATH': str(data / "events.sock"),
+        'WORKER_IPC_SOCKET_PATH': "",  # No worker to forward real-time inference to
+        'GPU_TELEMETRY_BACKEND': "none",
+        'INFERENCE_BACKEND': "simulated",
+        'ENABLE_RATE_LIMITING': str(rate_limiting).lower(),
+        'SENTRY_DSN': "",
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', "WARNING"),
+    })
+
+
+class InProcessServer:
+    """uvicorn serving ``app`` on a free localhost port from a background thread."""
+
+    def __init__(self, app):
+        try:
+            import uvicorn
+        except ImportError as e:
+            raise RuntimeError("Load tests need uvicorn: pip install uvicorn") from e
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning",
+                                                    access_log=False, lifespan="on"))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    def start(self, timeout: float = 30.0) -> None:
+        self._thread = threading.Thread(target=self.server.run, name="loadtest-api", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("API server failed to start")
+            time.sleep(0.05)
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+
+def seed_model(session_factory, model_id: str) -> None:
+    """Register the scenario's model so batch creation accepts it."""
+    from core.batch_app.database import ModelRegistry
+
+    with session_factory() as db:
+        if db.query(ModelRegistry).filter(ModelRegistry.model_id == model_id).first() is None:
+            db.add(ModelRegistry(model_id=model_id, name=model_id, size_gb=1.0, estimated_memory_gb=1.0,
+                                 rtx4080_compatible=True))
+            db.commit()
+
+
+def run_scenario(scenario: Scenario, workdir: Path, database_url: str, seed: int = 0) -> Dict[str, Any]:
+    """Serve the API, start the stub worker, submit setup batches, then run the load."""
+    from core.batch_app import database
+    from core.config import settings
+
+    expected_output = Path(workdir).resolve() / "data" / "batches" / "output"
+    if database.DATABASE_URL != database_url or Path(settings.OUTPUT_DIR) != expected_output:
+        raise RuntimeError("core was imported before configure_environment(); the load test would use the wrong "
+                           "database and data directories")
+
+    from core.batch_app.api_server import app
+    from .stub_worker import StubWorker
+
+    settings.create_directories()
+    database.init_db()
+    seed_model(database.SessionLocal, scenario.setup.model)
+
+    stub = StubWorker(database.SessionLocal, Path(settings.OUTPUT_DIR), scenario.stub_worker.tick_seconds,
+                      scenario.stub_worker.requests_per_second)
+    server = InProcessServer(app)
+    server.start()
+    try:
+        # Heartbeat first: batch creation refuses jobs while the worker looks offline
+        stub.tick()
+        if scenario.stub_worker.enabled:
+            stub.start()
+        report = asyncio.run(_drive(scenario, server.base_url, seed))
+    finally:
+        stub.stop()
+        server.stop()
+
+    report['stub_worker'] = {'ticks': stub.ticks, 'errors': stub.errors, 'jobs_completed': len(stub.completed)}
+    return report
+
+
+async def _drive(scenario: Scenario, base_url: str, seed: int) -> Dict[str, Any]:
+    state = LoadState(model=scenario.setup.model, requests_per_batch=scenario.setup.requests_per_batch,
+                      rng=random.Random(seed))
+    limits = httpx.Limits(max_connections=scenario.total_clients, max_keepalive_connections=scenario.total_clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        accepted = await setup_batches(client, state, scenario.setup)
+        if accepted < scenario.setup.batches:
+            raise RuntimeError(f"Only {accepted}/{scenario.setup.batches} setup batches were accepted")
+        report = await run_load(scenario, client, state)
+    report['batches'] = {'submitted': len(state.batch_ids), 'seen_completed': len(state.completed_ids)}
+    return report
@@ -0,0 +1,157 @@
+"""
+Stub worker: moves jobs through their lifecycle without a model.
+
+Load tests measure the API, so inference is replaced by a thread that makes
+the same kinds of database writes the real worker makes, at a configurable
+pace:
+
+- Heartbeat every tick
+- The oldest queued job (validating) goes in_progress, one job at a time
+- ``requests_per_second`` of progress is committed to the running job every tick
+- Finished jobs get a results file with its offset index, an output File row
+  and status completed
+
+Polling clients therefore see jobs progress and complete, and result
+downloads have something to serve.
+"""
+
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from core.batch_app.database import BatchJob, File, WorkerHeartbeat
+from core.batch_app.queue_model import SCHEDULING_ORDER
+from core.batch_app.result_files import append_index_entries
+
+
+class StubWorker:
+    """Advances batch jobs in a background thread (see module docstring)."""
+
+    def __init__(self, session_factory: Callable[[], Session], output_dir: Path,
+                 tick_seconds: float = 0.2, requests_per_second: float = 500.0):
+        self.session_factory = session_factory
+        self.output_dir = Path(output_dir)
+        self.tick_seconds = tick_seconds
+        self.requests_per_second = requests_per_second
+        self.completed: List[str] = []
+        self.ticks = 0
+        self.errors = 0
+        self._progress = 0.0  # Fractional requests carried over between ticks
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="stub-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.tick_seconds):
+            try:
+                self.tick()
+            except Exception:
+                # Contention errors (e.g. SQLite busy) are part of what's measured; keep going
+                self.errors += 1
+
+    def tick(self) -> Optional[str]:
+        """One worker step; returns the batch ID it advanced, if any."""
+        self.ticks += 1
+        with self.session_factory() as db:
+            job = db.query(BatchJob).filter(BatchJob.status == 'in_progress').first()
+            if job is None:
+                job = db.query(BatchJob).filter(BatchJob.status == 'validating').order_by(*SCHEDULING_ORDER).first()
+                if job is not None:
+                    job.status = 'in_progress'
+                    job.in_progress_at = int(time.time())
+                    self._progress = 0.0
+
+            self._heartbeat(db, job)
+            if job is None:
+                db.commit()
+                return None
+
+            self._progress += self.requests_per_second * self.tick_seconds
+            advance = int(self._progress)
+            self._progress -= advance
+            job.completed_requests = min(job.completed_requests + advance, job.total_requests)
+            job.tokens_processed = job.completed_requests * 100
+            job.last_progress_update = datetime.now(timezone.utc)
+            if job.completed_requests >= job.total_requests:
+                self._complete(db, job)
+            db.commit()
+            return job.batch_id
+
+    def _heartbeat(self, db: Session, job: Optional[BatchJob]) -> None:
+        heartbeat = db.query(WorkerHeartbeat).filter(WorkerHeartbeat.id == 1).first()
+        if heartbeat is None:
+            heartbeat = WorkerHeartbeat(id=1)
+            db.add(heartbeat)
+        heartbeat.last_seen = datetime.now(timezone.utc)
+        heartbeat.status = 'processing' if job else 'idle'
+        heartbeat.current_job_id = job.batch_id if job else None
+        heartbeat.loaded_model = job.model if job else heartbeat.loaded_model
+
+    def _complete(self, db: Session, job: BatchJob) -> None:
+        input_file = db.query(File).filter(File.file_id == job.input_file_id).first()
+        results_path = self.output_dir / f"{job.batch_id}_results.jsonl"
+        entries = []
+        with open(results_path, 'wb') as out:
+            for custom_id in input_custom_ids(input_file.file_path if input_file else None, job.total_requests):
+                line = (json.dumps(stub_result(custom_id, job.model)) + '\n').encode('utf-8')
+                entries.append((out.tell(), len(line), custom_id))
+                out.write(line)
+        append_index_entries(results_path, entries)
+
+        output_file_id = f"file-out-{uuid.uuid4().hex[:20]}"
+        db.add(File(file_id=output_file_id, object='file', bytes=results_path.stat().st_size,
+                    created_at=int(time.time()), filename=results_path.name, purpose='batch',
+                    file_path=str(results_path), deleted=False))
+        job.status = 'completed'
+        job.completed_at = int(time.time())
+        job.output_file_id = output_file_id
+        job.total_tokens = job.tokens_processed
+        self.completed.append(job.batch_id)
+
+
+def input_custom_ids(input_path: Optional[str], total: int) -> List[str]:
+    """custom_ids of a batch input file (request-N for lines without one, or if the file is gone)."""
+    ids: List[str] = []
+    if input_path and Path(input_path).exists():
+        with open(input_path) as f:
+            for line in f:
+                if line.strip():
+                    ids.append(json.loads(line).get('custom_id') or f"request-{len(ids)}")
+    return ids or [f"request-{i}" for i in range(total)]
+
+
+def stub_result(custom_id: str, model: Optional[str]) -> dict:
+    """A result record shaped like the worker's (OpenAI batch output format)."""
+    return {
+        'id': f"batch_req_{uuid.uuid4().hex[:24]}",
+        'custom_id': custom_id,
+        'response': {
+            'status_code': 200,
+            'request_id': f"req-{uuid.uuid4().hex[:12]}",
+            'body': {
+                'id': f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': "stub " * 40},
+                             'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': 60, 'completion_tokens': 40, 'total_tokens': 100},
+            },
+        },
+        'error': None,
+    }
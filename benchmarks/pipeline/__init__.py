@@ -0,0 +1,24 @@
+"""
+Pipeline overhead benchmarks (no GPU needed).
+
+``benchmarks/scripts`` measures model throughput on the GPU. This suite
+measures the time our own code adds per request around inference (input
+validation, prompt rendering, result writing, checkpointing, API and
+workbench reads) at 1K / 50K / 500K scale, stores every run in a local
+history file and flags regressions against an earlier run.
+
+Usage (from the repo root):
+    python -m benchmarks.pipeline list
+    python -m benchmarks.pipeline run                        # all benchmarks, all scales
+    python -m benchmarks.pipeline run -b results --scale 1000 --label before-refactor
+    python -m benchmarks.pipeline run --compare-to latest    # gate against the previous run
+    python -m benchmarks.pipeline compare before-refactor latest --threshold 0.15
+    python -m benchmarks.pipeline history
+
+History: benchmarks/results/pipeline_history.jsonl (one JSON run per line).
+"""
+
+from . import suites  # noqa: F401  (registers the benchmarks)
+from .runner import BENCHMARKS, SCALES, BenchmarkUnavailable, benchmark, run_benchmarks
+
+__all__ = ["BENCHMARKS", "SCALES", "BenchmarkUnavailable", "benchmark", "run_benchmarks"]
@@ -0,0 +1,136 @@
+"""Command line for the pipeline overhead benchmarks (see ``benchmarks/pipeline/__init__.py``)."""
+
+import argparse
+import sys
+from pathlib import Path
+
+from . import runner
+from .runner import (
+    BENCHMARKS,
+    DEFAULT_THRESHOLD,
+    HISTORY_PATH,
+    SCALES,
+    compare_runs,
+    find_run,
+    format_comparison,
+    format_seconds,
+    load_history,
+    make_run,
+    regressions,
+    run_benchmarks,
+    save_run,
+    select_benchmarks,
+)
+
+
+def print_measurement(measurement: runner.Measurement):
+    if measurement.skipped:
+        print(f"  {measurement.benchmark:<28} {measurement.scale:>8}  skipped: {measurement.skipped}")
+        return
+    per_op = measurement.per_op_us
+    print(f"  {measurement.benchmark:<28} {measurement.scale:>8}  median {format_seconds(measurement.median):>9}"
+          f"  ({per_op:.1f} us/op)", flush=True)
+
+
+def gate(baseline, current, threshold: float) -> int:
+    comparisons = compare_runs(baseline, current)
+    print(f"\nBaseline {baseline['run_id']} ({baseline.get('commit')}, {baseline['timestamp']})"
+          f" vs {current['run_id']} ({current.get('commit')}, {current['timestamp']})")
+    if baseline.get('machine', {}).get('host') != current.get('machine', {}).get('host'):
+        print("⚠️  Runs are from different machines; timings may not be comparable")
+    print(format_comparison(comparisons, threshold))
+
+    slower = regressions(comparisons, threshold)
+    if slower:
+        print(f"\n❌ {len(slower)} regression(s) over {threshold:.0%}")
+        return 1
+    print(f"\n✅ No regressions over {threshold:.0%}")
+    return 0
+
+
+def cmd_list(args) -> int:
+    for bench in BENCHMARKS.values():
+        print(f"{bench.name:<28} {bench.group:<11} {bench.description}")
+    return 0
+
+
+def cmd_run(args) -> int:
+    history_path = Path(args.history)
+    baseline = find_run(load_history(history_path), args.compare_to) if args.compare_to else None
+
+    benchmarks = select_benchmarks(args.benchmark)
+    print(f"Running {len(benchmarks)} benchmark(s) at scales {', '.join(map(str, args.scale))} "
+          f"(repeat={args.repeat})")
+    measurements = run_benchmarks(benchmarks, args.scale, args.repeat, on_result=print_measurement)
+
+    run = make_run(measurements, label=args.label, repeat=args.repeat)
+    if not args.no_save:
+        save_run(run, history_path)
+        print(f"\nSaved run {run['run_id']} to {history_path}")
+
+    if baseline is not None:
+        return gate(baseline, run, args.threshold)
+    return 0
+
+
+def cmd_compare(args) -> int:
+    history = load_history(Path(args.history))
+    return gate(find_run(history, args.baseline), find_run(history, args.current), args.threshold)
+
+
+def cmd_history(args) -> int:
+    history = load_history(Path(args.history))
+    for run in history[-args.limit:]:
+        measured = sum(1 for r in run['results'] if r.get('median') is not None)
+        dirty = '+dirty' if run.get('dirty') else ''
+        print(f"{run['run_id']}  {run['timestamp'][:19]}  {run.get('commit') or '-'}{dirty:<7} "
+              f"{measured:>3} results  {run.get('label') or ''}")
+    if not history:
+        print(f"No runs in {args.history}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.pipeline',
+                                     description='Pipeline overhead benchmarks with stored baselines')
+    parser.add_argument('--history', default=str(HISTORY_PATH), help='History file (JSONL)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help='List benchmarks').set_defaults(func=cmd_list)
+
+    run_parser = commands.add_parser('run', help='Run benchmarks and store the results')
+    run_parser.add_argument('-b', '--benchmark', action='append',
+                            help='Benchmark name prefix or group (repeatable; default: all)')
+    run_parser.add_argument('--scale', type=int, action='append',
+                            help=f"Scale(s) to run (repeatable; default: {', '.join(map(str, SCALES))})")
+    run_parser.add_argument('--repeat', type=int, default=3, help='Timed calls per case (default: 3)')
+    run_parser.add_argument('--label', help='Name for this run (usable as a compare reference)')
+    run_parser.add_argument('--no-save', action='store_true', help="Don't write the run to the history file")
+    run_parser.add_argument('--compare-to', help='Stored run to gate against (run ID, label, commit or latest~N)')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help=f'Slowdown that counts as a regression (default: {DEFAULT_THRESHOLD})')
+    run_parser.set_defaults(func=cmd_run)
+
+    compare_parser = commands.add_parser('compare', help='Compare two stored runs; exits 1 on regressions')
+    compare_parser.add_argument('baseline', nargs='?', default='latest~1')
+    compare_parser.add_argument('current', nargs='?', default='latest')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.set_defaults(func=cmd_compare)
+
+    history_parser = commands.add_parser('history', help='List stored runs')
+    history_parser.add_argument('--limit', type=int, default=20)
+    history_parser.set_defaults(func=cmd_history)
+
+    args = parser.parse_args(argv)
+    if getattr(args, 'scale', None) is None and args.command == 'run':
+        args.scale = list(SCALES)
+    try:
+        status: int = args.func(args)
+        return status
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
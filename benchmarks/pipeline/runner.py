@@ -0,0 +1,298 @@
+"""
+Benchmark registry, timing loop, history store and regression comparison.
+
+A benchmark is a setup function registered with ``@benchmark``. It gets the
+scale (number of requests/records) and a scratch directory, builds its inputs,
+and yields the zero-argument callable to time::
+
+    @benchmark("results.write", group="results")
+    @contextmanager
+    def write_results(scale, workdir):
+        outputs = make_outputs(scale)
+        yield lambda: writer.save(outputs)
+
+Setup and teardown are not timed. Each (benchmark, scale) case is timed
+``repeat`` times and compared on the median.
+"""
+
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Optional, Sequence
+
+SCALES = (1_000, 50_000, 500_000)
+
+HISTORY_PATH = Path(__file__).resolve().parents[1] / "results" / "pipeline_history.jsonl"
+
+# Median slowdown (fraction) that counts as a regression
+DEFAULT_THRESHOLD = 0.10
+
+
+class BenchmarkUnavailable(Exception):
+    """Raised by a setup when its benchmark can't run in this environment."""
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[int, Path], ContextManager[Callable[[], Any]]]
+    group: str
+    ops: Optional[int] = None  # Operations per timed call (default: the scale)
+    description: str = ""
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, group: str, ops: Optional[int] = None):
+    """Register a benchmark setup (a context manager yielding the callable to time)."""
+    def register(setup):
+        if name in BENCHMARKS:
+            raise ValueError(f"Benchmark {name!r} is already registered")
+        doc = (setup.__doc__ or "").strip().splitlines()
+        BENCHMARKS[name] = Benchmark(name=name, setup=setup, group=group, ops=ops,
+                                     description=doc[0] if doc else "")
+        return setup
+    return register
+
+
+def select_benchmarks(patterns: Optional[Sequence[str]] = None) -> List[Benchmark]:
+    """Benchmarks whose name or group starts with any of the patterns (all if none)."""
+    selected = [
+        bench for bench in BENCHMARKS.values()
+        if not patterns or any(bench.name.startswith(p) or bench.group == p for p in patterns)
+    ]
+    if patterns and not selected:
+        raise ValueError(f"No benchmarks match {', '.join(patterns)} (see `list`)")
+    return selected
+
+
+@dataclass
+class Measurement:
+    benchmark: str
+    scale: int
+    ops: int
+    times: List[float] = field(default_factory=list)
+    skipped: Optional[str] = None
+
+    @property
+    def median(self) -> Optional[float]:
+        return statistics.median(self.times) if self.times else None
+
+    @property
+    def per_op_us(self) -> Optional[float]:
+        median = self.median
+        return median / self.ops * 1e6 if median is not None and self.ops else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'benchmark': self.benchmark,
+            'scale': self.scale,
+            'ops': self.ops,
+            'median': self.median,
+            'min': min(self.times) if self.times else None,
+            'stdev': statistics.stdev(self.times) if len(self.times) > 1 else 0.0,
+            'per_op_us': self.per_op_us,
+            'times': self.times,
+            'skipped': self.skipped,
+        }
+
+
+def time_case(func: Callable[[], Any], repeat: int) -> List[float]:
+    """Wall-clock seconds for ``repeat`` calls (collecting garbage between calls, not during)."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_benchmark(bench: Benchmark, scale: int, repeat: int) -> Measurement:
+    measurement = Measurement(benchmark=bench.name, scale=scale, ops=bench.ops or scale)
+    with tempfile.TemporaryDirectory(prefix="pipeline-bench-") as workdir:
+        try:
+            with bench.setup(scale, Path(workdir)) as func:
+                measurement.times = time_case(func, repeat)
+        except BenchmarkUnavailable as e:
+            measurement.skipped = str(e)
+    return measurement
+
+
+def run_benchmarks(
+    benchmarks: Iterable[Benchmark],
+    scales: Sequence[int] = SCALES,
+    repeat: int = 3,
+    on_result: Optional[Callable[[Measurement], None]] = None,
+) -> List[Measurement]:
+    """Run every benchmark at every scale."""
+    measurements = []
+    for bench in benchmarks:
+        for scale in scales:
+            measurement = run_benchmark(bench, scale, repeat)
+            measurements.append(measurement)
+            if on_result:
+                on_result(measurement)
+    return measurements
+
+
+# =============================================================================
+# History store
+# =============================================================================
+
+def git_revision(cwd: Optional[Path] = None) -> Dict[str, Any]:
+    """Current commit and whether the tree has uncommitted changes (None outside git)."""
+    cwd = cwd or Path(__file__).resolve().parent
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd, capture_output=True,
+                                text=True, check=True, timeout=10).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=cwd,
+                                capture_output=True, text=True, check=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return {'commit': None, 'dirty': None}
+    return {'commit': commit, 'dirty': bool(status.strip())}
+
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        'host': platform.node(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def make_run(measurements: Sequence[Measurement], label: Optional[str] = None,
+             repeat: Optional[int] = None) -> Dict[str, Any]:
+    return {
+        'run_id': uuid.uuid4().hex[:12],
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'label': label,
+        'repeat': repeat,
+        **git_revision(),
+        'machine': machine_info(),
+        'results': [m.to_dict() for m in measurements],
+    }
+
+
+def save_run(run: Dict[str, Any], path: Path = HISTORY_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(run) + '\n')
+
+
+def load_history(path: Path = HISTORY_PATH) -> List[Dict[str, Any]]:
+    """Stored runs, oldest first (unreadable lines are skipped)."""
+    if not path.exists():
+        return []
+    runs = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                runs.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return runs
+
+
+def find_run(history: Sequence[Dict[str, Any]], ref: str) -> Dict[str, Any]:
+    """
+    Look up a stored run by reference.
+
+    ``ref`` is a run ID, a label, a commit prefix (latest run at that commit),
+    or ``latest`` / ``latest~N`` (N runs before the latest).
+    """
+    if not history:
+        raise ValueError("No stored benchmark runs")
+    if ref == 'latest' or ref.startswith('latest~'):
+        back = int(ref.partition('~')[2] or 0)
+        if back >= len(history):
+            raise ValueError(f"Only {len(history)} stored runs")
+        return history[-1 - back]
+    for run in history[::-1]:
+        if run.get('run_id') == ref or run.get('label') == ref:
+            return run
+    for run in history[::-1]:
+        if run.get('commit') and run['commit'].startswith(ref):
+            return run
+    raise ValueError(f"No stored run matches {ref!r}")
+
+
+# =============================================================================
+# Comparison
+# =============================================================================
+
+@dataclass
+class Comparison:
+    benchmark: str
+    scale: int
+    baseline: Optional[float]
+    current: Optional[float]
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if not self.baseline or self.current is None:
+            return None
+        return self.current / self.baseline
+
+    def status(self, threshold: float) -> str:
+        if self.current is None:
+            return 'skipped' if self.baseline is None else 'missing'
+        if self.baseline is None:
+            return 'new'
+        ratio = self.ratio
+        if ratio is None:
+            return 'ok'
+        if ratio > 1 + threshold:
+            return 'regression'
+        if ratio < 1 / (1 + threshold):
+            return 'improvement'
+        return 'ok'
+
+
+def compare_runs(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Comparison]:
+    """Pair up medians of the two runs by (benchmark, scale)."""
+    def medians(run):
+        return {(r['benchmark'], r['scale']): r.get('median') for r in run.get('results', [])}
+
+    base, cur = medians(baseline), medians(current)
+    keys = list(cur) + [key for key in base if key not in cur]
+    return [Comparison(benchmark=name, scale=scale, baseline=base.get((name, scale)), current=cur.get((name, scale)))
+            for name, scale in keys]
+
+
+def regressions(comparisons: Iterable[Comparison], threshold: float = DEFAULT_THRESHOLD) -> List[Comparison]:
+    return [c for c in comparisons if c.status(threshold) == 'regression']
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '-'
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds * 1e6:.0f}us"
+
+
+def format_comparison(comparisons: Sequence[Comparison], threshold: float = DEFAULT_THRESHOLD) -> str:
+    lines = [f"{'benchmark':<28} {'scale':>8} {'baseline':>10} {'current':>10} {'ratio':>7}  status"]
+    for c in comparisons:
+        ratio = f"{c.ratio:.2f}x" if c.ratio is not None else '-'
+        status = c.status(threshold)
+        marker = '  <<<' if status == 'regression' else ''
+        lines.append(f"{c.benchmark:<28} {c.scale:>8} {format_seconds(c.baseline):>10} "
+                     f"{format_seconds(c.current):>10} {ratio:>7}  {status}{marker}")
+    return '\n'.join(lines)
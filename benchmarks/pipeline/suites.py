@@ -0,0 +1,371 @@
+"""
+Pipeline overhead benchmarks.
+
+Everything here runs the server's own code on synthetic data, with no GPU or
+model: the time measured is the overhead we add around inference. The scale is
+the number of requests in the batch (or result records / queued jobs for the
+read paths).
+
+Groups:
+    input       Submission-time validation and the worker's chunked input reads
+    prompts     Rendering chat messages into prompts
+    results     Serializing and appending result records (+ custom_id index)
+    checkpoint  Resume point counting and result index rebuilds after a crash
+    api         ``POST /v1/batches``, ``GET /v1/batches/{id}`` and ``/metrics``
+    workbench   Quality dashboard aggregation over a results file
+"""
+
+import json
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from .runner import BenchmarkUnavailable, benchmark
+
+MODEL = "bench/model"
+POLLS = 100  # GET /v1/batches/{id} calls per timed run
+
+WORDS = ("alpha", "batch", "cluster", "delta", "engine", "filter", "gamma", "history",
+         "index", "journal", "kernel", "ledger", "matrix", "nominal", "output", "prompt")
+
+
+def make_requests(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """OpenAI batch input lines with a shared system prompt and varied user messages."""
+    rng = random.Random(seed)
+    system = "You are a careful assistant. Answer in at most three sentences. " * 4
+    return [{
+        'custom_id': f"request-{i}",
+        'method': 'POST',
+        'url': '/v1/chat/completions',
+        'body': {
+            'model': MODEL,
+            'messages': [
+                {'role': 'system', 'content': system},
+                {'role': 'user', 'content': " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120)))},
+            ],
+            'max_tokens': 256,
+            'temperature': 0.7,
+        },
+    } for i in range(count)]
+
+
+def write_input_file(path: Path, requests: List[Dict[str, Any]]) -> Path:
+    with open(path, 'w') as f:
+        for request in requests:
+            f.write(json.dumps(request) + '\n')
+    return path
+
+
+def make_outputs(requests: List[Dict[str, Any]]) -> List[Any]:
+    """Engine outputs shaped like vLLM ``RequestOutput`` (built directly, no engine run)."""
+    from core.batch_app.engines import batch_prompt
+    from core.batch_app.simulated_engine import (
+        SimCompletionOutput,
+        SimRequestMetrics,
+        SimRequestOutput,
+        detokenize,
+        tokenize,
+    )
+
+    now = time.time()
+    outputs = []
+    for i, request in enumerate(requests):
+        prompt = batch_prompt(request)
+        token_ids = [(i * 31 + j) % 4096 for j in range(64 + i % 128)]
+        outputs.append(SimRequestOutput(
+            request_id=str(i),
+            prompt=prompt,
+            prompt_token_ids=tokenize(prompt),
+            outputs=[SimCompletionOutput(index=0, text=detokenize(token_ids), token_ids=token_ids,
+                                         finish_reason='stop')],
+            finished=True,
+            metrics=SimRequestMetrics(arrival_time=now, last_token_time=now),
+        ))
+    return outputs
+
+
+def chunk_bounds(total: int, chunk_size: int) -> Iterator[range]:
+    for start in range(0, total, chunk_size):
+        yield range(start, min(start + chunk_size, total))
+
+
+def batch_worker():
+    from core.batch_app.worker import BatchWorker
+
+    worker = BatchWorker()
+    worker.current_model = MODEL
+    return worker
+
+
+def write_results_file(path: Path, requests: List[Dict[str, Any]], chunk_size: int) -> Path:
+    worker = batch_worker()
+    outputs = make_outputs(requests)
+    for chunk in chunk_bounds(len(requests), chunk_size):
+        worker.save_chunk_results(outputs[chunk.start:chunk.stop], requests[chunk.start:chunk.stop],
+                                  str(path), chunk.start, None)
+    return path
+
+
+@contextmanager
+def sqlite_sessions(workdir: Path):
+    """Session factory for a fresh SQLite database with the full schema."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from core.batch_app.database import Base
+
+    engine = create_engine(f"sqlite:///{workdir / 'bench.db'}", connect_args={'check_same_thread': False})
+    Base.metadata.create_all(engine)
+    try:
+        yield sessionmaker(bind=engine)
+    finally:
+        engine.dispose()
+
+
+def add_jobs(session_factory, count: int) -> List[str]:
+    """Bulk insert ``count`` batch jobs spread over the job statuses; returns their IDs."""
+    from core.batch_app.database import BatchJob
+
+    statuses = ('completed', 'completed', 'completed', 'failed', 'cancelled', 'validating', 'in_progress')
+    now = int(time.time())
+    rows: List[Dict[str, Any]] = [{
+        'batch_id': f"batch_{i:016x}",
+        'input_file_id': f"file-{i:024x}",
+        'status': statuses[i % len(statuses)],
+        'created_at': now - i,
+        'expires_at': now + 86400,
+        'model': MODEL,
+        'total_requests': 1000,
+        'completed_requests': 1000 if i % len(statuses) < 3 else 0,
+        'failed_requests': 0,
+        'log_file': f"logs/batch_{i:016x}.log",
+    } for i in range(count)]
+    db = session_factory()
+    try:
+        db.bulk_insert_mappings(BatchJob, rows)
+        db.commit()
+    finally:
+        db.close()
+    return [row['batch_id'] for row in rows]
+
+
+def load_api_server():
+    """The API module (checked before building large fixtures for it)."""
+    try:
+        from core.batch_app import api_server
+    except ImportError as e:
+        raise BenchmarkUnavailable(f"API app not importable: {e}") from e
+    return api_server
+
+
+@contextmanager
+def api_client(session_factory):
+    """TestClient for the API app on the given database, with GPU health stubbed healthy."""
+    from fastapi.testclient import TestClient
+
+    api_server = load_api_server()
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    saved = api_server.check_gpu_health, api_server.MAX_REQUESTS_PER_JOB
+    api_server.app.dependency_overrides[api_server.get_db] = get_db
+    # No GPU here, and the per-job cap would reject the larger scales before parsing them
+    api_server.check_gpu_health = lambda: {'healthy': True, 'memory_percent': 0, 'temperature_c': 0}
+    api_server.MAX_REQUESTS_PER_JOB = 10 ** 9
+    try:
+        yield TestClient(api_server.app)
+    finally:
+        api_server.app.dependency_overrides.pop(api_server.get_db, None)
+        api_server.check_gpu_health, api_server.MAX_REQUESTS_PER_JOB = saved
+
+
+# =============================================================================
+# Input
+# =============================================================================
+
+@benchmark("input.validate", group="input")
+@contextmanager
+def validate_input(scale: int, workdir: Path):
+    """Submission-time scan of the input file (JSON parse, model, prompt token estimate)."""
+    from core.batch_app.queue_model import scan_batch_input
+
+    path = write_input_file(workdir / "input.jsonl", make_requests(scale))
+
+    def run():
+        scan_batch_input(path.read_text().strip().split('\n'))
+    yield run
+
+
+@benchmark("input.read_chunks", group="input")
+@contextmanager
+def read_chunks(scale: int, workdir: Path):
+    """Worker's streamed chunk reads over the whole input file."""
+    from core.batch_app.worker import CHUNK_SIZE, BatchWorker
+
+    path = write_input_file(workdir / "input.jsonl", make_requests(scale))
+
+    def run():
+        for chunk in chunk_bounds(scale, CHUNK_SIZE):
+            BatchWorker.read_request_chunk(str(path), chunk.start, chunk.stop)
+    yield run
+
+
+# =============================================================================
+# Prompts
+# =============================================================================
+
+@benchmark("prompts.render", group="prompts")
+@contextmanager
+def render_prompts(scale: int, workdir: Path):
+    """Chat messages to prompt strings for every request."""
+    from core.batch_app.engines import batch_prompt
+
+    requests = make_requests(scale)
+    yield lambda: [batch_prompt(request) for request in requests]
+
+
+# =============================================================================
+# Results
+# =============================================================================
+
+@benchmark("results.write", group="results")
+@contextmanager
+def write_results(scale: int, workdir: Path):
+    """Serialize and append result records chunk by chunk (with index sidecar)."""
+    from core.batch_app.worker import CHUNK_SIZE
+
+    requests = make_requests(scale)
+    outputs = make_outputs(requests)
+    worker = batch_worker()
+    runs = iter(range(10 ** 9))
+
+    def run():
+        path = str(workdir / f"results-{next(runs)}.jsonl")
+        for chunk in chunk_bounds(scale, CHUNK_SIZE):
+            worker.save_chunk_results(outputs[chunk.start:chunk.stop], requests[chunk.start:chunk.stop],
+                                      path, chunk.start, None)
+    yield run
+
+
+# =============================================================================
+# Checkpoint
+# =============================================================================
+
+@benchmark("checkpoint.count_completed", group="checkpoint")
+@contextmanager
+def count_completed(scale: int, workdir: Path):
+    """Resume point: count records already in the results file."""
+    from core.batch_app.worker import CHUNK_SIZE
+
+    path = write_results_file(workdir / "results.jsonl", make_requests(scale), CHUNK_SIZE)
+    worker = batch_worker()
+    yield lambda: worker.count_completed_results(str(path))
+
+
+@benchmark("checkpoint.rebuild_index", group="checkpoint")
+@contextmanager
+def rebuild_index(scale: int, workdir: Path):
+    """Rebuild the custom_id index from the results file (sidecar lost in a crash)."""
+    from core.batch_app.result_files import ResultIndex, index_path_for
+    from core.batch_app.worker import CHUNK_SIZE
+
+    path = write_results_file(workdir / "results.jsonl", make_requests(scale), CHUNK_SIZE)
+    index_path_for(path).unlink()
+    yield lambda: ResultIndex.load(path)
+
+
+# =============================================================================
+# API
+# =============================================================================
+
+@benchmark("api.create_batch", group="api", ops=1)
+@contextmanager
+def create_batch(scale: int, workdir: Path):
+    """``POST /v1/batches`` for an input file of ``scale`` requests."""
+    from core.batch_app.database import File, ModelRegistry
+
+    load_api_server()
+    path = write_input_file(workdir / "input.jsonl", make_requests(scale))
+    with sqlite_sessions(workdir) as session_factory:
+        db = session_factory()
+        db.add(ModelRegistry(model_id=MODEL, name="Bench", size_gb=1, estimated_memory_gb=2))
+        db.add(File(file_id="file-bench", bytes=path.stat().st_size, created_at=int(time.time()),
+                    filename=path.name, purpose="batch", file_path=str(path)))
+        db.commit()
+        db.close()
+
+        with api_client(session_factory) as client:
+            def run():
+                response = client.post("/v1/batches", json={
+                    'input_file_id': "file-bench",
+                    'endpoint': "/v1/chat/completions",
+                    'completion_window': "24h",
+                })
+                assert response.status_code == 200, response.text
+            yield run
+
+
+@benchmark("api.poll_batch", group="api", ops=POLLS)
+@contextmanager
+def poll_batch(scale: int, workdir: Path):
+    """``GET /v1/batches/{id}`` with ``scale`` jobs in the database."""
+    load_api_server()
+    with sqlite_sessions(workdir) as session_factory:
+        batch_ids = add_jobs(session_factory, scale)
+        with api_client(session_factory) as client:
+            targets = [batch_ids[i * len(batch_ids) // POLLS] for i in range(POLLS)]
+
+            def run():
+                for batch_id in targets:
+                    response = client.get(f"/v1/batches/{batch_id}")
+                    assert response.status_code == 200, response.text
+            yield run
+
+
+@benchmark("api.metrics_scrape", group="api", ops=1)
+@contextmanager
+def metrics_scrape(scale: int, workdir: Path):
+    """``GET /metrics`` with ``scale`` jobs in the database."""
+    load_api_server()
+    with sqlite_sessions(workdir) as session_factory:
+        add_jobs(session_factory, scale)
+        with api_client(session_factory) as client:
+            def run():
+                response = client.get("/metrics")
+                assert response.status_code == 200, response.text
+            yield run
+
+
+# =============================================================================
+# Workbench
+# =============================================================================
+
+@benchmark("workbench.quality_dashboard", group="workbench")
+@contextmanager
+def quality_dashboard(scale: int, workdir: Path):
+    """Quality metrics aggregation over a benchmark's results file."""
+    from core.batch_app.database import Benchmark, ModelRegistry
+    from core.batch_app.workbench_analytics import get_quality_metrics_dashboard
+    from core.batch_app.worker import CHUNK_SIZE
+
+    path = write_results_file(workdir / "results.jsonl", make_requests(scale), CHUNK_SIZE)
+    with sqlite_sessions(workdir) as session_factory:
+        db = session_factory()
+        now = datetime.now(timezone.utc)
+        db.add(ModelRegistry(model_id=MODEL, name="Bench", size_gb=1, estimated_memory_gb=2))
+        db.add(Benchmark(id="bench-1", model_id=MODEL, dataset_id="dataset-1", status="completed",
+                         total=scale, completed=scale, throughput=1000.0, started_at=now, completed_at=now,
+                         results_file=str(path)))
+        db.commit()
+        try:
+            yield lambda: get_quality_metrics_dashboard(db, ["bench-1"])
+        finally:
+            db.close()
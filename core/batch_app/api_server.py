@@ -8,19 +8,20 @@ Features:
 - Request tracing with correlation IDs
 """
 
+import itertools
 import json
 import os
 import time
 import uuid
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
 
 from contextlib import asynccontextmanager
-from fastapi import Depends, FastAPI, Form, HTTPException, Query, Request, UploadFile, WebSocket, WebSocketDisconnect, Response
+from fastapi import Body, Depends, FastAPI, Form, HTTPException, Query, Request, UploadFile, WebSocket, WebSocketDisconnect, Response
 from fastapi import File as FastAPIFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field, field_validator
 from sqlalchemy.orm import Session
@@ -47,6 +48,27 @@ from .model_manager import (
     get_test_status
 )
 from .model_installer import ModelInstaller
+from .result_files import build_file_response, get_result_index, results_path_for_batch
+from .request_metrics import metrics_path_for, read_request_rows, summarize_request_rows
+from .streaming import SSE_HEADERS, SSE_KEEPALIVE, FileResetError, follow_lines, is_line_boundary, sse_event
+from .autotune import AutotuneError, validate_search_space
+from .cost_tracking import get_job_usage
+from .engine_profiles import EngineProfileError, set_engine_profile
+from .events import EventSocketInUseError, get_event_bus, make_event
+from .log_files import get_log_stats, read_forward, tail_lines, worker_log_path
+from .model_cache import parse_warm_models
+from .residency import parse_resident_models
+from .gpu_telemetry import (
+    check_gpu_health,
+    downsample,
+    get_gpu_telemetry,
+    read_timeline,
+    start_gpu_telemetry,
+    summarize_samples,
+    timeline_path_for,
+)
+from .profiling import PROFILE_MODES, Profiler, handle_profile_message
+from .queue_model import scan_batch_input, safe_refresh_queue_snapshot, snapshot_entry, SCHEDULING_ORDER, QUEUED_STATUSES
 from core.plugins.registry import get_plugin_registry
 
 # Initialize logger
@@ -70,6 +92,21 @@ async def lifespan(app: FastAPI):
     init_sentry()
     init_db()
 
+    # Event bus: worker progress events fan out to all WebSocket/SSE clients
+    event_bus = get_event_bus()
+    try:
+        await event_bus.start()
+    except EventSocketInUseError as e:
+        logger.error(f"{e}. Live updates are disabled in this process (uvicorn --workers must be 1).")
+    except OSError as e:
+        logger.warning(f"Event bus socket unavailable, live updates disabled: {e}")
+    event_bus.add_poller("benchmarks", publish_benchmark_progress, interval=2.0)
+    event_bus.add_snapshot("queue", publish_queue_snapshot,
+                           triggers={"batch.status", "batch.progress", "queue.changed", "worker.heartbeat"})
+
+    # Shared GPU sampler: health checks read its latest sample, /metrics its gauges
+    start_gpu_telemetry()
+
     logger.info("Batch API Server started", extra={
         "host": settings.BATCH_API_HOST,
         "port": settings.BATCH_API_PORT,
@@ -81,7 +118,9 @@ async def lifespan(app: FastAPI):
 
     yield
 
-    # Shutdown (if needed in future)
+    # Shutdown
+    await event_bus.stop()
+    get_gpu_telemetry().close()
     logger.info("Batch API Server shutting down")
 
 
@@ -260,83 +299,6 @@ class CancelBatchRequest(BaseModel):
     pass  # No body needed
 
 
-def check_gpu_health() -> dict:
-    """
-    Check GPU health before accepting new jobs.
-    Now queries Prometheus instead of using pynvml directly.
-
-    Returns:
-        dict with 'healthy' (bool), 'reason' (str), 'memory_percent' (float), 'temperature_c' (float)
-    """
-    try:
-        import requests
-
-        prom_url = f"{settings.PROMETHEUS_URL}/api/v1/query"
-
-        # Query GPU temperature from Prometheus
-        temp_resp = requests.get(prom_url, params={"query": "nvidia_gpu_temperature_celsius"}, timeout=2)
-        temp_data = temp_resp.json()
-        temp = None
-        if temp_data.get("status") == "success" and temp_data.get("data", {}).get("result"):
-            temp = float(temp_data["data"]["result"][0]["value"][1])
-
-        # Query GPU memory from Prometheus
-        mem_resp = requests.get(prom_url, params={"query": "nvidia_gpu_memory_used_bytes / nvidia_gpu_memory_total_bytes * 100"}, timeout=2)
-        mem_data = mem_resp.json()
-        mem_percent = None
-        if mem_data.get("status") == "success" and mem_data.get("data", {}).get("result"):
-            mem_percent = float(mem_data["data"]["result"][0]["value"][1])
-
-        # If Prometheus doesn't have GPU metrics, fall back to pynvml
-        if temp is None or mem_percent is None:
-            try:
-                import pynvml
-                pynvml.nvmlInit()
-                handle = pynvml.nvmlDeviceGetHandleByIndex(0)
-
-                if temp is None:
-                    temp = pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMPERATURE_GPU)
-
-                if mem_percent is None:
-                    mem_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
-                    mem_percent = (mem_info.used / mem_info.total) * 100
-
-                pynvml.nvmlShutdown()
-            except Exception as e:
-                # If both Prometheus and pynvml fail, assume healthy
-                return {
-                    'healthy': True,
-                    'reason': None,
-                    'memory_percent': 0,
-                    'temperature_c': 0,
-                    'warning': f'GPU monitoring unavailable: {e}'
-                }
-
-        # Health check
-        healthy = mem_percent < 95 and temp < 85
-        reason = None
-        if mem_percent >= 95:
-            reason = f"GPU memory at {mem_percent:.1f}%"
-        if temp >= 85:
-            reason = f"GPU temperature at {temp}°C"
-
-        return {
-            'healthy': healthy,
-            'reason': reason,
-            'memory_percent': mem_percent,
-            'temperature_c': temp
-        }
-    except Exception as e:
-        # If everything fails, assume healthy (for development)
-        return {
-            'healthy': True,
-            'reason': None,
-            'memory_percent': 0,
-            'temperature_c': 0,
-            'warning': f'GPU monitoring unavailable: {e}'
-        }
-
-
 # ============================================================================
 # Health Check Endpoints
 # ============================================================================
@@ -461,10 +423,13 @@ async def get_file(file_id: str, db: Session = Depends(get_db)):
 
 
 @app.get("/v1/files/{file_id}/content")
-async def get_file_content(file_id: str, db: Session = Depends(get_db)):
+async def get_file_content(file_id: str, request: Request, db: Session = Depends(get_db)):
     """
     Download file content (OpenAI Files API compatible).
 
+    Supports resumable downloads (``Range: bytes=...`` -> 206) and
+    gzip/zstd compression negotiated via ``Accept-Encoding``.
+
     Args:
         file_id: File ID
 
@@ -479,8 +444,9 @@ async def get_file_content(file_id: str, db: Session = Depends(get_db)):
     if not file_path.exists():
         raise HTTPException(status_code=404, detail=f"File content not found: {file_id}")
 
-    return FileResponse(
-        path=str(file_path),
+    return build_file_response(
+        request,
+        file_path,
         media_type="application/x-ndjson",
         filename=db_file.filename
     )
@@ -633,11 +599,43 @@ async def get_queue_status(db: Session = Depends(get_db)):
     """
     Get current queue status with real-time progress tracking.
 
+    Reads the materialized queue snapshot (maintained on job transitions by
+    queue_model.refresh_queue_snapshot), in real scheduling order: priority,
+    then FIFO. Durations come from a per-model throughput model and include
+    model swap cost.
+
     Returns:
     - current_job: Currently processing job with progress, throughput, ETA
     - queue: List of queued jobs with position and estimated start time
     - worker_status: Worker health and current model
+
+    The same response is pushed to ``/v1/events`` subscribers as a
+    ``queue.snapshot`` event whenever a job or the worker changes.
+    """
+    return _queue_status(db)
+
+
+async def publish_queue_snapshot():
     """
+    Event snapshot: publish the ``/v1/queue`` response to the event bus.
+
+    Built once per burst of job/queue/worker events for all open queue
+    dashboards, instead of each dashboard refetching ``/v1/queue``
+    (see EventBus.add_snapshot).
+    """
+    def collect_status() -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            return _queue_status(db)
+        finally:
+            db.close()
+
+    status = await asyncio.to_thread(collect_status)
+    get_event_bus().publish(make_event("queue.snapshot", **status))
+
+
+def _queue_status(db: Session) -> Dict[str, Any]:
+    """Worker, current job and queued jobs, as returned by ``/v1/queue``."""
     # Get worker status
     worker_heartbeat = db.query(WorkerHeartbeat).filter(WorkerHeartbeat.id == 1).first()
     worker_status: Dict[str, Any] = {
@@ -675,8 +673,11 @@ async def get_queue_status(db: Session = Depends(get_db)):
         eta_seconds = None
         eta_iso = None
         if current_job.estimated_completion_time:
-            eta_iso = current_job.estimated_completion_time.isoformat()
-            eta_seconds = (current_job.estimated_completion_time - datetime.now(timezone.utc)).total_seconds()
+            estimated_completion = current_job.estimated_completion_time
+            if estimated_completion.tzinfo is None:
+                estimated_completion = estimated_completion.replace(tzinfo=timezone.utc)
+            eta_iso = estimated_completion.isoformat()
+            eta_seconds = (estimated_completion - datetime.now(timezone.utc)).total_seconds()
             eta_seconds = max(0, eta_seconds)  # Don't show negative
 
         current_job_data = {
@@ -704,47 +705,17 @@ async def get_queue_status(db: Session = Depends(get_db)):
             }
         }
 
-    # Get queued jobs
+    # Get queued jobs in scheduling order (snapshot fields are precomputed)
     queued_jobs = db.query(BatchJob).filter(
-        BatchJob.status.in_(['validating', 'queued'])
-    ).order_by(BatchJob.created_at).all()
-
-    queue_data = []
-    cumulative_eta_seconds: float = 0.0
-    if current_job_data and isinstance(current_job_data, dict):
-        timing = current_job_data.get("timing")
-        if timing and isinstance(timing, dict):
-            eta = timing.get("eta_seconds")
-            if eta and isinstance(eta, (int, float)):
-                cumulative_eta_seconds = float(eta)
-
-    for idx, job in enumerate(queued_jobs, start=1):
-        # Estimate time for this job based on average throughput
-        est_time_seconds = None
-        if job.total_tokens and current_job and current_job.throughput_tokens_per_sec:
-            est_time_seconds = job.total_tokens / current_job.throughput_tokens_per_sec
-        elif job.total_requests:
-            # Fallback: assume 30 seconds per request
-            est_time_seconds = job.total_requests * 30
-
-        # Calculate when this job will start
-        starts_in_seconds = cumulative_eta_seconds
-        if est_time_seconds:
-            cumulative_eta_seconds += est_time_seconds
-
-        queue_data.append({
-            "position": idx,
-            "batch_id": job.batch_id,
-            "model": job.model,
-            "status": job.status,
-            "total_requests": job.total_requests,
-            "total_tokens": job.total_tokens,
-            "created_at": datetime.fromtimestamp(job.created_at, tz=timezone.utc).isoformat(),
-            "estimated_duration_seconds": int(est_time_seconds) if est_time_seconds else None,
-            "estimated_duration_minutes": round(est_time_seconds / 60, 1) if est_time_seconds else None,
-            "starts_in_seconds": int(starts_in_seconds),
-            "starts_in_minutes": round(starts_in_seconds / 60, 1)
-        })
+        BatchJob.status.in_(QUEUED_STATUSES)
+    ).order_by(*SCHEDULING_ORDER).all()
+
+    if any(job.queue_position is None for job in queued_jobs):
+        # Jobs that predate the snapshot - build it once
+        safe_refresh_queue_snapshot(db)
+
+    now_utc = datetime.now(timezone.utc)
+    queue_data = [snapshot_entry(job, now_utc) for job in queued_jobs]
 
     return {
         "worker": worker_status,
@@ -849,20 +820,28 @@ async def worker_logs_page():
 
 
 @app.get("/admin/worker-logs/content")
-async def worker_logs_content(tail: int = 500):
+async def worker_logs_content(
+    tail: int = Query(500, ge=1, le=10000),
+    before: Optional[int] = Query(None, ge=0, description="Page backwards: lines ending at this byte cursor"),
+    cursor: Optional[int] = Query(None, ge=0, description="Page forwards: lines starting at this byte cursor")
+):
     """
     Get worker log content.
 
+    Reads only what is returned (reverse-seek tail / forward page), never the
+    whole file. Error and warning counts cover the current log file and are
+    maintained incrementally.
+
     Args:
         tail: Number of lines to return from end of log (default: 500)
+        before: Byte cursor to page backwards from (``start_cursor`` of a previous page)
+        cursor: Byte cursor to read forwards from (``end_cursor`` of a previous page)
 
     Returns:
-        JSON with logs array and statistics
+        JSON with logs array, statistics and cursors
     """
     try:
-        # Find project root
-        project_root = Path(__file__).parent.parent.parent
-        log_file = project_root / "logs" / "worker.log"
+        log_file = worker_log_path()
 
         if not log_file.exists():
             return {
@@ -872,22 +851,22 @@ async def worker_logs_content(tail: int = 500):
                 "warning_count": 0
             }
 
-        # Read log file
-        with open(log_file, 'r') as f:
-            all_lines = f.readlines()
-
-        # Get last N lines
-        lines = all_lines[-tail:] if len(all_lines) > tail else all_lines
+        if cursor is not None:
+            lines, end_cursor = await asyncio.to_thread(read_forward, log_file, cursor, tail)
+            start_cursor = cursor
+        else:
+            lines, start_cursor, end_cursor = await asyncio.to_thread(tail_lines, log_file, tail, before)
 
-        # Count errors and warnings
-        error_count = sum(1 for line in lines if 'ERROR' in line or '❌' in line or 'Failed' in line)
-        warning_count = sum(1 for line in lines if 'WARNING' in line or '⚠️' in line)
+        stats = await asyncio.to_thread(get_log_stats, log_file)
 
         return {
-            "logs": [line.rstrip() for line in lines],
-            "total_lines": len(lines),
-            "error_count": error_count,
-            "warning_count": warning_count
+            "logs": lines,
+            "total_lines": stats["total_lines"],
+            "error_count": stats["error_count"],
+            "warning_count": stats["warning_count"],
+            "start_cursor": start_cursor,
+            "end_cursor": end_cursor,
+            "size": stats["size"]
         }
 
     except Exception as e:
@@ -900,6 +879,56 @@ async def worker_logs_content(tail: int = 500):
         }
 
 
+def _log_follow_response(request: Request, log_file: Path, cursor: Optional[int],
+                         is_finished=None) -> StreamingResponse:
+    """SSE stream of new log lines from a byte cursor (default: end of file)."""
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        try:
+            cursor = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid Last-Event-ID: {last_event_id}")
+    if cursor is None:
+        cursor = log_file.stat().st_size if log_file.exists() else 0
+    elif not is_line_boundary(log_file, cursor):
+        raise HTTPException(status_code=400, detail=f"Cursor {cursor} is not at a line boundary")
+
+    async def event_stream():
+        position = cursor
+        try:
+            async for end_offset, line in follow_lines(
+                log_file,
+                offset=cursor,
+                is_finished=is_finished,
+                keepalive_interval=15.0
+            ):
+                position = end_offset
+                if not line:
+                    yield SSE_KEEPALIVE
+                    continue
+                yield sse_event(line.decode('utf-8', errors='replace'), event="log", event_id=end_offset)
+        except FileResetError:
+            pass
+
+        # File rotated (cursor past end) or job finished
+        yield sse_event({"cursor": position}, event="end")
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.get("/admin/worker-logs/stream")
+async def worker_logs_stream(
+    request: Request,
+    cursor: Optional[int] = Query(None, ge=0, description="Byte cursor to follow from (default: end of file)")
+):
+    """
+    Follow the worker log over SSE (``event: log``, ``id`` = resume cursor).
+
+    Emits ``event: end`` when the log is rotated; clients reconnect from cursor 0.
+    """
+    return _log_follow_response(request, worker_log_path(), cursor)
+
+
 @app.get("/static/{filename}")
 async def serve_static_file(filename: str):
     """Serve static files (docs, JS, etc.)."""
@@ -966,6 +995,97 @@ async def get_config():
     }
 
 
+@app.get("/admin/gpu")
+async def get_gpu_telemetry_admin(
+    seconds: float = Query(300, gt=0, description="Window of buffered samples to return"),
+    max_points: int = Query(300, ge=1, le=100000)
+):
+    """Latest GPU readings and the recent time series from the API's sampler."""
+    telemetry = get_gpu_telemetry()
+    if not telemetry.available:
+        raise HTTPException(status_code=503, detail="GPU telemetry unavailable")
+    latest = [telemetry.latest(i) for i in range(telemetry.backend.device_count())]
+    samples = telemetry.series(since=time.time() - seconds)
+    return {
+        'backend': telemetry.backend.name,
+        'interval_seconds': telemetry.interval,
+        'latest': [s.to_dict() for s in latest if s is not None],
+        'summary': summarize_samples(samples),
+        'samples': [s.to_dict() for s in downsample(samples, max_points)],
+    }
+
+
+class ProfileRequest(BaseModel):
+    """Request model for an on-demand profiling session."""
+    target: str = Field(default="worker", pattern="^(worker|api)$", description="Process to profile")
+    mode: str = Field(default="sample", description=f"One of: {', '.join(PROFILE_MODES)}")
+    duration_seconds: float = Field(default=30.0, gt=0, le=settings.PROFILING_MAX_SECONDS)
+    interval_ms: float = Field(default=settings.PROFILING_SAMPLE_INTERVAL_MS, ge=1, le=1000,
+                               description="Stack sampling interval (sample mode)")
+
+
+# The API profiles itself in-process; it has no step loop, so only sample and memory modes
+api_profiler = Profiler(checkpoints=False, max_duration=settings.PROFILING_MAX_SECONDS)
+
+
+async def _profile_control(target: str, message: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a profiling control message to the API or forward it to the worker."""
+    from core.batch_app.worker_ipc import request_worker
+
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled (PROFILING_ENABLED=false)")
+
+    if target == 'api':
+        response = handle_profile_message(api_profiler, message,
+                                          lambda: (Path(settings.LOGS_DIR) / "profiles", "api"))
+    else:
+        if not settings.WORKER_IPC_SOCKET_PATH:
+            raise HTTPException(status_code=503, detail="Worker IPC is disabled (WORKER_IPC_SOCKET_PATH)")
+        try:
+            response = await request_worker({"op": "profile", **message}, timeout=10)
+        except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+            raise HTTPException(status_code=503, detail=f"Worker not reachable: {e}")
+
+    if not response.get("ok"):
+        raise HTTPException(status_code=400, detail=response.get("error", "Profiling request failed"))
+    response.pop("ok")
+    return {"target": target, **response}
+
+
+@app.post("/admin/profile")
+async def start_profile(request: ProfileRequest):
+    """
+    Start a time-boxed profiling session on the worker or the API (admin endpoint).
+
+    Artifacts are written under the running batch's log directory
+    (``<log dir>/profiles/``), or ``LOGS_DIR/profiles`` when the worker is
+    idle. Poll ``GET /admin/profile`` for their paths. See profiling.py for
+    the modes.
+
+    Raises:
+        HTTPException 400: Invalid mode or a session is already running
+        HTTPException 503: Worker not reachable
+    """
+    return await _profile_control(request.target, {
+        "action": "start",
+        "mode": request.mode,
+        "duration_seconds": request.duration_seconds,
+        "interval_seconds": request.interval_ms / 1000,
+    })
+
+
+@app.post("/admin/profile/stop")
+async def stop_profile(target: str = Query("worker", pattern="^(worker|api)$")):
+    """End the running profiling session early and write its artifacts."""
+    return await _profile_control(target, {"action": "stop"})
+
+
+@app.get("/admin/profile")
+async def get_profile_status(target: str = Query("worker", pattern="^(worker|api)$")):
+    """Running and recent profiling sessions (with artifact paths)."""
+    return await _profile_control(target, {"action": "status"})
+
+
 @app.post("/admin/config")
 async def update_config(config_updates: dict):
     """
@@ -1066,18 +1186,7 @@ async def prometheus_metrics(db: Session = Depends(get_db)):
     ).all()
     metrics.update_queue_metrics(len(pending_jobs))
 
-    # Update GPU metrics (if available)
-    gpu_status = check_gpu_health()
-    if 'memory_percent' in gpu_status and gpu_status['memory_percent'] > 0:
-        # Convert percentage to bytes (approximate)
-        # This is a simplified calculation - actual implementation would need GPU info
-        metrics.update_gpu_metrics(
-            gpu_id="0",
-            memory_used=int(gpu_status.get('memory_percent', 0) * 1024 * 1024 * 1024 / 100),  # Rough estimate
-            memory_total=1024 * 1024 * 1024,  # Placeholder
-            temperature=gpu_status.get('temperature_c', 0),
-            utilization=gpu_status.get('memory_percent', 0)
-        )
+    # GPU gauges are kept current by the telemetry sampler (see gpu_telemetry.py)
 
     # Generate Prometheus metrics in text format
     prometheus_metrics = generate_latest()
@@ -1202,24 +1311,10 @@ async def create_batch(
         lines = content.strip().split('\n')
 
         # Count requests and extract model from first request
-        num_requests = 0
-        model = None
-
-        for i, line in enumerate(lines):
-            if line.strip():
-                try:
-                    req = json.loads(line)
-                    num_requests += 1
-
-                    # Extract model from first request
-                    if model is None and 'body' in req and 'model' in req['body']:
-                        model = req['body']['model']
-
-                except json.JSONDecodeError as e:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Invalid JSON on line {i+1}: {e}"
-                    ) from e
+        try:
+            num_requests, model, estimated_prompt_tokens = scan_batch_input(lines)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
 
         if num_requests == 0:
             raise HTTPException(status_code=400, detail="No valid requests found in file")
@@ -1303,6 +1398,7 @@ async def create_batch(
         log_file=str(log_file_path),
         throughput_tokens_per_sec=None,
         total_tokens=None,
+        estimated_prompt_tokens=estimated_prompt_tokens,  # For queue ETAs
         priority=batch_request.priority,  # Priority queue support
         webhook_url=batch_request.webhook.url if batch_request.webhook else None,
         webhook_status=None,
@@ -1317,8 +1413,11 @@ async def create_batch(
 
     db.add(batch_job)
     db.commit()
+    safe_refresh_queue_snapshot(db)
     db.refresh(batch_job)
 
+    get_event_bus().publish(make_event("queue.changed", reason="created", batch_id=batch_id, model=model))
+
     # Track batch job creation metrics
     metrics.track_batch_job(status='validating', model=model)
     metrics.batch_jobs_active.labels(status='validating').inc()
@@ -1352,42 +1451,18 @@ async def get_batch(batch_id: str, db: Session = Depends(get_db)):
     # Get base response
     response = batch_job.to_dict()
 
-    # Add queue visibility for queued jobs
-    if batch_job.status == 'validating':
-        # Calculate queue position (1-based)
-        queue_position = db.query(BatchJob).filter(
-            BatchJob.status == 'validating',
-            BatchJob.created_at < batch_job.created_at
-        ).count() + 1
-
-        response['queue_position'] = queue_position
-
-        # Estimate start time based on current job progress
-        current_job = db.query(BatchJob).filter(
-            BatchJob.status == 'in_progress'
-        ).first()
-
-        if current_job and current_job.estimated_completion_time:
-            # Current job has ETA, use it as base
-            estimated_start = current_job.estimated_completion_time
-        else:
-            # No current job or no ETA, assume immediate start
-            estimated_start = datetime.now(timezone.utc)
+    # Add queue visibility for queued jobs (from the materialized queue snapshot)
+    if batch_job.status in QUEUED_STATUSES:
+        if batch_job.queue_position is None:
+            # Job predates the snapshot - build it once
+            safe_refresh_queue_snapshot(db)
+            db.refresh(batch_job)
 
-        # Add estimated time for jobs ahead in queue
-        # Rough estimate: 2 minutes per job (conservative)
-        jobs_ahead = queue_position - 1
-        if jobs_ahead > 0:
-            estimated_start += timedelta(minutes=2 * jobs_ahead)
-
-        response['estimated_start_time'] = estimated_start.isoformat()
-
-        # Estimate completion time (start + job duration)
-        # Use total_requests to estimate duration (rough: 100 req/min)
-        if batch_job.total_requests:
-            estimated_duration_minutes = max(1, batch_job.total_requests / 100)
-            estimated_completion = estimated_start + timedelta(minutes=estimated_duration_minutes)
-            response['estimated_completion_time'] = estimated_completion.isoformat()
+        entry = snapshot_entry(batch_job)
+        response['queue_position'] = entry['position']
+        response['estimated_start_time'] = entry['estimated_start_time']
+        response['estimated_completion_time'] = entry['estimated_completion_time']
+        response['estimated_duration_seconds'] = entry['estimated_duration_seconds']
 
     elif batch_job.status == 'in_progress':
         # Job is currently processing
@@ -1396,9 +1471,58 @@ async def get_batch(batch_id: str, db: Session = Depends(get_db)):
         if batch_job.estimated_completion_time:
             response['estimated_completion_time'] = batch_job.estimated_completion_time.isoformat()
 
+    # Phase breakdown of finished jobs (see phase_timing.py)
+    if batch_job.phase_timings:
+        response['phase_timings'] = json.loads(batch_job.phase_timings)
+
+    # Exact tokens, GPU seconds and energy (see usage_accounting.py)
+    usage = get_job_usage(batch_job, include_chunks=False)
+    if usage:
+        response['usage'] = usage
+
     return response
 
 
+async def _run_realtime_inference(model_id: str, prompt: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Generate on the worker if it has the model loaded, else on the API's engine.
+
+    Forwarding avoids a second copy of the same weights on the GPU.
+    """
+    from core.batch_app.inference import get_inference_batcher
+    from core.batch_app.worker_ipc import forward_generate
+
+    result = await forward_generate(model_id, prompt, params)
+    if result is not None:
+        return result
+    return await get_inference_batcher().submit(model_id, prompt, params)
+
+
+async def _stream_realtime_inference(model_id: str, prompt: str,
+                                     params: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """Stream from the worker if it has the model loaded, else from the API's async engine."""
+    from core.batch_app.inference import get_inference_engine
+    from core.batch_app.worker_ipc import forward_stream
+
+    outputs = await forward_stream(model_id, prompt, params)
+    if outputs is not None:
+        return outputs
+    return get_inference_engine().stream_generate(model_id, prompt, params)
+
+
+def _default_inference_model(db: Session) -> str:
+    """Most recently installed ready model, for requests that don't name one."""
+    model = db.query(ModelRegistry).filter(
+        ModelRegistry.status == 'ready'
+    ).order_by(ModelRegistry.created_at.desc()).first()
+
+    if not model:
+        raise HTTPException(status_code=400, detail="No models available. Please install a model first.")
+
+    logger.info(f"No model specified, using default: {model.model_id}")
+    return model.model_id
+
+
 @app.post("/v1/inference")
 async def single_inference(
     request: Request,
@@ -1407,7 +1531,12 @@ async def single_inference(
     """
     Single inference endpoint for real-time predictions.
 
-    Used by Label Studio ML Backend for interactive labeling.
+    Used by Label Studio ML Backend for interactive labeling. If the batch
+    worker has the model loaded, the request is forwarded to it and injected
+    into its running batch at high priority (one copy of the weights on the
+    GPU). Otherwise concurrent requests are micro-batched
+    (INFERENCE_BATCH_WINDOW_MS / INFERENCE_MAX_BATCH_SIZE) on the API's own
+    engine, off the event loop.
 
     Request body:
         {
@@ -1429,27 +1558,18 @@ async def single_inference(
                 "completion_tokens": 50,
                 "total_tokens": 150
             },
-            "latency_ms": 1234
+            "latency_ms": 1234,     # Queue wait + batch generation
+            "queue_ms": 3,          # Time waiting for the micro-batch
+            "batch_size": 4         # Requests generated together
         }
     """
-    from core.batch_app.inference import get_inference_engine
+    from core.batch_app.inference import render_chat_prompt
 
     try:
         body = await request.json()
 
         # Get model ID (default to first available model)
-        model_id = body.get('model_id')
-        if not model_id:
-            # Get default model from registry
-            models = db.query(ModelRegistry).filter(
-                ModelRegistry.status == 'ready'
-            ).order_by(ModelRegistry.created_at.desc()).all()
-
-            if not models:
-                raise HTTPException(status_code=400, detail="No models available. Please install a model first.")
-
-            model_id = models[0].model_id
-            logger.info(f"No model_id specified, using default: {model_id}")
+        model_id = body.get('model_id') or _default_inference_model(db)
 
         # Get prompt or messages
         prompt = body.get('prompt')
@@ -1464,40 +1584,97 @@ async def single_inference(
         top_p = body.get('top_p', 0.9)
         stop = body.get('stop')
 
-        # Get inference engine
-        engine = get_inference_engine()
-
-        # Generate response
         if messages:
-            result = engine.generate_chat(
-                messages=messages,
-                model_id=model_id,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                stop=stop
-            )
-        else:
-            result = engine.generate(
-                prompt=prompt,
-                model_id=model_id,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                stop=stop
-            )
+            prompt = render_chat_prompt(messages)
+
+        start_time = time.time()
+        result = await _run_realtime_inference(model_id, prompt, {
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": top_p,
+            "stop": stop
+        })
+        if 'error' in result:
+            raise HTTPException(status_code=503, detail=result['error'])
+        result['latency_ms'] = int((time.time() - start_time) * 1000)
 
-        logger.info(f"Single inference complete: model={model_id}, latency={result['latency_ms']}ms")
+        logger.info(
+            f"Single inference complete: model={model_id}, latency={result['latency_ms']}ms, "
+            f"served_by={result.get('served_by', 'api')}, batch_size={result.get('batch_size')}"
+        )
 
         return result
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in single inference: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/v1/chat/completions")
+async def chat_completions(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    OpenAI-compatible chat completions on the real-time path.
+
+    Accepts the OpenAI request body (model, messages, max_tokens /
+    max_completion_tokens, temperature, top_p, stop, stream, stream_options).
+    ``model`` defaults to the most recently installed ready model.
+
+    - ``stream: false``: served by the worker if it has the model loaded,
+      otherwise micro-batched with other real-time requests; returns a
+      ``chat.completion`` object.
+    - ``stream: true``: server-sent ``chat.completion.chunk`` deltas from the
+      worker if it has the model loaded, otherwise from the API's async
+      engine, terminated by ``data: [DONE]``. Time-to-first-token and
+      inter-token latency are exported as metrics.
+    """
+    from core.batch_app.chat_completions import (
+        ChatRequestError,
+        build_chat_completion,
+        parse_chat_request,
+        stream_chat_completion,
+    )
+    from core.batch_app.inference import render_chat_prompt
+
+    try:
+        chat_request = parse_chat_request(await request.json())
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    except ChatRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    model_id = chat_request.model or _default_inference_model(db)
+    prompt = render_chat_prompt(chat_request.messages)
+
+    if chat_request.stream:
+        try:
+            outputs = await _stream_realtime_inference(model_id, prompt, chat_request.params)
+        except Exception as e:
+            logger.error(f"Error in chat completion: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        return StreamingResponse(
+            stream_chat_completion(chat_request, model_id, outputs),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+
+    try:
+        result = await _run_realtime_inference(model_id, prompt, chat_request.params)
+    except Exception as e:
+        logger.error(f"Error in chat completion: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if 'error' in result:
+        raise HTTPException(status_code=503, detail=result['error'])
+
+    return build_chat_completion(chat_request, model_id, result)
+
+
 @app.get("/v1/batches")
 async def list_batches(
     limit: int = 20,
@@ -1561,18 +1738,16 @@ async def cancel_batch(batch_id: str, db: Session = Depends(get_db)):
     batch_job.status = 'cancelling'
     batch_job.cancelling_at = int(time.time())
     db.commit()
+    safe_refresh_queue_snapshot(db)
     db.refresh(batch_job)
 
-    return batch_job.to_dict()
+    get_event_bus().publish(make_event("queue.changed", reason="cancelled", batch_id=batch_id, model=batch_job.model))
 
+    return batch_job.to_dict()
 
-@app.get("/v1/batches/{batch_id}/results")
-async def get_results(batch_id: str, db: Session = Depends(get_db)):
-    """
-    Download batch job results (DEPRECATED - use /v1/files/{output_file_id}/content instead).
 
-    This endpoint is kept for backward compatibility.
-    """
+def _get_completed_results_path(batch_id: str, db: Session) -> Path:
+    """Resolve the results file of a completed batch (404/400 otherwise)."""
     batch_job = db.query(BatchJob).filter(BatchJob.batch_id == batch_id).first()
 
     if not batch_job:
@@ -1596,16 +1771,185 @@ async def get_results(batch_id: str, db: Session = Depends(get_db)):
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Output file content not found")
 
-    return FileResponse(
-        path=str(file_path),
+    return file_path
+
+
+@app.get("/v1/batches/{batch_id}/results")
+async def get_results(
+    batch_id: str,
+    request: Request,
+    offset: Optional[int] = Query(None, ge=0, description="First result record to return (0-based)"),
+    limit: Optional[int] = Query(None, ge=1, le=100000, description="Max result records to return"),
+    db: Session = Depends(get_db)
+):
+    """
+    Download batch job results (DEPRECATED - use /v1/files/{output_file_id}/content instead).
+
+    This endpoint is kept for backward compatibility. It additionally supports:
+    - ``?offset=&limit=`` paging by record (served from the custom_id index)
+    - ``Range`` requests and gzip/zstd compression for full downloads
+    """
+    file_path = _get_completed_results_path(batch_id, db)
+
+    if offset is None and limit is None:
+        return build_file_response(
+            request,
+            file_path,
+            media_type='application/x-ndjson',
+            filename=f"{batch_id}_results.jsonl"
+        )
+
+    index = await asyncio.to_thread(get_result_index, file_path)
+    page_offset = offset or 0
+    page_limit = limit or len(index)
+    next_offset = page_offset + page_limit
+
+    headers = {"X-Total-Records": str(len(index))}
+    if next_offset < len(index):
+        headers["X-Next-Offset"] = str(next_offset)
+
+    return build_file_response(
+        request,
+        file_path,
         media_type='application/x-ndjson',
-        filename=f"{batch_id}_results.jsonl"
+        byte_span=index.page_span(page_offset, page_limit),
+        extra_headers=headers
     )
 
 
+TERMINAL_BATCH_STATUSES = ('completed', 'failed', 'cancelled', 'expired')
+
+
+@app.get("/v1/batches/{batch_id}/results/stream")
+async def stream_results(
+    batch_id: str,
+    request: Request,
+    cursor: int = Query(0, ge=0, description="Byte cursor to resume from (id of the last event received)"),
+    format: str = Query("sse", pattern="^(sse|ndjson)$", description="sse (text/event-stream) or ndjson"),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream results of a batch as they are checkpointed by the worker.
+
+    Works for in-progress and completed batches. Each result is sent once, as
+    soon as its chunk is saved; the stream ends after the batch reaches a
+    terminal status and all results have been sent.
+
+    - ``format=sse``: one ``event: result`` per record with ``id: <cursor>``;
+      reconnecting clients resume via ``Last-Event-ID`` (or ``?cursor=``).
+      A final ``event: done`` carries the batch status.
+    - ``format=ndjson``: raw records, one per line (resume with ``?cursor=``
+      set to the byte count received so far).
+
+    If the results file is replaced under the cursor (e.g. the batch was
+    re-run), the stream ends with ``event: reset`` (``id: 0``, so
+    ``EventSource`` reconnects from the start) or, for ndjson, a final
+    ``{"error": {"type": "reset", ...}}`` line; clients should discard what
+    they received and reconnect from cursor 0.
+
+    The file is followed by position polling: each follower stats the file
+    and reads only newly appended bytes, so many concurrent followers are cheap.
+    """
+    batch_job = db.query(BatchJob).filter(BatchJob.batch_id == batch_id).first()
+    if not batch_job:
+        raise HTTPException(status_code=404, detail=f"Batch not found: {batch_id}")
+
+    results_path = results_path_for_batch(batch_id)
+    if batch_job.output_file_id:
+        output_file = db.query(File).filter(File.file_id == batch_job.output_file_id).first()
+        if output_file:
+            results_path = Path(output_file.file_path)
+
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and format == "sse":
+        try:
+            cursor = max(int(last_event_id), 0)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid Last-Event-ID: {last_event_id}")
+
+    if cursor and not await asyncio.to_thread(is_line_boundary, results_path, cursor):
+        raise HTTPException(status_code=400, detail=f"Cursor {cursor} is not at a record boundary")
+
+    async def batch_status() -> str:
+        def query_status() -> str:
+            status_db = SessionLocal()
+            try:
+                job = status_db.query(BatchJob.status).filter(BatchJob.batch_id == batch_id).first()
+                return job[0] if job else 'expired'
+            finally:
+                status_db.close()
+        return await asyncio.to_thread(query_status)
+
+    async def is_finished() -> bool:
+        return await batch_status() in TERMINAL_BATCH_STATUSES
+
+    async def event_stream():
+        records = 0
+        try:
+            async for end_offset, line in follow_lines(
+                results_path,
+                offset=cursor,
+                is_finished=is_finished,
+                keepalive_interval=15.0 if format == "sse" else None
+            ):
+                if not line:
+                    yield SSE_KEEPALIVE
+                    continue
+                records += 1
+                if format == "sse":
+                    yield sse_event(line.decode('utf-8'), event="result", event_id=end_offset)
+                else:
+                    yield line + b"\n"
+        except FileResetError as e:
+            logger.warning(f"Results stream for {batch_id} reset: {e}")
+            reset = {"type": "reset", "message": str(e), "cursor": 0, "records": records}
+            if format == "sse":
+                yield sse_event(reset, event="reset", event_id=0)
+            else:
+                yield json.dumps({"error": reset}).encode() + b"\n"
+            return
+
+        if format == "sse":
+            yield sse_event({"status": await batch_status(), "records": records}, event="done")
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(event_stream(), media_type=media_type, headers=SSE_HEADERS)
+
+
+@app.get("/v1/batches/{batch_id}/results/{custom_id}")
+async def get_result_by_custom_id(batch_id: str, custom_id: str, db: Session = Depends(get_db)):
+    """
+    Get a single result record by its ``custom_id``.
+
+    Uses the byte-offset index written alongside the results file, so the
+    lookup is a single seek regardless of file size.
+    """
+    file_path = _get_completed_results_path(batch_id, db)
+
+    index = await asyncio.to_thread(get_result_index, file_path)
+    record = await asyncio.to_thread(index.read_record, custom_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"No result with custom_id '{custom_id}' in batch {batch_id}")
+
+    return Response(content=record, media_type="application/json")
+
+
 @app.get("/v1/batches/{batch_id}/logs")
-async def get_logs(batch_id: str, db: Session = Depends(get_db)):
-    """Get batch job logs."""
+async def get_logs(
+    batch_id: str,
+    tail: int = Query(1000, ge=1, le=100000, description="Lines to return from the end (or before `before`)"),
+    before: Optional[int] = Query(None, ge=0, description="Page backwards: lines ending at this byte cursor"),
+    cursor: Optional[int] = Query(None, ge=0, description="Page forwards: lines starting at this byte cursor"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get batch job logs.
+
+    Returns the last ``tail`` lines by default (reverse seek, not a full read).
+    Use ``start_cursor`` as ``before`` to page back and ``end_cursor`` as
+    ``cursor`` to read newer lines. Rotated generations are kept gzipped next
+    to the log (``.1.gz``, ``.2.gz``, ...).
+    """
     batch_job = db.query(BatchJob).filter(BatchJob.batch_id == batch_id).first()
 
     if not batch_job:
@@ -1614,10 +1958,137 @@ async def get_logs(batch_id: str, db: Session = Depends(get_db)):
     if not batch_job.log_file or not os.path.exists(batch_job.log_file):
         return {"logs": "No logs available yet"}
 
-    with open(batch_job.log_file) as f:
-        logs = f.read()
+    if cursor is not None:
+        lines, end_cursor = await asyncio.to_thread(read_forward, batch_job.log_file, cursor, tail)
+        start_cursor = cursor
+    else:
+        lines, start_cursor, end_cursor = await asyncio.to_thread(tail_lines, batch_job.log_file, tail, before)
+
+    return {
+        "logs": "\n".join(lines),
+        "start_cursor": start_cursor,
+        "end_cursor": end_cursor,
+        "has_more_before": start_cursor > 0
+    }
+
+
+@app.get("/v1/batches/{batch_id}/logs/stream")
+async def stream_logs(
+    batch_id: str,
+    request: Request,
+    cursor: Optional[int] = Query(None, ge=0, description="Byte cursor to follow from (default: end of file)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Follow a batch job's log over SSE until the job finishes.
+
+    Each line is an ``event: log`` with ``id`` = resume cursor (reconnects use
+    ``Last-Event-ID``); ``event: end`` is sent when the job reaches a terminal
+    status.
+    """
+    batch_job = db.query(BatchJob).filter(BatchJob.batch_id == batch_id).first()
+
+    if not batch_job:
+        raise HTTPException(status_code=404, detail=f"Batch job '{batch_id}' not found")
+
+    if not batch_job.log_file:
+        raise HTTPException(status_code=404, detail="No log file for this batch")
+
+    async def is_finished() -> bool:
+        def query_status() -> Optional[str]:
+            status_db = SessionLocal()
+            try:
+                job = status_db.query(BatchJob.status).filter(BatchJob.batch_id == batch_id).first()
+                return job[0] if job else None
+            finally:
+                status_db.close()
+        return await asyncio.to_thread(query_status) in (None, *TERMINAL_BATCH_STATUSES)
 
-    return {"logs": logs}
+    return _log_follow_response(request, Path(batch_job.log_file), cursor, is_finished)
+
+
+@app.get("/v1/batches/{batch_id}/request_metrics")
+async def get_request_metrics(
+    batch_id: str,
+    include_rows: bool = Query(False, description="Also return the per-request rows"),
+    offset: int = Query(0, ge=0, description="First row to return"),
+    limit: int = Query(1000, ge=1, le=100000, description="Max rows to return"),
+    db: Session = Depends(get_db)
+):
+    """
+    Per-request latency and token metrics of a batch (custom extension).
+
+    Summarizes TTFT, queue wait, prefill, decode per token and end-to-end
+    latency percentiles, finish reasons and the share of request time spent
+    queued / in prefill / in decode (see request_metrics.py). Available while
+    the job runs, for the chunks saved so far.
+    """
+    batch_job = db.query(BatchJob).filter(BatchJob.batch_id == batch_id).first()
+    if not batch_job:
+        raise HTTPException(status_code=404, detail=f"Batch not found: {batch_id}")
+
+    results_path = results_path_for_batch(batch_id)
+    if not metrics_path_for(results_path).exists():
+        raise HTTPException(status_code=404, detail=f"No request metrics recorded for batch: {batch_id}")
+
+    def load() -> Dict[str, Any]:
+        response: Dict[str, Any] = {'batch_id': batch_id, 'model': batch_job.model,
+                                    'summary': summarize_request_rows(read_request_rows(results_path))}
+        if include_rows:
+            response['rows'] = list(itertools.islice(read_request_rows(results_path), offset, offset + limit))
+        return response
+
+    return await asyncio.to_thread(load)
+
+
+@app.get("/v1/batches/{batch_id}/gpu_timeline")
+async def get_gpu_timeline(
+    batch_id: str,
+    max_points: int = Query(500, ge=1, le=100000, description="Max samples per GPU (evenly thinned)"),
+    db: Session = Depends(get_db)
+):
+    """
+    GPU utilization, memory, power, clocks and temperature over a batch (custom extension).
+
+    The worker appends its telemetry samples after every chunk (see
+    gpu_telemetry.py), so the timeline grows while the job runs.
+    """
+    batch_job = db.query(BatchJob).filter(BatchJob.batch_id == batch_id).first()
+    if not batch_job:
+        raise HTTPException(status_code=404, detail=f"Batch not found: {batch_id}")
+
+    results_path = results_path_for_batch(batch_id)
+    if not timeline_path_for(results_path).exists():
+        raise HTTPException(status_code=404, detail=f"No GPU timeline recorded for batch: {batch_id}")
+
+    def load() -> Dict[str, Any]:
+        samples = list(read_timeline(results_path))
+        return {
+            'batch_id': batch_id,
+            'model': batch_job.model,
+            'summary': summarize_samples(samples),
+            'samples': [s.to_dict() for s in downsample(samples, max_points)],
+        }
+
+    return await asyncio.to_thread(load)
+
+
+@app.get("/v1/batches/{batch_id}/usage")
+async def get_batch_usage(batch_id: str, db: Session = Depends(get_db)):
+    """
+    Tokens, GPU seconds, energy and local cost of a batch, per chunk (custom extension).
+
+    The worker records each chunk as it's saved, so this grows while the job runs.
+    """
+    batch_job = db.query(BatchJob).filter(BatchJob.batch_id == batch_id).first()
+    if not batch_job:
+        raise HTTPException(status_code=404, detail=f"Batch not found: {batch_id}")
+
+    usage = get_job_usage(batch_job)
+    if usage is None:
+        raise HTTPException(status_code=404, detail=f"No usage recorded for batch: {batch_id}")
+
+    return {'batch_id': batch_id, 'model': batch_job.model, **usage}
 
 
 @app.get("/v1/batches/{batch_id}/failed")
@@ -1703,6 +2174,106 @@ async def create_model_admin(request: AddModelRequest, db: Session = Depends(get
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.put("/admin/models/{model_id:path}/engine-profile")
+async def set_model_engine_profile_admin(
+    model_id: str,
+    profile: Dict[str, Any] = Body(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Set a model's vLLM engine tuning profile (admin endpoint).
+
+    Accepts tensor_parallel_size, max_num_seqs, max_num_batched_tokens,
+    kv_cache_dtype, swap_space, enforce_eager and speculative_config. Each
+    change bumps the profile version; the worker reloads the model on its next
+    job and records the version on the job.
+
+    Raises:
+        HTTPException 404: Model not found
+        HTTPException 400: Invalid profile
+    """
+    try:
+        model = set_engine_profile(db, model_id, profile)
+    except EngineProfileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return model.to_dict()
+
+
+class AutotuneRequest(BaseModel):
+    """Request model for an engine config autotune job."""
+    input_file_id: str = Field(..., description="Dataset (batch input file) to sample requests from")
+    sample_size: int = Field(default=settings.AUTOTUNE_SAMPLE_SIZE, ge=1, le=50000)
+    max_trials: int = Field(default=settings.AUTOTUNE_MAX_TRIALS, ge=1, le=200)
+    patience: int = Field(default=settings.AUTOTUNE_PATIENCE, ge=1)
+    search_space: Optional[Dict[str, List[Any]]] = Field(
+        default=None,
+        description="Values to try per parameter (max_num_seqs, max_num_batched_tokens, "
+                    "gpu_memory_utilization, max_model_len, chunk_size); unset ones use defaults"
+    )
+
+
+@app.post("/admin/models/{model_id:path}/autotune")
+async def autotune_model_admin(
+    model_id: str,
+    request: AutotuneRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Queue an autotune job for a model (admin endpoint).
+
+    The worker samples requests from the input file, benchmarks engine
+    configs on them and writes the fastest to the model's engine profile and
+    registry entry. Runs at low priority; the job's output file lists every
+    trial.
+
+    Raises:
+        HTTPException 404: Model or input file not found
+        HTTPException 400: Adapter model or invalid search space
+    """
+    model = db.query(ModelRegistry).filter(ModelRegistry.model_id == model_id).first()
+    if not model:
+        raise HTTPException(status_code=404, detail=f"Model {model_id} not found")
+    if model.base_model_id:
+        raise HTTPException(status_code=400, detail=f"{model_id} is a LoRA adapter; autotune its base model {model.base_model_id}")
+    input_file = db.query(File).filter(File.file_id == request.input_file_id, ~File.deleted).first()
+    if not input_file:
+        raise HTTPException(status_code=404, detail=f"File not found: {request.input_file_id}")
+
+    try:
+        validate_search_space(request.search_space)
+    except AutotuneError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    batch_id = f"batch_{uuid.uuid4().hex[:16]}"
+    created_at = int(time.time())
+    job = BatchJob(
+        batch_id=batch_id,
+        input_file_id=request.input_file_id,
+        status='validating',
+        created_at=created_at,
+        expires_at=created_at + (settings.BATCH_EXPIRY_HOURS * 3600),
+        total_requests=request.sample_size,
+        model=model_id,
+        log_file=str(LOGS_DIR / f"{batch_id}.log"),
+        priority=-1,  # Benchmarking work yields to real jobs
+        job_type='autotune',
+        job_config=json.dumps(request.model_dump())
+    )
+    db.add(job)
+    db.commit()
+    safe_refresh_queue_snapshot(db)
+    db.refresh(job)
+
+    get_event_bus().publish(make_event("queue.changed", reason="created", batch_id=batch_id, model=model_id))
+    metrics.track_batch_job(status='validating', model=model_id)
+    metrics.batch_jobs_active.labels(status='validating').inc()
+    logger.info("Autotune job created", extra={"batch_id": batch_id, "model": model_id})
+
+    return {**job.to_dict(), "job_type": job.job_type}
+
+
 @app.post("/admin/models/{model_id:path}/test")
 async def test_model_admin(
     model_id: str,
@@ -2041,14 +2612,15 @@ async def run_benchmark(request: RunBenchmarkRequest, db: Session = Depends(get_
     db.add(benchmark)
     db.commit()
 
-    # Start background process
+    # Queue the worker job (runs through the same engine and result writer as batches)
     from core.batch_app.model_manager import start_benchmark
-    start_benchmark(benchmark_id, request.model_id, request.dataset_id, db)
+    job = start_benchmark(benchmark_id, request.model_id, request.dataset_id, db)
 
     logger.info(f"Started benchmark {benchmark_id}: {model.name} on {dataset.name}")
 
     return {
         "benchmark_id": benchmark_id,
+        "batch_id": job.batch_id if job else None,
         "status": "running",
         "started_at": benchmark.started_at.isoformat()
     }
@@ -2114,11 +2686,11 @@ async def cancel_benchmark(benchmark_id: str, db: Session = Depends(get_db)):
             detail=f"Cannot cancel benchmark with status '{benchmark.status}'"
         )
 
-    # Cancel the background process
+    # Cancel the worker job
     try:
-        cancel_benchmark_process(benchmark_id)
+        cancel_benchmark_process(benchmark_id, db)
     except Exception as e:
-        logger.error(f"Error cancelling benchmark process: {e}")
+        logger.error(f"Error cancelling benchmark job: {e}")
 
     # Update status
     benchmark.status = 'cancelled'
@@ -2158,6 +2730,15 @@ async def get_workbench_results(dataset_id: str, db: Session = Depends(get_db)):
     # Find all benchmarks for this dataset
     benchmarks = db.query(Benchmark).filter(Benchmark.dataset_id == dataset_id).all()
 
+    # Worker result records don't repeat the request; candidate info comes from the dataset
+    dataset_requests = {}
+    if Path(dataset.file_path).exists():
+        with open(dataset.file_path, "r") as f:
+            for line in f:
+                if line.strip():
+                    request = json.loads(line)
+                    dataset_requests[request.get("custom_id", "")] = request
+
     # Load results from each benchmark
     results_by_candidate = {}
 
@@ -2190,7 +2771,7 @@ async def get_workbench_results(dataset_id: str, db: Session = Depends(get_db)):
                     }
 
                 # Extract candidate info from request
-                request_body = result.get("request", {}).get("body", {})
+                request_body = (result.get("request") or dataset_requests.get(candidate_id, {})).get("body", {})
                 messages = request_body.get("messages", [])
                 if messages:
                     # Try to extract name/title from user message
@@ -2608,6 +3189,33 @@ async def get_usage_summary(
     return summary
 
 
+@app.get("/admin/workbench/efficiency")
+async def get_efficiency(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    model_id: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get measured efficiency per model and engine config.
+
+    Args:
+        start_date: Start date (ISO format, optional)
+        end_date: End date (ISO format, optional)
+        model_id: Filter by model (optional)
+
+    Returns:
+        Tokens per joule, tokens per GPU-second and local vs hosted $/1M tokens
+    """
+    from core.batch_app.cost_tracking import get_efficiency_summary
+    from datetime import datetime
+
+    start_dt = datetime.fromisoformat(start_date) if start_date else None
+    end_dt = datetime.fromisoformat(end_date) if end_date else None
+
+    return get_efficiency_summary(db, start_dt, end_dt, model_id)
+
+
 class BudgetAlertRequest(BaseModel):
     """Request to check budget alert."""
     budget_limit: float = Field(..., description="Budget limit in dollars")
@@ -3153,6 +3761,8 @@ async def get_worker_status(db: Session = Depends(get_db)):
             "uptime_seconds": None,
             "restart_count": 0,
             "loaded_model": None,
+            "warm_models": [],
+            "resident_models": [],
             "gpu_memory_percent": 0,
             "gpu_utilization": 0,
             "gpu_temperature": 0
@@ -3181,6 +3791,8 @@ async def get_worker_status(db: Session = Depends(get_db)):
         "uptime_seconds": uptime_seconds,
         "restart_count": 0,  # TODO: Track this in watchdog
         "loaded_model": worker_heartbeat.loaded_model,
+        "warm_models": list(parse_warm_models(worker_heartbeat.warm_models)),
+        "resident_models": list(parse_resident_models(worker_heartbeat.resident_models)),
         "gpu_memory_percent": worker_heartbeat.gpu_memory_percent or 0,
         "gpu_utilization": worker_heartbeat.gpu_utilization or 0,
         "gpu_temperature": worker_heartbeat.gpu_temperature or 0
@@ -3453,26 +4065,19 @@ async def system_status():
         status["processes"]["worker"] = {"running": False, "error": str(e)}
 
     # Check GPU status
-    try:
-        import pynvml
-        pynvml.nvmlInit()
-        handle = pynvml.nvmlDeviceGetHandleByIndex(0)
-
-        mem_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
-        temp = pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMPERATURE_GPU)
-        util = pynvml.nvmlDeviceGetUtilizationRates(handle)
-
+    sample = get_gpu_telemetry().latest()
+    if sample is not None:
         status["gpu"] = {
-            "memory_used_mb": mem_info.used // (1024 * 1024),
-            "memory_total_mb": mem_info.total // (1024 * 1024),
-            "memory_percent": (mem_info.used / mem_info.total) * 100,
-            "temperature_c": temp,
-            "utilization_percent": util.gpu
+            "memory_used_mb": sample.memory_used_bytes // (1024 * 1024),
+            "memory_total_mb": sample.memory_total_bytes // (1024 * 1024),
+            "memory_percent": sample.memory_percent,
+            "temperature_c": sample.temperature_c,
+            "utilization_percent": sample.utilization_percent,
+            "power_watts": sample.power_watts,
+            "sm_clock_mhz": sample.sm_clock_mhz
         }
-
-        pynvml.nvmlShutdown()
-    except Exception as e:
-        status["gpu"] = {"error": str(e)}
+    else:
+        status["gpu"] = {"error": "GPU telemetry unavailable"}
 
     return status
 
@@ -3854,15 +4459,85 @@ async def export_golden_dataset(
 # WebSocket Endpoints
 # ============================================================================
 
+async def publish_benchmark_progress():
+    """
+    Shared poller: publish a snapshot of running benchmarks to the event bus.
+
+    The worker publishes ``benchmark.progress`` per chunk; the snapshot lists
+    every running benchmark for the workbench - once per interval for all
+    subscribers, and only while someone is subscribed (see EventBus.add_poller).
+    """
+    def collect_jobs() -> List[Dict[str, Any]]:
+        from core.batch_app.database import Benchmark
+        from core.batch_app.model_manager import get_benchmark_status
+
+        db = SessionLocal()
+        try:
+            jobs = []
+            for benchmark in db.query(Benchmark).filter(Benchmark.status == "running").all():
+                status = get_benchmark_status(benchmark.id, db)
+                jobs.append({
+                    "benchmark_id": benchmark.id,
+                    "model_id": benchmark.model_id,
+                    "dataset_id": benchmark.dataset_id,
+                    "status": status.get("status", "running"),
+                    "progress": status.get("progress", 0),
+                    "completed": status.get("completed", 0),
+                    "total": status.get("total", 0),
+                    "throughput": status.get("throughput", 0.0),
+                    "eta_seconds": status.get("eta_seconds", 0)
+                })
+            return jobs
+        finally:
+            db.close()
+
+    jobs = await asyncio.to_thread(collect_jobs)
+    get_event_bus().publish(make_event("benchmark.snapshot", jobs=jobs))
+
+
+@app.get("/v1/events")
+async def stream_events(
+    request: Request,
+    types: Optional[str] = Query(None, description="Comma-separated event types or prefixes (e.g. batch,queue)")
+):
+    """
+    Server-sent event stream of job, queue, worker and benchmark updates.
+
+    All clients share one event bus fed by the worker, so open dashboards do
+    not poll the database. On connect, the latest known state of each active
+    batch/benchmark/worker is replayed.
+
+    Event types:
+    - ``batch.status`` / ``batch.progress`` - job transitions and per-chunk progress
+    - ``queue.changed`` - a job was submitted or cancelled
+    - ``worker.heartbeat`` - worker status and GPU stats
+    - ``benchmark.progress`` - per-chunk progress of a benchmark job
+    - ``benchmark.snapshot`` - progress of running benchmarks
+    """
+    type_filter = {t.strip() for t in types.split(",") if t.strip()} if types else None
+    subscription = get_event_bus().subscribe(type_filter)
+
+    async def event_stream():
+        try:
+            while True:
+                event = await subscription.get(timeout=15.0)
+                if event is None:
+                    yield SSE_KEEPALIVE
+                    continue
+                yield sse_event(event, event=event.get("type"))
+        finally:
+            subscription.close()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @app.websocket("/ws/workbench")
 async def workbench_websocket(websocket: WebSocket):
     """
     WebSocket endpoint for live workbench updates.
 
-    Sends real-time updates for:
-    - Benchmark progress (every 2 seconds)
-    - New results as they complete
-    - Job status changes
+    Subscribes to the shared event bus, so every connected client is served
+    from the same benchmark poll and worker progress events.
 
     Client receives JSON messages:
     {
@@ -3870,60 +4545,32 @@ async def workbench_websocket(websocket: WebSocket):
         "jobs": [{"benchmark_id": "...", "progress": 50, ...}]
     }
     {
-        "type": "result",
-        "result": {"candidate_id": "...", "model_outputs": {...}}
+        "type": "job",
+        "event": {"type": "batch.progress", "batch_id": "...", ...}
     }
     """
     await websocket.accept()
     logger.info("WebSocket client connected")
 
+    subscription = get_event_bus().subscribe({"benchmark", "batch"})
+
     try:
-        while True:
-            db = SessionLocal()
-            try:
-                # Get active benchmarks
-                from core.batch_app.database import Benchmark
-
-                active_benchmarks = db.query(Benchmark).filter(
-                    Benchmark.status == "running"
-                ).all()
-
-                jobs = []
-                for benchmark in active_benchmarks:
-                    # Get latest status
-                    from core.batch_app.model_manager import get_benchmark_status
-                    status = get_benchmark_status(benchmark.id, db)
-
-                    jobs.append({
-                        "benchmark_id": benchmark.id,
-                        "model_id": benchmark.model_id,
-                        "dataset_id": benchmark.dataset_id,
-                        "status": status.get("status", "running"),
-                        "progress": status.get("progress", 0),
-                        "completed": status.get("completed", 0),
-                        "total": status.get("total", 0),
-                        "throughput": status.get("throughput", 0.0),
-                        "eta_seconds": status.get("eta_seconds", 0)
-                    })
-
-                # Send progress update
+        async for event in subscription:
+            if event["type"] == "benchmark.snapshot":
                 await websocket.send_json({
                     "type": "progress",
-                    "jobs": jobs,
-                    "timestamp": datetime.now(timezone.utc).isoformat()
+                    "jobs": event["jobs"],
+                    "timestamp": datetime.fromtimestamp(event["timestamp"], timezone.utc).isoformat()
                 })
-
-            finally:
-                db.close()
-
-            # Wait 2 seconds before next update
-            await asyncio.sleep(2)
+            else:
+                await websocket.send_json({"type": "job", "event": event})
 
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
+        subscription.close()
         try:
             await websocket.close()
         except:
@@ -0,0 +1,356 @@
+"""
+Engine config autotuning.
+
+An autotune job (``BatchJob.job_type == 'autotune'``) runs on a sample of a
+real input file. It searches ``max_num_seqs``, ``max_num_batched_tokens``,
+``gpu_memory_utilization``, ``max_model_len`` and the worker chunk size for
+the highest tokens/sec, then writes the best config back to the model
+(``apply_autotune_result``).
+
+The search is coordinate descent from the model's current config. For each
+parameter it tries larger values, then smaller ones if larger didn't help.
+A direction stops early after ``patience`` trials without a
+``min_improvement`` gain. OOM-aware pruning: a config that OOMs rules out
+every config using at least as much of each memory-bound parameter, so those
+are never launched. A config that fails for another reason (e.g. a
+``max_model_len`` shorter than a sampled prompt) is discarded.
+
+``Autotuner`` only needs an ``evaluate(config) -> TrialResult`` callable. The
+worker evaluates with ``run_trial`` (a fresh engine per trial); tests run the
+same path on the simulated engine.
+"""
+
+import json
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from core.batch_app.logging_config import get_logger
+
+from .database import ModelRegistry
+from .engine_profiles import get_engine_profile, set_engine_profile
+from .engines import engine_clock
+from .model_lifecycle import release_memory, shutdown_llm
+from .worker_ipc import run_step_loop
+
+logger = get_logger(__name__)
+
+# Search order: the batch shape matters most, chunking least
+AUTOTUNE_PARAMETERS = ('max_num_seqs', 'max_num_batched_tokens', 'gpu_memory_utilization', 'max_model_len', 'chunk_size')
+
+# Raising any of these needs more GPU memory
+MEMORY_PARAMETERS = ('max_num_seqs', 'max_num_batched_tokens', 'gpu_memory_utilization', 'max_model_len')
+
+# Parameters that go into the engine profile rather than ModelRegistry columns
+PROFILE_PARAMETERS = ('max_num_seqs', 'max_num_batched_tokens')
+
+DEFAULT_SEARCH_SPACE: Dict[str, List[Any]] = {
+    'max_num_seqs': [64, 128, 256, 512],
+    'max_num_batched_tokens': [2048, 4096, 8192, 16384],
+    'gpu_memory_utilization': [0.80, 0.85, 0.90, 0.95],
+    'max_model_len': [2048, 4096, 8192],
+    'chunk_size': [1000, 2500, 5000],
+}
+
+# vLLM's defaults when a model's engine profile doesn't set them
+VLLM_DEFAULTS = {'max_num_seqs': 256, 'max_num_batched_tokens': 8192}
+
+OOM_MARKERS = (
+    'out of memory',
+    'free memory on device',
+    'not enough memory',
+    'no available memory for the cache blocks',
+    'larger than the maximum number of tokens that can be stored in kv cache',
+)
+
+
+class AutotuneError(ValueError):
+    """Raised for invalid autotune settings or when the baseline can't run."""
+    pass
+
+
+def is_oom_error(error: BaseException) -> bool:
+    """Whether an engine start/generate failure was caused by GPU memory."""
+    message = str(error).lower()
+    return any(marker in message for marker in OOM_MARKERS)
+
+
+@dataclass
+class TrialResult:
+    """Measured throughput of one config."""
+    config: Dict[str, Any]
+    tokens_per_sec: float = 0.0
+    requests: int = 0
+    tokens: int = 0
+    seconds: float = 0.0
+    oom: bool = False
+    pruned: bool = False  # Skipped: dominates a config that OOMed
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.oom and not self.pruned and self.error is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class AutotuneResult:
+    """All trials and the best config."""
+    baseline: TrialResult
+    best: TrialResult
+    trials: List[TrialResult] = field(default_factory=list)
+    launched: int = 0  # Engines started
+
+    @property
+    def improvement(self) -> float:
+        """Best tokens/sec relative to the baseline (1.0 = no gain)."""
+        if self.baseline.tokens_per_sec <= 0:
+            return 1.0
+        return self.best.tokens_per_sec / self.baseline.tokens_per_sec
+
+
+def validate_search_space(space: Optional[Dict[str, Any]], sample_size: Optional[int] = None) -> Dict[str, List[Any]]:
+    """
+    Merge a requested search space over the defaults.
+
+    Chunk sizes larger than ``sample_size`` would all run the sample as a
+    single chunk, so they are dropped (chunk size is then left as is).
+
+    Raises:
+        AutotuneError: Unknown parameter or empty/non-numeric value list
+    """
+    merged = {name: list(values) for name, values in DEFAULT_SEARCH_SPACE.items()}
+    for name, values in (space or {}).items():
+        if name not in DEFAULT_SEARCH_SPACE:
+            raise AutotuneError(f"Unknown autotune parameter: {name} (allowed: {', '.join(AUTOTUNE_PARAMETERS)})")
+        if not isinstance(values, list) or not values:
+            raise AutotuneError(f"{name} must be a non-empty list")
+        if any(isinstance(v, bool) or not isinstance(v, (int, float)) or v <= 0 for v in values):
+            raise AutotuneError(f"{name} values must be positive numbers")
+        if name == 'gpu_memory_utilization':
+            if any(v > 1 for v in values):
+                raise AutotuneError("gpu_memory_utilization values must be at most 1.0")
+        elif any(not isinstance(v, int) for v in values):
+            raise AutotuneError(f"{name} values must be integers")
+        merged[name] = sorted(set(values))
+    if sample_size is not None:
+        merged['chunk_size'] = [v for v in merged['chunk_size'] if v <= sample_size]
+    return merged
+
+
+def baseline_config(engine_config: Dict[str, Any], chunk_size: int) -> Dict[str, Any]:
+    """Search starting point: the config a model's engine is started with today."""
+    return {
+        'max_num_seqs': engine_config.get('max_num_seqs', VLLM_DEFAULTS['max_num_seqs']),
+        'max_num_batched_tokens': engine_config.get('max_num_batched_tokens', VLLM_DEFAULTS['max_num_batched_tokens']),
+        'gpu_memory_utilization': engine_config['gpu_memory_utilization'],
+        'max_model_len': engine_config['max_model_len'],
+        'chunk_size': chunk_size,
+    }
+
+
+class Autotuner:
+    """Coordinate-descent search with early stopping and OOM pruning."""
+
+    def __init__(self, evaluate: Callable[[Dict[str, Any]], TrialResult], space: Dict[str, List[Any]],
+                 baseline: Dict[str, Any], patience: int = 1, max_trials: int = 30,
+                 min_improvement: float = 0.02, on_trial: Optional[Callable[[TrialResult], None]] = None):
+        self.evaluate = evaluate
+        self.space = space
+        self.baseline = dict(baseline)
+        self.patience = max(patience, 1)
+        self.max_trials = max_trials
+        self.min_improvement = min_improvement
+        self.on_trial = on_trial
+        self.trials: List[TrialResult] = []
+        self.launched = 0  # Trials that started an engine (pruned/invalid ones are free)
+        self._results: Dict[str, TrialResult] = {}
+        self._oom_configs: List[Dict[str, Any]] = []
+
+    def is_pruned(self, config: Dict[str, Any]) -> bool:
+        """Whether a config needs at least as much memory as one that OOMed."""
+        return any(
+            all(config.get(p, 0) >= oom.get(p, 0) for p in MEMORY_PARAMETERS)
+            for oom in self._oom_configs
+        )
+
+    def trial(self, config: Dict[str, Any]) -> TrialResult:
+        key = json.dumps(config, sort_keys=True)
+        if key in self._results:
+            return self._results[key]
+
+        if self.is_pruned(config):
+            result = TrialResult(config=dict(config), pruned=True)
+        elif config.get('max_num_batched_tokens', 0) < config.get('max_num_seqs', 0):
+            result = TrialResult(config=dict(config), error="max_num_batched_tokens below max_num_seqs")
+        else:
+            self.launched += 1
+            result = self.evaluate(dict(config))
+            if result.oom:
+                self._oom_configs.append(dict(config))
+
+        self._results[key] = result
+        self.trials.append(result)
+        if self.on_trial:
+            self.on_trial(result)
+        return result
+
+    def _better(self, candidate: TrialResult, best: TrialResult) -> bool:
+        return candidate.ok and candidate.tokens_per_sec > best.tokens_per_sec * (1 + self.min_improvement)
+
+    def _walk(self, param: str, values: Sequence[Any], best: TrialResult) -> TrialResult:
+        """Try values along one direction until patience runs out, an OOM, or the budget."""
+        misses = 0
+        for value in values:
+            if self.launched >= self.max_trials:
+                break
+            result = self.trial({**best.config, param: value})
+            if result.oom or result.pruned:
+                # Further values in this direction only need more memory
+                if param in MEMORY_PARAMETERS and value > best.config.get(param, 0):
+                    break
+                continue
+            if self._better(result, best):
+                best, misses = result, 0
+            else:
+                misses += 1
+                if misses >= self.patience:
+                    break
+        return best
+
+    def run(self) -> AutotuneResult:
+        """
+        Run the search.
+
+        Raises:
+            AutotuneError: If the baseline config fails
+        """
+        baseline = self.trial(self.baseline)
+        if not baseline.ok:
+            raise AutotuneError(
+                f"Baseline config failed ({'OOM' if baseline.oom else baseline.error}): {self.baseline}"
+            )
+
+        best = baseline
+        for param in AUTOTUNE_PARAMETERS:
+            values = self.space.get(param) or []
+            current = best.config.get(param)
+            if current is None:
+                continue
+            higher = [v for v in values if v > current]
+            lower = [v for v in reversed(values) if v < current]
+
+            improved = self._walk(param, higher, best)
+            if improved is best:
+                improved = self._walk(param, lower, best)
+            best = improved
+
+        return AutotuneResult(baseline=baseline, best=best, trials=list(self.trials), launched=self.launched)
+
+
+def run_trial(create_llm: Callable[..., Any], engine_config: Dict[str, Any], trial_config: Dict[str, Any],
+              prompts: List[str], sampling_params: Any, make_sampling_params: Callable[[Dict[str, Any]], Any],
+              on_start_failure: Optional[Callable[[], None]] = None) -> TrialResult:
+    """
+    Start an engine with a trial's config, generate the prompts in chunks and measure tokens/sec.
+
+    The engine is always shut down afterwards. Startup and generation
+    failures are returned as OOM or error trials, not raised.
+    """
+    vllm_config = {**engine_config, **{p: trial_config[p] for p in MEMORY_PARAMETERS}}
+    llm = None
+    try:
+        llm = create_llm(**vllm_config)
+        clock = engine_clock(llm)
+        start = clock()
+        tokens = 0
+        chunk_size = trial_config['chunk_size']
+        for offset in range(0, len(prompts), chunk_size):
+            outputs = run_step_loop(llm.llm_engine, prompts[offset:offset + chunk_size],
+                                    sampling_params, make_sampling_params)
+            tokens += sum(len(o.prompt_token_ids or []) + len(o.outputs[0].token_ids) for o in outputs)
+        seconds = clock() - start
+        return TrialResult(config=trial_config, tokens_per_sec=tokens / seconds if seconds > 0 else 0.0,
+                           requests=len(prompts), tokens=tokens, seconds=seconds)
+    except Exception as e:
+        if llm is None and on_start_failure is not None:
+            on_start_failure()
+        oom = is_oom_error(e)
+        return TrialResult(config=trial_config, oom=oom, error=None if oom else str(e))
+    finally:
+        if llm is not None:
+            shutdown_llm(llm)
+        del llm
+        release_memory()
+
+
+def sample_requests(path: Path, sample_size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Uniform sample of request lines from a JSONL input file (reservoir sampling)."""
+    rng = random.Random(seed)
+    sample: List[Dict[str, Any]] = []
+    seen = 0
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            seen += 1
+            if len(sample) < sample_size:
+                sample.append(json.loads(line))
+            else:
+                index = rng.randrange(seen)
+                if index < sample_size:
+                    sample[index] = json.loads(line)
+    return sample
+
+
+def apply_autotune_result(db: Session, model_id: str, result: AutotuneResult) -> Optional[ModelRegistry]:
+    """
+    Persist the best config to the model (commits).
+
+    ``max_num_seqs``/``max_num_batched_tokens`` go into the engine profile
+    (bumping its version); ``gpu_memory_utilization``, ``max_model_len`` and
+    ``chunk_size`` into ModelRegistry columns. Nothing is written if the best
+    config is the baseline.
+    """
+    entry = db.query(ModelRegistry).filter(ModelRegistry.model_id == model_id).first()
+    if entry is None or result.best is result.baseline:
+        return None
+
+    config = result.best.config
+    profile = dict(get_engine_profile(db, model_id).settings)
+    profile.update({p: config[p] for p in PROFILE_PARAMETERS if p in config})
+
+    if 'gpu_memory_utilization' in config:
+        entry.gpu_memory_utilization = config['gpu_memory_utilization']
+    if 'max_model_len' in config:
+        entry.max_model_len = config['max_model_len']
+    if 'chunk_size' in config:
+        entry.chunk_size = config['chunk_size']
+    entry.throughput_tokens_per_sec = result.best.tokens_per_sec
+
+    # Commits the column updates too
+    entry = set_engine_profile(db, model_id, profile)
+    logger.info(f"Autotuned {model_id}: {config} ({result.best.tokens_per_sec:.0f} tok/s, "
+                f"{result.improvement:.2f}x baseline)")
+    return entry
+
+
+def trial_summary(result: AutotuneResult, started: float) -> Dict[str, Any]:
+    """Summary record written at the end of an autotune job's output."""
+    return {
+        "type": "autotune_summary",
+        "baseline": result.baseline.to_dict(),
+        "best": result.best.to_dict(),
+        "improvement": round(result.improvement, 3),
+        "trials": len(result.trials),
+        "launched": result.launched,
+        "pruned": sum(1 for t in result.trials if t.pruned),
+        "ooms": sum(1 for t in result.trials if t.oom),
+        "seconds": round(time.time() - started, 1),
+    }
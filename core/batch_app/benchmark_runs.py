@@ -0,0 +1,185 @@
+"""
+Workbench benchmark runs as worker jobs.
+
+A benchmark (a ``Benchmark`` row: one model on one dataset) is queued as a
+``BatchJob`` with ``job_type == 'benchmark'`` over a Files API copy of the
+dataset (``dataset_file``). The worker runs it like any other batch: the same engine config, chat template
+rendering, sampling params, scheduling and result writer. Benchmark
+throughput is therefore what production jobs on that model would get.
+
+After every chunk the worker mirrors the job's progress onto the Benchmark
+row (``sync_benchmark``) and publishes a ``benchmark.progress`` event with
+``benchmark_status``; dashboards read the row or the event, nothing parses
+logs.
+"""
+
+import json
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+
+from .database import BatchJob, Benchmark, Dataset, File, ModelRegistry
+from .queue_model import scan_batch_input
+from .result_files import results_path_for_batch
+
+# Benchmark status for each job status (anything else is still running)
+BENCHMARK_STATUS = {'completed': 'completed', 'failed': 'failed', 'expired': 'failed', 'cancelled': 'cancelled'}
+
+METADATA_DIR = Path("benchmarks/metadata")
+
+
+def dataset_file(dataset: Dataset, db: Session) -> File:
+    """
+    Files API entry for a dataset, so the worker can read it as batch input.
+
+    The dataset is copied into FILES_DIR like an upload (once, reused while
+    the copy exists): deleting the file through the Files API must not remove
+    the workbench dataset.
+    """
+    filename = f"dataset_{dataset.id}.jsonl"
+    input_file = db.query(File).filter(File.filename == filename, ~File.deleted).first()
+    if input_file is not None and Path(input_file.file_path).exists():
+        return input_file
+
+    file_id = f"file-{uuid.uuid4().hex[:24]}"
+    file_path = Path(settings.FILES_DIR) / f"{file_id}.jsonl"
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(dataset.file_path, file_path)
+    input_file = File(
+        file_id=file_id,
+        object='file',
+        bytes=file_path.stat().st_size,
+        created_at=int(time.time()),
+        filename=filename,
+        purpose='batch',
+        file_path=str(file_path),
+        deleted=False
+    )
+    db.add(input_file)
+    return input_file
+
+
+def queue_benchmark_job(benchmark: Benchmark, model: ModelRegistry, dataset: Dataset, db: Session) -> BatchJob:
+    """
+    Queue the worker job for a benchmark and link it to the Benchmark row.
+
+    Runs at low priority, like autotune jobs: benchmarking yields to real work.
+    """
+    input_file = dataset_file(dataset, db)
+    with open(input_file.file_path) as f:
+        _, _, estimated_prompt_tokens = scan_batch_input(f)
+
+    batch_id = f"batch_{uuid.uuid4().hex[:16]}"
+    created_at = int(time.time())
+    job = BatchJob(
+        batch_id=batch_id,
+        input_file_id=input_file.file_id,
+        status='validating',
+        created_at=created_at,
+        expires_at=created_at + (settings.BATCH_EXPIRY_HOURS * 3600),
+        total_requests=dataset.count,
+        model=model.model_id,
+        log_file=str(Path(settings.LOGS_DIR) / f"{batch_id}.log"),
+        estimated_prompt_tokens=estimated_prompt_tokens,
+        priority=-1,
+        job_type='benchmark',
+        job_config=json.dumps({'benchmark_id': benchmark.id, 'dataset_id': dataset.id})
+    )
+    db.add(job)
+    benchmark.batch_id = batch_id
+    benchmark.results_file = str(results_path_for_batch(batch_id))
+    db.commit()
+    return job
+
+
+def sync_benchmark(job: BatchJob, db: Session) -> Optional[Benchmark]:
+    """
+    Copy a benchmark job's progress onto its Benchmark row (not committed).
+
+    Throughput is requests/sec since the job started. A cancelled benchmark
+    stays cancelled whatever the job does afterwards. On completion the run's
+    metadata file is written to ``benchmarks/metadata``.
+    """
+    benchmark = db.query(Benchmark).filter(Benchmark.batch_id == job.batch_id).first()
+    if benchmark is None or benchmark.status == 'cancelled':
+        return benchmark
+
+    elapsed = time.time() - job.in_progress_at if job.in_progress_at else 0.0
+    benchmark.completed = job.completed_requests
+    benchmark.progress = int(job.completed_requests / benchmark.total * 100) if benchmark.total else 0
+    benchmark.throughput = job.completed_requests / elapsed if elapsed > 0 else 0.0
+    remaining = max(benchmark.total - job.completed_requests, 0)
+    benchmark.eta_seconds = int(remaining / benchmark.throughput) if benchmark.throughput > 0 else 0
+
+    status = BENCHMARK_STATUS.get(job.status)
+    if status is not None and benchmark.status == 'running':
+        benchmark.status = status
+        benchmark.completed_at = datetime.now(timezone.utc)
+        benchmark.total_time_seconds = elapsed
+        benchmark.eta_seconds = 0
+        if status == 'completed':
+            benchmark.metadata_file = str(write_metadata(benchmark, job))
+    return benchmark
+
+
+def write_metadata(benchmark: Benchmark, job: BatchJob) -> Path:
+    metadata_path = METADATA_DIR / f"{benchmark.id}.json"
+    metadata_path.parent.mkdir(parents=True, exist_ok=True)
+    metadata = {
+        "benchmark_id": benchmark.id,
+        "batch_id": job.batch_id,
+        "model_id": benchmark.model_id,
+        "dataset_id": benchmark.dataset_id,
+        "total_requests": benchmark.total,
+        "completed_requests": benchmark.completed,
+        "total_time_seconds": benchmark.total_time_seconds,
+        "throughput_req_per_sec": benchmark.throughput,
+        "throughput_tokens_per_sec": job.throughput_tokens_per_sec,
+        "total_tokens": job.total_tokens,
+        "started_at": benchmark.started_at.isoformat() if benchmark.started_at else None,
+        "completed_at": benchmark.completed_at.isoformat() if benchmark.completed_at else None,
+        "results_file": benchmark.results_file
+    }
+    with open(metadata_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    return metadata_path
+
+
+def benchmark_status(benchmark: Benchmark) -> Dict[str, Any]:
+    """Progress fields of a benchmark (API responses and ``benchmark.progress`` events)."""
+    return {
+        "benchmark_id": benchmark.id,
+        "batch_id": benchmark.batch_id,
+        "model_id": benchmark.model_id,
+        "dataset_id": benchmark.dataset_id,
+        "status": benchmark.status,
+        "progress": benchmark.progress,
+        "completed": benchmark.completed,
+        "total": benchmark.total,
+        "throughput": benchmark.throughput,
+        "eta_seconds": benchmark.eta_seconds
+    }
+
+
+def cancel_benchmark_job(benchmark: Benchmark, db: Session) -> Optional[BatchJob]:
+    """
+    Cancel a benchmark's job (not committed).
+
+    A queued job is cancelled outright; a running one goes to 'cancelling',
+    like a cancelled batch.
+    """
+    job = db.query(BatchJob).filter(BatchJob.batch_id == benchmark.batch_id).first() if benchmark.batch_id else None
+    if job is not None and job.status == 'validating':
+        job.status = 'cancelled'
+        job.cancelled_at = int(time.time())
+    elif job is not None and job.status in ('in_progress', 'finalizing'):
+        job.status = 'cancelling'
+        job.cancelling_at = int(time.time())
+    return job
@@ -0,0 +1,221 @@
+"""
+OpenAI-compatible ``/v1/chat/completions`` request parsing and response shaping.
+
+The endpoint is a drop-in for the OpenAI chat API on the real-time path:
+
+- ``stream: false`` goes through the micro-batcher and returns a
+  ``chat.completion`` object.
+- ``stream: true`` reads cumulative outputs from the async engine and emits
+  ``chat.completion.chunk`` deltas as server-sent events, terminated by
+  ``data: [DONE]``.
+
+If the engine fails after the stream has started (the 200 is already sent),
+an OpenAI-style ``{"error": ...}`` event is emitted before ``data: [DONE]``.
+
+Time-to-first-token and inter-token latency are observed per request while
+streaming. Time-to-first-token is measured from when the request reached the
+engine (``submitted_at``), so a model load before it is not counted. Nothing
+here imports vLLM.
+"""
+
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from core.batch_app.logging_config import get_logger
+from core.batch_app.metrics import inference_inter_token_latency, inference_time_to_first_token
+from core.batch_app.streaming import sse_event
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_TOKENS = 512
+DEFAULT_TEMPERATURE = 0.7
+DEFAULT_TOP_P = 1.0  # OpenAI default
+
+SSE_DONE = "data: [DONE]\n\n"
+
+
+class ChatRequestError(ValueError):
+    """Invalid chat completion request (maps to HTTP 400)."""
+
+
+@dataclass
+class ChatRequest:
+    """A validated chat completion request."""
+    model: Optional[str]
+    messages: List[Dict[str, str]]
+    params: Dict[str, Any]
+    stream: bool = False
+    include_usage: bool = False
+    id: str = field(default_factory=lambda: f"chatcmpl-{uuid.uuid4().hex[:24]}")
+    created: int = field(default_factory=lambda: int(time.time()))
+
+
+def _number(body: Dict[str, Any], key: str, convert: Any, default: Any) -> Any:
+    value = body.get(key)
+    if value is None:
+        return default
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        raise ChatRequestError(f"'{key}' must be a number")
+
+
+def parse_chat_request(body: Any) -> ChatRequest:
+    """
+    Validate an OpenAI chat completion body.
+
+    Raises:
+        ChatRequestError: If the body is malformed or uses unsupported options
+    """
+    if not isinstance(body, dict):
+        raise ChatRequestError("Request body must be a JSON object")
+
+    messages = body.get('messages')
+    if not isinstance(messages, list) or not messages:
+        raise ChatRequestError("'messages' must be a non-empty list")
+    for message in messages:
+        if not isinstance(message, dict) or 'role' not in message:
+            raise ChatRequestError("Each message must be an object with a 'role'")
+        if not isinstance(message.get('content', ''), str):
+            raise ChatRequestError("Only string message content is supported")
+
+    if body.get('n', 1) != 1:
+        raise ChatRequestError("Only n=1 is supported")
+
+    stop = body.get('stop')
+    if isinstance(stop, str):
+        stop = [stop]
+
+    max_tokens_key = 'max_completion_tokens' if body.get('max_completion_tokens') is not None else 'max_tokens'
+    max_tokens = _number(body, max_tokens_key, int, DEFAULT_MAX_TOKENS)
+    if max_tokens < 1:
+        raise ChatRequestError(f"'{max_tokens_key}' must be at least 1")
+
+    stream_options = body.get('stream_options')
+    if stream_options is None:
+        stream_options = {}
+    elif not isinstance(stream_options, dict):
+        raise ChatRequestError("'stream_options' must be an object")
+
+    return ChatRequest(
+        model=body.get('model'),
+        messages=messages,
+        params={
+            "max_tokens": max_tokens,
+            "temperature": _number(body, 'temperature', float, DEFAULT_TEMPERATURE),
+            "top_p": _number(body, 'top_p', float, DEFAULT_TOP_P),
+            "stop": stop
+        },
+        stream=bool(body.get('stream', False)),
+        include_usage=bool(stream_options.get('include_usage', False))
+    )
+
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> Dict[str, int]:
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
+
+def build_chat_completion(request: ChatRequest, model: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a ``chat.completion`` object from an engine result."""
+    usage = result.get('usage', {})
+    completion_tokens = usage.get('completion_tokens', 0)
+    finish_reason = result.get('finish_reason') or (
+        "length" if completion_tokens >= request.params["max_tokens"] else "stop"
+    )
+    return {
+        "id": request.id,
+        "object": "chat.completion",
+        "created": request.created,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": result.get('text', '')},
+            "finish_reason": finish_reason
+        }],
+        "usage": _usage(usage.get('prompt_tokens', 0), completion_tokens)
+    }
+
+
+def _chunk(request: ChatRequest, model: str, delta: Dict[str, Any],
+           finish_reason: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "id": request.id,
+        "object": "chat.completion.chunk",
+        "created": request.created,
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+
+
+async def stream_chat_completion(request: ChatRequest, model: str,
+                                 outputs: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """
+    Convert cumulative engine outputs to SSE ``chat.completion.chunk`` deltas.
+
+    Args:
+        request: Parsed request
+        model: Model id reported in chunks
+        outputs: Engine outputs, each ``{"text": cumulative_text,
+            "finish_reason": str | None, "prompt_tokens": int,
+            "completion_tokens": int, "submitted_at": float}``;
+            ``submitted_at`` (``time.monotonic()`` when the engine accepted
+            the request) is optional and defaults to when streaming started
+
+    Yields:
+        SSE-formatted strings, ending with ``data: [DONE]`` (after an
+        ``{"error": ...}`` event if the engine failed)
+    """
+    start = time.monotonic()
+    last_token_at: Optional[float] = None
+    sent = 0
+    finish_reason = None
+    prompt_tokens = completion_tokens = 0
+
+    yield sse_event(_chunk(request, model, {"role": "assistant", "content": ""}))
+
+    try:
+        async for output in outputs:
+            text = output.get('text', '')
+            prompt_tokens = output.get('prompt_tokens', prompt_tokens)
+            new_tokens = output.get('completion_tokens', completion_tokens) - completion_tokens
+            completion_tokens += max(new_tokens, 0)
+            finish_reason = output.get('finish_reason') or finish_reason
+            if last_token_at is None:
+                start = output.get('submitted_at', start)
+
+            if new_tokens > 0:
+                now = time.monotonic()
+                if last_token_at is None:
+                    inference_time_to_first_token.labels(model=model).observe(now - start)
+                else:
+                    # Spread over the tokens produced since the previous output
+                    gap = (now - last_token_at) / new_tokens
+                    for _ in range(new_tokens):
+                        inference_inter_token_latency.labels(model=model).observe(gap)
+                last_token_at = now
+
+            delta = text[sent:]
+            if delta:
+                sent = len(text)
+                yield sse_event(_chunk(request, model, {"content": delta}))
+    except Exception as e:
+        logger.error(f"Error streaming chat completion {request.id}: {e}")
+        yield sse_event({"error": {"message": str(e), "type": "server_error", "param": None, "code": None}})
+        yield SSE_DONE
+        return
+
+    yield sse_event(_chunk(request, model, {}, finish_reason or "stop"))
+
+    if request.include_usage:
+        usage_chunk = _chunk(request, model, {})
+        usage_chunk["choices"] = []
+        usage_chunk["usage"] = _usage(prompt_tokens, completion_tokens)
+        yield sse_event(usage_chunk)
+
+    yield SSE_DONE
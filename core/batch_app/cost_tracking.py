@@ -3,12 +3,18 @@ Cost Tracking for vLLM Batch Server
 
 Tracks token usage and calculates costs based on model pricing.
 Supports custom pricing models and budget alerts.
+
+Hosted prices (DEFAULT_PRICING) are what the same tokens would cost on a
+cloud API. Local cost is what the job actually cost here: measured GPU
+energy x ELECTRICITY_PRICE_PER_KWH plus GPU-hours x GPU_HOURLY_COST, from
+the usage the worker records per job (see usage_accounting.py).
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 
+from core.config import settings
 from core.batch_app.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -103,6 +109,118 @@ def calculate_cost(
     }
 
 
+def calculate_local_cost(
+    energy_joules: Optional[float],
+    gpu_seconds: Optional[float],
+    tokens: int,
+    price_per_kwh: Optional[float] = None,
+    gpu_hourly_cost: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Calculate what a job cost to run on local GPUs.
+    
+    Args:
+        energy_joules: Measured GPU energy (None if not measured)
+        gpu_seconds: GPU-busy seconds (generate time x GPUs)
+        tokens: Prompt + completion tokens processed
+        price_per_kwh: Electricity price (default: ELECTRICITY_PRICE_PER_KWH)
+        gpu_hourly_cost: Amortized hardware cost (default: GPU_HOURLY_COST)
+    
+    Returns:
+        Cost breakdown, $/1M tokens and tokens per joule
+    """
+    if price_per_kwh is None:
+        price_per_kwh = settings.ELECTRICITY_PRICE_PER_KWH
+    if gpu_hourly_cost is None:
+        gpu_hourly_cost = settings.GPU_HOURLY_COST
+    
+    energy_kwh = energy_joules / 3_600_000 if energy_joules is not None else None
+    gpu_hours = (gpu_seconds or 0.0) / 3600
+    energy_cost = energy_kwh * price_per_kwh if energy_kwh is not None else 0.0
+    hardware_cost = gpu_hours * gpu_hourly_cost
+    total_cost = energy_cost + hardware_cost
+    
+    return {
+        'energy_kwh': energy_kwh,
+        'energy_cost': energy_cost,
+        'gpu_hours': gpu_hours,
+        'hardware_cost': hardware_cost,
+        'total_cost': total_cost,
+        'cost_per_1m_tokens': total_cost / tokens * 1_000_000 if tokens > 0 else None,
+        'tokens_per_joule': tokens / energy_joules if energy_joules else None,
+        'energy_measured': energy_joules is not None,
+        'pricing': {
+            'electricity_per_kwh': price_per_kwh,
+            'gpu_hourly_cost': gpu_hourly_cost
+        }
+    }
+
+
+def format_usage(totals: Dict[str, Any], local_cost: Dict[str, Any]) -> List[str]:
+    """Log lines for a job's usage totals and local cost."""
+    lines = [
+        f"Tokens:       {totals['prompt_tokens']:,} prompt + {totals['completion_tokens']:,} completion",
+        f"GPU time:     {totals['gpu_seconds']:.1f} GPU-seconds",
+    ]
+    if totals.get('energy_joules') is not None:
+        lines.append(f"Energy:       {totals['energy_joules'] / 3600:.2f} Wh "
+                     f"({local_cost['tokens_per_joule'] or 0:.1f} tokens/J)")
+    else:
+        lines.append("Energy:       not measured (no GPU telemetry)")
+    if local_cost['cost_per_1m_tokens'] is not None:
+        lines.append(f"Local cost:   ${local_cost['total_cost']:.4f} "
+                     f"(${local_cost['cost_per_1m_tokens']:.4f}/1M tokens)")
+    return lines
+
+
+def job_token_split(job: Any) -> Tuple[int, int, bool]:
+    """
+    Prompt and completion tokens for a job.
+    
+    Jobs finished before the worker recorded the split only have
+    total_tokens; those fall back to a 70/30 prompt/completion estimate.
+    
+    Returns:
+        (prompt_tokens, completion_tokens, estimated)
+    """
+    if job.prompt_tokens is not None and job.completion_tokens is not None:
+        return job.prompt_tokens, job.completion_tokens, False
+    total = job.total_tokens or 0
+    return int(total * 0.7), int(total * 0.3), True
+
+
+def get_job_usage(job: Any, include_chunks: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Recorded usage of one job with its local and hosted cost.
+    
+    Args:
+        job: BatchJob
+        include_chunks: Include the per-chunk entries
+    
+    Returns:
+        Usage report, or None if the worker recorded no usage for the job
+    """
+    from core.batch_app.usage_accounting import JobUsage
+    
+    if not job.resource_usage:
+        return None
+    
+    usage = JobUsage.from_json(job.resource_usage)
+    totals = usage.totals()
+    local = calculate_local_cost(totals['energy_joules'], totals['gpu_seconds'], totals['total_tokens'])
+    hosted = calculate_cost(totals['prompt_tokens'], totals['completion_tokens'], job.model or "unknown")
+    
+    report = {
+        'totals': totals,
+        'tokens_per_joule': local['tokens_per_joule'],
+        'local_cost': local,
+        'hosted_cost': hosted['total_cost'],
+    }
+    if include_chunks:
+        report['chunks'] = usage.chunks
+    return report
+
+
 def calculate_batch_cost(
     results: List[Dict[str, Any]],
     model_id: str,
@@ -192,12 +310,9 @@ def get_usage_summary(
     # Calculate totals
     total_jobs = len(jobs)
     total_requests = sum(job.completed_requests for job in jobs)
-    total_tokens = sum(job.total_tokens or 0 for job in jobs)
-    
-    # Estimate costs (we don't have prompt/completion breakdown in BatchJob)
-    # Assume 70% prompt, 30% completion as rough estimate
-    estimated_prompt_tokens = int(total_tokens * 0.7)
-    estimated_completion_tokens = int(total_tokens * 0.3)
+    total_prompt_tokens = 0
+    total_completion_tokens = 0
+    estimated_split_jobs = 0
     
     # Calculate cost for each model
     costs_by_model = {}
@@ -207,22 +322,38 @@ def get_usage_summary(
                 'jobs': 0,
                 'requests': 0,
                 'tokens': 0,
-                'cost': 0.0
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+                'cost': 0.0,
+                'gpu_seconds': 0.0,
+                'energy_joules': 0.0,
+                'local_cost': 0.0
             }
         
-        job_tokens = job.total_tokens or 0
-        job_prompt = int(job_tokens * 0.7)
-        job_completion = int(job_tokens * 0.3)
+        job_prompt, job_completion, estimated = job_token_split(job)
+        job_tokens = job_prompt + job_completion
+        total_prompt_tokens += job_prompt
+        total_completion_tokens += job_completion
+        estimated_split_jobs += estimated
 
         model_name = job.model if job.model else "unknown"
         cost = calculate_cost(job_prompt, job_completion, model_name)
+        local = calculate_local_cost(job.energy_joules, job.gpu_seconds, job_tokens)
         
-        costs_by_model[job.model]['jobs'] += 1
-        costs_by_model[job.model]['requests'] += job.completed_requests
-        costs_by_model[job.model]['tokens'] += job_tokens
-        costs_by_model[job.model]['cost'] += cost['total_cost']
-    
+        entry = costs_by_model[job.model]
+        entry['jobs'] += 1
+        entry['requests'] += job.completed_requests
+        entry['tokens'] += job_tokens
+        entry['prompt_tokens'] += job_prompt
+        entry['completion_tokens'] += job_completion
+        entry['cost'] += cost['total_cost']
+        entry['gpu_seconds'] += job.gpu_seconds or 0.0
+        entry['energy_joules'] += job.energy_joules or 0.0
+        entry['local_cost'] += local['total_cost']
+    
+    total_tokens = total_prompt_tokens + total_completion_tokens
     total_cost = sum(m['cost'] for m in costs_by_model.values())
+    total_local_cost = sum(m['local_cost'] for m in costs_by_model.values())
     
     return {
         'period': {
@@ -232,15 +363,120 @@ def get_usage_summary(
         'total_jobs': total_jobs,
         'total_requests': total_requests,
         'total_tokens': total_tokens,
-        'estimated_prompt_tokens': estimated_prompt_tokens,
-        'estimated_completion_tokens': estimated_completion_tokens,
+        'prompt_tokens': total_prompt_tokens,
+        'completion_tokens': total_completion_tokens,
+        'estimated_split_jobs': estimated_split_jobs,  # Jobs without a recorded prompt/completion split
         'total_cost': total_cost,
         'cost_per_request': total_cost / total_requests if total_requests > 0 else 0,
         'cost_per_1k_tokens': (total_cost / total_tokens * 1000) if total_tokens > 0 else 0,
+        'local_cost': total_local_cost,
+        'local_cost_per_1m_tokens': (total_local_cost / total_tokens * 1_000_000) if total_tokens > 0 else 0,
         'by_model': costs_by_model
     }
 
 
+def get_efficiency_summary(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    model_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Get measured efficiency per model and engine config.
+    
+    Only completed jobs with recorded usage count. Jobs are grouped by
+    model and engine profile version, so a config change shows up as its
+    own row.
+    
+    Args:
+        db: Database session
+        start_date: Start date (optional)
+        end_date: End date (optional)
+        model_id: Filter by model (optional)
+    
+    Returns:
+        Tokens per joule, tokens per GPU-second and local vs hosted $/1M tokens
+    """
+    from core.batch_app.database import BatchJob
+    
+    query = db.query(BatchJob).filter(
+        BatchJob.status == 'completed',
+        BatchJob.gpu_seconds.isnot(None)
+    )
+    
+    if start_date:
+        query = query.filter(BatchJob.completed_at >= int(start_date.timestamp()))
+    
+    if end_date:
+        query = query.filter(BatchJob.completed_at <= int(end_date.timestamp()))
+    
+    if model_id:
+        query = query.filter(BatchJob.model == model_id)
+    
+    groups: Dict[Tuple[str, Optional[int]], Dict[str, Any]] = {}
+    for job in query.all():
+        key = (job.model or "unknown", job.engine_profile_version)
+        group = groups.setdefault(key, {
+            'model': key[0],
+            'engine_profile_version': key[1],
+            'jobs': 0,
+            'requests': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'gpu_seconds': 0.0,
+            'energy_joules': 0.0,
+            'measured_tokens': 0,  # Tokens from jobs with measured energy
+            'measured_completion_tokens': 0
+        })
+        prompt, completion, _ = job_token_split(job)
+        group['jobs'] += 1
+        group['requests'] += job.completed_requests
+        group['prompt_tokens'] += prompt
+        group['completion_tokens'] += completion
+        group['gpu_seconds'] += job.gpu_seconds or 0.0
+        if job.energy_joules is not None:
+            group['energy_joules'] += job.energy_joules
+            group['measured_tokens'] += prompt + completion
+            group['measured_completion_tokens'] += completion
+    
+    rows = []
+    for group in groups.values():
+        tokens = group['prompt_tokens'] + group['completion_tokens']
+        energy = group['energy_joules'] if group['measured_tokens'] else None
+        local = calculate_local_cost(energy, group['gpu_seconds'], tokens)
+        hosted = calculate_cost(group['prompt_tokens'], group['completion_tokens'], group['model'])
+        rows.append({
+            'model': group['model'],
+            'engine_profile_version': group['engine_profile_version'],
+            'jobs': group['jobs'],
+            'requests': group['requests'],
+            'prompt_tokens': group['prompt_tokens'],
+            'completion_tokens': group['completion_tokens'],
+            'gpu_seconds': round(group['gpu_seconds'], 3),
+            'energy_joules': round(energy, 3) if energy is not None else None,
+            'tokens_per_joule': group['measured_tokens'] / energy if energy else None,
+            'completion_tokens_per_joule': group['measured_completion_tokens'] / energy if energy else None,
+            'tokens_per_gpu_second': tokens / group['gpu_seconds'] if group['gpu_seconds'] > 0 else None,
+            'local_cost': local['total_cost'],
+            'local_cost_per_1m_tokens': local['cost_per_1m_tokens'],
+            'hosted_cost': hosted['total_cost'],
+            'hosted_cost_per_1m_tokens': hosted['total_cost'] / tokens * 1_000_000 if tokens > 0 else None
+        })
+    rows.sort(key=lambda r: (r['model'], r['engine_profile_version'] or 0))
+    
+    return {
+        'period': {
+            'start': start_date.isoformat() if start_date else None,
+            'end': end_date.isoformat() if end_date else None
+        },
+        'pricing': {
+            'electricity_per_kwh': settings.ELECTRICITY_PRICE_PER_KWH,
+            'gpu_hourly_cost': settings.GPU_HOURLY_COST
+        },
+        'by_config': rows
+    }
+
+
 def check_budget_alert(
     current_cost: float,
     budget_limit: float,
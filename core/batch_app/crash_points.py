@@ -0,0 +1,66 @@
+"""
+Deterministic worker crashes for durability testing.
+
+The worker calls ``crash_point(name)`` where a crash loses or tears work:
+
+    generate   A chunk is generated, nothing of it saved yet
+    write      Before each result line is written (the crash tears the line in half)
+    index      A chunk's results are written and fsynced, the offset index is not
+    commit     Results and sidecars are saved, progress is not committed to the DB
+
+With ``WORKER_CRASH_POINT=<name>:<n>`` the worker SIGKILLs itself the n-th
+time it reaches ``<name>`` (counted per process). Unset, the default,
+``crash_point`` does nothing. The chaos benchmark (benchmarks/chaos) uses
+this to kill the worker at chosen points and check that resuming loses,
+duplicates and corrupts nothing.
+"""
+
+import os
+import signal
+from collections import Counter
+from typing import BinaryIO, Optional, Tuple
+
+from core.config import settings
+
+CRASH_POINTS = ('generate', 'write', 'index', 'commit')
+
+_hits: Counter = Counter()
+
+
+def parse_crash_point(value: str) -> Optional[Tuple[str, int]]:
+    """``(name, n)`` from a ``name:n`` spec, or None if empty."""
+    if not value:
+        return None
+    name, _, count = value.partition(':')
+    if name not in CRASH_POINTS:
+        raise ValueError(f"Unknown crash point {name!r} (expected one of: {', '.join(CRASH_POINTS)})")
+    try:
+        hit = int(count or 1)
+    except ValueError:
+        raise ValueError(f"Invalid crash point hit count: {value!r}") from None
+    if hit < 1:
+        raise ValueError(f"Crash point hit count must be >= 1: {value!r}")
+    return name, hit
+
+
+def crash_point(name: str, partial_write: Optional[Tuple[BinaryIO, bytes]] = None) -> None:
+    """
+    SIGKILL this process if ``name`` is the configured crash point and its hit count is reached.
+
+    Args:
+        name: Crash point (one of CRASH_POINTS)
+        partial_write: (file, data) to write the first half of before dying, like a crash mid-write
+    """
+    parsed = parse_crash_point(settings.WORKER_CRASH_POINT)
+    if parsed is None:
+        return
+    target, hit = parsed
+    if name != target:
+        return
+    _hits[name] += 1
+    if _hits[name] == hit:
+        if partial_write is not None:
+            f, data = partial_write
+            f.write(data[:len(data) // 2])
+            f.flush()
+        os.kill(os.getpid(), signal.SIGKILL)
@@ -165,6 +165,32 @@ class BatchJob(Base):
     last_progress_update: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     estimated_completion_time: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
+    # Queue snapshot (maintained by queue_model.refresh_queue_snapshot on job transitions)
+    estimated_start_time: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    estimated_duration_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
+    estimated_prompt_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)  # Estimated at submission
+
+    # Actual token usage (fits the per-model throughput model)
+    prompt_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    completion_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    # Engine the job ran on (ties throughput to config, see engine_profiles.py)
+    engine_profile_version: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    engine_config: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON effective vLLM engine kwargs
+
+    # Where the job's wall time went (see phase_timing.py)
+    phase_timings: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON per-phase seconds
+    gpu_busy_fraction: Mapped[float | None] = mapped_column(Float, nullable=True)  # Share of wall time in generate
+
+    # Resources the job used (see usage_accounting.py)
+    gpu_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)  # generate time x GPUs
+    energy_joules: Mapped[float | None] = mapped_column(Float, nullable=True)  # Measured GPU energy
+    resource_usage: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON per-chunk usage
+
+    # Job type (custom extension): batch, autotune (see autotune.py), benchmark (see benchmark_runs.py)
+    job_type: Mapped[str] = mapped_column(String(32), default='batch')
+    job_config: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON settings for non-batch job types
+
     # Priority queue support (custom extension)
     # -1 = low (testing/benchmarking), 0 = normal (default), 1 = high (production)
     priority: Mapped[int] = mapped_column(Integer, default=0)
@@ -288,6 +314,8 @@ class WorkerHeartbeat(Base):
     # Model tracking (NEW - know what's loaded in GPU)
     loaded_model: Mapped[str | None] = mapped_column(String(256), nullable=True)
     model_loaded_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    warm_models: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON list of models sleeping in host RAM
+    resident_models: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON list of models loaded side by side on the GPU
 
     # Worker process tracking (NEW - detect zombies)
     worker_pid: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -328,9 +356,16 @@ class ModelRegistry(Base):
     local_path: Mapped[str | None] = mapped_column(String(512), nullable=True)  # Path to downloaded GGUF file
     quantization_type: Mapped[str | None] = mapped_column(String(32), nullable=True)  # Q4_0, Q2_K, FP16, etc.
 
+    # LoRA adapters (fine-tunes served on their base model, see lora.py)
+    base_model_id: Mapped[str | None] = mapped_column(String(256), nullable=True, index=True)  # Base model the adapter attaches to
+    adapter_path: Mapped[str | None] = mapped_column(String(512), nullable=True)  # PEFT adapter directory
+
     # vLLM configuration
     enable_prefix_caching: Mapped[bool] = mapped_column(Boolean, default=True)
     chunked_prefill_enabled: Mapped[bool] = mapped_column(Boolean, default=True)
+    engine_profile: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON vLLM tuning (see engine_profiles.py)
+    engine_profile_version: Mapped[int] = mapped_column(Integer, default=0)  # Bumped on every profile change
+    chunk_size: Mapped[int | None] = mapped_column(Integer, nullable=True)  # Worker chunk size (None = CHUNK_SIZE), set by autotune
 
     # Compatibility
     rtx4080_compatible: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -348,6 +383,9 @@ class ModelRegistry(Base):
     throughput_tokens_per_sec: Mapped[float | None] = mapped_column(Float, nullable=True)
     throughput_requests_per_sec: Mapped[float | None] = mapped_column(Float, nullable=True)
     avg_latency_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    load_time_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)  # Measured model load (swap cost)
+    unload_time_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)  # Measured GPU memory release after unload
+    warm_load_time_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)  # Measured restore from host RAM cache
 
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -361,10 +399,15 @@ class ModelRegistry(Base):
             'name': self.name,
             'size_gb': self.size_gb,
             'estimated_memory_gb': self.estimated_memory_gb,
+            'base_model_id': self.base_model_id,
+            'adapter_path': self.adapter_path,
             'max_model_len': self.max_model_len,
             'gpu_memory_utilization': self.gpu_memory_utilization,
             'enable_prefix_caching': self.enable_prefix_caching,
             'chunked_prefill_enabled': self.chunked_prefill_enabled,
+            'engine_profile': json.loads(self.engine_profile) if self.engine_profile else None,
+            'engine_profile_version': self.engine_profile_version,
+            'chunk_size': self.chunk_size,
             'rtx4080_compatible': self.rtx4080_compatible,
             'requires_hf_auth': self.requires_hf_auth,
             'status': self.status,
@@ -374,6 +417,9 @@ class ModelRegistry(Base):
             'throughput_tokens_per_sec': self.throughput_tokens_per_sec,
             'throughput_requests_per_sec': self.throughput_requests_per_sec,
             'avg_latency_ms': self.avg_latency_ms,
+            'load_time_seconds': self.load_time_seconds,
+            'unload_time_seconds': self.unload_time_seconds,
+            'warm_load_time_seconds': self.warm_load_time_seconds,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'tested_at': self.tested_at.isoformat() if self.tested_at else None
         }
@@ -447,6 +493,7 @@ class Benchmark(Base):
     total_time_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
     results_file: Mapped[str | None] = mapped_column(String, nullable=True)
     metadata_file: Mapped[str | None] = mapped_column(String, nullable=True)
+    batch_id: Mapped[str | None] = mapped_column(String, nullable=True, index=True)  # Worker job running it (job_type 'benchmark')
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(timezone.utc)
     )
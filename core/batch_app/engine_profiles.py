@@ -0,0 +1,160 @@
+"""
+Per-model vLLM engine tuning profiles.
+
+Model rows in ``ModelRegistry`` carry the basic engine settings (context
+length, memory utilization, prefix caching, chunked prefill, CPU offload).
+Everything else vLLM can be tuned with lives in a per-model profile
+(``ModelRegistry.engine_profile``, JSON), e.g.::
+
+    {"max_num_seqs": 128, "kv_cache_dtype": "fp8", "enforce_eager": false,
+     "speculative_config": {"method": "ngram", "num_speculative_tokens": 4}}
+
+Profiles are validated before they are stored, and every change bumps
+``engine_profile_version``. The worker records the version and the effective
+engine kwargs on each job (``BatchJob.engine_profile_version`` /
+``engine_config``) so throughput can be tied to the config that produced it,
+and reloads an engine whose profile changed since it was loaded.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.batch_app.logging_config import get_logger
+
+from .database import ModelRegistry
+
+logger = get_logger(__name__)
+
+KV_CACHE_DTYPES = ('auto', 'fp8', 'fp8_e4m3', 'fp8_e5m2')
+
+
+class EngineProfileError(ValueError):
+    """Raised when an engine profile is invalid."""
+    pass
+
+
+def _positive_int(key: str, value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise EngineProfileError(f"{key} must be a positive integer")
+    return value
+
+
+def _non_negative_number(key: str, value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise EngineProfileError(f"{key} must be a non-negative number")
+    return float(value)
+
+
+def _boolean(key: str, value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise EngineProfileError(f"{key} must be true or false")
+    return value
+
+
+def _kv_cache_dtype(key: str, value: Any) -> str:
+    if value not in KV_CACHE_DTYPES:
+        raise EngineProfileError(f"{key} must be one of {', '.join(KV_CACHE_DTYPES)}")
+    return str(value)
+
+
+def _speculative_config(key: str, value: Any) -> Dict[str, Any]:
+    if not isinstance(value, dict):
+        raise EngineProfileError(f"{key} must be an object")
+    if not value.get('method') and not value.get('model'):
+        raise EngineProfileError(f"{key} needs a 'method' (e.g. ngram) or a draft 'model'")
+    _positive_int(f"{key}.num_speculative_tokens", value.get('num_speculative_tokens'))
+    return dict(value)
+
+
+# Tunable vLLM engine arguments and their validators
+PROFILE_FIELDS: Dict[str, Callable[[str, Any], Any]] = {
+    'tensor_parallel_size': _positive_int,
+    'max_num_seqs': _positive_int,
+    'max_num_batched_tokens': _positive_int,
+    'kv_cache_dtype': _kv_cache_dtype,
+    'swap_space': _non_negative_number,
+    'enforce_eager': _boolean,
+    'speculative_config': _speculative_config,
+}
+
+
+def validate_engine_profile(profile: Any) -> Dict[str, Any]:
+    """
+    Validate a profile and return it normalized.
+
+    Raises:
+        EngineProfileError: Unknown keys or invalid values
+    """
+    if not isinstance(profile, dict):
+        raise EngineProfileError("Engine profile must be a JSON object")
+
+    unknown = sorted(set(profile) - set(PROFILE_FIELDS))
+    if unknown:
+        raise EngineProfileError(
+            f"Unknown engine profile keys: {', '.join(unknown)} "
+            f"(allowed: {', '.join(PROFILE_FIELDS)})"
+        )
+
+    validated: Dict[str, Any] = {
+        key: PROFILE_FIELDS[key](key, value) for key, value in profile.items() if value is not None
+    }
+    if 'max_num_seqs' in validated and 'max_num_batched_tokens' in validated:
+        if validated['max_num_batched_tokens'] < validated['max_num_seqs']:
+            raise EngineProfileError("max_num_batched_tokens must be at least max_num_seqs")
+    return validated
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """A model's engine profile (version 0 = no profile set)."""
+    version: int = 0
+    settings: Dict[str, Any] = field(default_factory=dict)
+
+    def engine_kwargs(self) -> Dict[str, Any]:
+        """vLLM engine kwargs from the profile over the global defaults."""
+        return {"tensor_parallel_size": settings.TENSOR_PARALLEL_SIZE, **self.settings}
+
+
+def profile_for(entry: Optional[ModelRegistry]) -> EngineProfile:
+    """Profile stored on a registry entry (an invalid stored profile is ignored)."""
+    if entry is None:
+        return EngineProfile()
+    if not entry.engine_profile:
+        return EngineProfile(version=entry.engine_profile_version or 0)
+    try:
+        profile = validate_engine_profile(json.loads(entry.engine_profile))
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Ignoring invalid engine profile for {entry.model_id}: {e}")
+        profile = {}
+    return EngineProfile(version=entry.engine_profile_version or 0, settings=profile)
+
+
+def get_engine_profile(db: Session, model_id: str) -> EngineProfile:
+    entry = db.query(ModelRegistry).filter(ModelRegistry.model_id == model_id).first()
+    return profile_for(entry)
+
+
+def set_engine_profile(db: Session, model_id: str, profile: Any) -> ModelRegistry:
+    """
+    Validate and store a model's engine profile, bumping its version (commits).
+
+    Raises:
+        ValueError: Model not in the registry
+        EngineProfileError: Invalid profile
+    """
+    entry = db.query(ModelRegistry).filter(ModelRegistry.model_id == model_id).first()
+    if entry is None:
+        raise ValueError(f"Model {model_id} not found")
+
+    validated = validate_engine_profile(profile)
+    entry.engine_profile = json.dumps(validated, sort_keys=True) if validated else None
+    entry.engine_profile_version = (entry.engine_profile_version or 0) + 1
+    db.commit()
+    db.refresh(entry)
+
+    logger.info(f"Engine profile for {model_id} is now version {entry.engine_profile_version}: {validated}")
+    return entry
@@ -0,0 +1,62 @@
+"""
+Inference engine backends.
+
+The worker creates engines and sampling params through this module instead of
+importing vLLM directly, so the same pipeline runs on:
+
+- ``vllm`` (default): ``vllm.LLM`` on the GPU
+- ``simulated``: ``SimulatedLLM``, a deterministic CPU model of the engine
+  (see simulated_engine.py), for benchmarks and tests on machines without a
+  GPU. Tune it with ``SIMULATED_ENGINE_CONFIG`` (JSON overrides of
+  ``SimulatedEngineConfig``).
+
+vLLM is imported on first use, so the simulated backend doesn't need it
+installed.
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+from core.config import settings
+
+from .simulated_engine import SimSamplingParams, SimulatedEngine, SimulatedEngineConfig, SimulatedLLM
+
+ENGINE_BACKENDS = ('vllm', 'simulated')
+
+
+def engine_backend() -> str:
+    backend = settings.INFERENCE_BACKEND
+    if backend not in ENGINE_BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND {backend!r} (expected one of {', '.join(ENGINE_BACKENDS)})")
+    return backend
+
+
+def create_llm(simulation: Optional[SimulatedEngineConfig] = None, **engine_kwargs: Any) -> Any:
+    """Start an engine with vLLM ``LLM`` kwargs on the configured backend."""
+    if engine_backend() == 'simulated':
+        simulation = simulation or SimulatedEngineConfig.from_json(settings.SIMULATED_ENGINE_CONFIG)
+        return SimulatedLLM(simulation=simulation, **engine_kwargs)
+    from vllm import LLM
+    return LLM(**engine_kwargs)
+
+
+def make_sampling_params(**kwargs: Any) -> Any:
+    """``SamplingParams`` for the configured backend."""
+    if engine_backend() == 'simulated':
+        return SimSamplingParams(**kwargs)
+    from vllm import SamplingParams
+    return SamplingParams(**kwargs)
+
+
+def batch_prompt(request: Dict[str, Any]) -> str:
+    """Prompt the worker generates from a batch request line."""
+    messages = request['body']['messages']
+    return "\n".join([f"{m['role']}: {m['content']}" for m in messages])
+
+
+def engine_clock(llm: Any) -> Callable[[], float]:
+    """Time source for measuring an engine's throughput (simulated engines run on a virtual clock)."""
+    engine = getattr(llm, 'llm_engine', None)
+    if isinstance(engine, SimulatedEngine):
+        return lambda: engine.clock
+    return time.time
@@ -0,0 +1,409 @@
+"""
+In-process event bus for job, benchmark and worker progress.
+
+Producers (the worker process, benchmark runs, API handlers) publish small
+JSON events; the API server fans them out to every WebSocket/SSE subscriber.
+Fifty open dashboards therefore cost the same as one, and updates arrive as
+soon as they happen instead of on the next poll.
+
+Transport:
+- Other processes call ``publish_event()``, which sends a fire-and-forget
+  datagram to a Unix socket (``settings.EVENT_SOCKET_PATH``). If the API is not
+  running, the event is dropped - events are a latency optimization, the DB
+  remains the source of truth.
+- Inside the API process, ``get_event_bus().publish()`` delivers directly.
+
+The socket has a fixed path, so only one API process can own it: run the API
+as a single process (no ``uvicorn --workers N``). ``EventBus.start()`` refuses
+to take over a socket another live process is bound to; a second API process
+serves requests but its WebSocket/SSE clients get no pushed events.
+
+State that is not pushed by a producer (e.g. the list of running benchmarks
+for the workbench) is refreshed by shared pollers registered with
+``EventBus.add_poller()``. Each poller runs once per interval for all
+subscribers, and only while at least one subscriber is connected.
+
+Derived state that changes on events (e.g. the ``/v1/queue`` response for the
+queue dashboard) is rebuilt by snapshots registered with
+``EventBus.add_snapshot()``: once per burst of trigger events, not once per
+subscriber. ``*.snapshot`` events are replayed to new subscribers.
+
+Event format:
+    {"type": "batch.progress", "timestamp": 1730000000.0, "batch_id": "...", ...}
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from core.config import settings
+from core.batch_app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Datagrams above this size are dropped by publish_event() (Unix datagram
+# sockets typically allow ~200 KB; progress events are a few hundred bytes)
+MAX_EVENT_BYTES = 64 * 1024
+
+# Per-subscriber buffer; slow consumers drop their oldest events
+SUBSCRIBER_QUEUE_SIZE = 256
+
+_publish_socket: Optional[socket.socket] = None
+
+
+class EventSocketInUseError(OSError):
+    """Another live process (a second API process) is bound to the event socket."""
+
+
+def _socket_in_use(path: Path) -> bool:
+    """True if a process is bound to the Unix datagram socket at ``path`` (False for a stale file)."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        probe.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def make_event(event_type: str, **data: Any) -> Dict[str, Any]:
+    """Build an event dict with type and timestamp."""
+    return {"type": event_type, "timestamp": time.time(), **data}
+
+
+def publish_event(event_type: str, **data: Any) -> bool:
+    """
+    Publish an event to the API server's event bus from any process.
+
+    Never blocks and never raises: if nobody is listening the event is dropped.
+
+    Args:
+        event_type: Dotted event type (e.g. "batch.progress")
+        **data: JSON-serializable event fields
+
+    Returns:
+        True if the datagram was handed to the socket
+    """
+    global _publish_socket
+
+    try:
+        payload = json.dumps(make_event(event_type, **data), default=str).encode('utf-8')
+    except (TypeError, ValueError) as e:
+        logger.debug(f"Event {event_type} not serializable: {e}")
+        return False
+
+    if len(payload) > MAX_EVENT_BYTES:
+        logger.debug(f"Event {event_type} too large ({len(payload)} bytes), dropped")
+        return False
+
+    try:
+        if _publish_socket is None:
+            _publish_socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            _publish_socket.setblocking(False)
+        _publish_socket.sendto(payload, settings.EVENT_SOCKET_PATH)
+        return True
+    except (FileNotFoundError, ConnectionRefusedError, BlockingIOError):
+        # API not running or its buffer is full - drop
+        return False
+    except OSError as e:
+        logger.debug(f"Failed to publish event {event_type}: {e}")
+        return False
+
+
+class Subscription:
+    """A subscriber's bounded event queue. Iterate with ``async for``."""
+
+    def __init__(self, bus: "EventBus", types: Optional[Set[str]] = None, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.bus = bus
+        self.types = types
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        if not self.types:
+            return True
+        event_type = event.get("type", "")
+        # Match exact type or a prefix ("batch" matches "batch.progress")
+        return any(event_type == t or event_type.startswith(t + ".") for t in self.types)
+
+    def put(self, event: Dict[str, Any]) -> None:
+        if not self.wants(event):
+            return
+        if self.queue.full():
+            # Drop oldest so a slow client sees the latest state
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next event, or None on timeout."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+
+@dataclass
+class _Poller:
+    name: str
+    func: Callable[[], Awaitable[None]]
+    interval: float
+    task: Optional[asyncio.Task] = field(default=None)
+
+
+@dataclass
+class _Snapshot:
+    name: str
+    func: Callable[[], Awaitable[None]]
+    triggers: Set[str]
+    debounce: float
+    task: Optional[asyncio.Task] = field(default=None)
+
+
+class EventBus:
+    """
+    Fan-out event bus living in the API server's event loop.
+
+    Keeps the last event per ``key`` (e.g. per batch_id) so new subscribers
+    immediately receive the current state without hitting the database.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[Subscription] = set()
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._pollers: List[_Poller] = []
+        self._snapshots: List[_Snapshot] = []
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._socket_path: Optional[str] = None
+        self.published = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Deliver an event to all subscribers (must run in the bus loop)."""
+        self.published += 1
+        key = self._state_key(event)
+        if key:
+            if event.get("final"):
+                self._latest.pop(key, None)
+            else:
+                self._latest[key] = event
+
+        for subscription in list(self._subscribers):
+            subscription.put(event)
+
+        if self._subscribers:
+            for snapshot in self._snapshots:
+                if event.get("type") in snapshot.triggers:
+                    self._schedule_snapshot(snapshot)
+
+    @staticmethod
+    def _state_key(event: Dict[str, Any]) -> Optional[str]:
+        event_type: str = event.get("type", "")
+        if event_type.endswith(".snapshot"):
+            return event_type
+        for id_field in ("batch_id", "benchmark_id", "worker_id"):
+            if id_field in event:
+                return f"{event_type.split('.')[0]}:{event[id_field]}"
+        return None
+
+    def latest(self) -> List[Dict[str, Any]]:
+        """Last known event per batch/benchmark/worker, and the last of each snapshot."""
+        return list(self._latest.values())
+
+    # ------------------------------------------------------------------
+    # Subscribing
+    # ------------------------------------------------------------------
+
+    def subscribe(self, types: Optional[Set[str]] = None, replay_latest: bool = True) -> Subscription:
+        """
+        Subscribe to events.
+
+        Args:
+            types: Event types (or prefixes like "batch") to receive; None = all
+            replay_latest: Queue the last known state events immediately
+        """
+        subscription = Subscription(self, types)
+        if replay_latest:
+            for event in self.latest():
+                subscription.put(event)
+
+        self._subscribers.add(subscription)
+        if len(self._subscribers) == 1:
+            self._start_pollers()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+        if not self._subscribers:
+            self._stop_pollers()
+
+    # ------------------------------------------------------------------
+    # Shared pollers
+    # ------------------------------------------------------------------
+
+    def add_poller(self, name: str, func: Callable[[], Awaitable[None]], interval: float) -> None:
+        """
+        Register a shared poller that publishes state nobody pushes.
+
+        ``func`` should call ``bus.publish()``; it runs every ``interval``
+        seconds while there is at least one subscriber.
+        """
+        poller = _Poller(name=name, func=func, interval=interval)
+        self._pollers.append(poller)
+        if self._subscribers:
+            self._start_poller(poller)
+
+    def _start_pollers(self) -> None:
+        for poller in self._pollers:
+            self._start_poller(poller)
+
+    def _start_poller(self, poller: _Poller) -> None:
+        if poller.task and not poller.task.done():
+            return
+        try:
+            poller.task = asyncio.get_running_loop().create_task(self._run_poller(poller))
+        except RuntimeError:
+            pass  # No running loop (e.g. sync tests) - pollers start on next subscribe
+
+    def _stop_pollers(self) -> None:
+        for poller in self._pollers:
+            if poller.task:
+                poller.task.cancel()
+                poller.task = None
+
+    async def _run_poller(self, poller: _Poller) -> None:
+        while self._subscribers:
+            try:
+                await poller.func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event poller {poller.name} failed: {e}")
+            await asyncio.sleep(poller.interval)
+
+    # ------------------------------------------------------------------
+    # Event-driven snapshots
+    # ------------------------------------------------------------------
+
+    def add_snapshot(self, name: str, func: Callable[[], Awaitable[None]], triggers: Set[str],
+                     debounce: float = 0.25) -> None:
+        """
+        Register derived state rebuilt when any of ``triggers`` is published.
+
+        ``func`` should publish a ``*.snapshot`` event; it runs ``debounce``
+        seconds after the first trigger of a burst, once for all subscribers,
+        and only while there is at least one subscriber.
+        """
+        self._snapshots.append(_Snapshot(name=name, func=func, triggers=set(triggers), debounce=debounce))
+
+    def _schedule_snapshot(self, snapshot: _Snapshot) -> None:
+        if snapshot.task and not snapshot.task.done():
+            return  # Already pending - this event is covered by it
+        try:
+            snapshot.task = asyncio.get_running_loop().create_task(self._run_snapshot(snapshot))
+        except RuntimeError:
+            pass  # No running loop (e.g. sync tests)
+
+    async def _run_snapshot(self, snapshot: _Snapshot) -> None:
+        await asyncio.sleep(snapshot.debounce)
+        try:
+            await snapshot.func()
+        except Exception as e:
+            logger.warning(f"Event snapshot {snapshot.name} failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Cross-process transport
+    # ------------------------------------------------------------------
+
+    async def start(self, socket_path: Optional[str] = None) -> None:
+        """
+        Bind the Unix datagram socket that other processes publish to.
+
+        Raises:
+            EventSocketInUseError: Another API process owns the socket
+        """
+        socket_path = socket_path or settings.EVENT_SOCKET_PATH
+        path = Path(socket_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            if _socket_in_use(path):
+                raise EventSocketInUseError(
+                    f"Event socket {path} is in use by another process; run a single API process")
+            path.unlink()  # Stale socket from a previous run
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(path))
+        sock.setblocking(False)
+
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _EventProtocol(self), sock=sock
+        )
+        self._socket_path = str(path)
+        logger.info(f"Event bus listening on {path}")
+
+    async def stop(self) -> None:
+        self._stop_pollers()
+        for snapshot in self._snapshots:
+            if snapshot.task:
+                snapshot.task.cancel()
+                snapshot.task = None
+        if self._transport:
+            self._transport.close()
+            self._transport = None
+        if self._socket_path and os.path.exists(self._socket_path):
+            os.unlink(self._socket_path)
+        self._socket_path = None
+
+
+class _EventProtocol(asyncio.DatagramProtocol):
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+
+    def datagram_received(self, data: bytes, addr: Any) -> None:
+        try:
+            event = json.loads(data)
+        except ValueError:
+            logger.debug("Ignoring malformed event datagram")
+            return
+        if isinstance(event, dict) and "type" in event:
+            self.bus.publish(event)
+
+
+_event_bus: Optional[EventBus] = None
+
+
+def get_event_bus() -> EventBus:
+    """Get the API process's event bus (singleton)."""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = EventBus()
+    return _event_bus
@@ -0,0 +1,594 @@
+"""
+GPU telemetry: one NVML handle and a background sampler with a ring buffer.
+
+Each process (worker, API) has one ``GPUTelemetry`` (``get_gpu_telemetry()``).
+It initializes NVML once and keeps the device handles. While started, a
+daemon thread reads every device each ``GPU_TELEMETRY_INTERVAL_SECONDS`` into
+a fixed-size ring buffer (``GPU_TELEMETRY_BUFFER_SIZE`` samples per device)
+and updates the ``vllm_gpu_*`` gauges.
+
+Callers:
+    latest()            Most recent sample (a fresh read if the buffered one
+                        is older than ``max_age``). Used by the health checks
+                        and the heartbeat
+    read_now()          Fresh read through the held handle (polling for
+                        released memory after an unload)
+    series(since=...)   Buffered samples in a time window (per-job timelines)
+
+Samples hold memory, GPU/memory utilization, power draw and limit, the total
+energy counter (Volta+), SM/memory clocks and temperature. Fields a device
+doesn't support are None.
+
+Backends (``GPU_TELEMETRY_BACKEND``):
+    auto   NVML if it initializes, else ``fake`` with the simulated inference
+           backend, else none
+    nvml   NVML only
+    fake   ``FakeGPUBackend`` (fixed, adjustable readings for CPU-only runs)
+    none   No telemetry (health checks report healthy with a warning)
+
+Per-job timelines are written by the worker next to the results file
+(``{batch_id}_results.jsonl.gpu.tsv``, see ``append_timeline``).
+"""
+
+import csv
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.config import settings
+from core.batch_app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+TIMELINE_SUFFIX = ".gpu.tsv"
+NVML_RETRY_SECONDS = 60.0  # Wait before retrying a failed NVML init
+
+
+@dataclass
+class GPUSample:
+    """One reading of one device."""
+
+    timestamp: float  # Epoch seconds
+    device_index: int
+    memory_used_bytes: int
+    memory_total_bytes: int
+    utilization_percent: Optional[float] = None
+    memory_utilization_percent: Optional[float] = None
+    power_watts: Optional[float] = None
+    power_limit_watts: Optional[float] = None
+    energy_joules: Optional[float] = None  # Device energy counter since driver load
+    sm_clock_mhz: Optional[int] = None
+    memory_clock_mhz: Optional[int] = None
+    temperature_c: Optional[float] = None
+
+    @property
+    def memory_free_bytes(self) -> int:
+        return max(self.memory_total_bytes - self.memory_used_bytes, 0)
+
+    @property
+    def memory_percent(self) -> float:
+        return self.memory_used_bytes / self.memory_total_bytes * 100 if self.memory_total_bytes else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'memory_percent': round(self.memory_percent, 2)}
+
+
+SAMPLE_COLUMNS = tuple(f.name for f in fields(GPUSample))
+
+
+# =============================================================================
+# Backends
+# =============================================================================
+
+def _number(value: Any) -> Optional[float]:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _optional(read: Callable[[], Any], scale: float = 1.0) -> Optional[float]:
+    """NVML field or None when the device/driver doesn't support it."""
+    try:
+        value = _number(read())
+    except Exception:
+        return None
+    return value * scale if value is not None else None
+
+
+class NVMLBackend:
+    """Reads devices through NVML, initialized once for the life of the backend."""
+
+    name = 'nvml'
+
+    def __init__(self):
+        import pynvml
+        pynvml.nvmlInit()
+        self.nvml = pynvml
+        count = _optional(pynvml.nvmlDeviceGetCount)
+        self.handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(int(count or 1))]
+
+    def device_count(self) -> int:
+        return len(self.handles)
+
+    def read(self, device_index: int) -> GPUSample:
+        nvml, handle = self.nvml, self.handles[device_index]
+        memory = nvml.nvmlDeviceGetMemoryInfo(handle)
+        utilization = _optional(lambda: nvml.nvmlDeviceGetUtilizationRates(handle).gpu)
+        memory_utilization = _optional(lambda: nvml.nvmlDeviceGetUtilizationRates(handle).memory)
+        sm_clock = _optional(lambda: nvml.nvmlDeviceGetClockInfo(handle, nvml.NVML_CLOCK_SM))
+        memory_clock = _optional(lambda: nvml.nvmlDeviceGetClockInfo(handle, nvml.NVML_CLOCK_MEM))
+        return GPUSample(
+            timestamp=time.time(),
+            device_index=device_index,
+            memory_used_bytes=int(memory.used),
+            memory_total_bytes=int(memory.total),
+            utilization_percent=utilization,
+            memory_utilization_percent=memory_utilization,
+            power_watts=_optional(lambda: nvml.nvmlDeviceGetPowerUsage(handle), 1e-3),
+            power_limit_watts=_optional(lambda: nvml.nvmlDeviceGetEnforcedPowerLimit(handle), 1e-3),
+            energy_joules=_optional(lambda: nvml.nvmlDeviceGetTotalEnergyConsumption(handle), 1e-3),
+            sm_clock_mhz=int(sm_clock) if sm_clock is not None else None,
+            memory_clock_mhz=int(memory_clock) if memory_clock is not None else None,
+            temperature_c=_optional(lambda: nvml.nvmlDeviceGetTemperature(handle, nvml.NVML_TEMPERATURE_GPU)),
+        )
+
+    def close(self) -> None:
+        try:
+            self.nvml.nvmlShutdown()
+        except Exception:
+            pass
+
+
+class FakeGPUBackend:
+    """
+    Deterministic stand-in for CPU-only runs and tests.
+
+    Readings are the attributes below; change them to simulate load. The
+    energy counter integrates ``power_watts`` over wall time between reads,
+    like the NVML counter.
+    """
+
+    name = 'fake'
+
+    def __init__(self, devices: int = 1, memory_total_bytes: int = 16 * 1024 ** 3, memory_used_bytes: int = 0,
+                 utilization_percent: float = 0.0, power_watts: float = 30.0, power_limit_watts: float = 320.0,
+                 temperature_c: float = 40.0, clock: Callable[[], float] = time.time):
+        self.devices = devices
+        self.memory_total_bytes = memory_total_bytes
+        self.memory_used_bytes = memory_used_bytes
+        self.utilization_percent = utilization_percent
+        self.power_watts = power_watts
+        self.power_limit_watts = power_limit_watts
+        self.temperature_c = temperature_c
+        self.clock = clock
+        self._energy = [0.0] * devices
+        self._last_read: List[Optional[float]] = [None] * devices
+
+    def device_count(self) -> int:
+        return self.devices
+
+    def read(self, device_index: int) -> GPUSample:
+        now = self.clock()
+        last = self._last_read[device_index]
+        if last is not None:
+            self._energy[device_index] += self.power_watts * max(now - last, 0.0)
+        self._last_read[device_index] = now
+        return GPUSample(
+            timestamp=now,
+            device_index=device_index,
+            memory_used_bytes=self.memory_used_bytes,
+            memory_total_bytes=self.memory_total_bytes,
+            utilization_percent=self.utilization_percent,
+            memory_utilization_percent=self.utilization_percent / 2,
+            power_watts=self.power_watts,
+            power_limit_watts=self.power_limit_watts,
+            energy_joules=self._energy[device_index],
+            sm_clock_mhz=2505 if self.utilization_percent else 210,
+            memory_clock_mhz=11201,
+            temperature_c=self.temperature_c,
+        )
+
+    def close(self) -> None:
+        pass
+
+
+def create_backend(kind: Optional[str] = None) -> Any:
+    """Backend for ``GPU_TELEMETRY_BACKEND`` (None when telemetry is unavailable)."""
+    kind = (kind or settings.GPU_TELEMETRY_BACKEND).lower()
+    if kind == 'none':
+        return None
+    if kind == 'fake':
+        return FakeGPUBackend()
+    if kind not in ('auto', 'nvml'):
+        raise ValueError(f"Unknown GPU_TELEMETRY_BACKEND: {kind} (expected auto, nvml, fake or none)")
+    try:
+        return NVMLBackend()
+    except Exception as e:
+        if kind == 'auto' and settings.INFERENCE_BACKEND == 'simulated':
+            return FakeGPUBackend()
+        logger.debug(f"NVML unavailable, GPU telemetry disabled: {e}")
+        return None
+
+
+# =============================================================================
+# Sampler
+# =============================================================================
+
+class GPUTelemetry:
+    """
+    Shared GPU reader with a background sampler.
+
+    Args:
+        backend: Backend instance, or None to create one from settings on
+            first use (retried every ``NVML_RETRY_SECONDS`` if unavailable)
+        interval: Seconds between background samples
+        capacity: Samples kept per device
+    """
+
+    def __init__(self, backend: Any = None, interval: Optional[float] = None, capacity: Optional[int] = None):
+        self.interval = interval or settings.GPU_TELEMETRY_INTERVAL_SECONDS
+        self.capacity = capacity or settings.GPU_TELEMETRY_BUFFER_SIZE
+        self._backend = backend
+        self._backend_checked_at: Optional[float] = time.monotonic() if backend is not None else None
+        self._buffers: Dict[int, Deque[GPUSample]] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[GPUSample], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def backend(self) -> Any:
+        if self._backend is None and (self._backend_checked_at is None
+                                      or time.monotonic() - self._backend_checked_at >= NVML_RETRY_SECONDS):
+            self._backend_checked_at = time.monotonic()
+            self._backend = create_backend()
+        return self._backend
+
+    @property
+    def available(self) -> bool:
+        return self.backend is not None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_listener(self, listener: Callable[[GPUSample], None]) -> None:
+        """Call ``listener`` with every new sample (on the sampling thread)."""
+        self._listeners.append(listener)
+
+    def start(self) -> bool:
+        """Start background sampling (False if no backend is available)."""
+        if self.running:
+            return True
+        if not self.available:
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="gpu-telemetry", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def close(self) -> None:
+        self.stop()
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def sample(self) -> List[GPUSample]:
+        """Read every device into the buffer (what the sampling thread does each interval)."""
+        backend = self.backend
+        if backend is None:
+            return []
+        samples = []
+        for device_index in range(backend.device_count()):
+            try:
+                samples.append(backend.read(device_index))
+            except Exception as e:
+                logger.debug(f"GPU {device_index} read failed: {e}")
+        with self._lock:
+            for sample in samples:
+                buffer = self._buffers.get(sample.device_index)
+                if buffer is None:
+                    buffer = self._buffers[sample.device_index] = deque(maxlen=self.capacity)
+                buffer.append(sample)
+        for sample in samples:
+            for listener in self._listeners:
+                try:
+                    listener(sample)
+                except Exception as e:
+                    logger.debug(f"GPU telemetry listener failed: {e}")
+        return samples
+
+    def read_now(self, device_index: int = 0) -> Optional[GPUSample]:
+        """Fresh reading of one device (None if unavailable), not buffered."""
+        backend = self.backend
+        if backend is None:
+            return None
+        try:
+            sample: GPUSample = backend.read(device_index)
+            return sample
+        except Exception as e:
+            logger.debug(f"GPU {device_index} read failed: {e}")
+            return None
+
+    def latest(self, device_index: int = 0, max_age: Optional[float] = None) -> Optional[GPUSample]:
+        """
+        Most recent sample of a device.
+
+        Returns the buffered sample if it is at most ``max_age`` seconds old
+        (default: two sampling intervals), else a fresh read.
+        """
+        max_age = 2 * self.interval if max_age is None else max_age
+        with self._lock:
+            buffer = self._buffers.get(device_index)
+            sample = buffer[-1] if buffer else None
+        if sample is not None and self.running and time.time() - sample.timestamp <= max_age:
+            return sample
+        return self.read_now(device_index)
+
+    def series(self, device_index: Optional[int] = None, since: Optional[float] = None,
+               until: Optional[float] = None) -> List[GPUSample]:
+        """Buffered samples (all devices if ``device_index`` is None) in a time window, oldest first."""
+        with self._lock:
+            buffers = [self._buffers.get(device_index, ())] if device_index is not None else list(self._buffers.values())
+            samples = [s for buffer in buffers for s in buffer
+                       if (since is None or s.timestamp >= since) and (until is None or s.timestamp <= until)]
+        return sorted(samples, key=lambda s: (s.timestamp, s.device_index))
+
+
+_telemetry: Optional[GPUTelemetry] = None
+_telemetry_lock = threading.Lock()
+
+
+def get_gpu_telemetry() -> GPUTelemetry:
+    """The process-wide telemetry instance."""
+    global _telemetry
+    if _telemetry is None:
+        with _telemetry_lock:
+            if _telemetry is None:
+                _telemetry = GPUTelemetry()
+    return _telemetry
+
+
+def reset_gpu_telemetry() -> None:
+    """Stop and drop the process-wide instance (tests, backend changes)."""
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is not None:
+            _telemetry.close()
+        _telemetry = None
+
+
+def export_sample_metrics(sample: GPUSample) -> None:
+    """Sampler listener updating the ``vllm_gpu_*`` gauges."""
+    from core.batch_app import metrics
+
+    metrics.update_gpu_metrics(
+        gpu_id=str(sample.device_index),
+        memory_used=sample.memory_used_bytes,
+        memory_total=sample.memory_total_bytes,
+        temperature=sample.temperature_c or 0,
+        utilization=sample.utilization_percent or 0,
+    )
+    if sample.power_watts is not None:
+        metrics.gpu_power_watts.labels(gpu_id=str(sample.device_index)).set(sample.power_watts)
+    if sample.sm_clock_mhz is not None:
+        metrics.gpu_sm_clock_mhz.labels(gpu_id=str(sample.device_index)).set(sample.sm_clock_mhz)
+
+
+def start_gpu_telemetry() -> GPUTelemetry:
+    """Start the process-wide sampler with Prometheus export (worker and API startup)."""
+    telemetry = get_gpu_telemetry()
+    if not telemetry.running:
+        telemetry.add_listener(export_sample_metrics)
+        if telemetry.start():
+            logger.info(f"GPU telemetry sampling every {telemetry.interval:g}s ({telemetry.backend.name})")
+    return telemetry
+
+
+# =============================================================================
+# Shared readers
+# =============================================================================
+
+def check_gpu_health(device_index: int = 0) -> dict:
+    """
+    GPU health for admission control and heartbeats.
+
+    Returns:
+        dict with 'healthy' (bool), 'reason' (str or None), 'memory_percent',
+        'temperature_c' and, when known, 'utilization_percent' and
+        'power_watts'. Without telemetry the GPU is assumed healthy and
+        'warning' says why.
+    """
+    sample = get_gpu_telemetry().latest(device_index)
+    if sample is None:
+        return {
+            'healthy': True,
+            'reason': None,
+            'memory_percent': 0,
+            'temperature_c': 0,
+            'warning': 'GPU monitoring unavailable',
+        }
+
+    memory_percent = sample.memory_percent
+    temperature = sample.temperature_c if sample.temperature_c is not None else 0
+    reason = None
+    if memory_percent >= settings.GPU_MEMORY_THRESHOLD:
+        reason = f"GPU memory at {memory_percent:.1f}%"
+    if temperature >= settings.GPU_TEMP_THRESHOLD:
+        reason = f"GPU temperature at {temperature}°C"
+    return {
+        'healthy': reason is None,
+        'reason': reason,
+        'memory_percent': memory_percent,
+        'temperature_c': temperature,
+        'utilization_percent': sample.utilization_percent,
+        'power_watts': sample.power_watts,
+    }
+
+
+def gpu_memory_info(device_index: int = 0) -> Optional[Tuple[int, int]]:
+    """
+    (free_bytes, total_bytes) from a fresh read, or None without telemetry.
+
+    NVML reports device-wide usage, so memory held by other processes
+    (including zombie EngineCore processes) is counted.
+    """
+    sample = get_gpu_telemetry().read_now(device_index)
+    if sample is None:
+        return None
+    return sample.memory_free_bytes, sample.memory_total_bytes
+
+
+# =============================================================================
+# Timelines
+# =============================================================================
+
+def timeline_path_for(results_path: str | Path) -> Path:
+    """Path of the per-job GPU timeline sidecar for a results file."""
+    return Path(f"{results_path}{TIMELINE_SUFFIX}")
+
+
+def _format(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return f"{value:.3f}".rstrip('0').rstrip('.') if value else '0'
+    return str(value)
+
+
+def append_timeline(results_path: str | Path, samples: Iterable[GPUSample]) -> int:
+    """Append samples to a job's timeline (writing the header first if the file is new)."""
+    samples = list(samples)
+    if not samples:
+        return 0
+    path = timeline_path_for(results_path)
+    lines = [] if path.exists() and path.stat().st_size else ['\t'.join(SAMPLE_COLUMNS) + '\n']
+    lines.extend('\t'.join(_format(getattr(s, column)) for column in SAMPLE_COLUMNS) + '\n' for s in samples)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(''.join(lines))
+    return len(samples)
+
+
+def _optional_int(value: str) -> Optional[int]:
+    return int(value) if value else None
+
+
+def _optional_float(value: str) -> Optional[float]:
+    return float(value) if value else None
+
+
+def read_timeline(results_path: str | Path) -> Iterator[GPUSample]:
+    """Samples of a job's timeline (incomplete or malformed lines are skipped)."""
+    path = timeline_path_for(results_path)
+    if not path.exists():
+        return
+    with open(path, encoding='utf-8', newline='') as f:
+        for record in csv.DictReader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if None in record.values() or None in record:
+                continue
+            try:
+                sample = GPUSample(
+                    timestamp=float(record['timestamp']),
+                    device_index=int(record['device_index']),
+                    memory_used_bytes=int(record['memory_used_bytes']),
+                    memory_total_bytes=int(record['memory_total_bytes']),
+                    utilization_percent=_optional_float(record['utilization_percent']),
+                    memory_utilization_percent=_optional_float(record['memory_utilization_percent']),
+                    power_watts=_optional_float(record['power_watts']),
+                    power_limit_watts=_optional_float(record['power_limit_watts']),
+                    energy_joules=_optional_float(record['energy_joules']),
+                    sm_clock_mhz=_optional_int(record['sm_clock_mhz']),
+                    memory_clock_mhz=_optional_int(record['memory_clock_mhz']),
+                    temperature_c=_optional_float(record['temperature_c']),
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            yield sample
+
+
+def downsample(samples: List[GPUSample], max_points: int) -> List[GPUSample]:
+    """Every n-th sample so at most ``max_points`` remain (per device)."""
+    devices: Dict[int, List[GPUSample]] = {}
+    for sample in samples:
+        devices.setdefault(sample.device_index, []).append(sample)
+    kept = []
+    for device_samples in devices.values():
+        step = max(-(-len(device_samples) // max(max_points, 1)), 1)
+        kept.extend(device_samples[::step])
+    return sorted(kept, key=lambda s: (s.timestamp, s.device_index))
+
+
+def summarize_samples(samples: Iterable[GPUSample]) -> Dict[str, Any]:
+    """
+    Utilization, memory, power and temperature over a set of samples (all devices).
+
+    ``energy_joules`` is the device energy counter delta when available, else
+    power integrated over time.
+    """
+    by_device: Dict[int, List[GPUSample]] = {}
+    for sample in samples:
+        by_device.setdefault(sample.device_index, []).append(sample)
+    if not by_device:
+        return {'samples': 0, 'devices': 0}
+
+    def stats(values: List[float]) -> Optional[Dict[str, float]]:
+        return {'mean': round(sum(values) / len(values), 2), 'max': round(max(values), 2)} if values else None
+
+    all_samples = [s for device in by_device.values() for s in device]
+    energy = 0.0
+    for device in by_device.values():
+        device.sort(key=lambda s: s.timestamp)
+        counters = [s.energy_joules for s in device if s.energy_joules is not None]
+        if len(counters) >= 2 and counters[-1] >= counters[0]:
+            energy += counters[-1] - counters[0]
+            continue
+        for previous, current in zip(device, device[1:]):
+            if previous.power_watts is not None and current.power_watts is not None:
+                energy += (previous.power_watts + current.power_watts) / 2 * (current.timestamp - previous.timestamp)
+
+    start = min(s.timestamp for s in all_samples)
+    end = max(s.timestamp for s in all_samples)
+    return {
+        'samples': len(all_samples),
+        'devices': len(by_device),
+        'start': start,
+        'end': end,
+        'seconds': round(end - start, 3),
+        'utilization_percent': stats([s.utilization_percent for s in all_samples if s.utilization_percent is not None]),
+        'memory_used_gb': stats([s.memory_used_bytes / 1024 ** 3 for s in all_samples]),
+        'power_watts': stats([s.power_watts for s in all_samples if s.power_watts is not None]),
+        'temperature_c': stats([s.temperature_c for s in all_samples if s.temperature_c is not None]),
+        'energy_joules': round(energy, 3),
+    }
+
+
+def format_summary(summary: Dict[str, Any]) -> List[str]:
+    """Log lines for a timeline summary."""
+    def line(label: str, key: str, unit: str, digits: int = 0) -> Optional[str]:
+        stats = summary.get(key)
+        if not stats:
+            return None
+        return f"{label + ':':<14}mean {stats['mean']:.{digits}f}{unit}  max {stats['max']:.{digits}f}{unit}"
+
+    lines = [f"Samples:      {summary['samples']:,} over {summary['seconds']:.0f}s ({summary['devices']} GPU)"]
+    lines += filter(None, [
+        line("Utilization", 'utilization_percent', '%'),
+        line("Memory", 'memory_used_gb', ' GB', 1),
+        line("Power", 'power_watts', ' W'),
+        line("Temperature", 'temperature_c', '°C'),
+    ])
+    if summary.get('energy_joules'):
+        lines.append(f"Energy:       {summary['energy_joules'] / 3600:.2f} Wh")
+    return lines
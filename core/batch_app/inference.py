@@ -6,16 +6,31 @@ Used by:
 - API endpoints for single-request inference
 
 This is separate from the batch worker to avoid conflicts.
+
+The engine holds one model at a time, either as a synchronous ``LLM``
+(micro-batched requests) or as an ``AsyncLLMEngine`` (token streaming).
+Once the streaming engine is loaded it also serves micro-batched requests for
+its model, so mixed streaming and non-streaming traffic does not reload the
+weights. Loads and engine switches run on the micro-batcher's thread, so they
+never overlap a running batch, and a switch away from the streaming engine
+waits until no stream is reading from it.
 """
 
+import asyncio
+import threading
 import time
-from typing import Dict, Any, List, Optional, cast
-from vllm import LLM, SamplingParams
+import uuid
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple, cast
+from vllm import LLM, AsyncEngineArgs, AsyncLLMEngine, SamplingParams
 from pathlib import Path
 
 from core.config import settings
 from core.batch_app.logging_config import get_logger
 from core.batch_app.database import SessionLocal, ModelRegistry
+from core.batch_app.engine_profiles import profile_for
+from core.batch_app.lora import lora_enabled, lora_engine_config, make_lora_request, resolve_serving_model
+from core.batch_app.micro_batcher import MicroBatcher
+from core.batch_app.model_lifecycle import release_memory, shutdown_llm
 
 logger = get_logger(__name__)
 
@@ -27,7 +42,8 @@ class InferenceEngine:
     Unlike the batch worker, this:
     - Keeps model loaded in memory
     - Processes single requests quickly
-    - Doesn't do chunking or batching
+    - Doesn't do chunking (concurrent requests are micro-batched, see
+      ``generate_batch`` and ``get_inference_batcher``)
     - Optimized for low latency
     """
     
@@ -35,22 +51,14 @@ class InferenceEngine:
         self.current_llm: Optional[LLM] = None
         self.current_model: Optional[str] = None
         self.load_time: Optional[float] = None
-    
-    def load_model(self, model_id: str) -> None:
-        """
-        Load model if not already loaded.
-        
-        Args:
-            model_id: Model identifier (HuggingFace ID or local path)
-        """
-        # If model already loaded, skip
-        if self.current_model == model_id and self.current_llm is not None:
-            logger.info(f"Model {model_id} already loaded, reusing")
-            return
-        
-        logger.info(f"Loading model: {model_id}")
-        start_time = time.time()
-        
+        self.async_engine: Optional[AsyncLLMEngine] = None
+        self.async_model: Optional[str] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None  # Loop the streaming engine runs on
+        self._active_streams = 0
+        self._streams_idle = threading.Condition()
+
+    def _engine_config(self, model_id: str) -> Dict[str, Any]:
+        """vLLM engine kwargs for a model (local path from the registry if installed)."""
         # Check if model is in registry (get local path if GGUF)
         db = SessionLocal()
         try:
@@ -66,16 +74,52 @@ class InferenceEngine:
                 # Use HuggingFace model ID
                 model_path = model_id
                 logger.info(f"Using HuggingFace model: {model_path}")
+            lora_config = lora_engine_config(db, model_id)
+            profile = profile_for(model_entry)
         finally:
             db.close()
         
         # Configure vLLM
-        vllm_config = {
+        return {
             "model": model_path,
             "gpu_memory_utilization": settings.GPU_MEMORY_UTILIZATION,
             "max_model_len": 8192,  # Reasonable default for single inference
             "trust_remote_code": True,
+            **profile.engine_kwargs(),
+            **lora_config,
         }
+
+    @staticmethod
+    def _sampling_params(params: Dict[str, Any]) -> SamplingParams:
+        return SamplingParams(
+            max_tokens=params.get("max_tokens", 512),
+            temperature=params.get("temperature", 0.7),
+            top_p=params.get("top_p", 0.9),
+            stop=params.get("stop") or []
+        )
+    
+    def load_model(self, model_id: str, require_lora: bool = False) -> None:
+        """
+        Load model if not already loaded.
+        
+        Args:
+            model_id: Model identifier (HuggingFace ID or local path)
+            require_lora: Reload if the loaded engine lacks LoRA support
+        """
+        # If model already loaded, skip
+        if (self.current_model == model_id and self.current_llm is not None
+                and (not require_lora or lora_enabled(self.current_llm))):
+            logger.info(f"Model {model_id} already loaded, reusing")
+            return
+        
+        logger.info(f"Loading model: {model_id}")
+        start_time = time.time()
+        
+        vllm_config = self._engine_config(model_id)
+
+        # Only one engine fits on the GPU
+        self._wait_for_streams()
+        self.unload_async_engine()
         
         # Load model
         try:
@@ -119,50 +163,129 @@ class InferenceEngine:
                 "latency_ms": 1234
             }
         """
-        # Load model if needed
-        self.load_model(model_id)
-        
-        # Configure sampling
-        sampling_params = SamplingParams(
-            max_tokens=max_tokens,
-            temperature=temperature,
-            top_p=top_p,
-            stop=stop or []
-        )
-        
+        return self.generate_batch(
+            model_id,
+            [prompt],
+            [{"max_tokens": max_tokens, "temperature": temperature, "top_p": top_p, "stop": stop}]
+        )[0]
+
+    def generate_batch(
+        self,
+        model_id: str,
+        prompts: List[str],
+        params_list: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate completions for several prompts in one engine call.
+
+        vLLM schedules all prompts through the same step loop; each prompt
+        keeps its own sampling parameters.
+
+        Args:
+            model_id: Model to use
+            prompts: Input prompts
+            params_list: Per-prompt sampling kwargs (max_tokens, temperature,
+                top_p, stop)
+
+        Returns:
+            One result per prompt, same format as generate(); latency_ms is
+            the duration of the whole batch
+        """
+        # Load model if needed (LoRA fine-tunes run on their base model)
+        db = SessionLocal()
+        try:
+            serving = resolve_serving_model(db, model_id)
+        finally:
+            db.close()
+
+        # The streaming engine already holds this model: use it rather than swap engines
+        if (self.async_engine is not None and self.async_model == serving.base_model
+                and (serving.adapter is None or lora_enabled(self.async_engine))):
+            return self._generate_on_async_engine(model_id, prompts, params_list, make_lora_request(serving.adapter))
+
+        self.load_model(serving.base_model, require_lora=serving.adapter is not None)
+
+        if self.current_llm is None:
+            return [{'error': 'Model not loaded', 'model': model_id} for _ in prompts]
+
+        sampling_params = [self._sampling_params(params) for params in params_list]
+
         # Generate
         start_time = time.time()
         try:
-            if self.current_llm is None:
-                return {
-                    'error': 'Model not loaded',
-                    'model': model_id
-                }
+            outputs = self.current_llm.generate(
+                prompts, sampling_params, lora_request=make_lora_request(serving.adapter)
+            )
+        except Exception as e:
+            logger.error(f"Inference failed: {e}")
+            raise
+        latency_ms = (time.time() - start_time) * 1000
 
-            outputs = self.current_llm.generate([prompt], sampling_params)
-            latency_ms = (time.time() - start_time) * 1000
-            
-            # Extract result
-            output = outputs[0]
-            generated_text = output.outputs[0].text
-            
+        results = []
+        for output in outputs:
             # Calculate token counts (approximate)
             prompt_tokens = len(output.prompt_token_ids) if hasattr(output, 'prompt_token_ids') and output.prompt_token_ids is not None else 0
             completion_tokens = len(output.outputs[0].token_ids) if hasattr(output.outputs[0], 'token_ids') else 0
-            
-            return {
-                "text": generated_text,
+
+            results.append({
+                "text": output.outputs[0].text,
                 "model": model_id,
+                "finish_reason": getattr(output.outputs[0], 'finish_reason', None),
                 "usage": {
                     "prompt_tokens": prompt_tokens,
                     "completion_tokens": completion_tokens,
                     "total_tokens": prompt_tokens + completion_tokens
                 },
                 "latency_ms": int(latency_ms)
-            }
+            })
+        return results
+
+    def _generate_on_async_engine(
+        self,
+        model_id: str,
+        prompts: List[str],
+        params_list: List[Dict[str, Any]],
+        lora_request: Any = None
+    ) -> List[Dict[str, Any]]:
+        """``generate_batch`` on the loaded streaming engine (blocks the batch thread, not its event loop)."""
+        assert self.async_engine is not None and self._async_loop is not None
+        engine = self.async_engine
+
+        async def run_one(prompt: str, params: Dict[str, Any]) -> Any:
+            final = None
+            async for output in engine.generate(prompt, self._sampling_params(params), f"batch-{uuid.uuid4().hex}",
+                                                lora_request=lora_request):
+                final = output
+            return final
+
+        async def run_all() -> List[Any]:
+            return await asyncio.gather(*(run_one(p, params) for p, params in zip(prompts, params_list)))
+
+        start_time = time.time()
+        try:
+            outputs = asyncio.run_coroutine_threadsafe(run_all(), self._async_loop).result()
         except Exception as e:
             logger.error(f"Inference failed: {e}")
             raise
+        latency_ms = (time.time() - start_time) * 1000
+
+        results = []
+        for output in outputs:
+            completion = output.outputs[0]
+            prompt_tokens = len(output.prompt_token_ids or [])
+            completion_tokens = len(completion.token_ids)
+            results.append({
+                "text": completion.text,
+                "model": model_id,
+                "finish_reason": completion.finish_reason,
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                },
+                "latency_ms": int(latency_ms)
+            })
+        return results
     
     def generate_chat(
         self,
@@ -187,22 +310,7 @@ class InferenceEngine:
         Returns:
             Same format as generate()
         """
-        # Convert messages to prompt
-        # Simple format: concatenate with role prefixes
-        prompt_parts = []
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            
-            if role == "system":
-                prompt_parts.append(f"System: {content}")
-            elif role == "user":
-                prompt_parts.append(f"User: {content}")
-            elif role == "assistant":
-                prompt_parts.append(f"Assistant: {content}")
-        
-        prompt_parts.append("Assistant:")  # Prompt for response
-        prompt = "\n\n".join(prompt_parts)
+        prompt = render_chat_prompt(messages)
         
         # Generate
         return self.generate(
@@ -214,29 +322,171 @@ class InferenceEngine:
             stop=stop
         )
     
+    def load_async_engine(self, model_id: str, require_lora: bool = False) -> AsyncLLMEngine:
+        """
+        Load the streaming engine for a model if not already loaded.
+
+        Blocking; call via ``get_inference_batcher().run_exclusive()`` from
+        async code.
+
+        Args:
+            model_id: Base model to load (not a LoRA fine-tune)
+            require_lora: Reload if the loaded engine lacks LoRA support
+        """
+        if (self.async_model == model_id and self.async_engine is not None
+                and (not require_lora or lora_enabled(self.async_engine))):
+            return self.async_engine
+
+        logger.info(f"Loading streaming engine: {model_id}")
+        start_time = time.time()
+        engine_args = AsyncEngineArgs(**self._engine_config(model_id))
+
+        # Only one engine fits on the GPU
+        self._wait_for_streams()
+        self.unload_async_engine()
+        self.unload_model()
+
+        try:
+            self.async_engine = AsyncLLMEngine.from_engine_args(engine_args)
+            self.async_model = model_id
+            self.load_time = time.time() - start_time
+            logger.info(f"Streaming engine loaded in {self.load_time:.1f}s")
+        except Exception as e:
+            logger.error(f"Failed to load streaming engine {model_id}: {e}")
+            raise
+        return self.async_engine
+
+    def _acquire_async_engine(self, model_id: str, loop: asyncio.AbstractEventLoop) -> Tuple[AsyncLLMEngine, Any]:
+        """
+        Load the streaming engine for a model and count a stream on it.
+
+        Runs on the batch thread, so no switch is in progress. LoRA fine-tunes
+        run on their base model; returns the engine and the LoRA request.
+        """
+        db = SessionLocal()
+        try:
+            serving = resolve_serving_model(db, model_id)
+        finally:
+            db.close()
+        engine = self.load_async_engine(serving.base_model, require_lora=serving.adapter is not None)
+        self._async_loop = loop
+        with self._streams_idle:
+            self._active_streams += 1
+        return engine, make_lora_request(serving.adapter)
+
+    def _release_stream(self) -> None:
+        with self._streams_idle:
+            self._active_streams -= 1
+            self._streams_idle.notify_all()
+
+    def _wait_for_streams(self) -> None:
+        """Block until no stream is reading from the streaming engine (before unloading it)."""
+        with self._streams_idle:
+            if self._active_streams:
+                logger.info(f"Waiting for {self._active_streams} stream(s) to finish before switching engines")
+            self._streams_idle.wait_for(lambda: self._active_streams == 0)
+
+    async def stream_generate(
+        self,
+        model_id: str,
+        prompt: str,
+        params: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a completion as it is generated.
+
+        Yields cumulative outputs:
+            {"text": "Generated so far", "finish_reason": None | "stop" | "length",
+             "prompt_tokens": 100, "completion_tokens": 12,
+             "submitted_at": <time.monotonic() once the engine was loaded>}
+
+        Closing the iterator (e.g. client disconnect) aborts the request.
+        While the stream is open the engine is not unloaded.
+        """
+        acquire = asyncio.ensure_future(get_inference_batcher().run_exclusive(
+            self._acquire_async_engine, model_id, asyncio.get_running_loop()))
+        try:
+            engine, lora_request = await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # Disconnected during the load: release the stream once it is counted
+            acquire.add_done_callback(
+                lambda f: None if f.cancelled() or f.exception() else self._release_stream())
+            raise
+
+        try:
+            submitted_at = time.monotonic()
+            request_id = f"stream-{uuid.uuid4().hex}"
+            async for output in engine.generate(prompt, self._sampling_params(params), request_id,
+                                                lora_request=lora_request):
+                completion = output.outputs[0]
+                yield {
+                    "text": completion.text,
+                    "finish_reason": completion.finish_reason,
+                    "prompt_tokens": len(output.prompt_token_ids or []),
+                    "completion_tokens": len(completion.token_ids),
+                    "submitted_at": submitted_at
+                }
+        finally:
+            self._release_stream()
+
+    def unload_async_engine(self) -> None:
+        """Shut down the streaming engine to free GPU memory."""
+        if self.async_engine is None:
+            return
+
+        logger.info(f"Unloading streaming engine: {self.async_model}")
+        shutdown = getattr(self.async_engine, 'shutdown', None) or getattr(self.async_engine, 'shutdown_background_loop', None)
+        if shutdown is not None:
+            try:
+                shutdown()
+            except Exception as e:
+                logger.warning(f"Streaming engine shutdown failed: {e}")
+        self.async_engine = None
+        self.async_model = None
+
+        import gc
+        gc.collect()
+        try:
+            import torch
+            torch.cuda.empty_cache()
+        except Exception:
+            pass
+
     def unload_model(self) -> None:
         """Unload current model to free GPU memory."""
         if self.current_llm is not None:
             logger.info(f"Unloading model: {self.current_model}")
+            shutdown_llm(self.current_llm)
             del self.current_llm
             self.current_llm = None
             self.current_model = None
             self.load_time = None
             
-            # Force garbage collection
-            import gc
-            gc.collect()
-            
-            # Clear CUDA cache
-            try:
-                import torch
-                torch.cuda.empty_cache()
-            except:
-                pass
+            # Force garbage collection and clear CUDA cache
+            release_memory()
+
+
+def render_chat_prompt(messages: List[Dict[str, str]]) -> str:
+    """Convert chat messages to a prompt (role prefixes, ending with "Assistant:")."""
+    prompt_parts = []
+    for msg in messages:
+        role = msg.get("role", "user")
+        content = msg.get("content", "")
+
+        if role == "system":
+            prompt_parts.append(f"System: {content}")
+        elif role == "user":
+            prompt_parts.append(f"User: {content}")
+        elif role == "assistant":
+            prompt_parts.append(f"Assistant: {content}")
+
+    prompt_parts.append("Assistant:")  # Prompt for response
+    return "\n\n".join(prompt_parts)
 
 
 # Global inference engine instance
 _inference_engine: Optional[InferenceEngine] = None
+_inference_batcher: Optional[MicroBatcher] = None
 
 
 def get_inference_engine() -> InferenceEngine:
@@ -246,3 +496,14 @@ def get_inference_engine() -> InferenceEngine:
         _inference_engine = InferenceEngine()
     return _inference_engine
 
+
+def get_inference_batcher() -> MicroBatcher:
+    """Get or create the global micro-batcher in front of the inference engine."""
+    global _inference_batcher
+    if _inference_batcher is None:
+        _inference_batcher = MicroBatcher(
+            get_inference_engine().generate_batch,
+            window_ms=settings.INFERENCE_BATCH_WINDOW_MS,
+            max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE
+        )
+    return _inference_batcher
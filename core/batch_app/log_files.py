@@ -0,0 +1,294 @@
+"""
+Log file access: reverse-seek tail, byte-cursor paging, stats and rotation.
+
+Log endpoints must not cost O(file size) per request:
+
+- ``tail_lines()`` seeks backwards from a cursor in fixed-size blocks until it
+  has N lines, so reading the last 500 lines of a 5 GB log reads ~50 KB.
+- ``read_forward()`` pages forward from a byte cursor (only complete lines).
+- ``LogStats`` keeps error/warning counts per file and only scans bytes
+  appended since the previous call; rotation (new inode / truncation) resets it.
+- ``rotate_log_file()`` rotates by size and gzips old generations
+  (``app.log.1.gz`` ... ``app.log.N.gz``). ``gzip_namer``/``gzip_rotator`` give
+  ``logging.handlers.RotatingFileHandler`` the same behaviour.
+- ``worker_log_path()`` is where the worker's stdout log lives, for both the
+  worker (rotation) and the API (log viewer).
+
+Cursors are byte offsets into the current (uncompressed) file.
+"""
+
+import gzip
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.config import settings
+
+TAIL_BLOCK_SIZE = 64 * 1024  # Bytes read per backwards seek
+MAX_PAGE_BYTES = 256 * 1024  # Max bytes returned per forward page
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def worker_log_path() -> Path:
+    """Worker stdout log (settings.WORKER_LOG_FILE, relative to the project root, not the cwd)."""
+    log_file = Path(settings.WORKER_LOG_FILE)
+    if not log_file.is_absolute():
+        log_file = PROJECT_ROOT / log_file
+    return log_file
+
+
+def is_error_line(line: str) -> bool:
+    """Same heuristic the worker log viewer uses for highlighting."""
+    return 'ERROR' in line or '❌' in line or 'Failed' in line
+
+
+def is_warning_line(line: str) -> bool:
+    return 'WARNING' in line or '⚠️' in line
+
+
+def _decode(data: bytes) -> str:
+    return data.decode('utf-8', errors='replace')
+
+
+def tail_lines(path: str | Path, num_lines: int, before: Optional[int] = None,
+               block_size: int = TAIL_BLOCK_SIZE) -> Tuple[List[str], int, int]:
+    """
+    Read the last ``num_lines`` complete lines ending at a byte cursor.
+
+    Args:
+        path: Log file
+        num_lines: Number of lines to return
+        before: Byte cursor to read backwards from (default: end of file)
+        block_size: Bytes per backwards read
+
+    Returns:
+        (lines, start_cursor, end_cursor) - ``start_cursor`` can be passed as
+        ``before`` to page further back; ``end_cursor`` to ``read_forward`` to
+        follow new lines
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        end = size if before is None else min(before, size)
+
+        # Drop a trailing partial line (still being written)
+        if before is None and end > 0:
+            f.seek(end - 1)
+            if f.read(1) != b'\n':
+                position = end
+                while position > 0:
+                    read_size = min(block_size, position)
+                    position -= read_size
+                    f.seek(position)
+                    chunk = f.read(read_size)
+                    newline = chunk.rfind(b'\n')
+                    if newline >= 0:
+                        end = position + newline + 1
+                        break
+                else:
+                    end = 0
+
+        if num_lines <= 0 or end == 0:
+            return [], end, end
+
+        # Read blocks backwards until we have num_lines + 1 newlines (the extra
+        # one marks the start of the first wanted line)
+        position = end
+        buffer = b''
+        while position > 0 and buffer.count(b'\n') <= num_lines:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            buffer = f.read(read_size) + buffer
+
+    lines = buffer.split(b'\n')
+    if lines and lines[-1] == b'':
+        lines.pop()  # Trailing newline
+
+    if len(lines) > num_lines:
+        dropped = lines[:-num_lines]
+        lines = lines[-num_lines:]
+        start = position + sum(len(line) + 1 for line in dropped)
+    else:
+        start = position
+
+    return [_decode(line).rstrip('\r') for line in lines], start, end
+
+
+def read_forward(path: str | Path, cursor: int, max_lines: Optional[int] = None,
+                 max_bytes: int = MAX_PAGE_BYTES) -> Tuple[List[str], int]:
+    """
+    Read complete lines starting at a byte cursor.
+
+    Returns:
+        (lines, next_cursor); next_cursor == cursor when there is nothing new
+    """
+    with open(path, 'rb') as f:
+        f.seek(cursor)
+        data = f.read(max_bytes)
+
+    last_newline = data.rfind(b'\n')
+    if last_newline < 0:
+        return [], cursor
+
+    raw_lines = data[:last_newline + 1].split(b'\n')[:-1]
+    if max_lines is not None and len(raw_lines) > max_lines:
+        raw_lines = raw_lines[:max_lines]
+    next_cursor = cursor + sum(len(line) + 1 for line in raw_lines)
+
+    return [_decode(line).rstrip('\r') for line in raw_lines], next_cursor
+
+
+@dataclass
+class _FileCounts:
+    inode: int
+    offset: int = 0
+    lines: int = 0
+    errors: int = 0
+    warnings: int = 0
+
+
+class LogStats:
+    """
+    Incrementally maintained line/error/warning counts per log file.
+
+    Each call to ``get()`` stats the file and scans only bytes appended since
+    the previous call.
+    """
+
+    def __init__(self):
+        self._counts: Dict[str, _FileCounts] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str | Path) -> Dict[str, int]:
+        key = str(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._counts.pop(key, None)
+            return {"total_lines": 0, "error_count": 0, "warning_count": 0, "size": 0}
+
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None or counts.inode != stat.st_ino or stat.st_size < counts.offset:
+                # New file, or rotated/truncated since last call
+                counts = _FileCounts(inode=stat.st_ino)
+                self._counts[key] = counts
+
+            if stat.st_size > counts.offset:
+                with open(path, 'rb') as f:
+                    f.seek(counts.offset)
+                    while True:
+                        data = f.read(MAX_PAGE_BYTES * 4)
+                        last_newline = data.rfind(b'\n')
+                        if last_newline < 0:
+                            if len(data) < MAX_PAGE_BYTES * 4:
+                                break
+                            # Single line longer than the buffer - read until its end
+                            f.seek(counts.offset)
+                            long_line = f.readline()
+                            if not long_line.endswith(b'\n'):
+                                break
+                            self._count_line(counts, long_line[:-1])
+                            counts.offset += len(long_line)
+                            continue
+                        for raw_line in data[:last_newline].split(b'\n'):
+                            self._count_line(counts, raw_line)
+                        counts.offset += last_newline + 1
+                        f.seek(counts.offset)
+                        if len(data) < MAX_PAGE_BYTES * 4:
+                            break
+
+            return {
+                "total_lines": counts.lines,
+                "error_count": counts.errors,
+                "warning_count": counts.warnings,
+                "size": stat.st_size
+            }
+
+    @staticmethod
+    def _count_line(counts: _FileCounts, raw_line: bytes) -> None:
+        line = _decode(raw_line)
+        counts.lines += 1
+        if is_error_line(line):
+            counts.errors += 1
+        elif is_warning_line(line):
+            counts.warnings += 1
+
+
+_log_stats = LogStats()
+
+
+def get_log_stats(path: str | Path) -> Dict[str, int]:
+    """Counts for a log file (shared, incrementally maintained)."""
+    return _log_stats.get(path)
+
+
+# ============================================================================
+# Rotation
+# ============================================================================
+
+def gzip_namer(name: str) -> str:
+    """RotatingFileHandler namer: rotated files get a .gz suffix."""
+    return name + ".gz"
+
+
+def gzip_rotator(source: str, dest: str) -> None:
+    """RotatingFileHandler rotator: gzip the rotated file."""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def rotate_log_file(path: str | Path, max_bytes: int, backup_count: int, copytruncate: bool = False) -> bool:
+    """
+    Rotate a log file if it exceeds ``max_bytes``.
+
+    Old generations are gzipped and shifted (``.1.gz`` is the newest); the
+    oldest beyond ``backup_count`` is deleted.
+
+    Args:
+        path: Log file
+        max_bytes: Size threshold (0 disables rotation)
+        backup_count: Compressed generations to keep
+        copytruncate: Copy then truncate in place instead of renaming. Use for
+            files held open by another process (e.g. stdout redirected with
+            ``>>``); lines written during the copy may be lost.
+
+    Returns:
+        True if the file was rotated
+    """
+    path = Path(path)
+    try:
+        if max_bytes <= 0 or path.stat().st_size < max_bytes:
+            return False
+    except FileNotFoundError:
+        return False
+
+    if backup_count <= 0:
+        if copytruncate:
+            os.truncate(path, 0)
+        else:
+            path.unlink()
+        return True
+
+    def generation(n: int) -> Path:
+        return Path(f"{path}.{n}.gz")
+
+    generation(backup_count).unlink(missing_ok=True)
+    for n in range(backup_count - 1, 0, -1):
+        if generation(n).exists():
+            generation(n).rename(generation(n + 1))
+
+    with open(path, 'rb') as f_in, gzip.open(generation(1), 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+
+    if copytruncate:
+        os.truncate(path, 0)
+    else:
+        path.unlink()
+    return True
@@ -146,12 +146,16 @@ def setup_logging(
         Path(log_file_path).parent.mkdir(parents=True, exist_ok=True)
 
         # Use RotatingFileHandler for automatic log rotation
-        # Max 10MB per file, keep 7 backup files (7 days of logs)
+        # Rotated files are gzipped (app.log.1.gz ... app.log.N.gz)
+        from core.batch_app.log_files import gzip_namer, gzip_rotator
+
         file_handler = RotatingFileHandler(
             log_file_path,
-            maxBytes=10 * 1024 * 1024,  # 10MB
-            backupCount=7  # Keep 7 old files
+            maxBytes=settings.LOG_MAX_BYTES,
+            backupCount=settings.LOG_BACKUP_COUNT
         )
+        file_handler.namer = gzip_namer
+        file_handler.rotator = gzip_rotator
         file_handler.setLevel(log_level_int)
         file_handler.setFormatter(formatter)
         file_handler.addFilter(RequestContextFilter())
@@ -0,0 +1,177 @@
+"""
+LoRA adapter serving for fine-tuned models.
+
+Fine-tunes from ``core/training`` are saved as PEFT adapters, not full weights.
+They are registered in ``ModelRegistry`` with ``base_model_id`` and
+``adapter_path``. Jobs for an adapter run on the base model, loaded with LoRA
+enabled, and the adapter is attached per request (vLLM ``LoRARequest``).
+
+The scheduler treats base and adapter jobs as the same resident model
+(``resident_model_id``), so moving between fine-tunes of one base is not a
+model swap.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.batch_app.logging_config import get_logger
+
+from .database import ModelRegistry
+
+logger = get_logger(__name__)
+
+ADAPTER_CONFIG_FILE = 'adapter_config.json'
+ADAPTER_WEIGHT_FILES = ('adapter_model.safetensors', 'adapter_model.bin')
+
+# vLLM only accepts these values for max_lora_rank
+SUPPORTED_LORA_RANKS = (8, 16, 32, 64, 128, 256, 320, 512)
+
+
+@dataclass(frozen=True)
+class LoRAAdapter:
+    """A fine-tune attached to its base model at request time."""
+    name: str  # Model ID jobs refer to
+    lora_id: int  # Unique positive ID vLLM caches the adapter under (registry row ID)
+    path: str
+
+
+@dataclass(frozen=True)
+class ServingModel:
+    """What the engine has to load to serve a model ID."""
+    model_id: str
+    base_model: str
+    adapter: Optional[LoRAAdapter] = None
+
+
+def is_adapter_dir(path: Path) -> bool:
+    """Whether a directory holds a PEFT adapter (config plus adapter weights)."""
+    path = Path(path)
+    return (path / ADAPTER_CONFIG_FILE).exists() and any((path / name).exists() for name in ADAPTER_WEIGHT_FILES)
+
+
+def read_adapter_config(path: Path) -> Dict[str, Any]:
+    """``adapter_config.json`` of an adapter directory (empty if unreadable)."""
+    try:
+        with open(Path(path) / ADAPTER_CONFIG_FILE) as f:
+            config: Dict[str, Any] = json.load(f)
+        return config
+    except (OSError, ValueError):
+        return {}
+
+
+def adapter_size_gb(path: Path) -> float:
+    """Size of an adapter's weight files."""
+    path = Path(path)
+    return sum((path / name).stat().st_size for name in ADAPTER_WEIGHT_FILES if (path / name).exists()) / 1024**3
+
+
+def supported_lora_rank(rank: int) -> int:
+    """Smallest ``max_lora_rank`` vLLM accepts that covers ``rank``."""
+    for supported in SUPPORTED_LORA_RANKS:
+        if rank <= supported:
+            return supported
+    return SUPPORTED_LORA_RANKS[-1]
+
+
+def resolve_serving_model(db: Session, model_id: str) -> ServingModel:
+    """Map a job's model to the base model to load and the adapter to attach."""
+    entry = db.query(ModelRegistry).filter(ModelRegistry.model_id == model_id).first()
+    if entry is None or not entry.base_model_id or not entry.adapter_path:
+        return ServingModel(model_id=model_id, base_model=model_id)
+    return ServingModel(
+        model_id=model_id,
+        base_model=entry.base_model_id,
+        adapter=LoRAAdapter(name=model_id, lora_id=entry.id, path=entry.adapter_path)
+    )
+
+
+def resident_model_id(db: Session, model_id: Optional[str]) -> Optional[str]:
+    """Model that is actually on the GPU while a job for ``model_id`` runs."""
+    if not model_id:
+        return model_id
+    return resolve_serving_model(db, model_id).base_model
+
+
+def lora_engine_config(db: Session, base_model: str) -> Dict[str, Any]:
+    """
+    vLLM engine kwargs to serve the adapters registered for a base model.
+
+    Empty if the base has no adapters (LoRA support costs memory and some
+    throughput, so it is only enabled when needed).
+    """
+    adapters = db.query(ModelRegistry).filter(
+        ModelRegistry.base_model_id == base_model,
+        ModelRegistry.adapter_path.isnot(None)
+    ).all()
+    if not adapters:
+        return {}
+
+    rank = max(
+        (int(read_adapter_config(Path(entry.adapter_path)).get('r') or settings.LORA_DEFAULT_RANK)
+         for entry in adapters if entry.adapter_path),
+        default=settings.LORA_DEFAULT_RANK
+    )
+    return {
+        "enable_lora": True,
+        "max_lora_rank": supported_lora_rank(rank),
+        "max_loras": max(1, min(settings.LORA_MAX_ADAPTERS, len(adapters))),
+    }
+
+
+def lora_enabled(llm: Any) -> bool:
+    """Whether a loaded vLLM ``LLM`` or ``AsyncLLMEngine`` was started with LoRA support."""
+    for engine in (getattr(llm, 'llm_engine', None), getattr(llm, 'engine', None), llm):
+        config = getattr(engine, 'vllm_config', None)
+        if config is not None:
+            return getattr(config, 'lora_config', None) is not None
+    return False
+
+
+def make_lora_request(adapter: Optional[LoRAAdapter]) -> Any:
+    """vLLM ``LoRARequest`` for an adapter (None for base model requests)."""
+    if adapter is None:
+        return None
+    if settings.INFERENCE_BACKEND == 'simulated':
+        return SimpleNamespace(lora_name=adapter.name, lora_int_id=adapter.lora_id, lora_path=adapter.path)
+    from vllm.lora.request import LoRARequest
+    return LoRARequest(adapter.name, adapter.lora_id, adapter.path)
+
+
+def register_adapter(db: Session, model_id: str, name: str, base_model: str, adapter_path: Path) -> ModelRegistry:
+    """
+    Register (or update) a fine-tune as a LoRA adapter on ``base_model`` (commits).
+
+    Engine settings (context length, memory utilization, ...) are taken from
+    the base model's registry entry when it has one.
+    """
+    adapter_path = Path(adapter_path).resolve()
+    base = db.query(ModelRegistry).filter(ModelRegistry.model_id == base_model).first()
+
+    entry = db.query(ModelRegistry).filter(ModelRegistry.model_id == model_id).first()
+    if entry is None:
+        entry = ModelRegistry(model_id=model_id, name=name)
+        db.add(entry)
+
+    entry.name = name
+    entry.base_model_id = base_model
+    entry.adapter_path = str(adapter_path)
+    entry.size_gb = adapter_size_gb(adapter_path)
+    entry.estimated_memory_gb = base.estimated_memory_gb if base else 0.0
+    if base is not None:
+        entry.max_model_len = base.max_model_len
+        entry.gpu_memory_utilization = base.gpu_memory_utilization
+        entry.cpu_offload_gb = base.cpu_offload_gb
+        entry.enable_prefix_caching = base.enable_prefix_caching
+        entry.chunked_prefill_enabled = base.chunked_prefill_enabled
+    entry.status = 'ready'
+
+    db.commit()
+    db.refresh(entry)
+    logger.info(f"Registered LoRA adapter {model_id} on {base_model}: {adapter_path}")
+    return entry
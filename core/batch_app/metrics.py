@@ -108,6 +108,39 @@ model_load_duration = Histogram(
     buckets=[1, 5, 10, 30, 60, 120, 300, 600]
 )
 
+model_unload_duration = Histogram(
+    'vllm_model_unload_duration_seconds',
+    'Time from unload until GPU memory for the next model was free',
+    ['model'],
+    buckets=[0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 30]
+)
+
+model_cache_requests = Counter(
+    'vllm_model_cache_requests_total',
+    'Model loads served from the host RAM cache (hit) or from disk (miss)',
+    ['model', 'result']
+)
+
+model_restore_duration = Histogram(
+    'vllm_model_restore_duration_seconds',
+    'Time to wake a model from the host RAM cache',
+    ['model'],
+    buckets=[0.5, 1, 2, 5, 10, 20, 30, 60]
+)
+
+model_prefetch_saved_seconds = Histogram(
+    'vllm_model_prefetch_saved_seconds',
+    'Load time saved by prefetching weights, vs the measured cold load',
+    ['model'],
+    buckets=[0, 1, 5, 10, 30, 60, 120, 300]
+)
+
+model_resident_routes = Counter(
+    'vllm_model_resident_routes_total',
+    'Jobs routed to an engine already resident on the GPU (no load)',
+    ['model']
+)
+
 model_loaded = Gauge(
     'vllm_model_loaded',
     'Whether a model is currently loaded (1=loaded, 0=not loaded)',
@@ -137,6 +170,61 @@ throughput_tokens_per_second = Gauge(
     ['model']
 )
 
+inference_queue_time = Histogram(
+    'vllm_inference_queue_time_seconds',
+    'Time a real-time request waits for its micro-batch to start',
+    ['model'],
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+)
+
+inference_batch_size = Histogram(
+    'vllm_inference_batch_size',
+    'Number of real-time requests run together in one micro-batch',
+    ['model'],
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128]
+)
+
+inference_time_to_first_token = Histogram(
+    'vllm_inference_time_to_first_token_seconds',
+    'Time from request start to the first streamed token',
+    ['model'],
+    buckets=[0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+)
+
+inference_inter_token_latency = Histogram(
+    'vllm_inference_inter_token_latency_seconds',
+    'Time between consecutive streamed tokens',
+    ['model'],
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.02, 0.04, 0.06, 0.08, 0.1, 0.25, 0.5, 1.0]
+)
+
+batch_request_queue_time = Histogram(
+    'vllm_batch_request_queue_time_seconds',
+    'Time a batch request waited in the engine queue before it was first scheduled',
+    ['model'],
+    buckets=[0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800]
+)
+
+batch_request_time_to_first_token = Histogram(
+    'vllm_batch_request_time_to_first_token_seconds',
+    'Time from a batch request entering the engine to its first token',
+    ['model'],
+    buckets=[0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800]
+)
+
+batch_request_decode_time_per_token = Histogram(
+    'vllm_batch_request_decode_time_per_token_seconds',
+    'Decode time per output token of a batch request (after the first token)',
+    ['model'],
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.02, 0.04, 0.08, 0.16, 0.32, 0.64, 1.28]
+)
+
+batch_request_finished = Counter(
+    'vllm_batch_requests_finished_total',
+    'Batch requests finished by the engine, by finish reason',
+    ['model', 'finish_reason']  # stop, length, abort
+)
+
 # ============================================================================
 # Chunk Processing Metrics
 # ============================================================================
@@ -160,6 +248,20 @@ chunks_processed = Counter(
     ['model', 'status']  # completed, failed
 )
 
+chunk_phase_duration = Histogram(
+    'vllm_chunk_phase_duration_seconds',
+    'Time per chunk spent in each worker phase (see phase_timing.py)',
+    ['phase', 'model'],
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 1200]
+)
+
+job_gpu_busy_fraction = Histogram(
+    'vllm_job_gpu_busy_fraction',
+    'Share of a batch job\'s wall time spent inside generate',
+    ['model'],
+    buckets=[0.1, 0.25, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0]
+)
+
 # ============================================================================
 # GPU Metrics
 # ============================================================================
@@ -188,6 +290,18 @@ gpu_utilization_percent = Gauge(
     ['gpu_id']
 )
 
+gpu_power_watts = Gauge(
+    'vllm_gpu_power_watts',
+    'GPU power draw in watts',
+    ['gpu_id']
+)
+
+gpu_sm_clock_mhz = Gauge(
+    'vllm_gpu_sm_clock_mhz',
+    'GPU SM clock in MHz',
+    ['gpu_id']
+)
+
 # ============================================================================
 # Worker Metrics
 # ============================================================================
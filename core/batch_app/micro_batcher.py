@@ -0,0 +1,154 @@
+"""
+Dynamic micro-batching for real-time inference.
+
+Concurrent ``/v1/inference`` calls (e.g. Label Studio ML-backend predictions)
+are collected for a short window and run through the engine as one batch,
+instead of each blocking the event loop as a batch of one:
+
+- The first request opens a window of ``window_ms``; the batch closes when the
+  window expires or ``max_batch_size`` requests are waiting.
+- Requests are grouped by model (the engine holds one model at a time) and
+  each group runs as a single engine call on a dedicated executor thread, so
+  the event loop keeps accepting requests while the GPU is busy.
+- Requests that arrive while a batch is running wait for the next one; their
+  window is measured from when they were submitted, so they are not delayed
+  a second time.
+
+The batcher does not import vLLM; ``run_batch`` is any callable taking
+``(model_id, prompts, params_list)`` and returning one result dict per prompt.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from core.batch_app.logging_config import get_logger
+from core.batch_app.metrics import inference_batch_size, inference_queue_time
+
+logger = get_logger(__name__)
+
+RunBatch = Callable[[str, List[str], List[Dict[str, Any]]], List[Dict[str, Any]]]
+
+
+@dataclass
+class PendingRequest:
+    """A request waiting to be batched."""
+    model_id: str
+    prompt: str
+    params: Dict[str, Any]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests into batches and runs them off the event loop.
+
+    Usage:
+        batcher = MicroBatcher(engine.generate_batch, window_ms=10, max_batch_size=32)
+        result = await batcher.submit(model_id, prompt, {"max_tokens": 100})
+    """
+
+    def __init__(self, run_batch: RunBatch, window_ms: float = 10.0, max_batch_size: int = 32):
+        self.run_batch = run_batch
+        self.window = max(window_ms, 0.0) / 1000.0
+        self.max_batch_size = max(max_batch_size, 1)
+        # One thread: the engine is not thread-safe and owns the whole GPU
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference-batch")
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, model_id: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Queue a prompt and wait for its result."""
+        self._ensure_running()
+        assert self._queue is not None
+        future: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+        await self._queue.put(PendingRequest(model_id, prompt, dict(params or {}), future))
+        return await future
+
+    async def run_exclusive(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn`` on the batch thread, between batches (e.g. engine swaps)."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._collect_loop())
+
+    async def close(self) -> None:
+        """Stop collecting; requests still queued are cancelled."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._queue.get_nowait().future.cancel()
+        self._executor.shutdown(wait=False)
+
+    async def _collect_loop(self) -> None:
+        assert self._queue is not None
+        while True:
+            batch = [await self._queue.get()]
+            deadline = batch[0].enqueued_at + self.window
+
+            while len(batch) < self.max_batch_size:
+                # Drain whatever already arrived (e.g. during the previous batch)
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._run(batch)
+
+    async def _run(self, batch: List[PendingRequest]) -> None:
+        # Callers that disconnected while queued don't take a batch slot
+        batch = [item for item in batch if not item.future.done()]
+
+        groups: Dict[str, List[PendingRequest]] = {}
+        for item in batch:
+            groups.setdefault(item.model_id, []).append(item)
+
+        loop = asyncio.get_running_loop()
+        for model_id, items in groups.items():
+            started = time.monotonic()
+            for item in items:
+                inference_queue_time.labels(model=model_id).observe(started - item.enqueued_at)
+            inference_batch_size.labels(model=model_id).observe(len(items))
+
+            try:
+                results = await loop.run_in_executor(
+                    self._executor,
+                    self.run_batch,
+                    model_id,
+                    [item.prompt for item in items],
+                    [item.params for item in items]
+                )
+                if len(results) != len(items):
+                    raise RuntimeError(f"Engine returned {len(results)} results for {len(items)} prompts")
+            except Exception as e:
+                logger.error(f"Inference batch failed: model={model_id}, size={len(items)}: {e}")
+                for item in items:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                continue
+
+            for item, result in zip(items, results):
+                if not item.future.done():
+                    item.future.set_result({
+                        **result,
+                        "batch_size": len(items),
+                        "queue_ms": int((started - item.enqueued_at) * 1000)
+                    })
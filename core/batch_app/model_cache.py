@@ -0,0 +1,103 @@
+"""
+Host-RAM cache of recently used models for fast hot-swap.
+
+A cold model switch reloads weights from disk and re-runs vLLM initialization
+(including CUDA graph capture). With vLLM sleep mode (``enable_sleep_mode``),
+``llm.sleep(level=1)`` instead offloads the weights to pinned host memory and
+drops the KV cache, and ``llm.wake_up()`` copies them back. That turns a swap
+back to a recently used model into a host-to-device copy.
+
+``WarmModelCache`` keeps sleeping engines in LRU order within a RAM budget
+(``MODEL_CACHE_RAM_GB``). Engines evicted from the cache are returned to the
+caller to shut down. The worker publishes the warm set on its heartbeat so the
+queue snapshot can use warm restore times in its swap-cost estimate.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+GB = 1024 ** 3
+
+
+@dataclass
+class WarmModel:
+    """A sleeping engine held in host RAM."""
+    model_id: str
+    llm: Any
+    host_bytes: int
+    slept_at: float = field(default_factory=time.time)
+
+
+class WarmModelCache:
+    """LRU of sleeping engines bounded by a host RAM budget."""
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = max(budget_bytes, 0)
+        self._entries: "OrderedDict[str, WarmModel]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes > 0
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(entry.host_bytes for entry in self._entries.values())
+
+    def __contains__(self, model_id: str) -> bool:
+        return model_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def warm_models(self) -> List[str]:
+        """Cached model ids, most recently used first."""
+        return list(reversed(self._entries))
+
+    def fits(self, host_bytes: int) -> bool:
+        """Whether a model of this size can be cached at all (0 = unknown size)."""
+        return self.enabled and 0 < host_bytes <= self.budget_bytes
+
+    def put(self, model_id: str, llm: Any, host_bytes: int) -> List[WarmModel]:
+        """
+        Cache a sleeping engine as most recently used.
+
+        Returns:
+            Entries evicted to stay within the budget (caller shuts them down)
+        """
+        evicted = []
+        if model_id in self._entries:
+            evicted.append(self._entries.pop(model_id))
+        self._entries[model_id] = WarmModel(model_id, llm, host_bytes)
+
+        while self.used_bytes > self.budget_bytes and len(self._entries) > 1:
+            _, oldest = self._entries.popitem(last=False)
+            evicted.append(oldest)
+        return evicted
+
+    def take(self, model_id: str) -> Optional[WarmModel]:
+        """Remove and return a cached engine (it becomes the active model)."""
+        return self._entries.pop(model_id, None)
+
+    def clear(self) -> List[WarmModel]:
+        """Remove everything (caller shuts the engines down)."""
+        entries = list(self._entries.values())
+        self._entries.clear()
+        return entries
+
+
+def host_bytes_for_model(size_gb: Optional[float], fallback_gb: float = 0.0) -> int:
+    """Host RAM a sleeping model needs (its weights)."""
+    return int((size_gb or fallback_gb) * GB)
+
+
+def parse_warm_models(value: Optional[str]) -> Tuple[str, ...]:
+    """Parse the warm model list (JSON) stored on the worker heartbeat."""
+    if not value:
+        return ()
+    try:
+        return tuple(json.loads(value))
+    except (ValueError, TypeError):
+        return ()
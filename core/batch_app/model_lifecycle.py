@@ -0,0 +1,125 @@
+"""
+Model unload with measured GPU memory release.
+
+Dropping the last reference to a vLLM ``LLM`` does not free VRAM immediately:
+the EngineCore subprocess and the CUDA context go away asynchronously. Instead
+of sleeping a fixed time on every swap, the worker:
+
+1. Explicitly shuts down the engine (``shutdown_llm``): stops the EngineCore
+   subprocess and tears down the model-parallel state; ``release_memory``
+   then collects garbage and empties the CUDA cache.
+2. Polls NVML (``wait_for_free_memory``, reading through the shared handle in
+   gpu_telemetry.py) until free memory covers what the next model will ask
+   for, or a timeout passes.
+
+The measured release time is stored per model and feeds the queue's swap-cost
+estimate. Without NVML the memory can't be observed, so a fixed fallback delay
+is used.
+"""
+
+import gc
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+
+from core.config import settings
+from core.batch_app.gpu_telemetry import gpu_memory_info
+from core.batch_app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MemoryInfo = Callable[[], Optional[Tuple[int, int]]]
+
+
+def required_free_bytes(gpu_memory_utilization: float, total_bytes: int) -> int:
+    """
+    Free memory vLLM needs to start with a given ``gpu_memory_utilization``.
+
+    vLLM refuses to start ("Free memory on device ... is less than desired GPU
+    memory utilization") unless this fraction of the device is free.
+    """
+    return int(gpu_memory_utilization * total_bytes)
+
+
+@dataclass
+class ReleaseResult:
+    """Outcome of waiting for GPU memory after an unload."""
+    released: bool  # Required memory became free (False on timeout)
+    seconds: float
+    free_bytes: Optional[int] = None
+    measured: bool = True  # False when NVML was unavailable (fixed fallback delay)
+
+
+def wait_for_free_memory(
+    required_bytes: Optional[int],
+    timeout: Optional[float] = None,
+    poll_interval: Optional[float] = None,
+    memory_info: MemoryInfo = gpu_memory_info,
+    sleep: Callable[[float], None] = time.sleep
+) -> ReleaseResult:
+    """
+    Poll until at least ``required_bytes`` of GPU memory are free.
+
+    Args:
+        required_bytes: Free memory needed (None: wait for the full fallback
+            delay when unmeasurable, otherwise return immediately)
+        timeout: Give up after this many seconds (default MODEL_UNLOAD_TIMEOUT_SECONDS)
+        poll_interval: Seconds between NVML reads (default MODEL_UNLOAD_POLL_INTERVAL)
+        memory_info: Returns (free, total) or None
+        sleep: Injected for tests
+    """
+    timeout = settings.MODEL_UNLOAD_TIMEOUT_SECONDS if timeout is None else timeout
+    poll_interval = settings.MODEL_UNLOAD_POLL_INTERVAL if poll_interval is None else poll_interval
+    start = time.monotonic()
+
+    info = memory_info()
+    if info is None:
+        sleep(settings.MODEL_UNLOAD_FALLBACK_SECONDS)
+        return ReleaseResult(released=True, seconds=time.monotonic() - start, measured=False)
+
+    while True:
+        free = info[0]
+        elapsed = time.monotonic() - start
+        if required_bytes is None or free >= required_bytes:
+            return ReleaseResult(released=True, seconds=elapsed, free_bytes=free)
+        if elapsed >= timeout:
+            return ReleaseResult(released=False, seconds=elapsed, free_bytes=free)
+
+        sleep(poll_interval)
+        info = memory_info() or info
+
+
+def shutdown_llm(llm: Any) -> None:
+    """
+    Stop a vLLM ``LLM``'s engine (best effort).
+
+    Drop all references to ``llm`` afterwards, then call ``release_memory()``.
+    """
+    engine = getattr(llm, 'llm_engine', None)
+
+    # V1: EngineCore runs in a subprocess owned by the engine core client
+    for target in (getattr(engine, 'engine_core', None), engine):
+        shutdown = getattr(target, 'shutdown', None)
+        if callable(shutdown):
+            try:
+                shutdown()
+            except Exception as e:
+                logger.warning(f"Engine shutdown failed: {e}")
+
+    try:
+        from vllm.distributed.parallel_state import destroy_distributed_environment, destroy_model_parallel
+        destroy_model_parallel()
+        destroy_distributed_environment()
+    except Exception:
+        pass
+
+
+def release_memory() -> None:
+    """Collect unreferenced engine objects and return cached CUDA blocks."""
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except Exception:
+        pass
@@ -18,6 +18,7 @@ from sqlalchemy.orm import Session
 from vllm import LLM
 
 from core.batch_app.database import FineTunedModel, ModelRegistry, get_db
+from core.batch_app.lora import is_adapter_dir, register_adapter
 from core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -163,22 +164,29 @@ class VLLMModelLoader:
         model_id: str,
         model_name: str,
         base_model: str,
-        db: Session
+        db: Session,
+        model_path: Optional[Path] = None
     ) -> ModelRegistry:
         """
         Register fine-tuned model in model registry.
         
         This makes the model available for inference via the batch API.
+        LoRA adapters are registered against their base model, so the worker
+        serves them on the loaded base instead of swapping models.
         
         Args:
             model_id: Fine-tuned model ID
             model_name: Display name
             base_model: Base model ID
             db: Database session
+            model_path: Model directory (checked for a LoRA adapter)
             
         Returns:
             ModelRegistry record
         """
+        if model_path is not None and is_adapter_dir(model_path):
+            return register_adapter(db, model_id, model_name, base_model, model_path)
+
         # Check if already registered
         existing = db.query(ModelRegistry).filter(
             ModelRegistry.model_id == model_id
@@ -252,7 +260,8 @@ class VLLMModelLoader:
                 model_id=model_id,
                 model_name=model.name,
                 base_model=model.base_model,
-                db=db
+                db=db,
+                model_path=model_path
             )
             
             # Step 4: Update deployment status
@@ -324,16 +333,16 @@ class VLLMModelLoader:
             FineTunedModel.status.in_(["completed", "deployed"])
         ).all()
         
-        for model in fine_tuned:
+        for fine_tuned_model in fine_tuned:
             models.append({
-                "id": model.id,
-                "name": model.name,
+                "id": fine_tuned_model.id,
+                "name": fine_tuned_model.name,
                 "type": "fine_tuned",
-                "base_model": model.base_model,
-                "status": model.status,
-                "version": model.version,
-                "win_rate": float(model.win_rate) if model.win_rate else None,
-                "deployed_at": model.deployed_at.isoformat() if model.deployed_at else None
+                "base_model": fine_tuned_model.base_model,
+                "status": fine_tuned_model.status,
+                "version": fine_tuned_model.version,
+                "win_rate": float(fine_tuned_model.win_rate) if fine_tuned_model.win_rate else None,
+                "deployed_at": fine_tuned_model.deployed_at.isoformat() if fine_tuned_model.deployed_at else None
             })
         
         return models
@@ -10,7 +10,6 @@ Handles:
 
 import json
 import subprocess
-import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional, Dict, Any, List, cast
@@ -856,312 +855,62 @@ def _process_test_results(db: Session, model: ModelRegistry, log_file: str):
 # BENCHMARK RUNNER
 # ============================================================================
 
-_active_benchmarks = {}  # benchmark_id -> {process, log_file, start_time}
+# Benchmarks run as worker jobs (job_type 'benchmark'), see benchmark_runs.py
 
 
 def start_benchmark(benchmark_id: str, model_id: str, dataset_id: str, db: Session):
     """
-    Start a benchmark run in the background.
+    Queue a benchmark run for the worker.
 
-    Creates a Python script that runs vLLM on the dataset and tracks progress.
+    The worker runs the dataset through the same engine, rendering and result
+    writer as real batches, and keeps the Benchmark row's progress current.
     """
     from core.batch_app.database import Dataset, Benchmark
+    from core.batch_app.benchmark_runs import queue_benchmark_job
 
-    # Get model and dataset
     model = db.query(ModelRegistry).filter(ModelRegistry.model_id == model_id).first()
     dataset = db.query(Dataset).filter(Dataset.id == dataset_id).first()
-
-    if not model or not dataset:
-        logger.error(f"Model or dataset not found: {model_id}, {dataset_id}")
-        return
-
-    # Create benchmark script
-    script_path = Path(f"scripts/benchmark_{benchmark_id}.py")
-    results_path = Path(f"benchmarks/raw/{benchmark_id}.jsonl")
-    log_path = Path(f"logs/benchmark_{benchmark_id}.log")
-
-    # Ensure directories exist
-    script_path.parent.mkdir(parents=True, exist_ok=True)
-    results_path.parent.mkdir(parents=True, exist_ok=True)
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Generate script
-    script_content = f'''"""
-Benchmark: {model.name} on {dataset.name}
-Generated: {datetime.now(timezone.utc).isoformat()}
-"""
-
-import json
-import time
-from datetime import datetime
-from pathlib import Path
-from vllm import LLM, SamplingParams
-
-# Load dataset
-dataset_path = Path("{dataset.file_path}")
-requests = []
-with open(dataset_path, "r") as f:
-    for line in f:
-        if line.strip():
-            requests.append(json.loads(line))
-
-print(f"Loaded {{len(requests)}} requests from {{dataset_path}}")
-
-# Initialize model
-print(f"Loading model: {model_id}")
-llm = LLM(
-    model="{model_id}",
-    max_model_len={model.max_model_len},
-    gpu_memory_utilization={model.gpu_memory_utilization},
-    {"cpu_offload_gb=" + str(model.cpu_offload_gb) + "," if model.cpu_offload_gb > 0 else ""}
-    enable_prefix_caching={str(model.enable_prefix_caching)},
-    enable_chunked_prefill={str(model.chunked_prefill_enabled)},
-)
-
-# Sampling params
-sampling_params = SamplingParams(
-    temperature=0.7,
-    top_p=0.9,
-    max_tokens=1024
-)
-
-# Process in batches
-batch_size = 100
-results_file = Path("{results_path}")
-total_batches = (len(requests) + batch_size - 1) // batch_size
-
-print(f"Processing {{len(requests)}} requests in {{total_batches}} batches of {{batch_size}}")
-
-start_time = time.time()
-completed = 0
-
-for batch_idx in range(total_batches):
-    batch_start = batch_idx * batch_size
-    batch_end = min(batch_start + batch_size, len(requests))
-    batch = requests[batch_start:batch_end]
-
-    print(f"Processing batch {{batch_idx + 1}}/{{total_batches}} ({{batch_start + 1}}-{{batch_end}})...")
-
-    # Extract prompts
-    prompts = []
-    for req in batch:
-        messages = req["body"]["messages"]
-        # Simple prompt construction - can be improved
-        prompt = "\\n".join([f"{{m['role']}}: {{m['content']}}" for m in messages])
-        prompts.append(prompt)
-
-    # Generate
-    batch_start_time = time.time()
-    outputs = llm.generate(prompts, sampling_params)
-    batch_time = time.time() - batch_start_time
-
-    # Save results
-    with open(results_file, "a") as f:
-        for req, output in zip(batch, outputs):
-            result = {{
-                "custom_id": req["custom_id"],
-                "request": req,
-                "response": {{
-                    "status_code": 200,
-                    "body": {{
-                        "choices": [{{
-                            "message": {{
-                                "role": "assistant",
-                                "content": output.outputs[0].text
-                            }}
-                        }}]
-                    }}
-                }}
-            }}
-            f.write(json.dumps(result) + "\\n")
-
-    completed += len(batch)
-    elapsed = time.time() - start_time
-    throughput = completed / elapsed if elapsed > 0 else 0
-
-    print(f"Batch complete: {{completed}}/{{len(requests)}} ({{completed/len(requests)*100:.1f}}%) - {{throughput:.1f}} req/s")
-
-total_time = time.time() - start_time
-print(f"\\nBenchmark complete!")
-print(f"Total time: {{total_time:.1f}}s")
-print(f"Throughput: {{len(requests)/total_time:.1f}} req/s")
-print(f"Results: {{results_file}}")
-'''
-
-    # Write script
-    with open(script_path, "w") as f:
-        f.write(script_content)
-
-    # Start process
-    log_file = open(log_path, "w")
-    process: subprocess.Popen[str] = subprocess.Popen(
-        ["python", str(script_path)],
-        stdout=log_file,
-        stderr=subprocess.STDOUT,
-        text=True
-    )
-
-    # Track process
-    _active_benchmarks[benchmark_id] = {
-        "process": process,
-        "log_file": log_file,
-        "log_path": log_path,
-        "results_path": results_path,
-        "start_time": time.time()
-    }
-
-    # Update benchmark record
     benchmark = db.query(Benchmark).filter(Benchmark.id == benchmark_id).first()
-    if benchmark:
-        benchmark.results_file = str(results_path)
-        db.commit()
 
-    logger.info(f"Started benchmark {benchmark_id}: {model.name} on {dataset.name}")
+    if not model or not dataset or not benchmark:
+        logger.error(f"Model, dataset or benchmark not found: {model_id}, {dataset_id}, {benchmark_id}")
+        return None
+
+    job = queue_benchmark_job(benchmark, model, dataset, db)
+    logger.info(f"Queued benchmark {benchmark_id} as {job.batch_id}: {model.name} on {dataset.name}")
+    return job
 
 
 def get_benchmark_status(benchmark_id: str, db: Session) -> dict:
     """
-    Get status of a running benchmark.
+    Get status of a benchmark.
 
-    Returns progress, throughput, ETA, etc.
+    Returns progress, throughput, ETA, etc. (updated by the worker after every chunk).
     """
     from core.batch_app.database import Benchmark
+    from core.batch_app.benchmark_runs import benchmark_status
 
     benchmark = db.query(Benchmark).filter(Benchmark.id == benchmark_id).first()
     if not benchmark:
         raise ValueError(f"Benchmark {benchmark_id} not found")
 
-    # Check if process is still running
-    if benchmark_id in _active_benchmarks:
-        proc_info = _active_benchmarks[benchmark_id]
-        process = cast(subprocess.Popen[str], proc_info["process"])
-
-        if process.poll() is not None:
-            # Process finished
-            _active_benchmarks.pop(benchmark_id)
-            log_file_obj = cast(Any, proc_info["log_file"])
-            log_file_obj.close()
-
-            # Update benchmark status
-            benchmark.status = "completed"
-            benchmark.completed_at = datetime.now(timezone.utc)
-            start_time_val = proc_info["start_time"]
-            benchmark.total_time_seconds = time.time() - (float(start_time_val) if isinstance(start_time_val, (int, float)) else 0.0)
-            benchmark.progress = 100
-            benchmark.completed = benchmark.total
-
-            # Calculate final throughput
-            if benchmark.total_time_seconds > 0:
-                benchmark.throughput = benchmark.total / benchmark.total_time_seconds
-
-            # Save metadata file
-            metadata_path = Path(f"benchmarks/metadata/{benchmark_id}.json")
-            metadata_path.parent.mkdir(parents=True, exist_ok=True)
-
-            metadata = {
-                "benchmark_id": benchmark_id,
-                "model_id": benchmark.model_id,
-                "dataset_id": benchmark.dataset_id,
-                "total_requests": benchmark.total,
-                "completed_requests": benchmark.completed,
-                "total_time_seconds": benchmark.total_time_seconds,
-                "throughput_req_per_sec": benchmark.throughput,
-                "started_at": benchmark.started_at.isoformat(),
-                "completed_at": benchmark.completed_at.isoformat(),
-                "results_file": benchmark.results_file
-            }
-
-            with open(metadata_path, "w") as f:
-                json.dump(metadata, f, indent=2)
-
-            benchmark.metadata_file = str(metadata_path)
-            db.commit()
-        else:
-            # Parse log for progress
-            log_path = cast(Path, proc_info["log_path"])
-            if log_path.exists():
-                with open(str(log_path), "r") as f:
-                    lines = f.readlines()
-
-                # Find last progress line
-                for line in reversed(lines):
-                    if "Batch complete:" in line:
-                        # Extract progress: "Batch complete: 500/5000 (10.0%) - 32.5 req/s"
-                        try:
-                            parts = line.split(":")
-                            if len(parts) >= 2:
-                                progress_part = parts[1].strip()
-                                completed_str = progress_part.split("/")[0].strip()
-                                completed = int(completed_str)
-
-                                # Extract throughput
-                                if " - " in progress_part:
-                                    throughput_str = progress_part.split(" - ")[1].split(" ")[0]
-                                    throughput = float(throughput_str)
-                                else:
-                                    throughput = 0
-
-                                # Update benchmark
-                                benchmark.completed = completed
-                                benchmark.progress = int((completed / benchmark.total) * 100)
-                                benchmark.throughput = throughput
-
-                                # Calculate ETA
-                                if throughput > 0:
-                                    remaining = benchmark.total - completed
-                                    benchmark.eta_seconds = int(remaining / throughput)
-
-                                db.commit()
-                                break
-                        except Exception as e:
-                            logger.error(f"Failed to parse progress: {e}")
+    return benchmark_status(benchmark)
 
-    return {
-        "benchmark_id": benchmark.id,
-        "status": benchmark.status,
-        "progress": benchmark.progress,
-        "completed": benchmark.completed,
-        "total": benchmark.total,
-        "throughput": benchmark.throughput,
-        "eta_seconds": benchmark.eta_seconds
-    }
 
-
-def cancel_benchmark(benchmark_id: str):
+def cancel_benchmark(benchmark_id: str, db: Session):
     """
-    Cancel a running benchmark.
+    Cancel a benchmark's worker job.
 
-    Terminates the background process and cleans up resources.
+    A queued job is cancelled; a running one is marked 'cancelling'.
     """
-    if benchmark_id not in _active_benchmarks:
-        logger.warning(f"Benchmark {benchmark_id} not in active benchmarks")
-        return
-
-    proc_info = _active_benchmarks[benchmark_id]
-    process = cast(subprocess.Popen[str], proc_info["process"])
-
-    # Terminate process
-    if process.poll() is None:
-        logger.info(f"Terminating benchmark process {benchmark_id}")
-        process.terminate()
-
-        # Wait up to 5 seconds for graceful shutdown
-        try:
-            process.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            logger.warning(f"Benchmark {benchmark_id} did not terminate gracefully, killing")
-            process.kill()
-            process.wait()
-
-    # Close log file
-    if "log_file" in proc_info and proc_info["log_file"]:
-        try:
-            log_file_obj = cast(Any, proc_info["log_file"])
-            log_file_obj.close()
-        except:
-            pass
+    from core.batch_app.database import Benchmark
+    from core.batch_app.benchmark_runs import cancel_benchmark_job
 
-    # Remove from active benchmarks
-    _active_benchmarks.pop(benchmark_id)
-    logger.info(f"Cancelled benchmark {benchmark_id}")
+    benchmark = db.query(Benchmark).filter(Benchmark.id == benchmark_id).first()
+    if not benchmark:
+        logger.warning(f"Benchmark {benchmark_id} not found")
+        return
 
+    job = cancel_benchmark_job(benchmark, db)
+    db.commit()
+    logger.info(f"Cancelled benchmark {benchmark_id}" + (f" (job {job.batch_id}: {job.status})" if job else ""))
@@ -0,0 +1,103 @@
+"""
+Per-phase wall time for batch jobs.
+
+The worker wraps each step of a chunk in a span, exports the per-chunk times
+as the ``vllm_chunk_phase_duration_seconds{phase,model}`` histogram, logs a
+one-line breakdown per chunk and a summary table per job, and stores the job
+summary on ``BatchJob.phase_timings``.
+
+Phases (in pipeline order):
+    load       Loading / waking / restoring the model before the first chunk
+    count      Counting input lines and finding the resume point
+    read       Reading the chunk's lines from the input file
+    parse      JSON-decoding request lines
+    render     Building prompts from chat messages
+    generate   Inside ``LLM.generate`` (the GPU is busy)
+    serialize  Building and encoding result records
+    write      Appending result lines to the results file
+    fsync      Flushing the results file to disk
+    index      Appending custom_id index entries
+    metrics    Appending per-request metrics rows (see request_metrics.py)
+    commit     Progress commits, queue snapshot refresh and progress events
+
+Time not covered by a phase (finalizing, webhooks, ...) is reported as
+``other``. The GPU busy fraction is ``generate`` time over job wall time.
+
+Usage:
+    timer = PhaseTimer()
+    with timer.span('parse'):
+        requests = [json.loads(line) for line in lines]
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+PHASES = ('load', 'count', 'read', 'parse', 'render', 'generate', 'serialize', 'write', 'fsync', 'index', 'metrics',
+          'commit')
+
+GPU_PHASE = 'generate'
+
+
+class PhaseTimer:
+    """Accumulates seconds per phase."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.seconds: Dict[str, float] = {}
+
+    @contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.add(phase, self.clock() - start)
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def merge(self, other: "PhaseTimer") -> None:
+        for phase, seconds in other.seconds.items():
+            self.add(phase, seconds)
+
+    @property
+    def total(self) -> float:
+        return sum(self.seconds.values())
+
+    def ordered(self) -> List[tuple]:
+        """(phase, seconds) in pipeline order, unknown phases last."""
+        known = [(phase, self.seconds[phase]) for phase in PHASES if phase in self.seconds]
+        return known + [(phase, s) for phase, s in self.seconds.items() if phase not in PHASES]
+
+    def format_line(self) -> str:
+        return " · ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.ordered())
+
+    def summary(self, wall_seconds: float) -> Dict[str, Any]:
+        """Phase breakdown of a job that took ``wall_seconds`` end to end."""
+        return {
+            'wall_seconds': round(wall_seconds, 3),
+            'phases': {phase: round(seconds, 3) for phase, seconds in self.ordered()},
+            'other_seconds': round(max(wall_seconds - self.total, 0.0), 3),
+            'gpu_busy_fraction': gpu_busy_fraction(self.seconds.get(GPU_PHASE, 0.0), wall_seconds),
+        }
+
+
+def gpu_busy_fraction(generate_seconds: float, wall_seconds: float) -> Optional[float]:
+    if wall_seconds <= 0:
+        return None
+    return round(min(generate_seconds / wall_seconds, 1.0), 4)
+
+
+def format_summary_table(summary: Dict[str, Any]) -> List[str]:
+    """Log lines for a job summary (phase, seconds, share of wall time)."""
+    wall = summary['wall_seconds']
+    rows = list(summary['phases'].items()) + [('other', summary['other_seconds'])]
+    lines = [f"{'Phase':<12}{'Seconds':>10}{'% wall':>9}"]
+    for phase, seconds in rows:
+        share = seconds / wall * 100 if wall > 0 else 0.0
+        lines.append(f"{phase:<12}{seconds:>10.2f}{share:>8.1f}%")
+    lines.append(f"{'wall':<12}{wall:>10.2f}")
+    busy = summary['gpu_busy_fraction']
+    lines.append(f"GPU busy:   {busy * 100:.1f}% of wall time in generate" if busy is not None else "GPU busy:   n/a")
+    return lines
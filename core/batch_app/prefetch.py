@@ -0,0 +1,230 @@
+"""
+Predictive weight prefetch into the OS page cache.
+
+When the running job is in its last chunks and the next queued job needs a
+different model, the worker reads that model's weight files (from
+``ModelRegistry.local_path`` or the HuggingFace cache) in a background thread.
+The next ``LLM(...)`` then reads the weights from RAM instead of disk.
+
+Reads are rate limited (``PREFETCH_MAX_MB_PER_SEC``) so they don't starve the
+running job's I/O, and skipped if the files would not fit in available memory
+(prefetching would only evict itself).
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from core.batch_app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Checked in order; like vLLM, only the first format a model directory has is loaded
+WEIGHT_FORMATS = (('.gguf',), ('.safetensors',), ('.bin', '.pt'))
+# Checkpoint files vLLM skips (training state, not weights)
+NON_WEIGHT_FILES = ('training_args.bin', 'optimizer.bin', 'optimizer.pt', 'scheduler.pt', 'scaler.pt')
+SAFETENSORS_INDEX = 'model.safetensors.index.json'
+READ_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def hf_cache_dir() -> Path:
+    """HuggingFace hub cache directory (honours HF_HUB_CACHE / HF_HOME)."""
+    if os.environ.get('HF_HUB_CACHE'):
+        return Path(os.environ['HF_HUB_CACHE'])
+    hf_home = os.environ.get('HF_HOME') or os.path.join(os.path.expanduser('~'), '.cache', 'huggingface')
+    return Path(hf_home) / 'hub'
+
+
+def select_weight_files(files: List[Path]) -> List[Path]:
+    """
+    The files of one model directory that vLLM will load.
+
+    Snapshots often ship both ``*.safetensors`` and ``pytorch_model*.bin``;
+    vLLM loads the safetensors and ignores the rest, so reading both would
+    double the I/O and evict the pages just cached. When a safetensors index
+    exists, only the shards it maps are kept (e.g. not an extra
+    ``consolidated.safetensors``).
+    """
+    for suffixes in WEIGHT_FORMATS:
+        chosen = [p for p in files if p.suffix in suffixes and p.name not in NON_WEIGHT_FILES]
+        if chosen:
+            break
+    else:
+        return []
+
+    if suffixes == ('.safetensors',):
+        index = chosen[0].parent / SAFETENSORS_INDEX
+        try:
+            with open(index) as f:
+                shards = set(json.load(f).get('weight_map', {}).values())
+        except (OSError, ValueError, AttributeError):
+            shards = set()
+        if any(p.name in shards for p in chosen):
+            chosen = [p for p in chosen if p.name in shards]
+    return sorted(chosen)
+
+
+def model_weight_files(model_id: str, local_path: Optional[str] = None,
+                       cache_dir: Optional[Path] = None) -> List[Path]:
+    """
+    Weight files a model load will read (see ``select_weight_files``).
+
+    Args:
+        model_id: HuggingFace model id
+        local_path: Local file (e.g. GGUF) or directory, if installed locally
+        cache_dir: HuggingFace hub cache (default: ``hf_cache_dir()``)
+
+    Returns:
+        Resolved file paths (empty if the model is not on local disk)
+    """
+    if local_path:
+        path = Path(local_path)
+        if path.is_file():
+            return [path]
+        if path.is_dir():
+            return select_weight_files([p for p in path.iterdir() if p.is_file()])
+        return []
+
+    repo_dir = (cache_dir or hf_cache_dir()) / f"models--{model_id.replace('/', '--')}" / 'snapshots'
+    if not repo_dir.is_dir():
+        return []
+    snapshots = sorted((p for p in repo_dir.iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime)
+    if not snapshots:
+        return []
+    # Snapshot entries are symlinks into blobs/ (select by link name, read the blob)
+    selected = select_weight_files([p for p in snapshots[-1].iterdir() if p.resolve().is_file()])
+    return sorted(p.resolve() for p in selected)
+
+
+def available_memory_bytes() -> Optional[int]:
+    """MemAvailable from /proc/meminfo (None if unknown)."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+@dataclass
+class PrefetchResult:
+    """Outcome of prefetching one model."""
+    model_id: str
+    total_bytes: int
+    bytes_read: int = 0
+    seconds: float = 0.0
+    completed: bool = False
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+
+
+def read_into_page_cache(paths: List[Path], max_bytes_per_sec: float = 0.0,
+                         should_stop: Callable[[], bool] = lambda: False,
+                         result: Optional[PrefetchResult] = None,
+                         sleep: Callable[[float], None] = time.sleep) -> int:
+    """
+    Read files sequentially (discarding the data) so the kernel caches them.
+
+    Args:
+        paths: Files to read
+        max_bytes_per_sec: Read rate limit (0 = unthrottled)
+        should_stop: Checked between chunks; return True to abort
+        result: Updated with ``bytes_read`` as reading progresses
+
+    Returns:
+        Bytes read
+    """
+    buffer = bytearray(READ_CHUNK_BYTES)
+    view = memoryview(buffer)
+    bytes_read = 0
+    start = time.monotonic()
+
+    for path in paths:
+        with open(path, 'rb', buffering=0) as f:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            while True:
+                if should_stop():
+                    return bytes_read
+                n = f.readinto(view)
+                if not n:
+                    break
+                bytes_read += n
+                if result is not None:
+                    result.bytes_read = bytes_read
+
+                if max_bytes_per_sec > 0:
+                    # Sleep until we're back under the rate limit
+                    ahead = bytes_read / max_bytes_per_sec - (time.monotonic() - start)
+                    if ahead > 0:
+                        sleep(ahead)
+
+    return bytes_read
+
+
+class Prefetcher:
+    """Prefetches one model at a time in a background thread."""
+
+    def __init__(self, max_bytes_per_sec: float = 0.0):
+        self.max_bytes_per_sec = max_bytes_per_sec
+        self.current: Optional[PrefetchResult] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, model_id: str, paths: List[Path]) -> PrefetchResult:
+        """Start prefetching (cancels a prefetch of another model)."""
+        if self.current and self.current.model_id == model_id and (self.running or self.current.completed):
+            return self.current
+
+        self.cancel()
+        result = PrefetchResult(model_id, total_bytes=sum(p.stat().st_size for p in paths))
+        self.current = result
+        self._stop = threading.Event()
+        stop = self._stop
+
+        def run():
+            start = time.monotonic()
+            try:
+                read_into_page_cache(paths, self.max_bytes_per_sec, stop.is_set, result)
+                result.completed = not stop.is_set()
+            except OSError as e:
+                result.error = str(e)
+                logger.warning(f"Prefetch of {model_id} failed: {e}")
+            result.seconds = time.monotonic() - start
+
+        self._thread = threading.Thread(target=run, name=f"prefetch-{model_id}", daemon=True)
+        self._thread.start()
+        return result
+
+    def cancel(self, wait: bool = True) -> None:
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def take(self, model_id: str) -> Optional[PrefetchResult]:
+        """
+        Stop prefetching and return the result if it was for ``model_id``.
+
+        Called right before loading a model so the prefetch doesn't compete
+        with the load's own reads.
+        """
+        self.cancel()
+        result, self.current = self.current, None
+        if result is not None and result.model_id == model_id:
+            return result
+        return None
@@ -0,0 +1,441 @@
+"""
+On-demand, time-boxed profiling of the running worker or API process.
+
+An admin starts a session with ``POST /admin/profile`` (or ``vllm-batch
+profile start``). The endpoint has no authentication, so it is off unless
+``PROFILING_ENABLED=true``. The API profiles itself, or forwards the request to the
+worker over the worker IPC socket. Each process has one ``Profiler``, and
+only one session runs at a time. It stops by itself after ``duration``
+seconds, or earlier on request.
+
+Modes:
+    sample    Stack sampler over all threads (no dependencies). Writes
+              speedscope JSON (open at https://www.speedscope.app) and
+              folded stacks (flamegraph.pl / inferno input)
+    cprofile  Deterministic cProfile of the main thread. Writes a .pstats
+              dump and a text summary sorted by cumulative time
+    torch     ``torch.profiler`` (CPU + CUDA) around the engine steps.
+              Writes a Chrome trace JSON (chrome://tracing, Perfetto)
+    memory    tracemalloc. Writes the end snapshot (.tracemalloc) and a
+              report of the top allocation sites and their growth since
+              the start
+
+cProfile and torch.profiler only see the thread that starts them, so they
+start and stop at ``Profiler.checkpoint()``, which the worker calls on its
+main thread before every engine step and on every idle poll. A session
+therefore starts at the next step and ends at the first step after it
+expires. Processes without checkpoints (the API) only offer ``sample`` and
+``memory``.
+
+When no session is active, ``checkpoint()`` is two attribute reads and
+nothing else is installed.
+
+Artifacts go to ``<log dir>/profiles/``. In the worker that is the directory
+of the running batch's log file, named after the batch. Otherwise it is
+``LOGS_DIR``.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from types import FrameType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.batch_app.logging_config import get_logger
+from core.config import settings
+
+logger = get_logger(__name__)
+
+PROFILE_MODES = ('sample', 'cprofile', 'torch', 'memory')
+CHECKPOINT_MODES = ('cprofile', 'torch')  # Must start/stop on the profiled thread
+
+DEFAULT_SAMPLE_INTERVAL = 0.01  # Seconds between stack samples (100 Hz)
+HISTORY_SIZE = 10  # Finished sessions kept for status
+TOP_ENTRIES = 50  # Rows in text summaries
+
+
+class ProfilerError(ValueError):
+    """Invalid profiling request (unknown mode, session already running, ...)."""
+
+
+@dataclass
+class ProfileSession:
+    """One time-boxed profiling run."""
+
+    mode: str
+    duration: float
+    output_dir: Path
+    label: str
+    interval: float = DEFAULT_SAMPLE_INTERVAL
+    id: str = field(default_factory=lambda: f"prof-{uuid.uuid4().hex[:12]}")
+    status: str = 'pending'  # pending -> running -> completed | failed
+    requested_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    artifacts: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        return self.started_at + self.duration if self.started_at is not None else None
+
+    def artifact_path(self, suffix: str) -> Path:
+        stamp = datetime.fromtimestamp(self.started_at or self.requested_at, timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        return self.output_dir / f"{self.label}-{self.mode}-{stamp}{suffix}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'mode': self.mode,
+            'status': self.status,
+            'duration_seconds': self.duration,
+            'label': self.label,
+            'requested_at': self.requested_at,
+            'started_at': self.started_at,
+            'expires_at': self.expires_at,
+            'finished_at': self.finished_at,
+            'artifacts': self.artifacts,
+            'error': self.error,
+        }
+
+
+# =============================================================================
+# Stack sampler
+# =============================================================================
+
+Frame = Tuple[str, str, int]  # (filename, function, first line)
+
+
+class StackSampler:
+    """Samples the Python stacks of all other threads every ``interval`` seconds."""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts: Counter = Counter()  # (thread name, stack root->leaf) -> samples
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(skip=own)
+
+    def sample(self, skip: Optional[int] = None) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, top in sys._current_frames().items():
+            if ident == skip:
+                continue
+            stack: List[Frame] = []
+            frame: Optional[FrameType] = top
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                frame = frame.f_back
+            self.counts[(names.get(ident, str(ident)), tuple(reversed(stack)))] += 1
+        self.samples += 1
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """Speedscope file (one sampled profile per thread)."""
+        frame_index: Dict[Frame, int] = {}
+        frames: List[Dict[str, Any]] = []
+        by_thread: Dict[str, List[Tuple[List[int], int]]] = {}
+        for (thread, stack), count in self.counts.items():
+            indexes = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({'name': frame[1], 'file': frame[0], 'line': frame[2]})
+                indexes.append(frame_index[frame])
+            by_thread.setdefault(thread, []).append((indexes, count))
+
+        profiles = []
+        for thread, stacks in sorted(by_thread.items()):
+            weights = [count * self.interval for _, count in stacks]
+            profiles.append({
+                'type': 'sampled',
+                'name': thread,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': [indexes for indexes, _ in stacks],
+                'weights': weights,
+            })
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'vllm-batch-server profiler',
+            'shared': {'frames': frames},
+            'profiles': profiles,
+        }
+
+    def to_folded(self) -> str:
+        """Folded stacks (``thread;frame;frame count`` per line)."""
+        lines = []
+        for (thread, stack), count in sorted(self.counts.items(), key=lambda item: -item[1]):
+            frames = ";".join(f"{Path(filename).name}:{function}" for filename, function, _ in stack)
+            lines.append(f"{thread};{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+
+# =============================================================================
+# Profiler
+# =============================================================================
+
+class Profiler:
+    """
+    Per-process profiling controller.
+
+    Args:
+        checkpoints: True if the process calls ``checkpoint()`` on its main
+            thread (enables ``cprofile`` and ``torch``)
+        max_duration: Longest session allowed (seconds)
+    """
+
+    def __init__(self, checkpoints: bool = False, max_duration: float = 600.0):
+        self.checkpoints = checkpoints
+        self.max_duration = max_duration
+        self.history: List[ProfileSession] = []
+        self._lock = threading.Lock()
+        self._session: Optional[ProfileSession] = None
+        self._pending: Optional[ProfileSession] = None  # Waiting for a checkpoint to start
+        self._stop_requested = False
+        self._timer: Optional[threading.Timer] = None
+        self._backend: Any = None  # cProfile.Profile, torch profiler, StackSampler or tracemalloc snapshot
+
+    @property
+    def active(self) -> Optional[ProfileSession]:
+        return self._session
+
+    def modes(self) -> Tuple[str, ...]:
+        return PROFILE_MODES if self.checkpoints else tuple(m for m in PROFILE_MODES if m not in CHECKPOINT_MODES)
+
+    def start(self, mode: str, duration: float, output_dir: Path, label: str = 'profile',
+              interval: float = DEFAULT_SAMPLE_INTERVAL) -> ProfileSession:
+        """Start (or schedule, for checkpoint modes) a session."""
+        if mode not in self.modes():
+            raise ProfilerError(f"Unknown or unsupported profiling mode {mode!r} here "
+                                f"(expected one of {', '.join(self.modes())})")
+        if not 0 < duration <= self.max_duration:
+            raise ProfilerError(f"duration must be between 0 and {self.max_duration:g} seconds")
+        if not 0.001 <= interval <= 1.0:
+            raise ProfilerError("interval must be between 0.001 and 1 second")
+        if mode == 'torch':
+            try:
+                import torch.profiler  # noqa: F401
+            except ImportError as e:
+                raise ProfilerError("torch profiling needs PyTorch installed") from e
+
+        with self._lock:
+            if self._session is not None:
+                raise ProfilerError(f"Profiling session {self._session.id} is already {self._session.status}")
+            session = ProfileSession(mode=mode, duration=duration, output_dir=Path(output_dir),
+                                     label=label, interval=interval)
+            self._session = session
+            self._stop_requested = False
+
+        session.output_dir.mkdir(parents=True, exist_ok=True)
+        if mode in CHECKPOINT_MODES:
+            self._pending = session
+        else:
+            self._begin(session)
+            self._timer = threading.Timer(duration, self._finish_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+        logger.info("Profiling requested", extra={"profile_id": session.id, "mode": mode, "duration": duration})
+        return session
+
+    def stop(self) -> Optional[ProfileSession]:
+        """End the active session early (checkpoint modes end at the next checkpoint)."""
+        session = self._session
+        if session is None:
+            return None
+        if session.mode in CHECKPOINT_MODES:
+            self._stop_requested = True
+            return session
+        if self._timer is not None:
+            self._timer.cancel()
+        self._finish(session)
+        return session
+
+    def checkpoint(self) -> None:
+        """Start or finish checkpoint-mode sessions; call on the profiled thread."""
+        if self._pending is None and self._session is None:
+            return
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            self._begin(pending)
+            return
+        session = self._session
+        if session is not None and session.mode in CHECKPOINT_MODES and session.status == 'running' and (
+                self._stop_requested or time.time() >= (session.expires_at or 0)):
+            self._finish(session)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'active': self._session.to_dict() if self._session else None,
+            'recent': [session.to_dict() for session in reversed(self.history)],
+            'modes': list(self.modes()),
+            'max_duration_seconds': self.max_duration,
+        }
+
+    # -------------------------------------------------------------------------
+
+    def _begin(self, session: ProfileSession) -> None:
+        session.started_at = time.time()
+        session.status = 'running'
+        try:
+            if session.mode == 'sample':
+                sampler = StackSampler(session.interval)
+                sampler.start()
+                self._backend = sampler
+            elif session.mode == 'cprofile':
+                profile = cProfile.Profile()
+                profile.enable()
+                self._backend = profile
+            elif session.mode == 'torch':
+                import torch.profiler
+                activities = [torch.profiler.ProfilerActivity.CPU]
+                if torch.cuda.is_available():
+                    activities.append(torch.profiler.ProfilerActivity.CUDA)
+                profile = torch.profiler.profile(activities=activities, record_shapes=False, with_stack=True)
+                profile.start()
+                self._backend = profile
+            elif session.mode == 'memory':
+                started_here = not tracemalloc.is_tracing()
+                if started_here:
+                    tracemalloc.start(25)
+                self._backend = (started_here, tracemalloc.take_snapshot())
+        except Exception as e:
+            self._fail(session, e)
+
+    def _finish_from_timer(self) -> None:
+        session = self._session
+        if session is not None and session.mode not in CHECKPOINT_MODES:
+            self._finish(session)
+
+    def _finish(self, session: ProfileSession) -> None:
+        with self._lock:
+            if self._session is not session or session.status != 'running':
+                return
+            session.status = 'stopping'
+        try:
+            if session.mode == 'sample':
+                self._write_sample(session)
+            elif session.mode == 'cprofile':
+                self._write_cprofile(session)
+            elif session.mode == 'torch':
+                self._write_torch(session)
+            elif session.mode == 'memory':
+                self._write_memory(session)
+            session.status = 'completed'
+            logger.info("Profiling finished", extra={"profile_id": session.id, "artifacts": session.artifacts})
+        except Exception as e:
+            self._fail(session, e)
+            return
+        self._close(session)
+
+    def _fail(self, session: ProfileSession, error: Exception) -> None:
+        logger.error("Profiling failed", exc_info=True, extra={"profile_id": session.id, "error": str(error)})
+        session.status = 'failed'
+        session.error = str(error)
+        self._close(session)
+
+    def _close(self, session: ProfileSession) -> None:
+        session.finished_at = time.time()
+        self._backend = None
+        with self._lock:
+            if self._session is session:
+                self._session = None
+            self.history = (self.history + [session])[-HISTORY_SIZE:]
+
+    def _write_sample(self, session: ProfileSession) -> None:
+        sampler: StackSampler = self._backend
+        sampler.stop()
+        speedscope = session.artifact_path('.speedscope.json')
+        speedscope.write_text(json.dumps(sampler.to_speedscope(f"{session.label} ({session.mode})")))
+        folded = session.artifact_path('.folded.txt')
+        folded.write_text(sampler.to_folded())
+        session.artifacts += [str(speedscope), str(folded)]
+
+    def _write_cprofile(self, session: ProfileSession) -> None:
+        profile: cProfile.Profile = self._backend
+        profile.disable()
+        dump = session.artifact_path('.pstats')
+        profile.dump_stats(str(dump))
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(TOP_ENTRIES)
+        text = session.artifact_path('.pstats.txt')
+        text.write_text(summary.getvalue())
+        session.artifacts += [str(dump), str(text)]
+
+    def _write_torch(self, session: ProfileSession) -> None:
+        profile = self._backend
+        profile.stop()
+        trace = session.artifact_path('.trace.json')
+        profile.export_chrome_trace(str(trace))
+        session.artifacts.append(str(trace))
+
+    def _write_memory(self, session: ProfileSession) -> None:
+        started_here, start_snapshot = self._backend
+        snapshot = tracemalloc.take_snapshot()
+        if started_here:
+            tracemalloc.stop()
+        dump = session.artifact_path('.tracemalloc')
+        snapshot.dump(str(dump))
+
+        lines = [f"Top {TOP_ENTRIES} allocation sites", ""]
+        lines += [str(stat) for stat in snapshot.statistics('lineno')[:TOP_ENTRIES]]
+        lines += ["", f"Top {TOP_ENTRIES} growth since the session started", ""]
+        lines += [str(stat) for stat in snapshot.compare_to(start_snapshot, 'lineno')[:TOP_ENTRIES]]
+        report = session.artifact_path('.memory.txt')
+        report.write_text("\n".join(lines) + "\n")
+        session.artifacts += [str(dump), str(report)]
+
+
+def handle_profile_message(profiler: Profiler, message: Dict[str, Any],
+                           output_dir: Callable[[], Tuple[Path, str]]) -> Dict[str, Any]:
+    """
+    Apply a profiling control message (``action``: start, stop or status).
+
+    ``output_dir`` returns the artifact directory and file label for a new
+    session (the running batch's log directory in the worker).
+    """
+    action = message.get('action', 'status')
+    try:
+        if action == 'start':
+            directory, label = output_dir()
+            session = profiler.start(
+                message.get('mode', 'sample'),
+                float(message.get('duration_seconds', 30)),
+                directory,
+                label=label,
+                interval=float(message.get('interval_seconds', settings.PROFILING_SAMPLE_INTERVAL_MS / 1000)),
+            )
+            return {"ok": True, "session": session.to_dict()}
+        if action == 'stop':
+            stopped = profiler.stop()
+            return {"ok": True, "session": stopped.to_dict() if stopped else None}
+        if action == 'status':
+            return {"ok": True, **profiler.status()}
+    except (ProfilerError, TypeError, ValueError, OSError) as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": False, "error": f"Unknown profile action: {action}"}
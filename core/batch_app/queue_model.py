@@ -0,0 +1,430 @@
+"""
+Queue snapshot and per-model throughput model for ETAs.
+
+The scheduler keeps a materialized snapshot on each queued ``BatchJob``
+(``queue_position``, ``estimated_start_time``, ``estimated_duration_seconds``,
+``estimated_completion_time``). It is refreshed on job transitions (submit,
+cancel, start, chunk saved, finish), so ``/v1/queue`` and ``GET /v1/batches/{id}``
+are plain reads.
+
+Predictions come from a per-model linear model fit on that model's recent
+completed jobs:
+
+    inference_seconds = a * prompt_tokens + b * completion_tokens + c
+
+plus a swap cost (the resident model's measured memory release time and the
+new model's measured load time, or its restore time if it is warm in the
+worker's host RAM cache) whenever the job's model differs from the one
+resident before it and is not co-resident on the GPU. LoRA adapter jobs count as their base model, which stays
+resident between them. The snapshot walks jobs in the same
+order the worker schedules them (priority, then FIFO).
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.batch_app.logging_config import get_logger
+
+from .database import BatchJob, ModelRegistry, WorkerHeartbeat
+from .lora import resident_model_id
+from .model_cache import parse_warm_models
+from .residency import parse_resident_models
+
+logger = get_logger(__name__)
+
+# Scheduling order used by the worker (BatchWorker.get_next_pending_job)
+SCHEDULING_ORDER = (BatchJob.priority.desc(), BatchJob.created_at)
+
+QUEUED_STATUSES = ('validating', 'queued')
+
+# Relative cost of a prompt token vs a completion token when there is too little
+# history to fit both coefficients (prefill is roughly 10x cheaper than decode)
+PROMPT_TOKEN_WEIGHT = 0.1
+
+# Characters per token for estimating prompt tokens at submission
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # Role markers / separators per chat message
+
+
+def estimate_prompt_tokens(request: Dict[str, Any]) -> int:
+    """Rough prompt token count for one batch input line (no tokenizer needed)."""
+    messages = request.get('body', {}).get('messages', [])
+    tokens = 0
+    for message in messages:
+        content = message.get('content') or ''
+        if not isinstance(content, str):
+            content = str(content)
+        tokens += len(content) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+    return tokens
+
+
+def scan_batch_input(lines: Iterable[str]) -> Tuple[int, Optional[str], int]:
+    """
+    Validate batch input lines at submission.
+
+    Returns:
+        (number of requests, model of the first request that names one, estimated prompt tokens)
+
+    Raises:
+        ValueError: A line is not valid JSON
+    """
+    num_requests = 0
+    model = None
+    estimated_prompt_tokens = 0
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {i+1}: {e}") from e
+        num_requests += 1
+        estimated_prompt_tokens += estimate_prompt_tokens(request)
+        if model is None and 'body' in request and 'model' in request['body']:
+            model = request['body']['model']
+    return num_requests, model, estimated_prompt_tokens
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+@dataclass
+class ThroughputModel:
+    """Predicts inference seconds for a job on one model."""
+
+    model: str
+    seconds_per_prompt_token: float
+    seconds_per_completion_token: float
+    overhead_seconds: float
+    prompt_tokens_per_request: Optional[float]
+    completion_tokens_per_request: float
+    samples: int
+    source: str  # fit, pooled, registry, default
+
+    def predict(self, prompt_tokens: float, completion_tokens: float) -> float:
+        return max(
+            self.overhead_seconds
+            + self.seconds_per_prompt_token * prompt_tokens
+            + self.seconds_per_completion_token * completion_tokens,
+            0.0
+        )
+
+    def predict_job(self, job: BatchJob) -> float:
+        """Predict inference seconds for a whole job from its request count."""
+        requests = job.total_requests or 0
+        prompt_tokens: float
+        if job.estimated_prompt_tokens is not None:
+            prompt_tokens = job.estimated_prompt_tokens
+        else:
+            prompt_tokens = requests * (self.prompt_tokens_per_request or 0)
+        completion_tokens = requests * self.completion_tokens_per_request
+        return self.predict(prompt_tokens, completion_tokens)
+
+
+def _solve_linear_system(matrix: List[List[float]], vector: List[float]) -> Optional[List[float]]:
+    """Gaussian elimination with partial pivoting; None if singular."""
+    n = len(vector)
+    a = [row[:] + [vector[i]] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+        if abs(a[pivot][col]) < 1e-12:
+            return None
+        a[col], a[pivot] = a[pivot], a[col]
+        for r in range(col + 1, n):
+            factor = a[r][col] / a[col][col]
+            for c in range(col, n + 1):
+                a[r][c] -= factor * a[col][c]
+    solution = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        solution[r] = (a[r][n] - sum(a[r][c] * solution[c] for c in range(r + 1, n))) / a[r][r]
+    return solution
+
+
+def _least_squares(rows: Sequence[Sequence[float]], targets: Sequence[float]) -> Optional[List[float]]:
+    """Ordinary least squares via the normal equations (small, dense problems)."""
+    k = len(rows[0])
+    xtx = [[sum(row[i] * row[j] for row in rows) for j in range(k)] for i in range(k)]
+    xty = [sum(row[i] * t for row, t in zip(rows, targets)) for i in range(k)]
+    return _solve_linear_system(xtx, xty)
+
+
+def fit_throughput_model(
+    model: str,
+    samples: Sequence[Tuple[int, int, float, int]],
+    registry_tokens_per_sec: Optional[float] = None,
+) -> ThroughputModel:
+    """
+    Fit a throughput model from completed jobs.
+
+    Args:
+        model: Model ID
+        samples: (prompt_tokens, completion_tokens, inference_seconds, requests) per job
+        registry_tokens_per_sec: Benchmark throughput from ModelRegistry (fallback)
+
+    Falls back, in order: full fit (>= 3 jobs, non-negative coefficients) ->
+    pooled rate over history -> registry benchmark -> configured default.
+    """
+    samples = [s for s in samples if s[2] > 0 and s[3] > 0 and (s[0] + s[1]) > 0]
+
+    if samples:
+        completion_per_request = sum(s[1] for s in samples) / sum(s[3] for s in samples)
+        prompt_per_request: Optional[float] = sum(s[0] for s in samples) / sum(s[3] for s in samples)
+    else:
+        completion_per_request = float(settings.QUEUE_DEFAULT_COMPLETION_TOKENS)
+        prompt_per_request = None
+
+    if len(samples) >= 3:
+        solution = _least_squares([(p, c, 1.0) for p, c, _, _ in samples], [d for _, _, d, _ in samples])
+        if solution and all(x >= 0 for x in solution) and (solution[0] > 0 or solution[1] > 0):
+            return ThroughputModel(
+                model=model,
+                seconds_per_prompt_token=solution[0],
+                seconds_per_completion_token=solution[1],
+                overhead_seconds=solution[2],
+                prompt_tokens_per_request=prompt_per_request,
+                completion_tokens_per_request=completion_per_request,
+                samples=len(samples),
+                source="fit"
+            )
+
+    if samples:
+        weighted_tokens = sum(c + PROMPT_TOKEN_WEIGHT * p for p, c, _, _ in samples)
+        seconds_per_completion = sum(d for _, _, d, _ in samples) / weighted_tokens
+        return ThroughputModel(
+            model=model,
+            seconds_per_prompt_token=PROMPT_TOKEN_WEIGHT * seconds_per_completion,
+            seconds_per_completion_token=seconds_per_completion,
+            overhead_seconds=0.0,
+            prompt_tokens_per_request=prompt_per_request,
+            completion_tokens_per_request=completion_per_request,
+            samples=len(samples),
+            source="pooled"
+        )
+
+    tokens_per_sec = registry_tokens_per_sec or settings.QUEUE_DEFAULT_TOKENS_PER_SEC
+    return ThroughputModel(
+        model=model,
+        seconds_per_prompt_token=1.0 / tokens_per_sec,
+        seconds_per_completion_token=1.0 / tokens_per_sec,
+        overhead_seconds=0.0,
+        prompt_tokens_per_request=prompt_per_request,
+        completion_tokens_per_request=completion_per_request,
+        samples=0,
+        source="registry" if registry_tokens_per_sec else "default"
+    )
+
+
+def job_inference_seconds(job: BatchJob) -> Optional[float]:
+    """Inference time of a completed job (excludes model load when measurable)."""
+    if job.total_tokens and job.throughput_tokens_per_sec:
+        return job.total_tokens / job.throughput_tokens_per_sec
+    if job.in_progress_at and job.completed_at:
+        return float(job.completed_at - job.in_progress_at)
+    return None
+
+
+def load_throughput_model(db: Session, model: str) -> ThroughputModel:
+    """Fit the throughput model for one model from its recent completed jobs."""
+    history = db.query(BatchJob).filter(
+        BatchJob.model == model,
+        BatchJob.status == 'completed',
+        BatchJob.prompt_tokens.isnot(None),
+        BatchJob.completion_tokens.isnot(None)
+    ).order_by(BatchJob.completed_at.desc()).limit(settings.QUEUE_MODEL_HISTORY_JOBS).all()
+
+    samples = []
+    for job in history:
+        seconds = job_inference_seconds(job)
+        if seconds:
+            samples.append((job.prompt_tokens or 0, job.completion_tokens or 0, seconds, job.completed_requests or 0))
+
+    registry = db.query(ModelRegistry).filter(ModelRegistry.model_id == model).first()
+    return fit_throughput_model(model, samples, registry.throughput_tokens_per_sec if registry else None)
+
+
+def model_load_seconds(db: Session, model: Optional[str]) -> float:
+    """Swap cost: measured load time for a model, or the configured default."""
+    if model:
+        registry = db.query(ModelRegistry).filter(ModelRegistry.model_id == model).first()
+        if registry and registry.load_time_seconds:
+            return registry.load_time_seconds
+    return settings.QUEUE_DEFAULT_MODEL_LOAD_SECONDS
+
+
+def model_warm_load_seconds(db: Session, model: Optional[str]) -> float:
+    """Swap cost for a model restored from the host RAM cache."""
+    if model:
+        registry = db.query(ModelRegistry).filter(ModelRegistry.model_id == model).first()
+        if registry and registry.warm_load_time_seconds:
+            return registry.warm_load_time_seconds
+    return settings.QUEUE_DEFAULT_WARM_LOAD_SECONDS
+
+
+def model_unload_seconds(db: Session, model: Optional[str]) -> float:
+    """Measured time for a model's GPU memory to be released (0 until measured)."""
+    if model:
+        registry = db.query(ModelRegistry).filter(ModelRegistry.model_id == model).first()
+        if registry and registry.unload_time_seconds:
+            return registry.unload_time_seconds
+    return 0.0
+
+
+def _record_smoothed(db: Session, model: str, field: str, seconds: float, smoothing: float) -> None:
+    registry = db.query(ModelRegistry).filter(ModelRegistry.model_id == model).first()
+    if not registry:
+        return
+    previous = getattr(registry, field)
+    setattr(registry, field, smoothing * seconds + (1 - smoothing) * previous if previous else seconds)
+    db.commit()
+
+
+def record_model_load_time(db: Session, model: str, seconds: float, smoothing: float = 0.5) -> None:
+    """Store a measured load time (exponentially smoothed) as the model's swap cost."""
+    _record_smoothed(db, model, 'load_time_seconds', seconds, smoothing)
+
+
+def record_model_warm_load_time(db: Session, model: str, seconds: float, smoothing: float = 0.5) -> None:
+    """Store a measured restore-from-cache time (exponentially smoothed) for a model."""
+    _record_smoothed(db, model, 'warm_load_time_seconds', seconds, smoothing)
+
+
+def record_model_unload_time(db: Session, model: str, seconds: float, smoothing: float = 0.5) -> None:
+    """Store a measured memory release time (exponentially smoothed) for a model."""
+    _record_smoothed(db, model, 'unload_time_seconds', seconds, smoothing)
+
+
+def refresh_queue_snapshot(db: Session, now: Optional[datetime] = None) -> List[BatchJob]:
+    """
+    Recompute and store the queue snapshot (commits).
+
+    Walks the running job and then queued jobs in scheduling order, assigning
+    each a position, predicted start, predicted duration (including swap cost)
+    and predicted completion.
+
+    Returns:
+        Queued jobs in scheduling order
+    """
+    now = now or datetime.now(timezone.utc)
+    models: Dict[str, ThroughputModel] = {}
+    load_times: Dict[Optional[str], float] = {}
+    unload_times: Dict[Optional[str], float] = {}
+    warm_load_times: Dict[Optional[str], float] = {}
+    residents: Dict[Optional[str], Optional[str]] = {}
+
+    def resident_of(model: Optional[str]) -> Optional[str]:
+        if model not in residents:
+            residents[model] = resident_model_id(db, model)
+        return residents[model]
+
+    def throughput_model(model: str) -> ThroughputModel:
+        if model not in models:
+            models[model] = load_throughput_model(db, model)
+        return models[model]
+
+    heartbeat = db.query(WorkerHeartbeat).filter(WorkerHeartbeat.id == 1).first()
+    resident_model = heartbeat.loaded_model if heartbeat else None
+    warm = set(parse_warm_models(heartbeat.warm_models if heartbeat else None))
+    cache_enabled = settings.MODEL_CACHE_RAM_GB > 0
+    # Engines loaded side by side (co-residency): routing to them is free
+    co_resident = set(parse_resident_models(heartbeat.resident_models if heartbeat else None))
+
+    def swap_cost(previous: Optional[str], model: Optional[str]) -> float:
+        if previous not in unload_times:
+            unload_times[previous] = model_unload_seconds(db, previous)
+        if model in warm:
+            if model not in warm_load_times:
+                warm_load_times[model] = model_warm_load_seconds(db, model)
+            return unload_times[previous] + warm_load_times[model]
+        if model not in load_times:
+            load_times[model] = model_load_seconds(db, model)
+        return unload_times[previous] + load_times[model]
+    cursor = now
+
+    current = db.query(BatchJob).filter(BatchJob.status == 'in_progress').order_by(BatchJob.in_progress_at).first()
+    if current:
+        if current.estimated_duration_seconds is None and current.model:
+            current.estimated_duration_seconds = throughput_model(current.model).predict_job(current)
+
+        worker_eta = _as_utc(current.estimated_completion_time)
+        if worker_eta is not None and worker_eta > now:
+            # The worker's measured chunk rate beats the model once the job runs
+            remaining = (worker_eta - now).total_seconds()
+        else:
+            fraction_left = 1.0
+            if current.total_requests:
+                fraction_left = max(1.0 - (current.completed_requests or 0) / current.total_requests, 0.0)
+            remaining = (current.estimated_duration_seconds or 0.0) * fraction_left
+            current.estimated_completion_time = now + timedelta(seconds=remaining)
+
+        current.queue_position = 0
+        cursor = now + timedelta(seconds=remaining)
+        resident_model = resident_of(current.model)
+
+    queued = db.query(BatchJob).filter(BatchJob.status.in_(QUEUED_STATUSES)).order_by(*SCHEDULING_ORDER).all()
+
+    for position, job in enumerate(queued, start=1):
+        duration = throughput_model(job.model).predict_job(job) if job.model else 0.0
+        job_resident = resident_of(job.model)
+        if job_resident != resident_model and job_resident not in co_resident:
+            duration += swap_cost(resident_model, job_resident)
+            # The worker sleeps the outgoing model into its cache
+            warm.discard(job_resident)
+            if cache_enabled and resident_model:
+                warm.add(resident_model)
+            # Which engines the load evicts isn't known here; assume all of them
+            co_resident = {job_resident} if co_resident and job_resident else set()
+
+        job.queue_position = position
+        job.estimated_start_time = cursor
+        job.estimated_duration_seconds = duration
+        job.estimated_completion_time = cursor + timedelta(seconds=duration)
+
+        cursor = job.estimated_completion_time
+        resident_model = job_resident
+
+    db.commit()
+    return queued
+
+
+def safe_refresh_queue_snapshot(db: Session) -> None:
+    """Refresh the snapshot without letting a failure break the caller."""
+    try:
+        refresh_queue_snapshot(db)
+    except Exception as e:
+        db.rollback()
+        logger.warning("Queue snapshot refresh failed", exc_info=True, extra={"error": str(e)})
+
+
+def snapshot_entry(job: BatchJob, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Queue entry for a queued job from its stored snapshot."""
+    now = now or datetime.now(timezone.utc)
+    start = _as_utc(job.estimated_start_time)
+    starts_in = max((start - now).total_seconds(), 0.0) if start else 0.0
+    duration = job.estimated_duration_seconds
+    completion = _as_utc(job.estimated_completion_time)
+
+    return {
+        "position": job.queue_position,
+        "batch_id": job.batch_id,
+        "model": job.model,
+        "status": job.status,
+        "priority": job.priority,
+        "total_requests": job.total_requests,
+        "total_tokens": job.total_tokens,
+        "estimated_prompt_tokens": job.estimated_prompt_tokens,
+        "created_at": datetime.fromtimestamp(job.created_at, tz=timezone.utc).isoformat(),
+        "estimated_start_time": start.isoformat() if start else None,
+        "estimated_completion_time": completion.isoformat() if completion else None,
+        "estimated_duration_seconds": int(duration) if duration is not None else None,
+        "estimated_duration_minutes": round(duration / 60, 1) if duration is not None else None,
+        "starts_in_seconds": int(starts_in),
+        "starts_in_minutes": round(starts_in / 60, 1)
+    }
@@ -0,0 +1,239 @@
+"""
+Per-request latency and token metrics for batch jobs.
+
+vLLM attaches a ``RequestMetrics`` to each ``RequestOutput`` (arrival, first
+scheduled, first token and finished timestamps, time in queue). The worker
+turns each one into a compact row, appends the rows of every saved chunk to a
+tab-separated sidecar next to the results file
+(``{batch_id}_results.jsonl.metrics.tsv``), and observes the same values in
+the ``vllm_batch_request_*`` Prometheus histograms.
+
+Columns:
+    custom_id, prompt_tokens, completion_tokens, cached_tokens, finish_reason,
+    arrival_time (epoch seconds), queue_s, ttft_s, prefill_s, decode_s,
+    decode_per_token_s, e2e_s
+
+``prefill_s`` is first scheduled -> first token and ``decode_s`` is first
+token -> finished. A job whose requests spend most of their time in
+``queue_s`` is limited by batch slots / KV cache (preemptions re-queue
+requests and show up there and in ``prefill_s``), otherwise by prefill or
+decode.
+
+vLLM V1 only fills ``RequestOutput.metrics`` with stats logging enabled, and
+the worker disables it. The worker's step loop therefore records arrival,
+first-token and finish timestamps itself and attaches them as a
+``StepTiming`` when ``metrics`` is empty; ``queue_s`` and ``prefill_s`` stay
+empty for those requests (the loop can't see when a request was scheduled).
+
+Usage:
+    from core.batch_app.request_metrics import read_request_rows, summarize_request_rows
+
+    summary = summarize_request_rows(read_request_rows(results_path))
+"""
+
+import csv
+import math
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from core.batch_app import metrics
+
+METRICS_SUFFIX = ".metrics.tsv"
+
+COLUMNS = (
+    'custom_id', 'prompt_tokens', 'completion_tokens', 'cached_tokens', 'finish_reason',
+    'arrival_time', 'queue_s', 'ttft_s', 'prefill_s', 'decode_s', 'decode_per_token_s', 'e2e_s',
+)
+INT_COLUMNS = ('prompt_tokens', 'completion_tokens', 'cached_tokens')
+TIMING_COLUMNS = ('queue_s', 'ttft_s', 'prefill_s', 'decode_s', 'decode_per_token_s', 'e2e_s')
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class StepTiming:
+    """Wall-clock timestamps of a request as seen by the step loop (``RequestMetrics`` field names)."""
+    arrival_time: float
+    first_token_time: Optional[float] = None
+    finished_time: Optional[float] = None
+
+
+def metrics_path_for(results_path: str | Path) -> Path:
+    """Path of the per-request metrics sidecar for a results file."""
+    return Path(f"{results_path}{METRICS_SUFFIX}")
+
+
+def _number(value: Any) -> Optional[float]:
+    """Numeric field or None (engines may omit or not fill a field)."""
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _span(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return max(end - start, 0.0)
+
+
+def request_row(custom_id: str, output: Any) -> Dict[str, Any]:
+    """Compact metrics row for one finished ``RequestOutput``."""
+    completion = output.outputs[0]
+    completion_tokens = len(completion.token_ids)
+    row: Dict[str, Any] = {
+        'custom_id': custom_id,
+        'prompt_tokens': len(output.prompt_token_ids) if output.prompt_token_ids else 0,
+        'completion_tokens': completion_tokens,
+        'cached_tokens': int(_number(getattr(output, 'num_cached_tokens', None)) or 0),
+        'finish_reason': completion.finish_reason,
+    }
+
+    timing = getattr(output, 'metrics', None)
+    arrival = _number(getattr(timing, 'arrival_time', None))
+    scheduled = _number(getattr(timing, 'first_scheduled_time', None))
+    first_token = _number(getattr(timing, 'first_token_time', None))
+    finished = _number(getattr(timing, 'finished_time', None)) or _number(getattr(timing, 'last_token_time', None))
+    queue = _number(getattr(timing, 'time_in_queue', None))
+    decode = _span(first_token, finished)
+
+    row.update({
+        'arrival_time': arrival,
+        'queue_s': queue if queue is not None else _span(arrival, scheduled),
+        'ttft_s': _span(arrival, first_token),
+        'prefill_s': _span(scheduled, first_token),
+        'decode_s': decode,
+        # The first token comes out of prefill; the rest are decode steps
+        'decode_per_token_s': decode / (completion_tokens - 1) if decode is not None and completion_tokens > 1 else None,
+        'e2e_s': _span(arrival, finished),
+    })
+    return row
+
+
+def _format(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return f"{value:.6f}".rstrip('0').rstrip('.') if value else '0'
+    return str(value).replace('\t', ' ').replace('\n', ' ')
+
+
+def append_request_rows(results_path: str | Path, rows: List[Dict[str, Any]]) -> None:
+    """Append rows to the sidecar (writing the header first if the file is new)."""
+    if not rows:
+        return
+    path = metrics_path_for(results_path)
+    lines = [] if path.exists() and path.stat().st_size else ['\t'.join(COLUMNS) + '\n']
+    lines.extend('\t'.join(_format(row.get(column)) for column in COLUMNS) + '\n' for row in rows)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(''.join(lines))
+
+
+def _parse(column: str, value: str) -> Any:
+    if value == '':
+        return None
+    if column in INT_COLUMNS:
+        return int(value)
+    if column in TIMING_COLUMNS or column == 'arrival_time':
+        return float(value)
+    return value
+
+
+def read_request_rows(results_path: str | Path) -> Iterator[Dict[str, Any]]:
+    """Rows of a results file's sidecar (incomplete or malformed lines are skipped)."""
+    path = metrics_path_for(results_path)
+    if not path.exists():
+        return
+    with open(path, encoding='utf-8', newline='') as f:
+        for record in csv.DictReader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if None in record.values() or None in record:
+                continue
+            try:
+                yield {column: _parse(column, record[column]) for column in COLUMNS}
+            except (KeyError, ValueError):
+                continue
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 6) if value is not None else None
+
+
+def summarize_request_rows(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Distribution of per-request latencies and token counts.
+
+    Returns request count, token totals, finish reason counts, p50/p90/p95/p99
+    and mean of each timing column, and the share of summed request time spent
+    queued, in prefill and in decode.
+    """
+    values: Dict[str, List[float]] = {column: [] for column in TIMING_COLUMNS}
+    finish_reasons: Counter = Counter()
+    totals = {column: 0 for column in INT_COLUMNS}
+    count = 0
+    for row in rows:
+        count += 1
+        finish_reasons[row['finish_reason'] or 'unknown'] += 1
+        for column in INT_COLUMNS:
+            totals[column] += row[column] or 0
+        for column in TIMING_COLUMNS:
+            if row[column] is not None:
+                values[column].append(row[column])
+
+    latency = {}
+    for column, column_values in values.items():
+        if not column_values:
+            continue
+        column_values.sort()
+        latency[column] = {
+            **{f"p{pct}": _round(percentile(column_values, pct)) for pct in PERCENTILES},
+            'mean': round(sum(column_values) / len(column_values), 6),
+            'max': round(column_values[-1], 6),
+        }
+
+    phase_seconds = {phase: sum(values[f"{phase}_s"]) for phase in ('queue', 'prefill', 'decode')}
+    phase_total = sum(phase_seconds.values())
+    return {
+        'requests': count,
+        **{f"total_{column}": total for column, total in totals.items()},
+        'finish_reasons': dict(finish_reasons.most_common()),
+        'latency': latency,
+        'time_share': {phase: round(seconds / phase_total, 4) for phase, seconds in phase_seconds.items()}
+                      if phase_total > 0 else None,
+    }
+
+
+def observe_request_rows(rows: Iterable[Dict[str, Any]], model: Optional[str]) -> None:
+    """Feed rows into the per-request Prometheus histograms."""
+    model = model or 'unknown'
+    for row in rows:
+        metrics.batch_request_finished.labels(model=model, finish_reason=row['finish_reason'] or 'unknown').inc()
+        if row['queue_s'] is not None:
+            metrics.batch_request_queue_time.labels(model=model).observe(row['queue_s'])
+        if row['ttft_s'] is not None:
+            metrics.batch_request_time_to_first_token.labels(model=model).observe(row['ttft_s'])
+        if row['decode_per_token_s'] is not None:
+            metrics.batch_request_decode_time_per_token.labels(model=model).observe(row['decode_per_token_s'])
+
+
+def format_summary(summary: Dict[str, Any]) -> List[str]:
+    """Log lines for a job's request metrics summary."""
+    lines = [f"Requests: {summary['requests']:,}  finish reasons: "
+             + ", ".join(f"{reason}={n:,}" for reason, n in summary['finish_reasons'].items())]
+    labels = {'queue_s': 'Queue', 'ttft_s': 'TTFT', 'decode_per_token_s': 'Decode/token', 'e2e_s': 'End to end'}
+    for column, label in labels.items():
+        stats = summary['latency'].get(column)
+        if stats:
+            lines.append(f"{label + ':':<14}p50 {stats['p50']:.3f}s  p95 {stats['p95']:.3f}s  "
+                         f"p99 {stats['p99']:.3f}s  max {stats['max']:.3f}s")
+    share = summary['time_share']
+    if share:
+        lines.append(f"Time share:   queue {share['queue']:.0%}  prefill {share['prefill']:.0%}  "
+                     f"decode {share['decode']:.0%}")
+    return lines
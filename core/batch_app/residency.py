@@ -0,0 +1,171 @@
+"""
+Co-resident small models on one GPU.
+
+A 1B-4B model uses a fraction of a 16 GB card, but the worker would otherwise
+hold one ``LLM`` and swap on every model change. With co-residency
+(``MODEL_CORESIDENCY_ENABLED``) the worker keeps several engines loaded, each
+started with its own slice of the card (``gpu_memory_utilization``) and a
+context length (``max_model_len``) whose KV cache fits that slice. Jobs are
+routed to the matching engine; switching between resident models costs
+nothing.
+
+``ResidencyPlanner`` sizes each model with ``estimate_memory_requirements``
+(weights + KV cache for ``CORESIDENCY_BATCH_SIZE`` sequences + engine
+overhead). If a model would take more than ``CORESIDENCY_MAX_MODEL_FRACTION``
+of the card even at ``CORESIDENCY_MIN_MODEL_LEN`` context, it gets the GPU to
+itself and every resident engine is evicted. Otherwise least recently used
+engines are evicted until its slice fits in the ``GPU_MEMORY_UTILIZATION``
+budget.
+"""
+
+import json
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+from .model_parser import estimate_memory_requirements
+
+# Round slices up so estimate error lands in headroom, not in an OOM
+FRACTION_STEP = 0.01
+
+
+@dataclass
+class ResidentEngine:
+    """An engine loaded on the GPU alongside others."""
+    model_id: str
+    llm: Any
+    memory_fraction: float  # gpu_memory_utilization it was started with
+    host_bytes: int = 0
+    last_used: float = field(default_factory=time.time)
+
+
+@dataclass
+class ResidencyPlan:
+    """How to load a model next to the resident engines."""
+    model_id: str
+    shared: bool  # False: the model gets the GPU to itself (evict everything)
+    gpu_memory_utilization: Optional[float] = None  # Slice for a shared model
+    max_model_len: Optional[int] = None  # Context length that fits the slice
+    evict: List[str] = field(default_factory=list)  # Resident models to shut down first
+
+
+def model_memory_fraction(size_gb: float, quantization_type: Optional[str], max_model_len: int,
+                          total_gb: float, batch_size: int) -> float:
+    """Share of the GPU a model needs at a given context length."""
+    estimate = estimate_memory_requirements(
+        size_gb,
+        is_quantized=bool(quantization_type),
+        quantization_type=quantization_type,
+        context_length=max_model_len,
+        available_vram_gb=total_gb,
+        batch_size=batch_size
+    )
+    return math.ceil(float(estimate['total_memory_gb']) / total_gb / FRACTION_STEP) * FRACTION_STEP
+
+
+class ResidencyPlanner:
+    """Resident engines in LRU order and the packing policy for new ones."""
+
+    def __init__(self, budget_fraction: float, max_model_fraction: float,
+                 min_model_len: int, batch_size: int, enabled: bool = True):
+        self.budget_fraction = budget_fraction
+        self.max_model_fraction = max_model_fraction
+        self.min_model_len = min_model_len
+        self.batch_size = batch_size
+        self.enabled = enabled
+        self._engines: "OrderedDict[str, ResidentEngine]" = OrderedDict()
+
+    def __contains__(self, model_id: str) -> bool:
+        return model_id in self._engines
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    @property
+    def used_fraction(self) -> float:
+        return sum(engine.memory_fraction for engine in self._engines.values())
+
+    def resident_models(self) -> List[str]:
+        """Resident model ids, most recently used first."""
+        return list(reversed(self._engines))
+
+    def get(self, model_id: str) -> Optional[ResidentEngine]:
+        """Look up an engine and mark it most recently used."""
+        engine = self._engines.get(model_id)
+        if engine is not None:
+            self._engines.move_to_end(model_id)
+            engine.last_used = time.time()
+        return engine
+
+    def add(self, engine: ResidentEngine) -> None:
+        self._engines[engine.model_id] = engine
+        self._engines.move_to_end(engine.model_id)
+
+    def remove(self, model_id: str) -> Optional[ResidentEngine]:
+        return self._engines.pop(model_id, None)
+
+    def clear(self) -> List[ResidentEngine]:
+        """Remove everything (caller shuts the engines down)."""
+        engines = list(self._engines.values())
+        self._engines.clear()
+        return engines
+
+    def plan(self, model_id: str, size_gb: Optional[float], quantization_type: Optional[str],
+             max_model_len: int, total_gb: float) -> ResidencyPlan:
+        """
+        Decide the slice and context length for a model and what to evict.
+
+        Models of unknown size are never shared.
+        """
+        others = [m for m in self._engines if m != model_id]
+        exclusive = ResidencyPlan(model_id, shared=False, evict=others)
+        if not self.enabled or not size_gb or total_gb <= 0:
+            return exclusive
+
+        # Shrink the context (KV cache) until the model fits a shareable slice
+        length = max_model_len
+        fraction = model_memory_fraction(size_gb, quantization_type, length, total_gb, self.batch_size)
+        while fraction > self.max_model_fraction and length > self.min_model_len:
+            length = max(length // 2, self.min_model_len)
+            fraction = model_memory_fraction(size_gb, quantization_type, length, total_gb, self.batch_size)
+        if fraction > self.max_model_fraction or fraction > self.budget_fraction:
+            return exclusive
+
+        return ResidencyPlan(model_id, shared=True, gpu_memory_utilization=round(fraction, 2),
+                             max_model_len=length, evict=self._lru_evictions(others, fraction))
+
+    def plan_fraction(self, model_id: str, fraction: float) -> ResidencyPlan:
+        """Evictions needed for an engine already sized (e.g. restored from the host RAM cache)."""
+        others = [m for m in self._engines if m != model_id]
+        return ResidencyPlan(model_id, shared=True, gpu_memory_utilization=fraction,
+                             evict=self._lru_evictions(others, fraction))
+
+    def _lru_evictions(self, others: List[str], fraction: float) -> List[str]:
+        """Least recently used engines to shut down until ``fraction`` fits the budget."""
+        free = self.budget_fraction - sum(self._engines[m].memory_fraction for m in others)
+        evict = []
+        for resident in others:
+            if fraction <= free + 1e-9:
+                break
+            evict.append(resident)
+            free += self._engines[resident].memory_fraction
+        return evict
+
+
+def engine_memory_fraction(llm: Any, default: float) -> float:
+    """``gpu_memory_utilization`` a loaded vLLM ``LLM`` was started with."""
+    engine = getattr(llm, 'llm_engine', None)
+    cache_config = getattr(getattr(engine, 'vllm_config', None), 'cache_config', None)
+    return getattr(cache_config, 'gpu_memory_utilization', None) or default
+
+
+def parse_resident_models(value: Optional[str]) -> Tuple[str, ...]:
+    """Parse the resident model list (JSON) stored on the worker heartbeat."""
+    if not value:
+        return ()
+    try:
+        return tuple(json.loads(value))
+    except (ValueError, TypeError):
+        return ()
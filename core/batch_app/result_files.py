@@ -0,0 +1,477 @@
+"""
+Result file access: custom_id index, HTTP Range and content-encoding.
+
+The worker appends one OpenAI-format JSON record per line to
+``{OUTPUT_DIR}/{batch_id}_results.jsonl``. Next to it, it appends a sidecar
+``.idx`` file with one ``offset<TAB>length<TAB>"custom_id"`` line per record.
+With that index the API can:
+
+- Look up a single record by ``custom_id`` with one seek + read
+- Page through records with ``?offset=&limit=`` without scanning the file
+- Serve byte ranges (``Range: bytes=...``) for resumable downloads
+
+The index is self-healing: if the worker crashed between writing results and
+appending index entries (or the file predates the index), the missing tail is
+rebuilt by scanning only the bytes after the last indexed record.
+
+Usage:
+    from core.batch_app.result_files import get_result_index, build_file_response
+
+    index = get_result_index(path)
+    span = index.lookup("request-42")  # (offset, length) or None
+"""
+
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from core.config import settings
+
+try:
+    import zstandard  # Optional: enables "Content-Encoding: zstd"
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None  # type: ignore[assignment]
+
+INDEX_SUFFIX = ".idx"
+STREAM_CHUNK_SIZE = 256 * 1024  # 256 KB reads when streaming files
+
+# Max number of result indexes kept in memory by the API process
+INDEX_CACHE_SIZE = 32
+
+
+def results_path_for_batch(batch_id: str) -> Path:
+    """Path of the results JSONL file the worker writes for a batch."""
+    return Path(settings.OUTPUT_DIR) / f"{batch_id}_results.jsonl"
+
+
+def index_path_for(results_path: str | Path) -> Path:
+    """Path of the custom_id index sidecar for a results file."""
+    return Path(f"{results_path}{INDEX_SUFFIX}")
+
+
+def append_index_entries(results_path: str | Path, entries: List[Tuple[int, int, str]]) -> None:
+    """
+    Append index entries for records just written to a results file.
+
+    Called by the worker after each chunk is saved.
+
+    Args:
+        results_path: Path to the results JSONL file
+        entries: List of (byte_offset, byte_length, custom_id) tuples
+    """
+    if not entries:
+        return
+
+    lines = [f"{offset}\t{length}\t{json.dumps(custom_id)}\n" for offset, length, custom_id in entries]
+    with open(index_path_for(results_path), 'a', encoding='utf-8') as f:
+        f.write(''.join(lines))
+        f.flush()
+
+
+def truncate_partial_line(path: str | Path) -> int:
+    """
+    Cut a torn last line (one without a trailing newline) off an append-only file.
+
+    A crash mid-write can leave half a record at the end of a results file or
+    one of its sidecars. Appending after it would glue the next record onto
+    it, and counting lines would take it for a finished record. The worker
+    calls this before resuming so the request is recomputed instead.
+
+    Returns:
+        Number of bytes removed
+    """
+    path = Path(path)
+    if not path.exists():
+        return 0
+
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        keep = 0
+        end = size
+        while end > 0:
+            start = max(end - STREAM_CHUNK_SIZE, 0)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline != -1:
+                keep = start + newline + 1
+                break
+            end = start
+
+        if keep == size:
+            return 0
+        f.truncate(keep)
+        f.flush()
+        os.fsync(f.fileno())
+    return size - keep
+
+
+class ResultIndex:
+    """
+    In-memory ``custom_id -> byte offset`` index for a results JSONL file.
+
+    Records are numbered in file order, so ``offsets[i]`` is the start of the
+    i-th record. Lookups and page boundaries are O(1).
+    """
+
+    def __init__(self, results_path: str | Path):
+        self.results_path = Path(results_path)
+        self.index_path = index_path_for(results_path)
+        self.offsets: List[int] = []
+        self.lengths: List[int] = []
+        self.by_custom_id: dict[str, int] = {}
+        self.indexed_bytes = 0  # Bytes of the results file covered by the index
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, results_path: str | Path) -> "ResultIndex":
+        """Load the sidecar index (if any) and index any records it is missing."""
+        index = cls(results_path)
+        index._load_sidecar()
+        index.refresh()
+        return index
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def _reset(self) -> None:
+        self.offsets = []
+        self.lengths = []
+        self.by_custom_id = {}
+        self.indexed_bytes = 0
+
+    def _add(self, offset: int, length: int, custom_id: Optional[str]) -> None:
+        record_num = len(self.offsets)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        if custom_id is not None:
+            # First occurrence wins if a custom_id is duplicated
+            self.by_custom_id.setdefault(custom_id, record_num)
+        self.indexed_bytes = offset + length
+
+    def _load_sidecar(self) -> None:
+        if not self.index_path.exists():
+            return
+
+        file_size = self.results_path.stat().st_size if self.results_path.exists() else 0
+
+        with open(self.index_path, encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t', 2)
+                if len(parts) != 3:
+                    break  # Torn write at the end of the sidecar
+                try:
+                    offset, length = int(parts[0]), int(parts[1])
+                    custom_id = json.loads(parts[2])
+                except ValueError:
+                    break
+
+                # Sidecar must describe a contiguous prefix of the results file
+                if offset != self.indexed_bytes or offset + length > file_size:
+                    break
+                self._add(offset, length, custom_id)
+
+    def refresh(self) -> None:
+        """Index records appended since the last refresh (scans only new bytes)."""
+        with self._lock:
+            if not self.results_path.exists():
+                self._reset()
+                return
+
+            file_size = self.results_path.stat().st_size
+            if file_size < self.indexed_bytes:
+                # File was truncated or rewritten - rebuild from scratch
+                self._reset()
+            if file_size == self.indexed_bytes:
+                return
+
+            with open(self.results_path, 'rb') as f:
+                f.seek(self.indexed_bytes)
+                offset = self.indexed_bytes
+                for raw_line in f:
+                    if not raw_line.endswith(b'\n'):
+                        break  # Partial record still being written
+                    custom_id = None
+                    if raw_line.strip():
+                        try:
+                            custom_id = json.loads(raw_line).get('custom_id')
+                        except (ValueError, AttributeError):
+                            custom_id = None
+                        self._add(offset, len(raw_line), custom_id)
+                    else:
+                        self.indexed_bytes = offset + len(raw_line)
+                    offset += len(raw_line)
+
+    def lookup(self, custom_id: str) -> Optional[Tuple[int, int]]:
+        """Return (byte_offset, byte_length) of a record, or None if unknown."""
+        record_num = self.by_custom_id.get(custom_id)
+        if record_num is None:
+            return None
+        return self.offsets[record_num], self.lengths[record_num]
+
+    def page_span(self, offset: int, limit: int) -> Tuple[int, int]:
+        """
+        Byte span covering records ``[offset, offset + limit)``.
+
+        Returns:
+            (start_byte, end_byte_exclusive); an empty span if offset is past the end
+        """
+        if offset >= len(self.offsets) or limit <= 0:
+            return self.indexed_bytes, self.indexed_bytes
+
+        last = min(offset + limit, len(self.offsets)) - 1
+        return self.offsets[offset], self.offsets[last] + self.lengths[last]
+
+    def read_record(self, custom_id: str) -> Optional[bytes]:
+        """Read a single record (without trailing newline) by custom_id."""
+        span = self.lookup(custom_id)
+        if span is None:
+            return None
+        offset, length = span
+        with open(self.results_path, 'rb') as f:
+            f.seek(offset)
+            return f.read(length).rstrip(b'\r\n')
+
+
+_index_cache: "OrderedDict[str, ResultIndex]" = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def get_result_index(results_path: str | Path) -> ResultIndex:
+    """
+    Get a (cached, refreshed) index for a results file.
+
+    The first call per file loads the sidecar; later calls only stat the file
+    and index newly appended records.
+    """
+    key = str(Path(results_path).resolve())
+    with _index_cache_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+
+    if index is None:
+        index = ResultIndex.load(results_path)
+        with _index_cache_lock:
+            _index_cache[key] = index
+            while len(_index_cache) > INDEX_CACHE_SIZE:
+                _index_cache.popitem(last=False)
+    else:
+        index.refresh()
+
+    return index
+
+
+# ============================================================================
+# HTTP Range and Content-Encoding
+# ============================================================================
+
+class RangeNotSatisfiable(ValueError):
+    """Raised when a Range header cannot be satisfied for the file size."""
+    pass
+
+
+def parse_range_header(range_header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range`` header.
+
+    Supports ``bytes=start-end``, ``bytes=start-`` and ``bytes=-suffix``.
+    Multi-range requests are ignored (full content is served), which RFC 9110
+    permits.
+
+    Returns:
+        (start, end_inclusive) or None if the header is absent/ignored
+
+    Raises:
+        RangeNotSatisfiable: Range is syntactically valid but outside the file
+    """
+    if not range_header:
+        return None
+
+    unit, _, spec = range_header.strip().partition('=')
+    if unit.strip().lower() != 'bytes' or not spec or ',' in spec:
+        return None
+
+    start_str, sep, end_str = spec.strip().partition('-')
+    if not sep:
+        return None
+
+    try:
+        if start_str == '':
+            # Suffix range: last N bytes
+            suffix = int(end_str)
+            if suffix <= 0:
+                raise RangeNotSatisfiable(range_header)
+            start = max(file_size - suffix, 0)
+            end = file_size - 1
+        else:
+            start = int(start_str)
+            end = int(end_str) if end_str else file_size - 1
+    except ValueError:
+        return None
+
+    if start < 0 or start >= file_size or end < start:
+        raise RangeNotSatisfiable(range_header)
+
+    return start, min(end, file_size - 1)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """
+    Pick a response content-encoding from an ``Accept-Encoding`` header.
+
+    Prefers zstd (when the ``zstandard`` package is installed), then gzip.
+
+    Returns:
+        'zstd', 'gzip' or 'identity'
+    """
+    if not accept_encoding:
+        return 'identity'
+
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+
+    def q_for(encoding: str) -> float:
+        return accepted.get(encoding, accepted.get('*', 0.0))
+
+    candidates = ['zstd', 'gzip'] if zstandard is not None else ['gzip']
+    best = max(candidates, key=q_for)
+    return best if q_for(best) > 0 else 'identity'
+
+
+def iter_file_range(path: str | Path, start: int, end: int, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield bytes ``[start, end]`` (inclusive) of a file in chunks."""
+    remaining = end - start + 1
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while remaining > 0:
+            data = f.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def compress_stream(chunks: Iterator[bytes], encoding: str) -> Iterator[bytes]:
+    """Compress a byte stream incrementally with gzip or zstd."""
+    if encoding == 'identity':
+        yield from chunks
+        return
+
+    if encoding == 'zstd':
+        assert zstandard is not None, "zstandard not installed"
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        for chunk in chunks:
+            out = compressor.compress(chunk)
+            if out:
+                yield out
+        yield compressor.flush()
+        return
+
+    # gzip container via zlib (wbits=31)
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = gz.compress(chunk)
+        if out:
+            yield out
+    yield gz.flush()
+
+
+def file_etag(path: str | Path) -> str:
+    """Weak-enough validator for If-Range: size + mtime."""
+    stat = os.stat(path)
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def build_file_response(
+    request: Request,
+    path: str | Path,
+    media_type: str = "application/x-ndjson",
+    filename: Optional[str] = None,
+    byte_span: Optional[Tuple[int, int]] = None,
+    extra_headers: Optional[dict[str, str]] = None,
+) -> StreamingResponse:
+    """
+    Stream a file with Range and content-encoding negotiation.
+
+    - ``Range`` requests (honouring ``If-Range``) get a 206 with identity
+      encoding, so resumed downloads line up byte-for-byte with the file.
+    - Full downloads are compressed with zstd/gzip when the client accepts it.
+
+    Args:
+        request: Incoming request (for Range/Accept-Encoding headers)
+        path: File to serve
+        media_type: Response media type
+        filename: Download filename (Content-Disposition)
+        byte_span: Optional (start, end_exclusive) sub-span to serve instead of
+            the whole file (used for paged results); Range is not applied to it
+        extra_headers: Additional response headers
+
+    Raises:
+        HTTPException 416: Range not satisfiable
+    """
+    file_size = os.stat(path).st_size
+    etag = file_etag(path)
+    headers: dict[str, str] = {"Vary": "Accept-Encoding"}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if extra_headers:
+        headers.update(extra_headers)
+
+    if byte_span is not None:
+        start, end_exclusive = byte_span
+        byte_range = None
+    else:
+        headers["Accept-Ranges"] = "bytes"
+        headers["ETag"] = etag
+        start, end_exclusive = 0, file_size
+
+        if_range = request.headers.get("if-range")
+        range_header = request.headers.get("range") if not if_range or if_range == etag else None
+        try:
+            byte_range = parse_range_header(range_header, file_size)
+        except RangeNotSatisfiable:
+            raise HTTPException(
+                status_code=416,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{file_size}"}
+            )
+
+    if byte_range is not None:
+        range_start, range_end = byte_range
+        headers["Content-Range"] = f"bytes {range_start}-{range_end}/{file_size}"
+        headers["Content-Length"] = str(range_end - range_start + 1)
+        return StreamingResponse(
+            iter_file_range(path, range_start, range_end),
+            status_code=206,
+            media_type=media_type,
+            headers=headers
+        )
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    body = iter_file_range(path, start, end_exclusive - 1) if end_exclusive > start else iter([])
+    if encoding != 'identity':
+        headers["Content-Encoding"] = encoding
+        body = compress_stream(body, encoding)
+    else:
+        headers["Content-Length"] = str(end_exclusive - start)
+
+    return StreamingResponse(body, status_code=200, media_type=media_type, headers=headers)
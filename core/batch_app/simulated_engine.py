@@ -0,0 +1,475 @@
+"""
+Deterministic CPU stand-in for a vLLM engine.
+
+Everything around inference (input parsing, chunking, result writing, DB
+updates, webhooks) can't be exercised or benchmarked without a GPU because
+the worker drives a vLLM ``LLM``. ``SimulatedLLM`` implements the part of
+that interface the worker uses (``llm_engine.add_request/step/
+has_unfinished_requests/abort_request``, ``sleep``/``wake_up``,
+``generate``, ``vllm_config``) and returns ``RequestOutput``-shaped objects.
+Select it with ``INFERENCE_BACKEND=simulated`` (see engines.py).
+
+The model is a small scheduler running on a virtual clock:
+
+- KV cache capacity comes from ``gpu_memory_utilization`` minus weights and
+  activations (which grow with ``max_num_batched_tokens``/``max_num_seqs``).
+  Configs that don't fit raise vLLM's startup errors; ``oom_probability`` /
+  ``oom_after_steps`` inject CUDA OOMs mid-run.
+- Each step decodes one token for every running sequence, then spends the
+  rest of the token budget on chunked prefill. Step time is a fixed overhead
+  plus prefill tokens / ``prefill_tokens_per_sec`` plus a decode cost where
+  aggregate decode throughput scales as ``batch ** batch_scaling``.
+- Sequences that outgrow the KV cache are preempted and recomputed.
+- With prefix caching, prompt blocks already in the (LRU) cache skip prefill.
+- Output lengths follow a fixed/uniform/lognormal distribution, capped by
+  ``max_tokens``. Output tokens depend only on the prompt and seed, never on
+  batching, so reruns produce identical text.
+
+``time_scale`` 0 (default) only advances the virtual clock, measuring the
+pipeline's own overhead; 1 sleeps for the simulated time.
+"""
+
+import json
+import math
+import random
+import re
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+VOCAB = (
+    "the of and to in is that for it as was with be by on not he this are or his from at which but have an "
+    "they you were her she there been one all we their has would when if so no will can more out other "
+    "about up what into some could them time only new these two may then do first any now such like our "
+    "over man me even most made after also did many before must through years where much your way well"
+).split()
+VOCAB_SIZE = 32000
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+@dataclass
+class SimulatedEngineConfig:
+    """Performance model of the simulated engine."""
+    prefill_tokens_per_sec: float = 20000.0
+    decode_tokens_per_sec: float = 60.0  # One sequence on its own
+    batch_scaling: float = 0.85  # Aggregate decode tok/s = decode_tokens_per_sec * batch ** batch_scaling
+    step_overhead_seconds: float = 0.002  # Scheduling + kernel launches per step
+    output_length: str = 'lognormal'  # fixed, uniform or lognormal
+    output_length_mean: int = 200
+    output_length_sigma: float = 0.6  # Lognormal sigma; uniform spread is +/- this fraction of the mean
+    gpu_memory_gb: float = 16.0
+    model_memory_gb: float = 4.0
+    activation_mb_per_batched_token: float = 0.1
+    logits_mb_per_seq: float = 0.5
+    kv_tokens_per_gb: int = 16384
+    block_size: int = 16
+    load_seconds: float = 0.0
+    oom_probability: float = 0.0  # Chance that any step raises a CUDA OOM
+    oom_after_steps: Optional[int] = None  # Raise a CUDA OOM on this step
+    time_scale: float = 0.0  # 0 = virtual clock only, 1 = sleep for the simulated time
+    seed: int = 0
+
+    @classmethod
+    def from_json(cls, value: Optional[str]) -> "SimulatedEngineConfig":
+        """Config from a JSON object of overrides (e.g. the SIMULATED_ENGINE_CONFIG setting)."""
+        overrides = json.loads(value) if value else {}
+        known = {f.name for f in fields(cls)}
+        unknown = sorted(set(overrides) - known)
+        if unknown:
+            raise ValueError(f"Unknown simulated engine settings: {', '.join(unknown)}")
+        return cls(**overrides)
+
+
+@dataclass
+class SimSamplingParams:
+    """Subset of vLLM ``SamplingParams`` the simulation reads."""
+    max_tokens: Optional[int] = 16
+    temperature: float = 1.0
+    top_p: float = 1.0
+    stop: List[str] = field(default_factory=list)
+    seed: Optional[int] = None
+
+
+@dataclass
+class SimCompletionOutput:
+    index: int
+    text: str
+    token_ids: List[int]
+    finish_reason: Optional[str] = None
+    stop_reason: Optional[str] = None
+    cumulative_logprob: Optional[float] = None
+    logprobs: Optional[Any] = None
+
+
+@dataclass
+class SimRequestMetrics:
+    """Same fields as vLLM's ``RequestMetrics`` (wall-clock timestamps)."""
+    arrival_time: float
+    last_token_time: float
+    first_scheduled_time: Optional[float] = None
+    first_token_time: Optional[float] = None
+    time_in_queue: Optional[float] = None
+    finished_time: Optional[float] = None
+    scheduler_time: Optional[float] = None
+    model_forward_time: Optional[float] = None
+    model_execute_time: Optional[float] = None
+
+
+@dataclass
+class SimRequestOutput:
+    request_id: str
+    prompt: str
+    prompt_token_ids: List[int]
+    outputs: List[SimCompletionOutput]
+    finished: bool
+    metrics: SimRequestMetrics
+    num_cached_tokens: int = 0
+    lora_request: Any = None
+    prompt_logprobs: Optional[Any] = None
+
+
+@dataclass
+class _Sequence:
+    request_id: str
+    prompt: str
+    prompt_token_ids: List[int]
+    target_tokens: List[int]  # Full output it will produce
+    finish_reason: str
+    priority: int
+    order: int
+    arrival_time: float
+    lora_request: Any = None
+    prefill_needed: int = 0
+    prefilled: int = 0
+    generated: int = 0
+    cached_tokens: int = 0
+    first_scheduled_time: Optional[float] = None
+    first_token_time: Optional[float] = None
+
+    @property
+    def kv_tokens(self) -> int:
+        return len(self.prompt_token_ids) + self.generated
+
+
+def tokenize(text: str) -> List[int]:
+    """Deterministic pseudo-tokenizer (one token per word or punctuation mark)."""
+    return [zlib.crc32(word.encode('utf-8')) % VOCAB_SIZE for word in _WORD_RE.findall(text)]
+
+
+def detokenize(token_ids: List[int]) -> str:
+    return " ".join(VOCAB[token % len(VOCAB)] for token in token_ids)
+
+
+def _cuda_oom() -> RuntimeError:
+    return RuntimeError("CUDA out of memory. Tried to allocate 2.00 GiB (simulated)")
+
+
+class SimulatedEngine:
+    """Step-level stand-in for vLLM's ``LLMEngine``."""
+
+    def __init__(self, sim: SimulatedEngineConfig, max_model_len: int, gpu_memory_utilization: float,
+                 max_num_seqs: int, max_num_batched_tokens: int, enable_prefix_caching: bool,
+                 lora_config: Any = None):
+        self.sim = sim
+        self.max_model_len = max_model_len
+        self.max_num_seqs = max_num_seqs
+        self.max_num_batched_tokens = max_num_batched_tokens
+        self.enable_prefix_caching = enable_prefix_caching
+        self.vllm_config = SimpleNamespace(
+            cache_config=SimpleNamespace(gpu_memory_utilization=gpu_memory_utilization,
+                                         enable_prefix_caching=enable_prefix_caching),
+            model_config=SimpleNamespace(max_model_len=max_model_len),
+            scheduler_config=SimpleNamespace(max_num_seqs=max_num_seqs,
+                                             max_num_batched_tokens=max_num_batched_tokens),
+            lora_config=lora_config,
+        )
+
+        # Memory profile, like vLLM's startup check
+        activation_gb = (max_num_batched_tokens * sim.activation_mb_per_batched_token
+                         + max_num_seqs * sim.logits_mb_per_seq) / 1024
+        kv_gb = sim.gpu_memory_gb * gpu_memory_utilization - sim.model_memory_gb - activation_gb
+        if kv_gb <= 0:
+            raise ValueError(
+                f"No available memory for the cache blocks. Try increasing `gpu_memory_utilization` "
+                f"(simulated: {sim.model_memory_gb:.1f} GiB weights + {activation_gb:.2f} GiB activations)"
+            )
+        self.kv_capacity_tokens = int(kv_gb * sim.kv_tokens_per_gb)
+        if max_model_len > self.kv_capacity_tokens:
+            raise ValueError(
+                f"The model's max seq len ({max_model_len}) is larger than the maximum number of tokens "
+                f"that can be stored in KV cache ({self.kv_capacity_tokens}). Try increasing "
+                f"`gpu_memory_utilization` or decreasing `max_model_len` when initializing the engine."
+            )
+
+        self.rng = random.Random(sim.seed)
+        self.clock = time.time()
+        self.waiting: List[_Sequence] = []
+        self.running: List[_Sequence] = []
+        self.prefix_cache: "OrderedDict[int, None]" = OrderedDict()
+        self._order = 0
+        self.stats = {"steps": 0, "preemptions": 0, "prefill_tokens": 0, "cached_tokens": 0,
+                      "decode_tokens": 0, "simulated_seconds": 0.0}
+
+    # ------------------------------------------------------------------
+    # LLMEngine interface
+    # ------------------------------------------------------------------
+
+    def add_request(self, request_id: str, prompt: str, params: Any, priority: int = 0,
+                    lora_request: Any = None, **kwargs: Any) -> None:
+        prompt_token_ids = tokenize(prompt)
+        max_tokens = getattr(params, 'max_tokens', None) or 16
+        if len(prompt_token_ids) + 1 > self.max_model_len:
+            raise ValueError(
+                f"The decoder prompt (length {len(prompt_token_ids)}) is longer than the maximum "
+                f"model length of {self.max_model_len}."
+            )
+
+        target, finish_reason = self._sample_output(prompt, params, max_tokens)
+        # Generation stops at the context limit, like vLLM
+        room = self.max_model_len - len(prompt_token_ids)
+        if len(target) > room:
+            target, finish_reason = target[:room], 'length'
+
+        self._sync_clock()
+        self._order += 1
+        self.waiting.append(_Sequence(
+            request_id=request_id, prompt=prompt, prompt_token_ids=prompt_token_ids,
+            target_tokens=target, finish_reason=finish_reason, priority=priority,
+            order=self._order, arrival_time=self.clock, lora_request=lora_request
+        ))
+
+    def abort_request(self, request_ids: Any) -> None:
+        ids = {request_ids} if isinstance(request_ids, str) else set(request_ids)
+        self.waiting = [s for s in self.waiting if s.request_id not in ids]
+        self.running = [s for s in self.running if s.request_id not in ids]
+
+    def has_unfinished_requests(self) -> bool:
+        return bool(self.waiting or self.running)
+
+    def get_num_unfinished_requests(self) -> int:
+        return len(self.waiting) + len(self.running)
+
+    def step(self) -> List[SimRequestOutput]:
+        """Run one scheduler step; returns the requests that finished in it."""
+        self.stats["steps"] += 1
+        if self.sim.oom_after_steps is not None and self.stats["steps"] >= self.sim.oom_after_steps:
+            raise _cuda_oom()
+        if self.sim.oom_probability and self.rng.random() < self.sim.oom_probability:
+            raise _cuda_oom()
+
+        self._sync_clock()
+        self._admit()
+
+        budget = self.max_num_batched_tokens
+        decoding = [s for s in self.running if s.prefilled >= s.prefill_needed][:budget]
+        budget -= len(decoding)
+
+        prefill_tokens = 0
+        prefill_done = []
+        for seq in self.running:
+            if budget <= 0:
+                break
+            if seq.prefilled >= seq.prefill_needed:
+                continue
+            take = min(budget, seq.prefill_needed - seq.prefilled)
+            seq.prefilled += take
+            budget -= take
+            prefill_tokens += take
+            if seq.prefilled >= seq.prefill_needed:
+                prefill_done.append(seq)
+
+        step_seconds = self.sim.step_overhead_seconds + prefill_tokens / self.sim.prefill_tokens_per_sec
+        if decoding:
+            step_seconds += len(decoding) ** (1 - self.sim.batch_scaling) / self.sim.decode_tokens_per_sec
+        self._advance(step_seconds)
+        self.stats["prefill_tokens"] += prefill_tokens
+        self.stats["decode_tokens"] += len(decoding)
+
+        for seq in prefill_done:
+            self._cache_prompt(seq)
+
+        # Every scheduled sequence whose prompt is done samples a token
+        finished = []
+        for seq in decoding + prefill_done:
+            seq.generated += 1
+            if seq.first_token_time is None:
+                seq.first_token_time = self.clock
+            if seq.generated >= len(seq.target_tokens):
+                finished.append(seq)
+
+        for seq in finished:
+            self.running.remove(seq)
+        self._preempt_overflow()
+        return [self._output(seq) for seq in finished]
+
+    # ------------------------------------------------------------------
+    # Scheduling model
+    # ------------------------------------------------------------------
+
+    def _sample_output(self, prompt: str, params: Any, max_tokens: int):
+        """Output tokens for a prompt: a function of prompt, seed and sampling params only."""
+        seed = getattr(params, 'seed', None)
+        rng = random.Random(zlib.crc32(f"{self.sim.seed}:{seed}:{prompt}".encode('utf-8')))
+        mean = max(self.sim.output_length_mean, 1)
+        if self.sim.output_length == 'fixed':
+            length = mean
+        elif self.sim.output_length == 'uniform':
+            spread = int(mean * self.sim.output_length_sigma)
+            length = rng.randint(max(mean - spread, 1), mean + spread)
+        else:
+            sigma = self.sim.output_length_sigma
+            length = int(rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma))
+        length = max(length, 1)
+        finish_reason = 'stop'
+        if length >= max_tokens:
+            length, finish_reason = max_tokens, 'length'
+        return [rng.randrange(VOCAB_SIZE) for _ in range(length)], finish_reason
+
+    def _kv_used(self) -> int:
+        return sum(seq.kv_tokens for seq in self.running)
+
+    def _admit(self) -> None:
+        """Move waiting sequences into the running batch (priority, then FIFO)."""
+        if not self.waiting:
+            return
+        self.waiting.sort(key=lambda s: (s.priority, s.order))
+        free = self.kv_capacity_tokens - self._kv_used()
+        while self.waiting and len(self.running) < self.max_num_seqs:
+            seq = self.waiting[0]
+            if seq.kv_tokens + 1 > free:
+                break
+            self.waiting.pop(0)
+            free -= seq.kv_tokens
+            # A preempted sequence recomputes its prompt and the tokens it had generated
+            seq.cached_tokens = self._cached_prefix(seq.prompt_token_ids)
+            seq.prefill_needed = max(seq.kv_tokens - seq.cached_tokens, 1)
+            seq.prefilled = 0
+            self.stats["cached_tokens"] += seq.cached_tokens
+            if seq.first_scheduled_time is None:
+                seq.first_scheduled_time = self.clock
+            self.running.append(seq)
+
+    def _preempt_overflow(self) -> None:
+        """Preempt the lowest-priority, newest sequences until the KV cache fits."""
+        while self.running and self._kv_used() > self.kv_capacity_tokens:
+            victim = max(self.running, key=lambda s: (s.priority, s.order))
+            self.running.remove(victim)
+            self.waiting.append(victim)
+            self.stats["preemptions"] += 1
+
+    def _block_hashes(self, token_ids: List[int]) -> List[int]:
+        hashes, parent = [], 0
+        size = self.sim.block_size
+        for start in range(0, len(token_ids) - size + 1, size):
+            parent = hash((parent, tuple(token_ids[start:start + size])))
+            hashes.append(parent)
+        return hashes
+
+    def _cached_prefix(self, token_ids: List[int]) -> int:
+        if not self.enable_prefix_caching:
+            return 0
+        cached = 0
+        for block in self._block_hashes(token_ids):
+            if block not in self.prefix_cache:
+                break
+            self.prefix_cache.move_to_end(block)
+            cached += self.sim.block_size
+        return cached
+
+    def _cache_prompt(self, seq: _Sequence) -> None:
+        if not self.enable_prefix_caching:
+            return
+        for block in self._block_hashes(seq.prompt_token_ids):
+            self.prefix_cache[block] = None
+            self.prefix_cache.move_to_end(block)
+        max_blocks = self.kv_capacity_tokens // self.sim.block_size
+        while len(self.prefix_cache) > max_blocks:
+            self.prefix_cache.popitem(last=False)
+
+    def _sync_clock(self) -> None:
+        self.clock = max(self.clock, time.time())
+
+    def _advance(self, seconds: float) -> None:
+        self.clock += seconds
+        self.stats["simulated_seconds"] += seconds
+        if self.sim.time_scale > 0:
+            time.sleep(seconds * self.sim.time_scale)
+
+    def _output(self, seq: _Sequence) -> SimRequestOutput:
+        return SimRequestOutput(
+            request_id=seq.request_id,
+            prompt=seq.prompt,
+            prompt_token_ids=seq.prompt_token_ids,
+            outputs=[SimCompletionOutput(
+                index=0,
+                text=detokenize(seq.target_tokens),
+                token_ids=list(seq.target_tokens),
+                finish_reason=seq.finish_reason
+            )],
+            finished=True,
+            metrics=SimRequestMetrics(
+                arrival_time=seq.arrival_time,
+                last_token_time=self.clock,
+                first_scheduled_time=seq.first_scheduled_time,
+                first_token_time=seq.first_token_time,
+                time_in_queue=(seq.first_scheduled_time or seq.arrival_time) - seq.arrival_time,
+                finished_time=self.clock
+            ),
+            num_cached_tokens=seq.cached_tokens,
+            lora_request=seq.lora_request
+        )
+
+
+class SimulatedLLM:
+    """Stand-in for ``vllm.LLM``: accepts its engine kwargs, ignores unknown ones."""
+
+    def __init__(self, model: str, max_model_len: Optional[int] = None, gpu_memory_utilization: float = 0.9,
+                 max_num_seqs: int = 256, max_num_batched_tokens: int = 8192,
+                 enable_prefix_caching: bool = True, enable_sleep_mode: bool = False,
+                 enable_lora: bool = False, max_lora_rank: int = 16, max_loras: int = 1,
+                 simulation: Optional[SimulatedEngineConfig] = None, **kwargs: Any):
+        self.model = model
+        self.sim = simulation or SimulatedEngineConfig()
+        self.enable_sleep_mode = enable_sleep_mode
+        self.sleeping = False
+        lora_config = SimpleNamespace(max_lora_rank=max_lora_rank, max_loras=max_loras) if enable_lora else None
+        self.llm_engine = SimulatedEngine(
+            self.sim,
+            max_model_len=max_model_len or 4096,
+            gpu_memory_utilization=gpu_memory_utilization,
+            max_num_seqs=max_num_seqs,
+            max_num_batched_tokens=max(max_num_batched_tokens, max_num_seqs),
+            enable_prefix_caching=enable_prefix_caching,
+            lora_config=lora_config
+        )
+        if self.sim.load_seconds and self.sim.time_scale > 0:
+            time.sleep(self.sim.load_seconds * self.sim.time_scale)
+
+    def sleep(self, level: int = 1) -> None:
+        if not self.enable_sleep_mode:
+            raise ValueError("Sleep mode is not enabled for this engine")
+        self.sleeping = True
+        self.llm_engine.prefix_cache.clear()  # Level 1 discards the KV cache
+
+    def wake_up(self) -> None:
+        self.sleeping = False
+
+    def generate(self, prompts: Any, sampling_params: Any = None, lora_request: Any = None,
+                 **kwargs: Any) -> List[SimRequestOutput]:
+        """Offline batch generation, like ``LLM.generate`` (outputs in prompt order)."""
+        if isinstance(prompts, str):
+            prompts = [prompts]
+        params = sampling_params or SimSamplingParams()
+        engine = self.llm_engine
+        ids = [f"gen-{index}" for index in range(len(prompts))]
+        for request_id, prompt in zip(ids, prompts):
+            engine.add_request(request_id, prompt, params, lora_request=lora_request)
+        finished: Dict[str, SimRequestOutput] = {}
+        while engine.has_unfinished_requests():
+            for output in engine.step():
+                finished[output.request_id] = output
+        return [finished[request_id] for request_id in ids]
@@ -11,11 +11,11 @@ This enables running larger models on consumer GPUs by intelligently
 offloading weights to CPU RAM when needed.
 """
 
-import subprocess
 import re
 from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
 
+from core.batch_app.gpu_telemetry import get_gpu_telemetry
 from core.batch_app.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -23,31 +23,21 @@ logger = get_logger(__name__)
 
 def get_gpu_memory_info() -> Dict[str, float]:
     """
-    Get current GPU memory usage via nvidia-smi.
+    Get current GPU memory usage from the shared GPU telemetry (see gpu_telemetry.py).
     
     Returns:
         Dictionary with total, used, and free memory in GB
     """
-    try:
-        result = subprocess.run(
-            ['nvidia-smi', '--query-gpu=memory.total,memory.used,memory.free', '--format=csv,noheader,nounits'],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        # Parse output: "total,used,free" in MB
-        line = result.stdout.strip().split('\n')[0]  # First GPU
-        total_mb, used_mb, free_mb = map(float, line.split(','))
-        
+    sample = get_gpu_telemetry().latest()
+    if sample is not None:
         return {
-            'total_gb': total_mb / 1024,
-            'used_gb': used_mb / 1024,
-            'free_gb': free_mb / 1024,
-            'utilization': used_mb / total_mb
+            'total_gb': sample.memory_total_bytes / 1024 ** 3,
+            'used_gb': sample.memory_used_bytes / 1024 ** 3,
+            'free_gb': sample.memory_free_bytes / 1024 ** 3,
+            'utilization': sample.memory_percent / 100
         }
-    except Exception as e:
-        logger.error(f"Failed to get GPU memory info: {e}")
+    else:
+        logger.error("Failed to get GPU memory info: GPU telemetry unavailable")
         # Fallback to RTX 4080 defaults
         return {
             'total_gb': 16.0,
@@ -0,0 +1,177 @@
+"""
+Streaming helpers: follow append-only files and format server-sent events.
+
+Used to stream results and logs of in-progress batches. Followers track a byte
+cursor and poll the file size (one ``stat`` per interval); only newly appended
+bytes are read, and only complete newline-terminated lines are emitted, so a
+record the worker is still writing is never sent half-done. If the file
+shrinks below the cursor (truncated or replaced), ``FileResetError`` is raised
+so callers can tell clients to start over from cursor 0.
+
+Usage:
+    async for end_offset, line in follow_lines(path, offset=cursor, is_finished=check):
+        yield sse_event(line.decode(), event="result", event_id=end_offset)
+"""
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+# Max bytes read per poll (keeps a slow client from buffering a whole file)
+MAX_READ_BYTES = 1024 * 1024
+
+
+class FileResetError(Exception):
+    """The followed file shrank below the cursor (truncated or replaced)."""
+
+
+def is_line_boundary(path: str | Path, offset: int) -> bool:
+    """True if ``offset`` is the start of a line (0 or just after a newline)."""
+    if offset == 0:
+        return True
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset - 1)
+            return f.read(1) == b'\n'
+    except OSError:
+        return False
+
+
+def read_complete_lines(path: str | Path, offset: int, max_bytes: int = MAX_READ_BYTES) -> Tuple[int, List[Tuple[int, bytes]]]:
+    """
+    Read complete lines appended after ``offset``.
+
+    Returns:
+        (new_offset, [(end_offset, line_without_newline), ...]); new_offset only
+        advances past the last complete line
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(max_bytes)
+
+    last_newline = data.rfind(b'\n')
+    if last_newline < 0:
+        if len(data) == max_bytes:
+            # Single line longer than max_bytes - read until its end
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                line = f.readline()
+            if line.endswith(b'\n'):
+                return offset + len(line), [(offset + len(line), line.rstrip(b'\r\n'))]
+        return offset, []
+
+    lines = []
+    position = offset
+    for line in data[:last_newline + 1].splitlines(keepends=True):
+        position += len(line)
+        lines.append((position, line.rstrip(b'\r\n')))
+    return position, lines
+
+
+async def follow_lines(
+    path: str | Path,
+    offset: int = 0,
+    poll_interval: float = 0.5,
+    is_finished: Optional[Callable[[], Awaitable[bool]]] = None,
+    finished_check_interval: float = 5.0,
+    idle_timeout: Optional[float] = None,
+    keepalive_interval: Optional[float] = None,
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Follow an append-only file, yielding complete lines as they are written.
+
+    Args:
+        path: File to follow (may not exist yet)
+        offset: Byte cursor to start from (must be at a line boundary)
+        poll_interval: Seconds between size checks when idle
+        is_finished: Async callback; when it returns True the remaining lines
+            are drained and iteration stops
+        finished_check_interval: Min seconds between ``is_finished`` calls
+        idle_timeout: Stop after this many seconds without new data (None = never)
+        keepalive_interval: If set, yield ``(offset, b"")`` after this many idle
+            seconds so callers can send keep-alives (file blank lines are skipped)
+
+    Yields:
+        (end_offset, line) where end_offset is the cursor to resume after line
+
+    Raises:
+        FileResetError: The file shrank below the cursor
+    """
+    path = Path(path)
+    last_finished_check = 0.0
+    last_data = time.monotonic()
+    last_yield = last_data
+    finished = False
+
+    while True:
+        try:
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            size = 0
+
+        if size < offset:
+            # File was truncated or replaced - cursor is no longer meaningful
+            raise FileResetError(f"{path} shrank to {size} bytes, below cursor {offset}")
+
+        if size > offset:
+            offset, lines = await asyncio.to_thread(read_complete_lines, path, offset)
+            for end_offset, line in lines:
+                if line:
+                    yield end_offset, line
+            if lines:
+                last_data = last_yield = time.monotonic()
+                if size > offset + MAX_READ_BYTES:
+                    continue  # More already on disk - don't wait
+
+        if finished:
+            return
+
+        now = time.monotonic()
+        if is_finished is not None and now - last_finished_check >= finished_check_interval:
+            last_finished_check = now
+            if await is_finished():
+                # One more pass to drain anything written before the final status
+                finished = True
+                continue
+
+        if idle_timeout is not None and now - last_data >= idle_timeout:
+            return
+
+        if keepalive_interval is not None and now - last_yield >= keepalive_interval:
+            last_yield = now
+            yield offset, b""
+
+        await asyncio.sleep(poll_interval)
+
+
+def sse_event(data: Any, event: Optional[str] = None, event_id: Optional[Any] = None) -> str:
+    """
+    Format one server-sent event.
+
+    Args:
+        data: String payload, or any JSON-serializable object
+        event: Optional event type
+        event_id: Optional id (clients send it back as ``Last-Event-ID``)
+    """
+    if not isinstance(data, str):
+        data = json.dumps(data)
+
+    parts = []
+    if event_id is not None:
+        parts.append(f"id: {event_id}")
+    if event:
+        parts.append(f"event: {event}")
+    for line in data.splitlines() or ['']:
+        parts.append(f"data: {line}")
+    return '\n'.join(parts) + '\n\n'
+
+
+SSE_KEEPALIVE = ": keep-alive\n\n"
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+}
@@ -0,0 +1,196 @@
+"""
+Per-job and per-chunk resource usage: exact tokens, GPU-busy seconds and energy.
+
+The worker records one entry per saved chunk:
+    requests, prompt_tokens, completion_tokens  From the chunk's outputs
+    generate_seconds   Wall time inside generate
+    gpu_seconds        generate_seconds x GPUs the engine runs on (tensor parallel)
+    energy_joules      GPU energy from reading the chunk to writing its results
+
+Energy comes from the NVML energy counter (Volta+) read through the shared
+telemetry handle at the chunk's start and end. Without a counter, it is the
+sampled power integrated over the chunk. It is None when neither exists
+(no telemetry). NVML reports device-wide energy, including other processes
+on the same GPUs.
+
+Chunks are kept in ``BatchJob.resource_usage`` (JSON) and committed with
+each chunk's progress, so a resumed job keeps adding to the same totals. A
+worker killed after saving a chunk's results but before that commit leaves
+results no chunk accounts for; on resume ``recover_chunk_usage`` rebuilds
+their tokens from the records' ``usage`` fields (their generate time and
+energy are lost).
+Energy spent outside chunks (model load, finalizing) is added as
+``overhead_energy_joules`` when the job ends. The totals are copied to
+``BatchJob.prompt_tokens``, ``completion_tokens``, ``gpu_seconds`` and
+``energy_joules``. Cost reports build on these (see cost_tracking.py).
+
+Usage:
+    meter = EnergyMeter(get_gpu_telemetry())
+    meter.start()
+    ...
+    joules = meter.stop()
+"""
+
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.batch_app.gpu_telemetry import GPUTelemetry, summarize_samples
+
+
+class EnergyMeter:
+    """GPU energy (joules, all devices) between ``start()`` and ``stop()``."""
+
+    def __init__(self, telemetry: GPUTelemetry):
+        self.telemetry = telemetry
+        self.started_at: Optional[float] = None
+        self._counters: Optional[Dict[int, float]] = None
+
+    def _read_counters(self) -> Optional[Dict[int, float]]:
+        backend = self.telemetry.backend
+        if backend is None:
+            return None
+        counters = {}
+        for device_index in range(backend.device_count()):
+            sample = self.telemetry.read_now(device_index)
+            if sample is None or sample.energy_joules is None:
+                return None
+            counters[device_index] = sample.energy_joules
+        return counters or None
+
+    def start(self) -> None:
+        self.started_at = time.time()
+        self._counters = self._read_counters()
+
+    def stop(self) -> Optional[float]:
+        """Joules since ``start()``, or None if energy can't be measured."""
+        if self.started_at is None:
+            return None
+        end = self._read_counters()
+        if self._counters is not None and end is not None and end.keys() == self._counters.keys():
+            deltas = [end[i] - self._counters[i] for i in end]
+            if all(delta >= 0 for delta in deltas):  # Counters reset with the driver
+                return round(sum(deltas), 3)
+
+        samples = self.telemetry.series(since=self.started_at)
+        if len({s.timestamp for s in samples}) < 2:
+            return None
+        energy: Optional[float] = summarize_samples(samples)['energy_joules']
+        return energy
+
+
+@dataclass
+class ChunkUsage:
+    """Resources one saved chunk used."""
+
+    chunk: int
+    requests: int
+    prompt_tokens: int
+    completion_tokens: int
+    generate_seconds: float
+    gpu_seconds: float
+    energy_joules: Optional[float] = None
+    started_at: Optional[float] = None
+    recovered: bool = False  # Rebuilt from the results file on resume (tokens only)
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = asdict(self)
+        record['generate_seconds'] = round(self.generate_seconds, 3)
+        record['gpu_seconds'] = round(self.gpu_seconds, 3)
+        return record
+
+
+class JobUsage:
+    """A job's chunk usage, as stored in ``BatchJob.resource_usage``."""
+
+    def __init__(self, chunks: Optional[List[Dict[str, Any]]] = None, overhead_energy_joules: float = 0.0):
+        self.chunks: List[Dict[str, Any]] = chunks or []
+        self.overhead_energy_joules = overhead_energy_joules
+
+    @classmethod
+    def from_json(cls, text: Optional[str]) -> "JobUsage":
+        if not text:
+            return cls()
+        data = json.loads(text)
+        return cls(data.get('chunks', []), data.get('overhead_energy_joules', 0.0))
+
+    def to_json(self) -> str:
+        return json.dumps({'chunks': self.chunks, 'overhead_energy_joules': round(self.overhead_energy_joules, 3)})
+
+    def add_chunk(self, usage: ChunkUsage) -> None:
+        self.chunks.append(usage.to_dict())
+
+    def add_overhead(self, joules: Optional[float]) -> None:
+        if joules is not None and joules > 0:
+            self.overhead_energy_joules += joules
+
+    def chunk_energy(self, since_chunk: int = 0) -> Optional[float]:
+        """Summed chunk energy from ``chunks[since_chunk:]`` (None if none was measured)."""
+        values = [c['energy_joules'] for c in self.chunks[since_chunk:] if c.get('energy_joules') is not None]
+        return sum(values) if values else None
+
+    def totals(self) -> Dict[str, Any]:
+        prompt = sum(c['prompt_tokens'] for c in self.chunks)
+        completion = sum(c['completion_tokens'] for c in self.chunks)
+        chunk_energy = self.chunk_energy()
+        energy = None
+        if chunk_energy is not None or self.overhead_energy_joules:
+            energy = round((chunk_energy or 0.0) + self.overhead_energy_joules, 3)
+        return {
+            'chunks': len(self.chunks),
+            'requests': sum(c['requests'] for c in self.chunks),
+            'prompt_tokens': prompt,
+            'completion_tokens': completion,
+            'total_tokens': prompt + completion,
+            'generate_seconds': round(sum(c['generate_seconds'] for c in self.chunks), 3),
+            'gpu_seconds': round(sum(c['gpu_seconds'] for c in self.chunks), 3),
+            'energy_joules': energy,
+            'overhead_energy_joules': round(self.overhead_energy_joules, 3),
+        }
+
+    def apply_to(self, job: Any) -> None:
+        """Copy the totals onto the job row (committed by the caller)."""
+        totals = self.totals()
+        job.resource_usage = self.to_json()
+        job.prompt_tokens = totals['prompt_tokens']
+        job.completion_tokens = totals['completion_tokens']
+        job.gpu_seconds = totals['gpu_seconds']
+        job.energy_joules = totals['energy_joules']
+
+
+def recover_chunk_usage(results_path: str | Path, recorded_requests: int, chunk: int) -> Optional[ChunkUsage]:
+    """
+    Token usage of the results after the first ``recorded_requests`` records.
+
+    Returns None if there are none. Records without usage (errors) count as
+    requests with no tokens.
+    """
+    requests = prompt_tokens = completion_tokens = 0
+    try:
+        with open(results_path, 'rb') as f:
+            for index, line in enumerate(f):
+                if index < recorded_requests or not line.strip():
+                    continue
+                requests += 1
+                try:
+                    usage = ((json.loads(line).get('response') or {}).get('body') or {}).get('usage') or {}
+                except (ValueError, AttributeError):
+                    continue
+                prompt_tokens += int(usage.get('prompt_tokens') or 0)
+                completion_tokens += int(usage.get('completion_tokens') or 0)
+    except FileNotFoundError:
+        return None
+    if not requests:
+        return None
+    return ChunkUsage(chunk=chunk, requests=requests, prompt_tokens=prompt_tokens,
+                      completion_tokens=completion_tokens, generate_seconds=0.0, gpu_seconds=0.0, recovered=True)
+
+
+def engine_gpu_count(engine_config: Optional[Dict[str, Any]]) -> int:
+    """GPUs an engine config runs on (tensor x pipeline parallel)."""
+    config = engine_config or {}
+    tensor = config.get('tensor_parallel_size') or 1
+    pipeline = config.get('pipeline_parallel_size') or 1
+    return max(int(tensor) * int(pipeline), 1)
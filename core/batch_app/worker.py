@@ -6,6 +6,7 @@ Features:
 - Incremental saves with resume capability
 - Per-request error handling
 - GPU health monitoring
+- Pluggable engine backend: vLLM, or a simulated CPU engine (see engines.py)
 """
 
 import json
@@ -17,7 +18,7 @@ import subprocess
 import signal
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Callable, cast
+from typing import Dict, List, Optional, Any, Callable
 
 print("🔄 Worker starting...", flush=True)
 print("📦 Importing dependencies...", flush=True)
@@ -28,10 +29,6 @@ from sqlalchemy.orm import Session
 
 print("✅ SQLAlchemy imported", flush=True)
 
-from vllm import LLM, SamplingParams
-
-print("✅ vLLM imported", flush=True)
-
 from core.config import settings
 from core.batch_app.logging_config import get_logger, set_request_context, clear_request_context
 from core.batch_app import metrics
@@ -39,9 +36,71 @@ from core.batch_app.sentry_config import init_sentry, set_batch_context
 
 print("✅ Core modules imported", flush=True)
 
+from .autotune import (
+    Autotuner,
+    AutotuneError,
+    TrialResult,
+    apply_autotune_result,
+    baseline_config,
+    run_trial,
+    sample_requests,
+    trial_summary,
+    validate_search_space,
+)
+from .benchmark_runs import benchmark_status, sync_benchmark
 from .benchmarks import get_benchmark_manager
+from .crash_points import crash_point
 from .database import BatchJob, File, SessionLocal, WorkerHeartbeat, ModelRegistry
+from .engines import batch_prompt, create_llm, engine_backend, make_sampling_params
+from .engine_profiles import EngineProfile, get_engine_profile
+from .events import publish_event
+from .gpu_telemetry import (
+    append_timeline,
+    check_gpu_health,
+    format_summary as format_gpu_summary,
+    get_gpu_telemetry,
+    read_timeline,
+    start_gpu_telemetry,
+    summarize_samples,
+    timeline_path_for,
+)
+from .log_files import rotate_log_file, worker_log_path
+from .lora import (
+    LoRAAdapter,
+    lora_enabled,
+    lora_engine_config,
+    make_lora_request,
+    resident_model_id,
+    resolve_serving_model,
+)
+from .model_cache import WarmModel, WarmModelCache, host_bytes_for_model
+from .phase_timing import PhaseTimer, format_summary_table
+from .profiling import Profiler, handle_profile_message
+from .model_lifecycle import gpu_memory_info, release_memory, required_free_bytes, shutdown_llm, wait_for_free_memory
+from .prefetch import Prefetcher, available_memory_bytes, model_weight_files
+from .residency import ResidencyPlanner, ResidentEngine, engine_memory_fraction
+from .queue_model import (
+    QUEUED_STATUSES,
+    SCHEDULING_ORDER,
+    record_model_load_time,
+    record_model_unload_time,
+    record_model_warm_load_time,
+    safe_refresh_queue_snapshot,
+)
+from .request_metrics import (
+    append_request_rows,
+    format_summary as format_request_summary,
+    metrics_path_for,
+    observe_request_rows,
+    read_request_rows,
+    request_row,
+    summarize_request_rows,
+)
+from .result_files import append_index_entries, index_path_for, results_path_for_batch, truncate_partial_line
+from .cost_tracking import calculate_local_cost, format_usage
+from .usage_accounting import ChunkUsage, EnergyMeter, JobUsage, engine_gpu_count, recover_chunk_usage
 from .webhooks import send_webhook_async
+from .worker_ipc import MODEL_NOT_LOADED, WorkerIPCServer, run_step_loop
 
 print("✅ All imports complete", flush=True)
 
@@ -54,28 +113,6 @@ CHUNK_SIZE = settings.CHUNK_SIZE
 GPU_MEMORY_UTILIZATION = settings.GPU_MEMORY_UTILIZATION
 
 
-def check_gpu_health() -> dict:
-    """Check GPU health for resource management."""
-    try:
-        import pynvml
-        pynvml.nvmlInit()
-        handle = pynvml.nvmlDeviceGetHandleByIndex(0)
-
-        mem_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
-        mem_percent = (mem_info.used / mem_info.total) * 100
-        temp = pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMPERATURE_GPU)
-
-        pynvml.nvmlShutdown()
-
-        return {
-            'healthy': mem_percent < settings.GPU_MEMORY_THRESHOLD and temp < settings.GPU_TEMP_THRESHOLD,
-            'memory_percent': mem_percent,
-            'temperature_c': temp
-        }
-    except Exception:
-        return {'healthy': True, 'memory_percent': 0, 'temperature_c': 0}
-
-
 def calculate_safe_chunk_size(gpu_status: dict) -> int:
     """Dynamically adjust chunk size based on GPU memory."""
     mem_percent = gpu_status.get('memory_percent', 0)
@@ -164,9 +201,28 @@ class BatchWorker:
             poll_interval: Seconds to wait between polling for new jobs
         """
         self.poll_interval = poll_interval
-        self.current_llm: LLM | None = None
+        self.current_llm: Any = None  # vllm.LLM (or SimulatedLLM, see engines.py)
         self.current_model: str | None = None
+        self.current_model_bytes = 0  # Host RAM the loaded model needs if slept into the cache
+        self.current_adapter: LoRAAdapter | None = None  # LoRA adapter the current job runs on the base model
+        self.model_cache = WarmModelCache(int(settings.MODEL_CACHE_RAM_GB * 1024 ** 3))
+        # Effective engine kwargs (and profile version) each loaded engine was started with
+        self.engine_configs: Dict[str, Dict[str, Any]] = {}
+        # Engines kept loaded side by side (co-residency); includes the current one
+        self.residents = ResidencyPlanner(
+            budget_fraction=GPU_MEMORY_UTILIZATION,
+            max_model_fraction=settings.CORESIDENCY_MAX_MODEL_FRACTION,
+            min_model_len=settings.CORESIDENCY_MIN_MODEL_LEN,
+            batch_size=settings.CORESIDENCY_BATCH_SIZE,
+            enabled=settings.MODEL_CORESIDENCY_ENABLED
+        )
+        self.prefetcher = Prefetcher(settings.PREFETCH_MAX_MB_PER_SEC * 1024 ** 2)
         self.benchmark_mgr = get_benchmark_manager()
+        self._last_log_rotation_check = 0.0
+        self.ipc: WorkerIPCServer | None = None
+        self.profiler = Profiler(checkpoints=True, max_duration=settings.PROFILING_MAX_SECONDS)
+        self.telemetry = get_gpu_telemetry()
+        self.active_batch: tuple[str, str | None] | None = None  # (batch_id, log_file) of the running job
 
     def update_heartbeat(self, db: Session, status: str = 'idle', job_id: str | None = None):
         """Update worker heartbeat for health monitoring."""
@@ -182,14 +238,70 @@ class BatchWorker:
             heartbeat.status = status
             heartbeat.current_job_id = job_id
             heartbeat.loaded_model = self.current_model  # Track what model is loaded
+            heartbeat.warm_models = json.dumps(self.model_cache.warm_models())  # Restorable from host RAM
+            heartbeat.resident_models = json.dumps(self.residents.resident_models())  # Loaded side by side on the GPU
             heartbeat.gpu_memory_percent = gpu_status.get('memory_percent')
             heartbeat.gpu_temperature = gpu_status.get('temperature_c')
 
             db.commit()
+
+            publish_event(
+                "worker.heartbeat",
+                worker_id=heartbeat.id,
+                status=status,
+                current_job_id=job_id,
+                loaded_model=self.current_model,
+                gpu_memory_percent=heartbeat.gpu_memory_percent,
+                gpu_temperature=heartbeat.gpu_temperature
+            )
         except Exception as e:
             # Don't fail the worker if heartbeat update fails
             logger.warning("Heartbeat update failed", exc_info=True, extra={"error": str(e)})
 
+    def publish_job_event(self, job: BatchJob, event_type: str, final: bool = False):
+        """
+        Push job state to the API's event bus (dashboards, SSE, WebSocket).
+
+        Best effort: dropped silently if the API server is not running.
+        """
+        eta_seconds = None
+        if job.estimated_completion_time:
+            eta = job.estimated_completion_time
+            if eta.tzinfo is None:
+                eta = eta.replace(tzinfo=timezone.utc)
+            eta_seconds = max(int((eta - datetime.now(timezone.utc)).total_seconds()), 0)
+
+        publish_event(
+            event_type,
+            batch_id=job.batch_id,
+            status=job.status,
+            model=job.model,
+            completed_requests=job.completed_requests,
+            failed_requests=job.failed_requests,
+            total_requests=job.total_requests,
+            tokens_processed=job.tokens_processed,
+            current_throughput=job.current_throughput,
+            eta_seconds=eta_seconds,
+            final=final
+        )
+
+    def update_benchmark(self, job: BatchJob, db: Session):
+        """
+        Mirror a benchmark job's progress onto its Benchmark row and publish it.
+
+        No-op for other job types; never fails the job (see benchmark_runs.py).
+        """
+        if job.job_type != 'benchmark':
+            return
+        try:
+            benchmark = sync_benchmark(job, db)
+            if benchmark is not None:
+                db.commit()
+                publish_event("benchmark.progress", **benchmark_status(benchmark))
+        except Exception as e:
+            db.rollback()
+            logger.warning("Benchmark update failed", extra={"error": str(e), "batch_id": job.batch_id})
+
     def _should_send_webhook(self, job: BatchJob, event: str) -> bool:
         """
         Check if webhook should be sent for this event.
@@ -223,8 +335,7 @@ class BatchWorker:
         return db.query(BatchJob).filter(
             BatchJob.status == 'validating'
         ).order_by(
-            BatchJob.priority.desc(),  # High priority first
-            BatchJob.created_at        # Then FIFO
+            *SCHEDULING_ORDER  # High priority first, then FIFO
         ).first()
 
     def count_completed_results(self, output_file: str) -> int:
@@ -238,7 +349,54 @@ class BatchWorker:
         except Exception:
             return 0
 
-    def save_chunk_results(self, outputs, requests, output_file: str, start_idx: int, log_file: str | None):
+    def repair_result_files(self, output_file: str | Path, log_file: str | None) -> None:
+        """Drop lines a crash left half-written in the results file and its sidecars."""
+        for path in (output_file, index_path_for(output_file), metrics_path_for(output_file),
+                     timeline_path_for(output_file)):
+            dropped = truncate_partial_line(path)
+            if dropped:
+                self.log(log_file, f"✂️  Dropped {dropped} bytes of a partial line from {Path(path).name}")
+
+    def requeue_interrupted_jobs(self, db: Session) -> List[str]:
+        """
+        Put jobs a previous worker process left running back in the queue.
+
+        One worker runs per database, so a job still in progress when the
+        worker starts was interrupted (crash, OOM kill, power loss).
+        process_job resumes it from the results already saved.
+        """
+        jobs = db.query(BatchJob).filter(BatchJob.status.in_(('in_progress', 'finalizing'))).all()
+        for job in jobs:
+            logger.warning("Requeueing interrupted job", extra={
+                "batch_id": job.batch_id, "status": job.status, "completed_requests": job.completed_requests})
+            self.log(job.log_file, f"\n🔁 Worker restarted: requeueing interrupted job ({job.status})")
+            job.status = 'validating'
+        if jobs:
+            db.commit()
+            safe_refresh_queue_snapshot(db)
+        return [job.batch_id for job in jobs]
+
+    @staticmethod
+    def read_request_lines(input_file: str, chunk_start: int, chunk_end: int) -> List[str]:
+        """Raw input lines ``[chunk_start, chunk_end)`` of a batch file (streamed, not loaded whole)."""
+        chunk_lines = []
+        with open(input_file) as f:
+            for line_idx, line in enumerate(f):
+                if not line.strip():
+                    continue
+                if line_idx >= chunk_start and line_idx < chunk_end:
+                    chunk_lines.append(line)
+                if line_idx >= chunk_end:
+                    break
+        return chunk_lines
+
+    @classmethod
+    def read_request_chunk(cls, input_file: str, chunk_start: int, chunk_end: int) -> List[Dict[str, Any]]:
+        """Parsed requests ``[chunk_start, chunk_end)`` of a batch file."""
+        return [json.loads(line) for line in cls.read_request_lines(input_file, chunk_start, chunk_end)]
+
+    def save_chunk_results(self, outputs, requests, output_file: str, start_idx: int, log_file: str | None,
+                           timer: PhaseTimer | None = None):
         """
         Save chunk results incrementally in append mode.
 
@@ -248,11 +406,15 @@ class BatchWorker:
             output_file: Path to output file
             start_idx: Starting index in original request list
             log_file: Path to log file (optional)
+            timer: Records serialize/write/fsync/index time (optional)
         """
+        timer = timer or PhaseTimer()
         saved_count = 0
+        index_entries = []
+        metrics_rows = []
+        lines = []
 
-        # Open in append mode
-        with open(output_file, 'a') as f:
+        with timer.span('serialize'):
             for i, output in enumerate(outputs):
                 try:
                     # Get original request
@@ -276,7 +438,7 @@ class BatchWorker:
                                 'id': f'chatcmpl-{uuid.uuid4().hex[:12]}',
                                 'object': 'chat.completion',
                                 'created': int(time.time()),
-                                'model': self.current_model,
+                                'model': self.served_model,
                                 'choices': [{
                                     'index': 0,
                                     'message': {
@@ -296,23 +458,62 @@ class BatchWorker:
                         # Include input data for Label Studio integration
                         'input': {
                             'messages': req.get('body', {}).get('messages', []),
-                            'model': req.get('body', {}).get('model', self.current_model),
+                            'model': req.get('body', {}).get('model', self.served_model),
                             'temperature': req.get('body', {}).get('temperature'),
                             'max_tokens': req.get('body', {}).get('max_tokens')
                         }
                     }
 
-                    # Write to file
-                    f.write(json.dumps(result) + '\n')
-                    f.flush()  # Force write to disk immediately
-                    saved_count += 1
+                    lines.append((start_idx + i, (json.dumps(result) + '\n').encode('utf-8'), result['custom_id'],
+                                  request_row(result['custom_id'], output)))
 
                 except Exception as e:
                     self.log(log_file, f"⚠️  Failed to save result {start_idx + i}: {e}")
 
+        # Open in binary append mode so byte offsets can be indexed by custom_id
+        with open(output_file, 'ab') as f:
+            with timer.span('write'):
+                for request_idx, line, custom_id, metrics_row in lines:
+                    try:
+                        crash_point('write', partial_write=(f, line))
+                        offset = f.tell()
+                        f.write(line)
+                        f.flush()  # Force write to disk immediately
+                        index_entries.append((offset, len(line), custom_id))
+                        metrics_rows.append(metrics_row)
+                        saved_count += 1
+                    except Exception as e:
+                        self.log(log_file, f"⚠️  Failed to save result {request_idx}: {e}")
+
+            # Once per chunk, so a saved chunk also survives a power loss
+            with timer.span('fsync'):
+                os.fsync(f.fileno())
+        crash_point('index')
+
+        # Record custom_id -> byte offset for result lookups and range downloads.
+        # If this is lost (crash), the API rebuilds the missing tail on demand.
+        with timer.span('index'):
+            try:
+                append_index_entries(output_file, index_entries)
+            except OSError as e:
+                self.log(log_file, f"⚠️  Failed to update result index: {e}")
+
+        # Per-request latency/token rows next to the results (see request_metrics.py)
+        with timer.span('metrics'):
+            try:
+                append_request_rows(output_file, metrics_rows)
+            except OSError as e:
+                self.log(log_file, f"⚠️  Failed to save request metrics: {e}")
+            observe_request_rows(metrics_rows, self.served_model)
+
         return saved_count
 
-    def load_model(self, model: str, log_file: str | None):
+    @property
+    def served_model(self) -> str | None:
+        """Model ID results are reported under (the adapter for LoRA jobs)."""
+        return self.current_adapter.name if self.current_adapter else self.current_model
+
+    def load_model(self, model: str, log_file: str | None, require_lora: bool = False):
         """
         Load vLLM model if not already loaded.
 
@@ -321,20 +522,50 @@ class BatchWorker:
         - Local GGUF models (from ModelRegistry)
         - CPU offload (from ModelRegistry)
         - Model-specific configs (from ModelRegistry)
+        - LoRA adapters: a base model with registered adapters is loaded with
+          LoRA enabled (``require_lora`` reloads a base loaded without it)
+        - Co-residency: small models are loaded next to the resident engines
+          with a slice of the GPU, and jobs are routed to an already resident
+          engine (see residency.py)
+        - Engine profiles: per-model vLLM tuning from ModelRegistry; an engine
+          loaded with an older profile version is reloaded
 
         CRITICAL: Model hot-swapping strategy
         ======================================
         When switching models, we MUST:
-        1. Delete the LLM object (releases CUDA context)
-        2. Run gc.collect() (forces Python garbage collection)
-        3. Sleep 3 seconds (gives GPU driver time to free VRAM)
+        1. Shut down the engine (stops the EngineCore subprocess)
+        2. Delete the LLM object and run gc.collect() (releases CUDA context)
+        3. Wait until the GPU driver has actually freed the VRAM
 
         Without this sequence, GPU memory leaks and causes OOM on next model load.
-        The 3-second sleep is empirically determined - shorter delays cause OOM.
+        Step 3 polls NVML until the next model's gpu_memory_utilization fits
+        (see unload_model), instead of a fixed sleep.
         """
+        db = SessionLocal()
+        try:
+            profile = get_engine_profile(db, model)
+        finally:
+            db.close()
+        loaded = self.engine_configs.get(model)
+        stale_profile = loaded is not None and loaded.get('engine_profile_version') != profile.version
+
         if self.current_model == model and self.current_llm is not None:
-            self.log(log_file, f"✅ Model {model} already loaded, reusing")
-            return
+            if stale_profile:
+                self.log(log_file, f"🔄 Engine profile for {model} changed (v{profile.version}), reloading")
+            elif not require_lora or lora_enabled(self.current_llm):
+                self.log(log_file, f"✅ Model {model} already loaded, reusing")
+                return
+            else:
+                self.log(log_file, f"🔄 Model {model} loaded without LoRA support, reloading")
+
+        # Already resident next to the current model: route to it, nothing to load
+        resident = self.residents.get(model)
+        if resident is not None:
+            if not stale_profile and (not require_lora or lora_enabled(resident.llm)):
+                self.activate_resident(resident, log_file)
+                return
+            if self.current_model != model:
+                self.evict_residents([model], log_file)
 
         self.log(log_file, f"🚀 Loading model: {model}")
 
@@ -343,78 +574,78 @@ class BatchWorker:
             # ===============================================
             # vLLM V1 engine has a bug where failed EngineCore subprocesses become
             # zombies and hold GPU memory. Kill them before attempting to load.
-            self.log(log_file, f"🧹 Checking for zombie vLLM processes...")
-            zombies_killed = cleanup_zombie_vllm_processes(self.log)
-            if zombies_killed > 0:
-                self.log(log_file, f"✅ Killed {zombies_killed} zombie processes, GPU memory freed")
+            # Skipped while we own live engines (loaded or sleeping in the cache):
+            # their EngineCore processes are not zombies.
+            if self.current_llm is None and not self.model_cache and not self.residents:
+                self.log(log_file, f"🧹 Checking for zombie vLLM processes...")
+                zombies_killed = cleanup_zombie_vllm_processes(self.log)
+                if zombies_killed > 0:
+                    self.log(log_file, f"✅ Killed {zombies_killed} zombie processes, GPU memory freed")
+
+            vllm_config, model_config, lora_config = self.build_engine_config(model, profile, log_file)
+            max_model_len = vllm_config["max_model_len"]
+            gpu_mem_util = vllm_config["gpu_memory_utilization"]
+
+            memory = gpu_memory_info()
+            warm = self.model_cache.take(model)
+            if warm is not None and ((lora_config and not lora_enabled(warm.llm)) or stale_profile):
+                # Cached before its first adapter was registered, or its profile changed
+                shutdown_llm(warm.llm)
+                warm = None
+
+            # Co-residency: give small models a slice of the GPU next to the
+            # resident engines, evicting least recently used ones to make room
+            plan = None
+            if self.residents.enabled:
+                if warm is not None:
+                    plan = self.residents.plan_fraction(model, engine_memory_fraction(warm.llm, gpu_mem_util))
+                else:
+                    plan = self.residents.plan(
+                        model,
+                        model_config.size_gb if model_config else None,
+                        model_config.quantization_type if model_config else None,
+                        max_model_len,
+                        memory[1] / 1024**3 if memory else 0.0
+                    )
+                    if plan.shared:
+                        gpu_mem_util = vllm_config["gpu_memory_utilization"] = plan.gpu_memory_utilization
+                        max_model_len = vllm_config["max_model_len"] = plan.max_model_len
+                        self.log(log_file, f"🧱 Co-resident load: {gpu_mem_util:.0%} of GPU, max length "
+                                           f"{max_model_len} ({len(plan.evict)} of {len(self.residents)} "
+                                           f"resident engines evicted)")
+
+            # Free memory vLLM will insist on at startup
+            required_bytes = required_free_bytes(gpu_mem_util, memory[1]) if memory else None
 
             # CRITICAL: Unload previous model to prevent OOM
             # ================================================
             # vLLM holds GPU memory until explicitly freed. Without this block,
             # loading a second model will OOM even if the first model would fit.
-            if self.current_llm is not None:
-                self.log(log_file, f"🔄 Unloading previous model: {self.current_model}")
-                del self.current_llm
-                self.current_llm = None
-                self.current_model = None
-
-                # Force garbage collection and give GPU time to free memory
-                # The 3-second sleep is REQUIRED - GPU driver needs time to release VRAM
-                import gc
-                gc.collect()
-                time.sleep(3)
-                self.log(log_file, f"✅ Previous model unloaded, GPU memory freed")
-
-            # Try to get model config from registry
-            db = SessionLocal()
-            try:
-                model_config = db.query(ModelRegistry).filter(
-                    ModelRegistry.model_id == model
-                ).first()
-            finally:
-                db.close()
-
-            # Determine model path and config
-            if model_config:
-                self.log(log_file, f"📋 Found model config in registry: {model_config.name}")
-
-                # Use local path if available (GGUF), otherwise HuggingFace ID
-                model_path = model_config.local_path or model_config.model_id
-                max_model_len = model_config.max_model_len
-                gpu_mem_util = model_config.gpu_memory_utilization
-                cpu_offload = model_config.cpu_offload_gb
-                enable_prefix_cache = model_config.enable_prefix_caching
-                enable_chunked = model_config.chunked_prefill_enabled
-
-                self.log(log_file, f"  Model path: {model_path}")
-                self.log(log_file, f"  Max length: {max_model_len}")
-                self.log(log_file, f"  GPU memory: {gpu_mem_util}")
-                self.log(log_file, f"  CPU offload: {cpu_offload} GB")
-
+            # A co-resident current model stays loaded; only evicted engines go.
+            if plan is not None:
+                self.evict_residents([m for m in plan.evict if m != self.current_model], log_file, required_bytes)
+            if (plan is not None and self.current_model is not None
+                    and self.current_model != model and self.current_model not in plan.evict):
+                self.park_current_model(log_file)
             else:
-                # Fallback to defaults for models not in registry
-                self.log(log_file, f"⚠️  Model not in registry, using defaults")
-                model_path = model
-                max_model_len = settings.DEFAULT_MAX_MODEL_LEN
-                gpu_mem_util = GPU_MEMORY_UTILIZATION
-                cpu_offload = 0.0
-                enable_prefix_cache = True
-                enable_chunked = True
-
-            # Build vLLM config
-            vllm_config = {
-                "model": model_path,
-                "max_model_len": max_model_len,
-                "gpu_memory_utilization": gpu_mem_util,
-                "disable_log_stats": True,
-                "enable_prefix_caching": enable_prefix_cache,
-                "enable_chunked_prefill": enable_chunked,
-            }
-
-            # Add CPU offload if needed
-            if cpu_offload > 0:
-                vllm_config["cpu_offload_gb"] = cpu_offload
-                self.log(log_file, f"⚠️  CPU offload enabled: {cpu_offload} GB (will be slower)")
+                self.unload_model(log_file, required_bytes)
+
+            # Recently used: copy weights back from host RAM instead of a cold load
+            if warm is not None:
+                if self.restore_warm_model(warm, log_file):
+                    return
+                warm = None
+                release_memory()
+            if self.model_cache.enabled:
+                metrics.model_cache_requests.labels(model=model, result='miss').inc()
+            model_bytes = host_bytes_for_model(model_config.size_gb if model_config else None)
+
+            # Weights read ahead while the previous job finished (see prefetch_next_model)
+            prefetched = self.prefetcher.take(model)
+            if prefetched is not None:
+                self.log(log_file, f"📥 Prefetched {prefetched.bytes_read / 1024**3:.1f}/"
+                                   f"{prefetched.total_bytes / 1024**3:.1f} GB of weights into page cache")
+            baseline_load_time = model_config.load_time_seconds if model_config else None
 
             # Load model with retry logic for GPU memory issues
             start_time = time.time()
@@ -426,12 +657,35 @@ class BatchWorker:
 
             for attempt in range(1, max_retries + 1):
                 try:
-                    self.current_llm = LLM(**cast(Any, vllm_config))
+                    attempt_start = time.time()
+                    self.current_llm = create_llm(**vllm_config)
 
                     load_time = time.time() - start_time
                     self.current_model = model
+                    self.current_model_bytes = model_bytes
+                    self.engine_configs[model] = {"engine_profile_version": profile.version, **vllm_config}
+                    if self.residents.enabled:
+                        self.residents.add(ResidentEngine(model, self.current_llm, gpu_mem_util, model_bytes))
                     self.log(log_file, f"✅ Model loaded in {load_time:.1f}s (attempt {attempt}/{max_retries})")
 
+                    attempt_time = time.time() - attempt_start
+                    if prefetched is not None and prefetched.bytes_read > 0:
+                        # Keep the cold-load baseline; report what prefetch saved
+                        if baseline_load_time:
+                            saved = baseline_load_time - attempt_time
+                            metrics.model_prefetch_saved_seconds.labels(model=model).observe(max(saved, 0.0))
+                            self.log(log_file, f"⚡ Prefetch saved {saved:.1f}s vs cold load "
+                                               f"({attempt_time:.1f}s vs {baseline_load_time:.1f}s)")
+                    else:
+                        # Measured swap cost feeds queue ETAs (excludes retry waits)
+                        db = SessionLocal()
+                        try:
+                            record_model_load_time(db, model, attempt_time)
+                        except Exception as e:
+                            self.log(log_file, f"⚠️  Failed to record model load time: {e}")
+                        finally:
+                            db.close()
+
                     # Log GPU status after load
                     gpu_status = check_gpu_health()
                     self.log(log_file, f"📊 GPU Memory: {gpu_status.get('memory_percent', 0):.1f}% used")
@@ -457,8 +711,12 @@ class BatchWorker:
                             import gc
                             gc.collect()
 
-                            self.log(log_file, f"🔄 Waiting {retry_delay}s before retry...")
-                            time.sleep(retry_delay)
+                            # Retry as soon as the memory is actually free
+                            self.log(log_file, f"🔄 Waiting up to {retry_delay}s for GPU memory before retry...")
+                            release = wait_for_free_memory(required_bytes, timeout=retry_delay)
+                            if release.measured:
+                                self.log(log_file, f"{'✅' if release.released else '⚠️ '} Waited {release.seconds:.1f}s, "
+                                                   f"{(release.free_bytes or 0) / 1024**3:.1f} GB free")
 
                             # Check GPU status
                             gpu_status = check_gpu_health()
@@ -485,10 +743,298 @@ class BatchWorker:
             self.log(log_file, f"Traceback: {traceback.format_exc()}")
             raise
 
+    def build_engine_config(self, model: str, profile: EngineProfile, log_file: str | None):
+        """
+        vLLM engine kwargs for a model: registry settings, engine profile, LoRA.
+
+        Returns:
+            (vllm_config, registry entry or None, LoRA engine config)
+        """
+        # Try to get model config from registry
+        db = SessionLocal()
+        try:
+            model_config = db.query(ModelRegistry).filter(
+                ModelRegistry.model_id == model
+            ).first()
+            lora_config = lora_engine_config(db, model)
+        finally:
+            db.close()
+
+        # Determine model path and config
+        if model_config:
+            self.log(log_file, f"📋 Found model config in registry: {model_config.name}")
+
+            # Use local path if available (GGUF), otherwise HuggingFace ID
+            model_path = model_config.local_path or model_config.model_id
+            max_model_len = model_config.max_model_len
+            gpu_mem_util = model_config.gpu_memory_utilization
+            cpu_offload = model_config.cpu_offload_gb
+            enable_prefix_cache = model_config.enable_prefix_caching
+            enable_chunked = model_config.chunked_prefill_enabled
+
+            self.log(log_file, f"  Model path: {model_path}")
+            self.log(log_file, f"  Max length: {max_model_len}")
+            self.log(log_file, f"  GPU memory: {gpu_mem_util}")
+            self.log(log_file, f"  CPU offload: {cpu_offload} GB")
+
+        else:
+            # Fallback to defaults for models not in registry
+            self.log(log_file, f"⚠️  Model not in registry, using defaults")
+            model_path = model
+            max_model_len = settings.DEFAULT_MAX_MODEL_LEN
+            gpu_mem_util = GPU_MEMORY_UTILIZATION
+            cpu_offload = 0.0
+            enable_prefix_cache = True
+            enable_chunked = True
+
+        # Build vLLM config
+        vllm_config = {
+            "model": model_path,
+            "max_model_len": max_model_len,
+            "gpu_memory_utilization": gpu_mem_util,
+            "disable_log_stats": True,
+            "enable_prefix_caching": enable_prefix_cache,
+            "enable_chunked_prefill": enable_chunked,
+            # Interactive requests forwarded by the API jump ahead of the batch
+            "scheduling_policy": "priority",
+        }
+
+        # Sleep mode lets a swapped-out model stay in host RAM (see unload_model)
+        if self.model_cache.enabled:
+            vllm_config["enable_sleep_mode"] = True
+
+        # Per-model tuning (max_num_seqs, kv_cache_dtype, speculative decoding, ...)
+        engine_kwargs = profile.engine_kwargs()
+        vllm_config.update(engine_kwargs)
+        if profile.settings:
+            self.log(log_file, f"  Engine profile v{profile.version}: {profile.settings}")
+
+        # Serve fine-tunes of this model as per-request LoRA adapters
+        if lora_config:
+            vllm_config.update(lora_config)
+            self.log(log_file, f"🧩 LoRA enabled: max rank {lora_config['max_lora_rank']}, "
+                               f"{lora_config['max_loras']} adapters on GPU")
+
+        # Add CPU offload if needed
+        if cpu_offload > 0:
+            vllm_config["cpu_offload_gb"] = cpu_offload
+            self.log(log_file, f"⚠️  CPU offload enabled: {cpu_offload} GB (will be slower)")
+
+        return vllm_config, model_config, lora_config
+
+    def prefetch_next_model(self, job: BatchJob, db: Session, log_file: str | None):
+        """
+        Read the next queued job's model weights into the page cache.
+
+        Only when that job needs a different model that isn't warm in the host
+        RAM cache, and its files fit in available memory. Runs in the
+        background, throttled to PREFETCH_MAX_MB_PER_SEC.
+        """
+        if not settings.PREFETCH_ENABLED:
+            return
+
+        try:
+            next_job = db.query(BatchJob).filter(
+                BatchJob.status.in_(QUEUED_STATUSES),
+                BatchJob.batch_id != job.batch_id
+            ).order_by(*SCHEDULING_ORDER).first()
+            if not next_job or not next_job.model:
+                return
+            # Adapter jobs load their base model
+            next_model = resident_model_id(db, next_job.model)
+            if not next_model or next_model == self.current_model:
+                return
+            if next_model in self.model_cache:
+                return
+            current = self.prefetcher.current
+            if current is not None and current.model_id == next_model:
+                return
+
+            registry = db.query(ModelRegistry).filter(ModelRegistry.model_id == next_model).first()
+            paths = model_weight_files(next_model, registry.local_path if registry else None)
+            if not paths:
+                self.log(log_file, f"⏭️  Not prefetching {next_model}: weights not on local disk")
+                return
+
+            total_bytes = sum(p.stat().st_size for p in paths)
+            available = available_memory_bytes()
+            if available is not None and total_bytes > available * 0.8:
+                self.log(log_file, f"⏭️  Not prefetching {next_model}: {total_bytes / 1024**3:.1f} GB "
+                                   f"exceeds available RAM ({available / 1024**3:.1f} GB)")
+                return
+
+            self.prefetcher.start(next_model, paths)
+            self.log(log_file, f"📥 Prefetching {next_model} ({total_bytes / 1024**3:.1f} GB, "
+                               f"{len(paths)} files) for next job {next_job.batch_id}")
+        except Exception as e:
+            self.log(log_file, f"⚠️  Prefetch skipped: {e}")
+
+    def unload_model(self, log_file: str | None, required_bytes: int | None = None):
+        """
+        Unload the current model and wait until its GPU memory is released.
+
+        If the host RAM cache is enabled and the model fits, it is slept into
+        the cache instead; otherwise the engine is shut down explicitly. Then
+        polls NVML until ``required_bytes`` are free (or
+        MODEL_UNLOAD_TIMEOUT_SECONDS passes). The measured release time is
+        recorded for shut-down models.
+        """
+        if self.current_llm is None:
+            return
+
+        previous_model = self.current_model
+        if previous_model is not None:
+            self.residents.remove(previous_model)
+        slept = previous_model is not None and self.sleep_current_model(log_file)
+
+        if not slept:
+            self.log(log_file, f"🔄 Unloading previous model: {previous_model}")
+            shutdown_llm(self.current_llm)
+        del self.current_llm
+        self.current_llm = None
+        self.current_model = None
+        self.current_model_bytes = 0
+        self.current_adapter = None
+        release_memory()
+
+        release = wait_for_free_memory(required_bytes)
+        if slept:
+            return
+        if not release.measured:
+            self.log(log_file, f"✅ Previous model unloaded (NVML unavailable, waited {release.seconds:.1f}s)")
+            return
+
+        if release.released:
+            self.log(log_file, f"✅ Previous model unloaded, GPU memory released in {release.seconds:.2f}s")
+        else:
+            self.log(log_file, f"⚠️  GPU memory not released after {release.seconds:.1f}s "
+                               f"({(release.free_bytes or 0) / 1024**3:.1f} GB free), loading anyway")
+
+        if previous_model:
+            metrics.model_unload_duration.labels(model=previous_model).observe(release.seconds)
+            if release.released:
+                db = SessionLocal()
+                try:
+                    record_model_unload_time(db, previous_model, release.seconds)
+                except Exception as e:
+                    self.log(log_file, f"⚠️  Failed to record model unload time: {e}")
+                finally:
+                    db.close()
+
+    def sleep_current_model(self, log_file: str | None) -> bool:
+        """
+        Offload the loaded model's weights to host RAM and cache it (LRU).
+
+        Returns:
+            True if the model was cached; False if it doesn't fit the budget
+            or sleeping failed (caller shuts it down)
+        """
+        if self.current_llm is None or self.current_model is None:
+            return False
+        if not self.model_cache.fits(self.current_model_bytes):
+            return False
+
+        start = time.time()
+        try:
+            self.current_llm.sleep(level=1)
+        except Exception as e:
+            self.log(log_file, f"⚠️  Failed to offload {self.current_model} to host RAM: {e}")
+            return False
+
+        evicted = self.model_cache.put(self.current_model, self.current_llm, self.current_model_bytes)
+        self.log(log_file, f"💤 {self.current_model} offloaded to host RAM in {time.time() - start:.1f}s "
+                           f"(cache: {self.model_cache.used_bytes / 1024**3:.1f}/"
+                           f"{self.model_cache.budget_bytes / 1024**3:.1f} GB)")
+
+        for entry in evicted:
+            self.log(log_file, f"🗑️  Evicting {entry.model_id} from host RAM cache")
+            shutdown_llm(entry.llm)
+        return True
+
+    def restore_warm_model(self, warm: WarmModel, log_file: str | None) -> bool:
+        """
+        Wake a cached model (host-to-device copy of its weights).
+
+        Returns:
+            True if the model is loaded; False if waking failed (the cached
+            engine is discarded and the caller does a cold load)
+        """
+        self.log(log_file, f"♨️  Restoring {warm.model_id} from host RAM cache")
+        start = time.time()
+        try:
+            warm.llm.wake_up()
+        except Exception as e:
+            self.log(log_file, f"⚠️  Failed to restore {warm.model_id}, loading from disk: {e}")
+            shutdown_llm(warm.llm)
+            return False
+
+        restore_time = time.time() - start
+        self.current_llm = warm.llm
+        self.current_model = warm.model_id
+        self.current_model_bytes = warm.host_bytes
+        if self.residents.enabled:
+            self.residents.add(ResidentEngine(
+                warm.model_id, warm.llm, engine_memory_fraction(warm.llm, GPU_MEMORY_UTILIZATION), warm.host_bytes
+            ))
+        self.log(log_file, f"✅ Model restored in {restore_time:.1f}s")
+
+        metrics.model_cache_requests.labels(model=warm.model_id, result='hit').inc()
+        metrics.model_restore_duration.labels(model=warm.model_id).observe(restore_time)
+        db = SessionLocal()
+        try:
+            record_model_warm_load_time(db, warm.model_id, restore_time)
+        except Exception as e:
+            self.log(log_file, f"⚠️  Failed to record model restore time: {e}")
+        finally:
+            db.close()
+        return True
+
+    def activate_resident(self, resident: ResidentEngine, log_file: str | None):
+        """Route to an engine that is already loaded (the current one stays resident)."""
+        self.current_llm = resident.llm
+        self.current_model = resident.model_id
+        self.current_model_bytes = resident.host_bytes
+        self.current_adapter = None
+        self.log(log_file, f"🔀 Routing to resident engine for {resident.model_id} "
+                           f"({resident.memory_fraction:.0%} of GPU, {len(self.residents)} resident)")
+        metrics.model_resident_routes.labels(model=resident.model_id).inc()
+
+    def park_current_model(self, log_file: str | None):
+        """Keep the current engine loaded as a resident while another model becomes current."""
+        if self.current_model is not None:
+            self.log(log_file, f"🅿️  Keeping {self.current_model} resident on the GPU")
+        self.current_llm = None
+        self.current_model = None
+        self.current_model_bytes = 0
+        self.current_adapter = None
+
+    def evict_residents(self, models: List[str], log_file: str | None, required_bytes: int | None = None):
+        """Shut down resident engines (not the current one) and wait for their memory."""
+        evicted = [engine for engine in (self.residents.remove(m) for m in models) if engine is not None]
+        if not evicted:
+            return
+        for engine in evicted:
+            self.log(log_file, f"🗑️  Evicting resident engine {engine.model_id} "
+                               f"({engine.memory_fraction:.0%} of GPU, least recently used)")
+            shutdown_llm(engine.llm)
+        del engine, evicted
+        release_memory()
+        release = wait_for_free_memory(required_bytes)
+        if release.measured and not release.released:
+            self.log(log_file, f"⚠️  GPU memory not released after {release.seconds:.1f}s, loading anyway")
+
     def process_job(self, job: BatchJob, db: Session):
         """Process a single batch job with chunking and resume capability (OpenAI compatible)."""
         log_file = job.log_file
         job_start_time = time.time()
+        job_timer = PhaseTimer()  # Per-phase wall time (see phase_timing.py)
+        gpu_mark = job_start_time  # GPU samples up to here are in the job's timeline
+        output_file_path = results_path_for_batch(job.batch_id)
+        # Exact tokens, GPU seconds and energy per chunk (see usage_accounting.py)
+        usage = JobUsage.from_json(job.resource_usage)
+        resumed_chunks = len(usage.chunks)
+        job_meter = EnergyMeter(self.telemetry)
+        job_meter.start()
 
         try:
             # Update status to in_progress (OpenAI format)
@@ -500,6 +1046,8 @@ class BatchWorker:
             metrics.track_batch_job(status='in_progress', model=job.model)
             metrics.batch_jobs_active.labels(status='validating').dec()
             metrics.batch_jobs_active.labels(status='in_progress').inc()
+            safe_refresh_queue_snapshot(db)
+            self.publish_job_event(job, "batch.status")
 
             # Set Sentry context for this batch
             set_batch_context(
@@ -516,7 +1064,6 @@ class BatchWorker:
             input_file_path = input_file.file_path
 
             # Create output file path
-            output_file_path = Path("data/batches/output") / f"{job.batch_id}_results.jsonl"
             output_file_path.parent.mkdir(parents=True, exist_ok=True)
 
             self.log(log_file, "=" * 80)
@@ -527,42 +1074,64 @@ class BatchWorker:
             self.log(log_file, f"Input path: {input_file_path}")
             self.log(log_file, f"Output path: {output_file_path}")
             self.log(log_file, f"Total requests: {job.total_requests}")
-            self.log(log_file, f"Chunk size: {CHUNK_SIZE}")
             self.log(log_file, "=" * 80)
 
             # Validate model is specified
             if not job.model:
                 raise Exception("Model not specified in batch job")
 
-            # Load model
-            self.load_model(job.model, log_file)
+            # Load model (fine-tunes stored as LoRA adapters run on their base model)
+            serving = resolve_serving_model(db, job.model)
+            if serving.adapter is not None:
+                self.log(log_file, f"🧩 LoRA adapter {serving.adapter.path} on base model {serving.base_model}")
+            with job_timer.span('load'):
+                self.load_model(serving.base_model, log_file, require_lora=serving.adapter is not None)
+            self.current_adapter = serving.adapter
+
+            # Record the engine config so this job's throughput can be tied to it
+            engine_config = self.engine_configs.get(serving.base_model)
+            if engine_config is not None:
+                job.engine_profile_version = engine_config["engine_profile_version"]
+                job.engine_config = json.dumps(engine_config, default=str)
+                db.commit()
+
+            # Chunk size tuned for this model (see autotune.py), else the global default
+            registry_entry = db.query(ModelRegistry).filter(ModelRegistry.model_id == serving.base_model).first()
+            chunk_size = (registry_entry.chunk_size if registry_entry else None) or CHUNK_SIZE
+            self.log(log_file, f"Chunk size: {chunk_size}")
 
             # Count total requests (memory-efficient - don't load all into RAM)
             self.log(log_file, f"\n📥 Counting requests in {input_file_path}")
-            total_requests = 0
-            with open(input_file_path) as f:
-                for line in f:
-                    if line.strip():
-                        total_requests += 1
+            with job_timer.span('count'):
+                total_requests = 0
+                with open(input_file_path) as f:
+                    for line in f:
+                        if line.strip():
+                            total_requests += 1
+
+                # Check for resume point (after cutting off a record torn by a crash)
+                self.repair_result_files(output_file_path, log_file)
+                completed_count = self.count_completed_results(str(output_file_path))
 
             self.log(log_file, f"✅ Found {total_requests} total requests")
 
-            # Check for resume point
-            completed_count = self.count_completed_results(str(output_file_path))
             if completed_count > 0:
                 self.log(log_file, f"\n📍 RESUMING from request {completed_count + 1}")
                 self.log(log_file, f"Already completed: {completed_count}/{total_requests}")
                 job.completed_requests = completed_count
+                # Results saved by a run killed before its progress commit have no usage entry yet
+                recovered = recover_chunk_usage(output_file_path, usage.totals()['requests'], len(usage.chunks))
+                if recovered is not None:
+                    usage.add_chunk(recovered)
+                    usage.apply_to(job)
+                    self.log(log_file, f"Recovered token usage of {recovered.requests} results saved before the "
+                                       f"last crash (GPU time and energy of that chunk were not recorded)")
                 db.commit()
 
             remaining_requests = total_requests - completed_count
 
             # Sampling parameters
-            sampling_params = SamplingParams(
-                temperature=0.7,
-                top_p=0.9,
-                max_tokens=settings.DEFAULT_MAX_TOKENS,
-            )
+            sampling_params = self.batch_sampling_params()
 
             # Process in chunks
             total_inference_time = 0.0
@@ -572,7 +1141,7 @@ class BatchWorker:
 
             # CRITICAL: Chunking Strategy (Memory-Efficient Streaming)
             # =========================================================
-            # Process requests in chunks of CHUNK_SIZE (default: 5000) to:
+            # Process requests in chunks of chunk_size (default: CHUNK_SIZE = 5000) to:
             # 1. Prevent OOM from loading all prompts into GPU at once
             # 2. Enable incremental saves (lose max CHUNK_SIZE requests on crash, not entire batch)
             # 3. Provide progress updates
@@ -586,36 +1155,35 @@ class BatchWorker:
             # vLLM's internal batching:
             # - vLLM automatically batches the prompts for parallel processing
             # - We don't need to batch manually - just pass chunk at once
-            num_chunks = (remaining_requests + CHUNK_SIZE - 1) // CHUNK_SIZE
+            num_chunks = (remaining_requests + chunk_size - 1) // chunk_size
             self.log(log_file, f"\n⚡ Processing {remaining_requests} requests in {num_chunks} chunks (streaming from file)")
-            self.log(log_file, f"vLLM will handle batching within each {CHUNK_SIZE}-request chunk")
+            self.log(log_file, f"vLLM will handle batching within each {chunk_size}-request chunk")
 
             for chunk_num in range(num_chunks):
+                # Near the end: read ahead the next job's model while the GPU is busy
+                if num_chunks - chunk_num <= settings.PREFETCH_LOOKAHEAD_CHUNKS:
+                    self.prefetch_next_model(job, db, log_file)
+
                 # Calculate which requests to read for this chunk
-                chunk_start = completed_count + (chunk_num * CHUNK_SIZE)
-                chunk_end = min(chunk_start + CHUNK_SIZE, total_requests)
+                chunk_start = completed_count + (chunk_num * chunk_size)
+                chunk_end = min(chunk_start + chunk_size, total_requests)
 
                 # Stream requests for this chunk only (memory-efficient)
                 self.log(log_file, f"\n{'─' * 80}")
                 self.log(log_file, f"📦 CHUNK {chunk_num + 1}/{num_chunks}: Streaming requests {chunk_start + 1}-{chunk_end}")
                 self.log(log_file, f"{'─' * 80}")
 
-                chunk_requests = []
-                with open(input_file_path) as f:
-                    for line_idx, line in enumerate(f):
-                        if not line.strip():
-                            continue
-                        if line_idx >= chunk_start and line_idx < chunk_end:
-                            chunk_requests.append(json.loads(line))
-                        if line_idx >= chunk_end:
-                            break
+                chunk_timer = PhaseTimer()
+                chunk_meter = EnergyMeter(self.telemetry)
+                chunk_meter.start()
+                with chunk_timer.span('read'):
+                    chunk_lines = self.read_request_lines(input_file_path, chunk_start, chunk_end)
+                with chunk_timer.span('parse'):
+                    chunk_requests = [json.loads(line) for line in chunk_lines]
 
                 # Extract prompts for this chunk
-                chunk_prompts = []
-                for req in chunk_requests:
-                    messages = req['body']['messages']
-                    prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
-                    chunk_prompts.append(prompt)
+                with chunk_timer.span('render'):
+                    chunk_prompts = [batch_prompt(req) for req in chunk_requests]
 
                 # Run inference on chunk
                 self.log(log_file, f"⚡ Running inference on {len(chunk_prompts)} prompts...")
@@ -624,7 +1192,9 @@ class BatchWorker:
                 try:
                     # Assert model is loaded (should be guaranteed by load_model above)
                     assert self.current_llm is not None, "Model not loaded"
-                    outputs = self.current_llm.generate(chunk_prompts, sampling_params)
+                    with chunk_timer.span('generate'):
+                        outputs = self.generate(chunk_prompts, sampling_params)
+                    crash_point('generate')
                     chunk_inference_time = time.time() - chunk_start_time
                     total_inference_time += chunk_inference_time
 
@@ -664,7 +1234,8 @@ class BatchWorker:
                         chunk_requests,
                         str(output_file_path),
                         chunk_start,  # Use chunk_start instead of chunk_idx
-                        log_file
+                        log_file,
+                        timer=chunk_timer
                     )
 
                     # Update job progress with real-time stats
@@ -682,9 +1253,31 @@ class BatchWorker:
                         from datetime import timedelta
                         job.estimated_completion_time = datetime.now(timezone.utc) + timedelta(seconds=est_remaining_seconds)
 
-                    db.commit()
+                    usage.add_chunk(ChunkUsage(
+                        chunk=len(usage.chunks),
+                        requests=saved,
+                        prompt_tokens=chunk_prompt_tokens,
+                        completion_tokens=chunk_completion_tokens,
+                        generate_seconds=chunk_timer.seconds['generate'],
+                        gpu_seconds=chunk_timer.seconds['generate'] * engine_gpu_count(engine_config),
+                        energy_joules=chunk_meter.stop(),
+                        started_at=chunk_meter.started_at,
+                    ))
+                    usage.apply_to(job)
+
+                    with chunk_timer.span('commit'):
+                        crash_point('commit')
+                        db.commit()
+                        safe_refresh_queue_snapshot(db)
+                        self.publish_job_event(job, "batch.progress")
+                        self.update_benchmark(job, db)
+                        gpu_mark = self.record_gpu_timeline(output_file_path, gpu_mark, log_file)
 
                     self.log(log_file, f"✅ Saved {saved} results ({job.completed_requests}/{total_requests} total)")
+                    self.log(log_file, f"⏱️  Phases: {chunk_timer.format_line()}")
+                    for phase, seconds in chunk_timer.seconds.items():
+                        metrics.chunk_phase_duration.labels(phase=phase, model=job.model).observe(seconds)
+                    job_timer.merge(chunk_timer)
 
                     # Estimate time remaining
                     if chunks_completed < num_chunks:
@@ -697,6 +1290,7 @@ class BatchWorker:
                     self.log(log_file, f"❌ Chunk {chunk_num + 1} failed: {e}")
                     # Track chunk failure
                     metrics.chunks_processed.labels(model=job.model, status='failed').inc()
+                    job_timer.merge(chunk_timer)
                     raise
 
             self.log(log_file, "\n✅ All chunks processed successfully!")
@@ -718,22 +1312,60 @@ class BatchWorker:
             self.log(log_file, f"Requests/sec:          {requests_per_sec:.2f}")
             self.log(log_file, "=" * 80)
 
+            # Per-request latency distribution (whether the job was queue-, prefill- or decode-bound)
+            request_summary = summarize_request_rows(read_request_rows(output_file_path))
+            if request_summary['requests']:
+                self.log(log_file, "\n📈 REQUEST METRICS")
+                for line in format_request_summary(request_summary):
+                    self.log(log_file, line)
+
+            # GPU utilization, memory and power over the job (see gpu_telemetry.py)
+            self.record_gpu_timeline(output_file_path, gpu_mark, log_file)
+            gpu_summary = summarize_samples(read_timeline(output_file_path))
+            if gpu_summary['samples']:
+                self.log(log_file, "\n🎛️  GPU TELEMETRY")
+                for line in format_gpu_summary(gpu_summary):
+                    self.log(log_file, line)
+
+            # Exact tokens, GPU seconds, energy and local cost (see cost_tracking.py)
+            usage_totals = self.finish_usage(job, usage, job_meter, resumed_chunks)
+            self.log(log_file, "\n⚡ RESOURCE USAGE")
+            job_cost = calculate_local_cost(usage_totals['energy_joules'], usage_totals['gpu_seconds'],
+                                            usage_totals['total_tokens'])
+            for line in format_usage(usage_totals, job_cost):
+                self.log(log_file, line)
+
+            # Where the job's wall time went (finalizing below is not counted)
+            phase_summary = self.record_phase_timings(job, job_timer, time.time() - job_start_time)
+            self.log(log_file, "\n⏱️  PHASE BREAKDOWN")
+            for line in format_summary_table(phase_summary):
+                self.log(log_file, line)
+            self.log(log_file, "=" * 80)
+
             # Create output file in Files API
             self.log(log_file, "\n📤 Registering output file...")
-            output_file_id = f"file-out-{uuid.uuid4().hex[:20]}"
             output_file_size = output_file_path.stat().st_size if output_file_path.exists() else 0
 
-            output_file_db = File(
-                file_id=output_file_id,
-                object='file',
-                bytes=output_file_size,
-                created_at=int(time.time()),
-                filename=f"{job.batch_id}_results.jsonl",
-                purpose='batch',
-                file_path=str(output_file_path),
-                deleted=False
-            )
-            db.add(output_file_db)
+            # A job interrupted while finalizing already registered it: reuse that row
+            output_file_db = db.query(File).filter(
+                File.file_path == str(output_file_path),
+                ~File.deleted
+            ).first()
+            if output_file_db is not None:
+                output_file_db.bytes = output_file_size
+            else:
+                output_file_db = File(
+                    file_id=f"file-out-{uuid.uuid4().hex[:20]}",
+                    object='file',
+                    bytes=output_file_size,
+                    created_at=int(time.time()),
+                    filename=f"{job.batch_id}_results.jsonl",
+                    purpose='batch',
+                    file_path=str(output_file_path),
+                    deleted=False
+                )
+                db.add(output_file_db)
+            output_file_id = output_file_db.file_id
 
             # Update job status to finalizing then completed (OpenAI format)
             job.status = 'finalizing'
@@ -747,9 +1379,12 @@ class BatchWorker:
             job.completed_at = int(time.time())
             job.output_file_id = output_file_id
             job.failed_requests = total_requests - job.completed_requests
-            job.total_tokens = total_tokens
+            job.total_tokens = usage_totals['total_tokens']  # Includes chunks saved before a resume
             job.throughput_tokens_per_sec = int(throughput)
             db.commit()
+            safe_refresh_queue_snapshot(db)
+            self.publish_job_event(job, "batch.status", final=True)
+            self.update_benchmark(job, db)
 
             # Track batch completion metrics
             job_duration = time.time() - job_start_time
@@ -778,7 +1413,13 @@ class BatchWorker:
             job.status = 'failed'
             job.failed_at = int(time.time())
             job.errors = json.dumps({"message": str(e)})
+            self.record_phase_timings(job, job_timer, time.time() - job_start_time)
+            self.record_gpu_timeline(output_file_path, gpu_mark, log_file)
+            self.finish_usage(job, usage, job_meter, resumed_chunks)
             db.commit()
+            safe_refresh_queue_snapshot(db)
+            self.publish_job_event(job, "batch.status", final=True)
+            self.update_benchmark(job, db)
 
             # Track batch failure metrics
             job_duration = time.time() - job_start_time
@@ -798,6 +1439,195 @@ class BatchWorker:
                 self.log(log_file, f"📡 Sending failure webhook to {job.webhook_url}...")
                 send_webhook_async(job.batch_id, job.webhook_url)
 
+    def record_gpu_timeline(self, results_path: Path, since: float, log_file: str | None) -> float:
+        """
+        Append GPU samples buffered since ``since`` to the job's timeline.
+
+        Returns the new mark (unchanged when there is nothing to add).
+        """
+        samples = self.telemetry.series(since=since)
+        if not samples:
+            return since
+        try:
+            append_timeline(results_path, samples)
+        except Exception as e:
+            self.log(log_file, f"⚠️  Failed to save GPU timeline: {e}")
+        return samples[-1].timestamp + 1e-6
+
+    def finish_usage(self, job: BatchJob, usage: JobUsage, job_meter: EnergyMeter,
+                     resumed_chunks: int) -> Dict[str, Any]:
+        """Add energy spent outside this run's chunks (load, finalizing) and store the totals."""
+        job_energy = job_meter.stop()
+        if job_energy is not None:
+            usage.add_overhead(job_energy - (usage.chunk_energy(resumed_chunks) or 0.0))
+        usage.apply_to(job)
+        return usage.totals()
+
+    def record_phase_timings(self, job: BatchJob, timer: PhaseTimer, wall_seconds: float) -> Dict[str, Any]:
+        """Store the job's phase breakdown and GPU busy fraction on the row (committed by the caller)."""
+        summary = timer.summary(wall_seconds)
+        job.phase_timings = json.dumps(summary)
+        job.gpu_busy_fraction = summary['gpu_busy_fraction']
+        if summary['gpu_busy_fraction'] is not None:
+            metrics.job_gpu_busy_fraction.labels(model=job.model).observe(summary['gpu_busy_fraction'])
+        return summary
+
+    def process_autotune_job(self, job: BatchJob, db: Session):
+        """
+        Search engine settings for the job's model on a sample of its input file.
+
+        Each trial starts a fresh engine with the trial's config on a GPU the
+        worker has cleared, generates the sample in chunks and measures
+        tokens/sec (see autotune.py for the search). The best config is
+        written back to the model; the trials are the job's output file.
+        """
+        log_file = job.log_file
+        job_start_time = time.time()
+
+        try:
+            job.status = 'in_progress'
+            job.in_progress_at = int(time.time())
+            db.commit()
+            metrics.batch_jobs_active.labels(status='validating').dec()
+            metrics.batch_jobs_active.labels(status='in_progress').inc()
+            safe_refresh_queue_snapshot(db)
+            self.publish_job_event(job, "batch.status")
+
+            if not job.model:
+                raise AutotuneError("Model not specified in autotune job")
+            input_file = db.query(File).filter(File.file_id == job.input_file_id).first()
+            if not input_file:
+                raise AutotuneError(f"Input file not found: {job.input_file_id}")
+
+            config = json.loads(job.job_config) if job.job_config else {}
+            sample = sample_requests(Path(input_file.file_path), config.get('sample_size', settings.AUTOTUNE_SAMPLE_SIZE))
+            if not sample:
+                raise AutotuneError("Input file has no requests")
+            prompts = [batch_prompt(request) for request in sample]
+            space = validate_search_space(config.get('search_space'), len(prompts))
+
+            profile = get_engine_profile(db, job.model)
+            engine_config, model_config, _ = self.build_engine_config(job.model, profile, log_file)
+            # Trial engines are shut down, never slept into the host RAM cache
+            engine_config.pop("enable_sleep_mode", None)
+            baseline = baseline_config(engine_config, (model_config.chunk_size if model_config else None) or CHUNK_SIZE)
+
+            self.log(log_file, "=" * 80)
+            self.log(log_file, f"AUTOTUNE JOB: {job.batch_id}")
+            self.log(log_file, "=" * 80)
+            self.log(log_file, f"Model: {job.model}")
+            self.log(log_file, f"Sample: {len(prompts)} requests from {job.input_file_id}")
+            self.log(log_file, f"Baseline: {baseline}")
+            self.log(log_file, f"Search space: {space}")
+            self.log(log_file, "=" * 80)
+
+            # Trials need the whole GPU: shut down everything that is loaded
+            self.evict_residents([m for m in self.residents.resident_models() if m != self.current_model], log_file)
+            self.unload_model(log_file)
+            sampling_params = self.batch_sampling_params()
+
+            def evaluate(trial_config: Dict[str, Any]) -> TrialResult:
+                memory = gpu_memory_info()
+                if memory:
+                    wait_for_free_memory(required_free_bytes(trial_config["gpu_memory_utilization"], memory[1]))
+
+                def on_start_failure():
+                    # Failed startups can leave EngineCore zombies holding GPU memory
+                    if not self.model_cache:
+                        cleanup_zombie_vllm_processes(self.log)
+
+                # Trial engines don't serve forwarded real-time requests
+                return run_trial(create_llm, engine_config, trial_config, prompts, sampling_params,
+                                 self._interactive_sampling_params, on_start_failure)
+
+            def on_trial(trial: TrialResult):
+                if trial.pruned:
+                    self.log(log_file, f"✂️  Pruned (needs more memory than an OOM config): {trial.config}")
+                elif trial.oom:
+                    self.log(log_file, f"💥 OOM: {trial.config}")
+                elif trial.error:
+                    self.log(log_file, f"⚠️  Trial failed: {trial.config}: {trial.error}")
+                else:
+                    self.log(log_file, f"🧪 {trial.tokens_per_sec:.0f} tok/s in {trial.seconds:.1f}s: {trial.config}")
+                    job.current_throughput = trial.tokens_per_sec
+                    job.last_progress_update = datetime.now(timezone.utc)
+                    db.commit()
+                    self.publish_job_event(job, "batch.progress")
+
+            tuner = Autotuner(
+                evaluate,
+                space,
+                baseline,
+                patience=config.get('patience', settings.AUTOTUNE_PATIENCE),
+                max_trials=config.get('max_trials', settings.AUTOTUNE_MAX_TRIALS),
+                min_improvement=settings.AUTOTUNE_MIN_IMPROVEMENT,
+                on_trial=on_trial
+            )
+            result = tuner.run()
+            summary = trial_summary(result, job_start_time)
+
+            # Trials and summary are the job's output
+            output_file_path = results_path_for_batch(job.batch_id)
+            output_file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(output_file_path, 'w') as f:
+                for trial in result.trials:
+                    f.write(json.dumps({"type": "autotune_trial", **trial.to_dict()}) + '\n')
+                f.write(json.dumps(summary) + '\n')
+
+            entry = apply_autotune_result(db, job.model, result)
+            if entry is not None:
+                self.log(log_file, f"✅ Best config saved (engine profile v{entry.engine_profile_version}): "
+                                   f"{result.best.config}, {result.best.tokens_per_sec:.0f} tok/s "
+                                   f"({result.improvement:.2f}x baseline)")
+            else:
+                self.log(log_file, f"✅ Baseline config is already the best ({result.baseline.tokens_per_sec:.0f} tok/s)")
+            self.log(log_file, f"📊 {summary['launched']} engines launched, {summary['pruned']} pruned, "
+                               f"{summary['ooms']} OOM")
+
+            output_file_id = f"file-out-{uuid.uuid4().hex[:20]}"
+            db.add(File(
+                file_id=output_file_id,
+                object='file',
+                bytes=output_file_path.stat().st_size,
+                created_at=int(time.time()),
+                filename=f"{job.batch_id}_autotune.jsonl",
+                purpose='batch',
+                file_path=str(output_file_path),
+                deleted=False
+            ))
+            job.status = 'completed'
+            job.completed_at = int(time.time())
+            job.output_file_id = output_file_id
+            job.total_requests = job.completed_requests = len(prompts)
+            job.throughput_tokens_per_sec = result.best.tokens_per_sec
+            job.engine_config = json.dumps(result.best.config)
+            db.commit()
+            safe_refresh_queue_snapshot(db)
+            self.publish_job_event(job, "batch.status", final=True)
+
+            metrics.track_batch_job(status='completed', model=job.model, duration=time.time() - job_start_time)
+            metrics.batch_jobs_active.labels(status='in_progress').dec()
+            metrics.batch_jobs_active.labels(status='completed').inc()
+            self.log(log_file, "\n🎉 Autotune job completed successfully!")
+
+        except Exception as e:
+            job.status = 'failed'
+            job.failed_at = int(time.time())
+            job.errors = json.dumps({"message": str(e)})
+            db.commit()
+            safe_refresh_queue_snapshot(db)
+            self.publish_job_event(job, "batch.status", final=True)
+
+            metrics.track_batch_job(status='failed', model=job.model, duration=time.time() - job_start_time)
+            metrics.batch_jobs_active.labels(status='in_progress').dec()
+            metrics.batch_jobs_active.labels(status='failed').inc()
+            metrics.track_error(error_type=type(e).__name__, component="worker")
+
+            self.log(log_file, f"\n❌ ERROR: {e}")
+            self.log(log_file, "Autotune job failed")
+            import traceback
+            self.log(log_file, traceback.format_exc())
+
     def auto_import_to_curation(self, job: BatchJob, db: Session, log_file: str | None):
         """
         Automatically import batch results to Label Studio for curation.
@@ -958,6 +1788,130 @@ class BatchWorker:
             Path(log_file).parent.mkdir(parents=True, exist_ok=True)
             with open(log_file, 'a') as f:
                 f.write(log_message + '\n')
+                log_size = f.tell()
+
+            # Size-based rotation with gzip (no extra stat: size comes from tell())
+            if settings.LOG_MAX_BYTES and log_size >= settings.LOG_MAX_BYTES:
+                rotate_log_file(log_file, settings.LOG_MAX_BYTES, settings.LOG_BACKUP_COUNT)
+
+        self.rotate_worker_log()
+
+    def rotate_worker_log(self):
+        """
+        Rotate the worker's stdout log (``worker_log_path()``) by size.
+
+        The file is held open by the shell redirect, so it is rotated with
+        copy + truncate; start_all.sh appends (>>) so writes continue at the new end.
+        Checked at most once a minute.
+        """
+        now = time.time()
+        if now - self._last_log_rotation_check < 60:
+            return
+        self._last_log_rotation_check = now
+
+        try:
+            rotate_log_file(
+                worker_log_path(),
+                settings.LOG_MAX_BYTES,
+                settings.LOG_BACKUP_COUNT,
+                copytruncate=True
+            )
+        except OSError as e:
+            logger.warning(f"Worker log rotation failed: {e}")
+
+    @staticmethod
+    def batch_sampling_params() -> Any:
+        return make_sampling_params(
+            temperature=0.7,
+            top_p=0.9,
+            max_tokens=settings.DEFAULT_MAX_TOKENS,
+        )
+
+    @staticmethod
+    def _interactive_sampling_params(params: Dict[str, Any]) -> Any:
+        return make_sampling_params(
+            max_tokens=params.get("max_tokens", 512),
+            temperature=params.get("temperature", 0.7),
+            top_p=params.get("top_p", 0.9),
+            stop=params.get("stop") or []
+        )
+
+    def generate(self, prompts: List[str], sampling_params: Any):
+        """
+        Run prompts through the loaded engine (replaces LLM.generate).
+
+        Steps the engine directly so real-time requests forwarded by the API
+        over IPC are injected between steps at high priority, sharing the
+        model already on the GPU instead of loading a second copy.
+        Batch prompts of a LoRA job carry the job's adapter.
+        """
+        assert self.current_llm is not None, "Model not loaded"
+        return run_step_loop(
+            self.current_llm.llm_engine,
+            prompts,
+            sampling_params,
+            self._interactive_sampling_params,
+            ipc=self.ipc,
+            model=self.current_model,
+            lora_request=make_lora_request(self.current_adapter) if prompts else None,
+            before_step=self.profiler.checkpoint
+        )
+
+    def profile_output_dir(self) -> tuple[Path, str]:
+        """Profiling artifact directory and file label (the running batch's log directory)."""
+        active = self.active_batch
+        if active is not None and active[1]:
+            return Path(active[1]).parent / "profiles", active[0]
+        return Path(settings.LOGS_DIR) / "profiles", "worker"
+
+    def handle_profile(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Profiling control over IPC (see profiling.py)."""
+        if not settings.PROFILING_ENABLED:
+            return {"ok": False, "error": "Profiling is disabled (PROFILING_ENABLED=false)"}
+        return handle_profile_message(self.profiler, message, self.profile_output_dir)
+
+    @staticmethod
+    def resolve_interactive_model(model_id: str) -> tuple[str, Any]:
+        """Base model and LoRA request for a real-time request (fine-tunes run on their loaded base)."""
+        db = SessionLocal()
+        try:
+            serving = resolve_serving_model(db, model_id)
+        finally:
+            db.close()
+        return serving.base_model, make_lora_request(serving.adapter)
+
+    def start_ipc(self):
+        """Serve real-time inference for the loaded model over a Unix socket."""
+        if not settings.WORKER_IPC_SOCKET_PATH:
+            return
+        try:
+            self.ipc = WorkerIPCServer(lambda: self.current_model, handle_profile=self.handle_profile,
+                                       resolve_model=self.resolve_interactive_model)
+            self.ipc.start()
+        except OSError as e:
+            logger.warning(f"Worker IPC disabled: {e}")
+            self.ipc = None
+
+    def serve_interactive(self, timeout: float):
+        """Idle wait that serves forwarded real-time requests until ``timeout``."""
+        if self.ipc is None:
+            time.sleep(timeout)
+            return
+
+        deadline = time.time() + timeout
+        while (remaining := deadline - time.time()) > 0:
+            self.profiler.checkpoint()
+            # Wake up often enough to end a running profile on time
+            if not self.ipc.wait_for_pending(min(remaining, 1.0) if self.profiler.active else remaining):
+                continue
+            if self.current_llm is None:
+                for request in self.ipc.take_pending():
+                    request.resolve(error=MODEL_NOT_LOADED)
+                continue
+            try:
+                self.generate([], None)
+            except Exception as e:
+                logger.error("Interactive inference failed", exc_info=True, extra={"error": str(e)})
 
     def run(self):
         """
@@ -993,11 +1947,21 @@ class BatchWorker:
         logger.info("BATCH WORKER STARTED", extra={
             "poll_interval_seconds": self.poll_interval,
             "chunk_size": CHUNK_SIZE,
+            "engine_backend": engine_backend(),
             "gpu_memory_utilization": GPU_MEMORY_UTILIZATION
         })
         logger.info("=" * 80)
         logger.info("Waiting for jobs...")
 
+        self.start_ipc()
+        start_gpu_telemetry()
+
+        db = SessionLocal()
+        try:
+            self.requeue_interrupted_jobs(db)
+        finally:
+            db.close()
+
         while True:
             try:
                 db = SessionLocal()
@@ -1018,13 +1982,21 @@ class BatchWorker:
                     self.update_heartbeat(db, status='processing', job_id=job.batch_id)
 
                     # Process job (blocks until complete)
-                    self.process_job(job, db)
+                    self.active_batch = (job.batch_id, job.log_file)
+                    try:
+                        if job.job_type == 'autotune':
+                            self.process_autotune_job(job, db)
+                        else:
+                            self.process_job(job, db)
+                    finally:
+                        self.active_batch = None
 
                     # Clear request context
                     clear_request_context()
                 else:
-                    # No jobs in queue, sleep and poll again
-                    time.sleep(self.poll_interval)
+                    # No jobs in queue, serve real-time requests until the next poll
+                    self.rotate_worker_log()
+                    self.serve_interactive(self.poll_interval)
 
                 db.close()
 
@@ -1035,6 +2007,10 @@ class BatchWorker:
                 logger.error("Worker error", exc_info=True, extra={"error": str(e)})
                 time.sleep(self.poll_interval)
 
+        if self.ipc is not None:
+            self.ipc.stop()
+        self.telemetry.close()
+
 
 if __name__ == "__main__":
     try:
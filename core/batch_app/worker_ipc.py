@@ -0,0 +1,497 @@
+"""
+Local IPC between the API server and the batch worker for real-time inference.
+
+The worker already holds a model on the GPU; a second copy in the API process
+OOMs a 16 GB card. Instead, the worker serves interactive requests for the
+model it has loaded:
+
+- ``WorkerIPCServer`` (worker side) listens on a Unix stream socket
+  (``WORKER_IPC_SOCKET_PATH``) in a background thread. Messages are one JSON
+  object per line with an ``op`` field (``status``, ``generate``,
+  ``generate_stream`` or ``profile``, see profiling.py). Generate requests
+  are queued for the worker's main thread. ``generate_stream`` replies with
+  ``{"ok": true, "accepted": true}``, then one ``{"ok": true, "output": ...}``
+  line per engine step (cumulative text and token counts) and a final
+  ``{"ok": true, "done": true}``; closing the connection aborts the request.
+- ``run_step_loop()`` replaces ``LLM.generate()`` in the worker: it drives the
+  engine step by step and, between steps, injects queued interactive requests
+  at a higher scheduling priority than the running batch (requires vLLM's
+  ``scheduling_policy="priority"``). When idle, the worker runs the same loop
+  with no batch prompts. Requests for a LoRA fine-tune of the loaded base
+  model run on it with their adapter attached.
+- ``forward_generate()`` / ``forward_stream()`` (API side) send a request to
+  the worker and return ``None`` when the worker is not running or has a
+  different model loaded, so the caller can fall back to its own engine.
+
+Nothing here imports vLLM; the engine only needs ``add_request``, ``step`` and
+``has_unfinished_requests`` (and ``abort_request`` to drop disconnected
+streams).
+"""
+
+import asyncio
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from core.config import settings
+from core.batch_app.logging_config import get_logger
+from core.batch_app.request_metrics import StepTiming
+
+logger = get_logger(__name__)
+
+# vLLM priority scheduling: lower values are scheduled first
+INTERACTIVE_PRIORITY = 0
+BATCH_PRIORITY = 1
+
+MODEL_NOT_LOADED = "model_not_loaded"
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+@dataclass
+class InteractiveRequest:
+    """A real-time request waiting for the worker's engine."""
+    model: str
+    prompt: str
+    params: Dict[str, Any]
+    base_model: Optional[str] = None  # Model the engine must hold (``model`` unless it is an adapter)
+    lora_request: Any = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    # Streaming requests: cumulative outputs per step, then None once resolved
+    outputs: "Optional[queue.Queue[Optional[Dict[str, Any]]]]" = None
+    cancelled: bool = False  # The caller went away; drop the request
+    _done: threading.Event = field(default_factory=threading.Event)
+
+    def resolve(self, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        self.result = result
+        self.error = error
+        self._done.set()
+        if self.outputs is not None:
+            self.outputs.put(None)
+
+    def wait(self, timeout: float) -> bool:
+        return self._done.wait(timeout)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_UnixServer"
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+                if message.get('op') == 'generate_stream':
+                    self.server.ipc.handle_stream(message, self.send)
+                    continue
+                response = self.server.ipc.handle_message(message)
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.send(response)
+
+    def send(self, response: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+        self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    ipc: "WorkerIPCServer"
+
+
+class WorkerIPCServer:
+    """
+    Worker-side IPC service.
+
+    Connection threads queue ``generate`` requests and block until the main
+    thread resolves them (via ``run_step_loop``) or ``request_timeout`` expires.
+    ``generate_stream`` requests are relayed step by step (``handle_stream``);
+    ``request_timeout`` then applies between outputs.
+    ``resolve_model`` maps a requested model to the base model the engine must
+    hold and the LoRA request to attach (default: the model itself, no adapter).
+    """
+
+    def __init__(self, get_loaded_model: Callable[[], Optional[str]],
+                 socket_path: Optional[str] = None, request_timeout: Optional[float] = None,
+                 handle_profile: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                 resolve_model: Optional[Callable[[str], Tuple[str, Any]]] = None):
+        self.get_loaded_model = get_loaded_model
+        self.handle_profile = handle_profile
+        self.resolve_model = resolve_model
+        self.socket_path = socket_path or settings.WORKER_IPC_SOCKET_PATH
+        self.request_timeout = request_timeout or settings.WORKER_IPC_TIMEOUT_SECONDS
+        self.pending: "queue.Queue[InteractiveRequest]" = queue.Queue()
+        self._arrived = threading.Event()
+        self._server: Optional[_UnixServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        Path(self.socket_path).parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.unlink(self.socket_path)  # Stale socket from a previous run
+        except FileNotFoundError:
+            pass
+
+        self._server = _UnixServer(self.socket_path, _Handler)
+        self._server.ipc = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="worker-ipc", daemon=True)
+        self._thread.start()
+        logger.info(f"Worker IPC listening on {self.socket_path}")
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        # Don't leave API callers hanging
+        for request in self.take_pending():
+            request.resolve(error="Worker stopped")
+
+    def handle_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        op = message.get('op')
+        loaded_model = self.get_loaded_model()
+
+        if op == 'status':
+            return {"ok": True, "loaded_model": loaded_model, "pending": self.pending.qsize()}
+
+        if op == 'generate':
+            request = self._accept(message, loaded_model)
+            if request is None:
+                return {"ok": False, "error": MODEL_NOT_LOADED, "loaded_model": loaded_model}
+
+            self.pending.put(request)
+            self._arrived.set()
+            if not request.wait(self.request_timeout):
+                return {"ok": False, "error": "Timed out waiting for the worker"}
+            if request.error:
+                return {"ok": False, "error": request.error}
+            return {"ok": True, "result": request.result}
+
+        if op == 'profile' and self.handle_profile is not None:
+            response = self.handle_profile(message)
+            self._arrived.set()  # Wake the idle loop so it reaches a profiler checkpoint
+            return response
+
+        return {"ok": False, "error": f"Unknown op: {op}"}
+
+    def _accept(self, message: Dict[str, Any], loaded_model: Optional[str]) -> Optional[InteractiveRequest]:
+        """The request for a generate message, or None if it needs a model that isn't loaded."""
+        model = message.get('model')
+        base_model, lora_request = self.resolve_model(model) if model and self.resolve_model else (model, None)
+        if not model or base_model != loaded_model:
+            return None
+        return InteractiveRequest(model, message['prompt'], message.get('params') or {},
+                                  base_model=base_model, lora_request=lora_request)
+
+    def handle_stream(self, message: Dict[str, Any], send: Callable[[Dict[str, Any]], None]) -> None:
+        """Serve a ``generate_stream`` message, sending each output as the main thread produces it."""
+        loaded_model = self.get_loaded_model()
+        request = self._accept(message, loaded_model)
+        if request is None:
+            send({"ok": False, "error": MODEL_NOT_LOADED, "loaded_model": loaded_model})
+            return
+        request.outputs = queue.Queue()
+
+        send({"ok": True, "accepted": True})
+        self.pending.put(request)
+        self._arrived.set()
+        try:
+            while True:
+                try:
+                    output = request.outputs.get(timeout=self.request_timeout)
+                except queue.Empty:
+                    request.cancelled = True
+                    send({"ok": False, "error": "Timed out waiting for the worker"})
+                    return
+                if output is not None:
+                    send({"ok": True, "output": output})
+                elif request.error:
+                    send({"ok": False, "error": request.error})
+                    return
+                else:
+                    send({"ok": True, "done": True})
+                    return
+        except OSError:
+            request.cancelled = True  # Client disconnected
+
+    def take_pending(self) -> List[InteractiveRequest]:
+        """Drain queued requests without blocking."""
+        requests = []
+        while True:
+            try:
+                requests.append(self.pending.get_nowait())
+            except queue.Empty:
+                return requests
+
+    def wait_for_pending(self, timeout: float) -> bool:
+        """Block until a request is queued (True) or ``timeout`` expires."""
+        if self._arrived.wait(timeout):
+            self._arrived.clear()
+        return not self.pending.empty()
+
+
+def output_to_stream_output(output: Any) -> Dict[str, Any]:
+    """Cumulative streaming output of a vLLM ``RequestOutput`` (same fields as ``InferenceEngine.stream_generate``)."""
+    completion = output.outputs[0]
+    return {
+        "text": completion.text,
+        "finish_reason": getattr(completion, 'finish_reason', None),
+        "prompt_tokens": len(output.prompt_token_ids or []),
+        "completion_tokens": len(completion.token_ids)
+    }
+
+
+def output_to_result(output: Any, model: str, started: float) -> Dict[str, Any]:
+    """Convert a finished vLLM ``RequestOutput`` to an inference result."""
+    completion = output.outputs[0]
+    prompt_tokens = len(output.prompt_token_ids or [])
+    completion_tokens = len(completion.token_ids)
+    return {
+        "text": completion.text,
+        "model": model,
+        "finish_reason": getattr(completion, 'finish_reason', None),
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        },
+        "latency_ms": int((time.monotonic() - started) * 1000),
+        "served_by": "worker"
+    }
+
+
+def run_step_loop(engine: Any, prompts: List[str], sampling_params: Any,
+                  make_sampling_params: Callable[[Dict[str, Any]], Any],
+                  ipc: Optional[WorkerIPCServer] = None, model: Optional[str] = None,
+                  lora_request: Any = None, before_step: Optional[Callable[[], None]] = None) -> List[Any]:
+    """
+    Generate batch prompts while serving interactive requests in between steps.
+
+    Args:
+        engine: vLLM ``LLMEngine`` (``llm.llm_engine``)
+        prompts: Batch prompts (may be empty to only serve interactive requests)
+        sampling_params: Sampling params shared by the batch prompts
+        make_sampling_params: Builds sampling params from an interactive
+            request's params dict
+        ipc: IPC server to take interactive requests from
+        model: Model loaded in the engine
+        lora_request: LoRA adapter for the batch prompts (None = base model)
+        before_step: Called before every engine step (profiler checkpoint)
+
+    Returns:
+        Finished batch outputs, in prompt order. Outputs without engine
+        metrics get a ``StepTiming`` as ``metrics`` (see request_metrics.py).
+    """
+    batch_ids: Dict[str, int] = {}
+    timings: Dict[str, StepTiming] = {}
+    prefix = uuid.uuid4().hex[:8]
+    adapter = {'lora_request': lora_request} if lora_request is not None else {}
+    for index, prompt in enumerate(prompts):
+        request_id = f"batch-{prefix}-{index}"
+        timings[request_id] = StepTiming(arrival_time=time.time())
+        engine.add_request(request_id, prompt, sampling_params, priority=BATCH_PRIORITY, **adapter)
+        batch_ids[request_id] = index
+
+    outputs: List[Any] = [None] * len(prompts)
+    interactive: Dict[str, InteractiveRequest] = {}
+
+    try:
+        while True:
+            if ipc is not None:
+                for request in ipc.take_pending():
+                    if request.cancelled:
+                        continue
+                    if (request.base_model or request.model) != model:
+                        request.resolve(error=MODEL_NOT_LOADED)
+                        continue
+                    request_id = f"interactive-{uuid.uuid4().hex}"
+                    request_adapter = {'lora_request': request.lora_request} if request.lora_request is not None else {}
+                    try:
+                        engine.add_request(
+                            request_id, request.prompt, make_sampling_params(request.params),
+                            priority=INTERACTIVE_PRIORITY, **request_adapter
+                        )
+                    except Exception as e:
+                        request.resolve(error=str(e))
+                        continue
+                    interactive[request_id] = request
+
+            cancelled = [request_id for request_id, request in interactive.items() if request.cancelled]
+            if cancelled:
+                abort = getattr(engine, 'abort_request', None)
+                if abort is not None:
+                    abort(cancelled)
+                for request_id in cancelled:
+                    del interactive[request_id]
+
+            if not engine.has_unfinished_requests():
+                break
+
+            if before_step is not None:
+                before_step()
+            outputs_of_step = engine.step()
+            now = time.time()
+            for output in outputs_of_step:
+                timing = timings.get(output.request_id)
+                if timing is not None and timing.first_token_time is None and output.outputs[0].token_ids:
+                    timing.first_token_time = now
+                streaming = interactive.get(output.request_id)
+                if streaming is not None and streaming.outputs is not None:
+                    streaming.outputs.put(output_to_stream_output(output))
+                if not output.finished:
+                    continue
+                if output.request_id in batch_ids:
+                    if getattr(output, 'metrics', None) is None and timing is not None:
+                        timing.finished_time = now
+                        output.metrics = timing
+                    outputs[batch_ids.pop(output.request_id)] = output
+                elif output.request_id in interactive:
+                    request = interactive.pop(output.request_id)
+                    request.resolve(result=output_to_result(output, request.model, request.enqueued_at))
+    except Exception as e:
+        for request in interactive.values():
+            request.resolve(error=f"Engine error: {e}")
+        raise
+
+    return outputs
+
+
+# ============================================================================
+# API side
+# ============================================================================
+
+async def request_worker(message: Dict[str, Any], socket_path: Optional[str] = None,
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Send one message to the worker and return its response.
+
+    Raises:
+        OSError: If the worker is not listening
+        asyncio.TimeoutError: If no response arrives within ``timeout``
+    """
+    socket_path = socket_path or settings.WORKER_IPC_SOCKET_PATH
+    # Slightly longer than the worker's own timeout so its error reply arrives
+    timeout = timeout or settings.WORKER_IPC_TIMEOUT_SECONDS + 5
+
+    reader, writer = await asyncio.open_unix_connection(socket_path, limit=MAX_MESSAGE_BYTES)
+    try:
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), timeout)
+    finally:
+        writer.close()
+    if not line:
+        raise ConnectionError("Worker closed the connection")
+    response: Dict[str, Any] = json.loads(line)
+    return response
+
+
+async def forward_generate(model: str, prompt: str, params: Dict[str, Any],
+                           socket_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Run a prompt on the worker's loaded model.
+
+    Returns:
+        The inference result, or None if the worker is unavailable or has a
+        different model loaded (caller should use its own engine)
+
+    Raises:
+        RuntimeError: If the worker accepted the request but generation failed
+    """
+    socket_path = socket_path or settings.WORKER_IPC_SOCKET_PATH
+    if not socket_path or not os.path.exists(socket_path):
+        return None
+
+    try:
+        response = await request_worker(
+            {"op": "generate", "model": model, "prompt": prompt, "params": params},
+            socket_path=socket_path
+        )
+    except OSError as e:
+        logger.warning(f"Worker IPC unavailable, using local engine: {e}")
+        return None
+    except asyncio.TimeoutError:
+        # Falling back would load a second copy of the model
+        raise RuntimeError("Timed out waiting for the worker")
+
+    if response.get('ok'):
+        result: Dict[str, Any] = response['result']
+        return result
+    if response.get('error') == MODEL_NOT_LOADED:
+        return None
+    raise RuntimeError(response.get('error') or "Worker inference failed")
+
+
+async def forward_stream(model: str, prompt: str, params: Dict[str, Any],
+                         socket_path: Optional[str] = None) -> Optional[AsyncIterator[Dict[str, Any]]]:
+    """
+    Stream a prompt on the worker's loaded model.
+
+    Returns:
+        Cumulative outputs (as ``InferenceEngine.stream_generate`` yields
+        them), or None if the worker is unavailable or has a different model
+        loaded (caller should use its own engine). Closing the iterator
+        aborts the request on the worker.
+
+    Raises:
+        RuntimeError: If the worker refused the request, or (while iterating)
+            generation failed
+    """
+    socket_path = socket_path or settings.WORKER_IPC_SOCKET_PATH
+    if not socket_path or not os.path.exists(socket_path):
+        return None
+    timeout = settings.WORKER_IPC_TIMEOUT_SECONDS + 5
+
+    try:
+        reader, writer = await asyncio.open_unix_connection(socket_path, limit=MAX_MESSAGE_BYTES)
+    except OSError as e:
+        logger.warning(f"Worker IPC unavailable, using local engine: {e}")
+        return None
+    try:
+        writer.write(json.dumps({"op": "generate_stream", "model": model, "prompt": prompt,
+                                 "params": params}).encode() + b"\n")
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), timeout)
+        response = json.loads(line) if line else {"ok": False, "error": "Worker closed the connection"}
+    except (OSError, asyncio.TimeoutError) as e:
+        writer.close()
+        logger.warning(f"Worker IPC unavailable, using local engine: {e}")
+        return None
+    if not response.get('ok'):
+        writer.close()
+        if response.get('error') == MODEL_NOT_LOADED:
+            return None
+        raise RuntimeError(response.get('error') or "Worker inference failed")
+
+    return _read_stream(reader, writer, timeout)
+
+
+async def _read_stream(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                       timeout: float) -> AsyncIterator[Dict[str, Any]]:
+    submitted_at = time.monotonic()  # Accepted by the worker (for time-to-first-token)
+    try:
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout)
+            if not line:
+                raise RuntimeError("Worker closed the stream")
+            response = json.loads(line)
+            if not response.get('ok'):
+                raise RuntimeError(response.get('error') or "Worker inference failed")
+            if response.get('done'):
+                return
+            yield {**response['output'], "submitted_at": submitted_at}
+    finally:
+        writer.close()
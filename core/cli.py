@@ -7,12 +7,16 @@ Usage:
     vllm-batch worker clear-gpu
     vllm-batch worker logs --tail 100
     vllm-batch worker kill
+    vllm-batch profile start --target worker --mode sample --duration 30 --wait
+    vllm-batch profile status
+    vllm-batch profile stop
 """
 
 import click
 import requests
 import subprocess
 import sys
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -249,6 +253,92 @@ def kill():
         sys.exit(1)
 
 
+@cli.group()
+def profile():
+    """On-demand profiling of the worker or API process."""
+    pass
+
+
+def _profile_request(method: str, path: str, **kwargs) -> dict:
+    """Call a profiling endpoint; exit with the API's error message on failure."""
+    try:
+        response = requests.request(method, f"{get_api_url()}{path}", timeout=30, **kwargs)
+    except requests.exceptions.ConnectionError:
+        print_error(f"Cannot connect to API server at {get_api_url()}")
+        sys.exit(1)
+    if not response.ok:
+        try:
+            detail = response.json().get('detail', response.text)
+        except ValueError:
+            detail = response.text
+        print_error(f"Profiling request failed ({response.status_code}): {detail}")
+        sys.exit(1)
+    return response.json()  # type: ignore[no-any-return]
+
+
+def _print_session(session: dict):
+    click.echo(f"  Session:  {session['id']} ({session['mode']}, {session['status']})")
+    click.echo(f"  Duration: {session['duration_seconds']:g}s")
+    if session.get('error'):
+        print_error(session['error'])
+    for artifact in session.get('artifacts') or []:
+        click.echo(f"  Artifact: {artifact}")
+
+
+@profile.command()
+@click.option('--target', type=click.Choice(['worker', 'api']), default='worker', help='Process to profile')
+@click.option('--mode', type=click.Choice(['sample', 'cprofile', 'torch', 'memory']), default='sample',
+              help='sample: stack sampler (speedscope), cprofile: pstats, torch: CUDA trace, memory: tracemalloc')
+@click.option('--duration', default=30.0, help='Seconds to profile')
+@click.option('--interval-ms', default=10.0, help='Stack sampling interval (sample mode)')
+@click.option('--wait', is_flag=True, help='Wait for the session to finish and print its artifacts')
+def start(target: str, mode: str, duration: float, interval_ms: float, wait: bool):
+    """Start a time-boxed profiling session."""
+    data = _profile_request('POST', '/admin/profile', json={
+        'target': target, 'mode': mode, 'duration_seconds': duration, 'interval_ms': interval_ms
+    })
+    session = data['session']
+    print_success(f"Profiling {target} for {duration:g}s ({mode})")
+    if not wait:
+        print_info("Check progress with 'vllm-batch profile status'")
+        return
+
+    time.sleep(duration)
+    while True:
+        status = _profile_request('GET', '/admin/profile', params={'target': target})
+        finished = next((s for s in status['recent'] if s['id'] == session['id']), None)
+        if finished:
+            _print_session(finished)
+            sys.exit(0 if finished['status'] == 'completed' else 1)
+        time.sleep(1)
+
+
+@profile.command()
+@click.option('--target', type=click.Choice(['worker', 'api']), default='worker')
+def stop(target: str):
+    """End the running profiling session early."""
+    data = _profile_request('POST', '/admin/profile/stop', params={'target': target})
+    if data.get('session') is None:
+        print_warning("No profiling session is running")
+        return
+    print_success("Profiling session stopping; artifacts will be listed by 'vllm-batch profile status'")
+
+
+@profile.command(name='status')
+@click.option('--target', type=click.Choice(['worker', 'api']), default='worker')
+def profile_status(target: str):
+    """Show the running and recent profiling sessions."""
+    data = _profile_request('GET', '/admin/profile', params={'target': target})
+    if data.get('active'):
+        print_info(f"Running on {target}:")
+        _print_session(data['active'])
+    else:
+        print_info(f"No profiling session running on {target}")
+    for session in data.get('recent', []):
+        click.echo("")
+        _print_session(session)
+
+
 if __name__ == '__main__':
     cli()
 
@@ -117,6 +117,58 @@ class Settings(BaseSettings):
     WORKER_POLL_INTERVAL: int = 5  # Seconds between job checks
     WORKER_HEARTBEAT_INTERVAL: int = 30  # Seconds between heartbeats
     CHUNK_SIZE: int = 5000  # Process N requests at a time (proven safe from benchmarks)
+    EVENT_SOCKET_PATH: str = "data/events.sock"  # Unix socket the worker publishes progress events to (one API process owns it)
+    WORKER_IPC_SOCKET_PATH: str = "data/worker.sock"  # Worker serves real-time inference for its loaded model here ("" disables)
+    WORKER_IPC_TIMEOUT_SECONDS: float = 300.0  # Max wait for an interactive request forwarded to the worker
+
+    # Queue ETA model (see core/batch_app/queue_model.py)
+    QUEUE_MODEL_HISTORY_JOBS: int = 50  # Recent completed jobs per model used to fit throughput
+    QUEUE_DEFAULT_TOKENS_PER_SEC: float = 1000.0  # Used until a model has history or benchmarks
+    QUEUE_DEFAULT_COMPLETION_TOKENS: int = 256  # Expected completion tokens per request without history
+    QUEUE_DEFAULT_MODEL_LOAD_SECONDS: float = 60.0  # Swap cost until a model's load time is measured
+    QUEUE_DEFAULT_WARM_LOAD_SECONDS: float = 5.0  # Swap cost for a model restored from the host RAM cache until measured
+
+    # Model unload (see core/batch_app/model_lifecycle.py)
+    MODEL_UNLOAD_TIMEOUT_SECONDS: float = 30.0  # Max wait for GPU memory to be released after unload
+    MODEL_UNLOAD_POLL_INTERVAL: float = 0.1  # Seconds between NVML free-memory reads
+    MODEL_UNLOAD_FALLBACK_SECONDS: float = 3.0  # Fixed wait when NVML is unavailable
+    MODEL_CACHE_RAM_GB: float = 0.0  # Host RAM for sleeping recently used models (vLLM sleep mode, 0 = disabled)
+    PREFETCH_ENABLED: bool = True  # Read the next queued model's weights into page cache near the end of a job
+    PREFETCH_LOOKAHEAD_CHUNKS: int = 2  # Start prefetching when this many chunks of the current job remain
+    PREFETCH_MAX_MB_PER_SEC: float = 200.0  # Prefetch read rate limit (0 = unthrottled)
+    MODEL_CORESIDENCY_ENABLED: bool = False  # Keep several small models loaded on the GPU at once
+    CORESIDENCY_MAX_MODEL_FRACTION: float = 0.5  # Largest share of the GPU a co-resident model may take
+    CORESIDENCY_MIN_MODEL_LEN: int = 2048  # Context length floor when shrinking a co-resident model to fit
+    CORESIDENCY_BATCH_SIZE: int = 64  # Concurrent sequences a co-resident model's KV cache is sized for
+    LORA_MAX_ADAPTERS: int = 4  # Adapters vLLM keeps on the GPU at once (max_loras)
+    LORA_DEFAULT_RANK: int = 16  # Assumed LoRA rank when an adapter_config.json doesn't say
+    INFERENCE_BACKEND: str = "vllm"  # vllm, or simulated (CPU stand-in for benchmarks/tests, see engines.py)
+    SIMULATED_ENGINE_CONFIG: str = ""  # JSON overrides of SimulatedEngineConfig (rates, OOM injection, ...)
+    AUTOTUNE_SAMPLE_SIZE: int = 500  # Requests sampled from the dataset for each autotune trial
+    AUTOTUNE_MAX_TRIALS: int = 20  # Engine launches per autotune job (pruned configs are free)
+    AUTOTUNE_PATIENCE: int = 1  # Non-improving trials before a parameter's search direction stops
+    AUTOTUNE_MIN_IMPROVEMENT: float = 0.02  # Relative tokens/sec gain a trial needs to count as better
+
+    # Durability testing only (see core/batch_app/crash_points.py)
+    WORKER_CRASH_POINT: str = ""  # SIGKILL the worker at <point>:<n>, e.g. "write:5" ("" disables)
+
+    # On-demand profiling (see core/batch_app/profiling.py)
+    PROFILING_ENABLED: bool = False  # Allow /admin/profile sessions on the worker and API (unauthenticated)
+    PROFILING_MAX_SECONDS: float = 600.0  # Longest profiling session
+    PROFILING_SAMPLE_INTERVAL_MS: float = 10.0  # Default stack sampling interval
+
+    # Real-time inference micro-batching (see core/batch_app/micro_batcher.py)
+    INFERENCE_BATCH_WINDOW_MS: float = 10.0  # How long the first request waits for others to join its batch
+    INFERENCE_MAX_BATCH_SIZE: int = 32  # Run the batch immediately once this many requests are waiting
+
+    # GPU telemetry (see core/batch_app/gpu_telemetry.py)
+    GPU_TELEMETRY_BACKEND: str = "auto"  # auto (NVML, else fake with the simulated backend), nvml, fake or none
+    GPU_TELEMETRY_INTERVAL_SECONDS: float = 1.0  # Background sampling interval
+    GPU_TELEMETRY_BUFFER_SIZE: int = 3600  # Samples kept in memory per device (1 hour at 1s)
+
+    # Local cost of a job (see core/batch_app/cost_tracking.py)
+    ELECTRICITY_PRICE_PER_KWH: float = 0.15  # $ per kWh of measured GPU energy
+    GPU_HOURLY_COST: float = 0.0  # Amortized hardware $ per GPU-hour (0 = energy only)
 
     # GPU Health Thresholds
     GPU_MEMORY_THRESHOLD: float = 95.0  # Max GPU memory % before rejecting jobs
@@ -173,6 +225,9 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"  # DEBUG, INFO, WARNING, ERROR, CRITICAL
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     LOG_FILE: Optional[str] = None  # If set, log to file
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024  # Rotate log files above this size (0 = never)
+    LOG_BACKUP_COUNT: int = 7  # Gzipped rotations to keep
+    WORKER_LOG_FILE: str = "logs/worker.log"  # Worker stdout log (see scripts/start_all.sh)
 
     # ========================================================================
     # Curation UI Defaults
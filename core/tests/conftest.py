@@ -8,7 +8,10 @@ Fixtures:
 - temp_log_file: Temporary log file for testing
 - temp_dir: Temporary directory for testing
 - mock_prometheus_metrics: Mock Prometheus metrics (session-scoped)
+- reset_gpu_telemetry: Fresh process-wide GPU telemetry per test (auto-use)
 - mock_vllm_engine: Mock vLLM engine for testing
+- simulated_llm: Deterministic simulated engine (see simulated_engine.py)
+- simulated_worker: Worker module wired to a SQLite file and the simulated backend
 - test_db_session: Test database session
 """
 
@@ -74,6 +77,19 @@ def mock_prometheus_metrics():
     yield sys.modules['core.batch_app.metrics']
 
 
+@pytest.fixture(autouse=True)
+def reset_gpu_telemetry():
+    """Drop the process-wide GPU telemetry after each test.
+    
+    The telemetry keeps its NVML handle (or its failed-init backoff) for the
+    life of the process; tests that patch pynvml or change the backend need
+    a fresh instance.
+    """
+    yield
+    from core.batch_app.gpu_telemetry import reset_gpu_telemetry as reset
+    reset()
+
+
 # ============================================================================
 # Temporary File Fixtures
 # ============================================================================
@@ -183,7 +199,7 @@ def mock_vllm_llm_class():
     
     Usage:
         def test_something(mock_vllm_llm_class):
-            with patch('core.batch_app.worker.LLM', mock_vllm_llm_class):
+            with patch('core.batch_app.worker.create_llm', mock_vllm_llm_class):
                 # Test code that creates LLM instances
     
     The mock LLM class returns a mock engine when instantiated.
@@ -208,6 +224,74 @@ def mock_vllm_llm_class():
     return mock_llm_class
 
 
+@pytest.fixture
+def simulated_llm():
+    """Create a deterministic simulated engine (CPU stand-in for vllm.LLM).
+    
+    Usage:
+        def test_something(simulated_llm):
+            outputs = simulated_llm.generate(["user: Hi"], SimSamplingParams(max_tokens=8))
+    
+    Unlike the mocks above, it schedules requests through a step loop
+    (llm_engine.add_request/step), so worker code runs unchanged. See
+    core/batch_app/simulated_engine.py for the performance knobs.
+    """
+    from core.batch_app.simulated_engine import SimulatedLLM
+    return SimulatedLLM("simulated-model")
+
+
+@pytest.fixture
+def simulated_worker(temp_dir, monkeypatch):
+    """Run the worker's job pipeline on the simulated backend.
+    
+    Usage:
+        def test_something(simulated_worker):
+            job, db = simulated_worker.submit(num_requests=10, chunk_size=4)
+            simulated_worker.module.BatchWorker().process_job(job, db)
+    
+    The worker uses a SQLite file database, writes results under
+    temp_dir / "results" and runs with temp_dir as its working directory.
+    """
+    import json
+    import time
+    from types import SimpleNamespace
+
+    from core.batch_app import worker as worker_module
+    from core.batch_app.database import BatchJob, File, ModelRegistry
+
+    engine = create_engine(f"sqlite:///{temp_dir / 'batch.db'}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    monkeypatch.chdir(temp_dir)
+    monkeypatch.setattr(worker_module, "SessionLocal", session_factory)
+    monkeypatch.setattr(worker_module.settings, "INFERENCE_BACKEND", "simulated")
+    monkeypatch.setattr(worker_module.settings, "OUTPUT_DIR", str(temp_dir / "results"))
+    monkeypatch.setattr(worker_module.settings, "PREFETCH_ENABLED", False)
+
+    def submit(num_requests=10, chunk_size=4, batch_id="batch_sim", model="sim-model"):
+        input_path = temp_dir / f"{batch_id}_input.jsonl"
+        with open(input_path, "w") as f:
+            for i in range(num_requests):
+                f.write(json.dumps({"custom_id": f"req-{i}", "body": {"messages": [
+                    {"role": "user", "content": f"Question {i}"}]}}) + "\n")
+
+        db = session_factory()
+        if db.query(ModelRegistry).filter_by(model_id=model).first() is None:
+            db.add(ModelRegistry(model_id=model, name="Sim", size_gb=1, estimated_memory_gb=2, chunk_size=chunk_size))
+        db.add(File(file_id=f"file-{batch_id}", bytes=input_path.stat().st_size, created_at=int(time.time()),
+                    filename=input_path.name, purpose="batch", file_path=str(input_path)))
+        db.add(BatchJob(batch_id=batch_id, input_file_id=f"file-{batch_id}", status="validating",
+                        created_at=int(time.time()), expires_at=int(time.time()) + 3600,
+                        model=model, total_requests=num_requests, log_file=str(temp_dir / f"{batch_id}.log")))
+        db.commit()
+        return db.query(BatchJob).filter_by(batch_id=batch_id).one(), db
+
+    yield SimpleNamespace(module=worker_module, session_factory=session_factory, submit=submit,
+                          results_dir=temp_dir / "results")
+    engine.dispose()
+
+
 # ============================================================================
 # Database Fixtures
 # ============================================================================
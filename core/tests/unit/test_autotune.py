@@ -0,0 +1,233 @@
+"""Unit tests for the engine config autotuner.
+
+Tests cover:
+- Coordinate search finding the fastest config
+- Early stopping when throughput stops improving
+- OOM-aware pruning of configs that need more memory
+- Trial budget and baseline failures
+- Writing the best config back to ModelRegistry
+- Search space validation, request sampling and OOM detection
+- Trials on the simulated engine (startup OOMs, measured throughput)
+
+Run with: pytest core/tests/unit/test_autotune.py -v
+"""
+
+import json
+
+import pytest
+
+from core.batch_app.autotune import (
+    AutotuneError,
+    Autotuner,
+    TrialResult,
+    apply_autotune_result,
+    baseline_config,
+    is_oom_error,
+    run_trial,
+    sample_requests,
+    validate_search_space,
+)
+from core.batch_app.database import ModelRegistry
+from core.batch_app.simulated_engine import SimSamplingParams, SimulatedEngineConfig, SimulatedLLM
+
+BASELINE = {
+    'max_num_seqs': 128,
+    'max_num_batched_tokens': 4096,
+    'gpu_memory_utilization': 0.9,
+    'max_model_len': 4096,
+    'chunk_size': 1000,
+}
+
+SPACE = {
+    'max_num_seqs': [64, 128, 256, 512],
+    'max_num_batched_tokens': [2048, 4096, 8192, 16384],
+    'gpu_memory_utilization': [0.85, 0.9],
+    'max_model_len': [2048, 4096],
+    'chunk_size': [500, 1000],
+}
+
+
+class FakeEngine:
+    """Throughput saturates at 256 seqs / 8192 batched tokens; 512 seqs OOMs."""
+
+    def __init__(self, flat: bool = False):
+        self.flat = flat
+        self.launched = []
+
+    def __call__(self, config):
+        self.launched.append(config)
+        if config['max_num_seqs'] >= 512 and config['gpu_memory_utilization'] >= 0.85:
+            return TrialResult(config=config, oom=True)
+        if self.flat:
+            return TrialResult(config=config, tokens_per_sec=1000.0, requests=100, seconds=1.0)
+        tokens_per_sec = (min(config['max_num_seqs'], 256) * 10
+                          + min(config['max_num_batched_tokens'], 8192) / 10
+                          + config['chunk_size'] / 10)
+        return TrialResult(config=config, tokens_per_sec=tokens_per_sec, requests=100, seconds=1.0)
+
+
+class TestAutotuner:
+    """Test the search."""
+
+    def test_finds_fastest_config(self):
+        engine = FakeEngine()
+
+        result = Autotuner(engine, SPACE, BASELINE, max_trials=50).run()
+
+        assert result.best.config['max_num_seqs'] == 256
+        assert result.best.config['max_num_batched_tokens'] == 8192
+        assert result.improvement > 1.5
+        assert result.baseline.config == BASELINE
+
+    def test_early_stopping(self):
+        engine = FakeEngine(flat=True)
+
+        result = Autotuner(engine, SPACE, BASELINE, patience=1, max_trials=50).run()
+
+        assert result.best is result.baseline
+        # Baseline + one step up and one step down per parameter (no larger chunk sizes)
+        assert len(engine.launched) < 1 + 2 * len(SPACE)
+
+    def test_oom_prunes_larger_configs(self):
+        engine = FakeEngine()
+        tuner = Autotuner(engine, SPACE, BASELINE, max_trials=50)
+
+        tuner.run()
+
+        assert tuner.is_pruned({**BASELINE, 'max_num_seqs': 512, 'max_num_batched_tokens': 16384})
+        assert not tuner.is_pruned({**BASELINE, 'max_num_seqs': 512, 'gpu_memory_utilization': 0.8})
+        # Nothing at 512 seqs ran again after the first OOM
+        assert sum(1 for config in engine.launched if config['max_num_seqs'] == 512) == 1
+
+    def test_trial_budget(self):
+        engine = FakeEngine()
+
+        result = Autotuner(engine, SPACE, BASELINE, max_trials=3).run()
+
+        assert len(engine.launched) == 3
+        assert result.launched == 3
+
+    def test_invalid_config_not_launched(self):
+        engine = FakeEngine()
+        space = {**SPACE, 'max_num_batched_tokens': [64, 4096]}
+        tuner = Autotuner(engine, space, {**BASELINE, 'max_num_batched_tokens': 4096}, max_trials=50)
+
+        tuner.run()
+
+        assert all(config['max_num_batched_tokens'] >= config['max_num_seqs'] for config in engine.launched)
+
+    def test_baseline_failure(self):
+        with pytest.raises(AutotuneError, match="OOM"):
+            Autotuner(FakeEngine(), SPACE, {**BASELINE, 'max_num_seqs': 512}).run()
+
+
+class TestSimulatedTrials:
+    """Test the search on the simulated engine through run_trial."""
+
+    ENGINE_CONFIG = {"model": "sim-model", "enable_prefix_caching": True, "disable_log_stats": True}
+    PROMPTS = [f"user: Write a short answer to question {i}." for i in range(64)]
+
+    def evaluate(self, config, sim=None, on_start_failure=None):
+        def create_llm(**kwargs):
+            return SimulatedLLM(simulation=sim or SimulatedEngineConfig(output_length_mean=50), **kwargs)
+        return run_trial(create_llm, self.ENGINE_CONFIG, config, self.PROMPTS,
+                         SimSamplingParams(max_tokens=100), SimSamplingParams, on_start_failure)
+
+    def test_trial_measures_throughput(self):
+        result = self.evaluate({**BASELINE, 'max_num_seqs': 16, 'chunk_size': 32})
+
+        assert result.ok
+        assert result.requests == 64
+        assert result.tokens > 0 and result.tokens_per_sec > 0
+
+    def test_startup_oom_is_an_oom_trial(self):
+        failures = []
+
+        result = self.evaluate({**BASELINE, 'gpu_memory_utilization': 0.2}, on_start_failure=lambda: failures.append(1))
+
+        assert result.oom and not result.ok
+        assert failures == [1]
+
+    def test_search_on_simulated_engine(self):
+        baseline = {**BASELINE, 'max_num_seqs': 8, 'gpu_memory_utilization': 0.5, 'chunk_size': 64}
+        space = {**SPACE, 'gpu_memory_utilization': [0.28, 0.5], 'chunk_size': [16, 64]}
+
+        result = Autotuner(self.evaluate, space, baseline, max_trials=20).run()
+
+        assert result.best.config['max_num_seqs'] > 8
+        assert result.best.config['chunk_size'] == 64
+        assert result.improvement > 2
+        assert any(trial.oom for trial in result.trials)
+
+
+class TestApplyResult:
+    """Test persisting the best config."""
+
+    @pytest.fixture
+    def db(self, test_db_session):
+        test_db_session.add(ModelRegistry(model_id="model-a", name="A", size_gb=2, estimated_memory_gb=4))
+        test_db_session.commit()
+        return test_db_session
+
+    def test_best_config_written(self, db):
+        result = Autotuner(FakeEngine(), SPACE, BASELINE, max_trials=50).run()
+
+        entry = apply_autotune_result(db, "model-a", result)
+
+        assert entry.engine_profile_version == 1
+        assert json.loads(entry.engine_profile) == {'max_num_batched_tokens': 8192, 'max_num_seqs': 256}
+        assert entry.chunk_size == 1000
+        assert entry.max_model_len == 4096
+        assert entry.throughput_tokens_per_sec == result.best.tokens_per_sec
+
+    def test_baseline_best_not_written(self, db):
+        result = Autotuner(FakeEngine(flat=True), SPACE, BASELINE).run()
+
+        assert apply_autotune_result(db, "model-a", result) is None
+        assert db.query(ModelRegistry).filter_by(model_id="model-a").one().engine_profile_version == 0
+
+
+class TestHelpers:
+    """Test search space, sampling and error helpers."""
+
+    def test_search_space_merges_defaults(self):
+        space = validate_search_space({'max_num_seqs': [256, 32, 32]}, sample_size=1500)
+
+        assert space['max_num_seqs'] == [32, 256]
+        assert space['chunk_size'] == [1000]
+        assert space['max_model_len'] == [2048, 4096, 8192]
+
+    @pytest.mark.parametrize("space, message", [
+        ({'block_size': [16]}, "Unknown autotune parameter"),
+        ({'max_num_seqs': []}, "non-empty"),
+        ({'max_num_seqs': [0]}, "positive"),
+        ({'max_num_seqs': [64.5]}, "integers"),
+        ({'gpu_memory_utilization': [1.5]}, "at most 1.0"),
+    ])
+    def test_invalid_search_space(self, space, message):
+        with pytest.raises(AutotuneError, match=message):
+            validate_search_space(space)
+
+    def test_baseline_config_defaults(self):
+        config = baseline_config({'gpu_memory_utilization': 0.9, 'max_model_len': 4096, 'max_num_seqs': 64}, 5000)
+
+        assert config == {'max_num_seqs': 64, 'max_num_batched_tokens': 8192, 'gpu_memory_utilization': 0.9,
+                          'max_model_len': 4096, 'chunk_size': 5000}
+
+    def test_sample_requests(self, temp_dir):
+        path = temp_dir / "input.jsonl"
+        path.write_text("".join(json.dumps({"custom_id": f"r{i}"}) + "\n\n" for i in range(100)))
+
+        sample = sample_requests(path, 10, seed=1)
+
+        assert len(sample) == 10
+        assert len({r["custom_id"] for r in sample}) == 10
+        assert sample == sample_requests(path, 10, seed=1)
+        assert len(sample_requests(path, 500)) == 100
+
+    def test_is_oom_error(self):
+        assert is_oom_error(ValueError("Free memory on device (1.2/16 GiB) is less than desired"))
+        assert is_oom_error(RuntimeError("CUDA out of memory. Tried to allocate 2.00 GiB"))
+        assert is_oom_error(ValueError("The model's max seq len (8192) is larger than the maximum number "
+                                       "of tokens that can be stored in KV cache (6000)"))
+        assert not is_oom_error(ValueError("Unknown quantization method"))
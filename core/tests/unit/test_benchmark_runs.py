@@ -0,0 +1,127 @@
+"""Unit tests for benchmark runs as worker jobs (core/batch_app/benchmark_runs.py).
+
+Tests cover:
+- Queueing a benchmark as a low-priority 'benchmark' job over its dataset
+- The worker running it through the batch path and mirroring progress
+- Structured benchmark.progress events
+- Cancelling queued and running benchmark jobs
+
+Run with: pytest core/tests/unit/test_benchmark_runs.py -v
+"""
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from core.batch_app import benchmark_runs, model_manager
+from core.batch_app.benchmark_runs import cancel_benchmark_job, sync_benchmark
+from core.batch_app.database import BatchJob, Benchmark, Dataset, File, ModelRegistry
+
+
+@pytest.fixture
+def benchmark_run(simulated_worker, temp_dir, monkeypatch):
+    """A dataset of 10 requests and a queued benchmark of sim-model on it."""
+    monkeypatch.setattr(benchmark_runs.settings, "LOGS_DIR", str(temp_dir / "logs"))
+    monkeypatch.setattr(benchmark_runs.settings, "FILES_DIR", str(temp_dir / "files"))
+    (temp_dir / "logs").mkdir()
+    dataset_path = temp_dir / "candidates.jsonl"
+    with open(dataset_path, "w") as f:
+        for i in range(10):
+            f.write(json.dumps({"custom_id": f"cand-{i}", "body": {"messages": [
+                {"role": "user", "content": f"Name: Candidate {i}"}]}}) + "\n")
+
+    db = simulated_worker.session_factory()
+    db.add(ModelRegistry(model_id="sim-model", name="Sim", size_gb=1, estimated_memory_gb=2, chunk_size=4))
+    db.add(Dataset(id="ds_1", name="Candidates", file_path=str(dataset_path), count=10,
+                   uploaded_at=datetime.now(timezone.utc)))
+    db.add(Benchmark(id="bm_1", model_id="sim-model", dataset_id="ds_1", status="running", total=10,
+                     started_at=datetime.now(timezone.utc)))
+    db.commit()
+
+    job = model_manager.start_benchmark("bm_1", "sim-model", "ds_1", db)
+    yield job, db
+    db.close()
+
+
+def test_start_benchmark_queues_worker_job(benchmark_run):
+    job, db = benchmark_run
+    benchmark = db.query(Benchmark).filter_by(id="bm_1").one()
+
+    assert job.job_type == "benchmark" and job.status == "validating" and job.priority == -1
+    assert job.total_requests == 10 and job.model == "sim-model"
+    assert json.loads(job.job_config)["benchmark_id"] == "bm_1"
+    assert benchmark.batch_id == job.batch_id
+    assert benchmark.results_file.endswith(f"{job.batch_id}_results.jsonl")
+    dataset_path = Path(db.query(Dataset).one().file_path)
+    input_file = db.query(File).filter_by(file_id=job.input_file_id).one()
+    assert Path(input_file.file_path).parent == Path(benchmark_runs.settings.FILES_DIR)
+    assert Path(input_file.file_path).read_bytes() == dataset_path.read_bytes()
+
+    # A second benchmark on the same dataset reuses the copy
+    for benchmark_id in ("bm_2", "bm_3"):
+        db.add(Benchmark(id=benchmark_id, model_id="sim-model", dataset_id="ds_1", status="running", total=10,
+                         started_at=datetime.now(timezone.utc)))
+    db.commit()
+    assert model_manager.start_benchmark("bm_2", "sim-model", "ds_1", db).input_file_id == job.input_file_id
+
+    # Deleting the copy (what DELETE /v1/files does) leaves the dataset alone; the next run copies again
+    input_file.deleted = True
+    Path(input_file.file_path).unlink()
+    db.commit()
+    assert dataset_path.exists()
+    assert model_manager.start_benchmark("bm_3", "sim-model", "ds_1", db).input_file_id != job.input_file_id
+
+
+def test_worker_runs_benchmark_through_batch_path(benchmark_run, simulated_worker, monkeypatch):
+    job, db = benchmark_run
+    events = []
+    monkeypatch.setattr(simulated_worker.module, "publish_event", lambda event_type, **fields: events.append(
+        (event_type, fields)))
+
+    worker = simulated_worker.module.BatchWorker()
+    assert worker.get_next_pending_job(db).batch_id == job.batch_id
+    worker.process_job(job, db)
+
+    benchmark = db.query(Benchmark).filter_by(id="bm_1").one()
+    assert job.status == "completed"
+    assert benchmark.status == "completed" and benchmark.completed == 10 and benchmark.progress == 100
+    assert benchmark.throughput > 0 and benchmark.total_time_seconds is not None
+
+    with open(benchmark.results_file) as f:
+        records = [json.loads(line) for line in f]
+    assert [r["custom_id"] for r in records] == [f"cand-{i}" for i in range(10)]
+    assert records[0]["response"]["body"]["choices"][0]["message"]["content"]
+
+    progress = [fields for event_type, fields in events if event_type == "benchmark.progress"]
+    assert [p["completed"] for p in progress] == [4, 8, 10, 10]  # One per chunk, then the final status
+    assert progress[-1]["status"] == "completed" and progress[-1]["batch_id"] == job.batch_id
+
+    with open(benchmark.metadata_file) as f:
+        metadata = json.load(f)
+    assert metadata["batch_id"] == job.batch_id and metadata["completed_requests"] == 10
+    assert model_manager.get_benchmark_status("bm_1", db)["progress"] == 100
+
+
+def test_cancel_benchmark(benchmark_run):
+    job, db = benchmark_run
+    model_manager.cancel_benchmark("bm_1", db)
+    assert job.status == "cancelled"
+
+    benchmark = db.query(Benchmark).filter_by(id="bm_1").one()
+    job.status = "in_progress"
+    assert cancel_benchmark_job(benchmark, db).status == "cancelling"
+
+    # A cancelled benchmark stays cancelled when its job finishes anyway
+    benchmark.status = "cancelled"
+    job.status = "completed"
+    job.completed_requests = 10
+    assert sync_benchmark(job, db).status == "cancelled"
+    assert benchmark.completed == 0
+
+
+def test_sync_ignores_non_benchmark_jobs(simulated_worker):
+    job, db = simulated_worker.submit(num_requests=2, chunk_size=2)
+    assert sync_benchmark(job, db) is None
+    assert db.query(BatchJob).filter_by(job_type="benchmark").count() == 0
@@ -0,0 +1,173 @@
+"""Unit tests for crash points and the crash/resume chaos benchmark.
+
+Tests cover:
+- Crash point specs and hit counting (core/batch_app/crash_points.py)
+- Requeueing jobs a killed worker left in progress
+- Resuming after a torn result line without gaps or duplicates
+- Result comparison against a clean run (benchmarks/chaos)
+- An end-to-end chaos run with real worker processes
+
+Run with: pytest core/tests/unit/test_chaos_benchmark.py -v
+"""
+
+import json
+import random
+
+import pytest
+
+from benchmarks.chaos.harness import (
+    ChaosConfig,
+    Workspace,
+    format_report,
+    load_records,
+    normalize_record,
+    plan_crash,
+    run_chaos,
+    verify,
+)
+from core.batch_app import crash_points
+from core.batch_app.crash_points import crash_point, parse_crash_point
+
+
+@pytest.fixture
+def kills(monkeypatch):
+    """Record the signals crash_point would send instead of sending them."""
+    sent = []
+    monkeypatch.setattr(crash_points.os, "kill", lambda pid, sig: sent.append(sig))
+    monkeypatch.setattr(crash_points, "_hits", crash_points.Counter())
+    return sent
+
+
+def test_parse_crash_point():
+    assert parse_crash_point("") is None
+    assert parse_crash_point("write:5") == ("write", 5)
+    assert parse_crash_point("commit") == ("commit", 1)
+    with pytest.raises(ValueError, match="Unknown crash point"):
+        parse_crash_point("render:1")
+    with pytest.raises(ValueError, match="hit count"):
+        parse_crash_point("write:0")
+    with pytest.raises(ValueError, match="hit count"):
+        parse_crash_point("write:x")
+
+
+def test_crash_point_kills_on_nth_hit_only(kills, monkeypatch):
+    crash_point("write")  # Disabled by default
+    monkeypatch.setattr(crash_points.settings, "WORKER_CRASH_POINT", "commit:2")
+    crash_point("write")
+    crash_point("commit")
+    assert kills == []
+    crash_point("commit")
+    assert kills == [crash_points.signal.SIGKILL]
+    crash_point("commit")
+    assert len(kills) == 1
+
+
+def test_crash_point_tears_the_line(kills, monkeypatch, temp_dir):
+    monkeypatch.setattr(crash_points.settings, "WORKER_CRASH_POINT", "write:1")
+    path = temp_dir / "out.jsonl"
+    with open(path, 'wb') as f:
+        crash_point("write", partial_write=(f, b'{"custom_id": "a"}\n'))
+    assert path.read_bytes() == b'{"custom_'  # First half of the 19-byte line
+    assert kills
+
+
+def test_worker_requeues_interrupted_jobs(simulated_worker):
+    job, db = simulated_worker.submit(num_requests=4, chunk_size=4)
+    job.status = 'in_progress'
+    db.commit()
+
+    worker = simulated_worker.module.BatchWorker()
+    assert worker.requeue_interrupted_jobs(db) == [job.batch_id]
+    assert job.status == 'validating'
+    assert worker.get_next_pending_job(db).batch_id == job.batch_id
+    assert "requeueing interrupted job" in open(job.log_file).read()
+
+
+def test_worker_resumes_after_torn_line(simulated_worker):
+    job, db = simulated_worker.submit(num_requests=10, chunk_size=4)
+    worker = simulated_worker.module.BatchWorker()
+    worker.process_job(job, db)
+    results = simulated_worker.results_dir / "batch_sim_results.jsonl"
+    clean = load_records(results)
+
+    # What a crash mid-write of request 6 leaves behind
+    lines = results.read_bytes().splitlines(keepends=True)
+    results.write_bytes(b"".join(lines[:5]) + lines[5][:40])
+    job.status = 'in_progress'
+    db.commit()
+
+    worker.requeue_interrupted_jobs(db)
+    worker.process_job(job, db)
+
+    assert job.status == 'completed' and job.completed_requests == 10
+    assert load_records(results) == clean
+    assert "Dropped 40 bytes" in open(job.log_file).read()
+
+
+def test_worker_resumes_finalizing_job_without_second_output_file(simulated_worker):
+    from core.batch_app.database import File
+
+    job, db = simulated_worker.submit(num_requests=4, chunk_size=4)
+    worker = simulated_worker.module.BatchWorker()
+    worker.process_job(job, db)
+    output_file_id = job.output_file_id
+
+    # Killed after the finalizing commit (output File row saved), before completed
+    job.status = 'finalizing'
+    job.output_file_id = None
+    db.commit()
+
+    worker.requeue_interrupted_jobs(db)
+    worker.process_job(job, db)
+
+    assert job.status == 'completed' and job.output_file_id == output_file_id
+    assert db.query(File).filter(File.file_path.like('%batch_sim_results.jsonl')).count() == 1
+
+
+def test_normalize_record_drops_per_write_fields():
+    first = {"id": "batch_req_1", "custom_id": "req-0", "response": {
+        "request_id": "req-a", "body": {"id": "chatcmpl-a", "created": 1, "choices": [{"text": "x"}]}}}
+    second = json.loads(json.dumps(first))
+    second.update(id="batch_req_2")
+    second["response"].update(request_id="req-b")
+    second["response"]["body"].update(id="chatcmpl-b", created=2)
+
+    assert normalize_record(json.dumps(first).encode()) == normalize_record(json.dumps(second).encode())
+    assert normalize_record(b'{"custom_id": "to') == (None, b'{"custom_id": "to')
+
+
+def test_verify_reports_duplicates_gaps_and_corruption(temp_dir):
+    config = ChaosConfig(requests=3, chunk_size=3)
+    workspace = Workspace(temp_dir / "run", config)
+    workspace.create_job()
+    expected = [(f"req-{i}", json.dumps({"custom_id": f"req-{i}"}).encode()) for i in range(3)]
+
+    workspace.output_dir.mkdir()
+    workspace.results_path.write_text('{"custom_id": "req-0"}\n{"custom_id": "req-0"}\n{"custom_id": "req-2", "x"\n')
+    result = verify(expected, workspace)
+    workspace.close()
+
+    assert not result['ok']
+    assert result['duplicates'] == 1 and result['missing'] == 2 and result['corrupt'] == 1
+    assert result['status'] == 'validating'
+
+
+def test_plan_crash_stays_within_remaining_work():
+    rng = random.Random(3)
+    for _ in range(50):
+        point, _, hit = plan_crash(rng, ("write", "commit"), remaining=10, chunk_size=4).partition(':')
+        assert 1 <= int(hit) <= (10 if point == "write" else 3)
+
+
+def test_chaos_run_matches_clean_run(temp_dir):
+    config = ChaosConfig(requests=12, chunk_size=4, crashes=2, points=("write", "commit"), seed=5, timeout=60)
+    report = run_chaos(config, temp_dir)
+
+    assert report['ok'], report['trials'][0]['verification']
+    trial = report['trials'][0]
+    assert trial['verification']['usage_ok']  # Tokens of chunks saved but not committed are recovered
+    assert 1 <= report['crashes'] == len(trial['crashes']) <= 2  # No second crash if the first left no work
+    assert trial['worker_runs'] == len(trial['crashes']) + 1
+    assert all(crash['time_to_resume'] is not None for crash in trial['crashes'])
+    assert report['requests_recomputed'] == sum(crash['recomputed'] for crash in trial['crashes'])
+    assert any("Time to resume" in line for line in format_report(report))
@@ -0,0 +1,140 @@
+"""Unit tests for the OpenAI-compatible chat completions endpoint helpers.
+
+Tests cover:
+- Request validation and OpenAI parameter mapping
+- Non-streaming chat.completion responses
+- Cumulative engine outputs converted to SSE deltas
+- Usage chunk and [DONE] terminator
+- Engine failures after the stream started reported as an error event
+- Time-to-first-token metric
+
+Run with: pytest core/tests/unit/test_chat_completions.py -v
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from core.batch_app.chat_completions import (
+    ChatRequestError,
+    build_chat_completion,
+    parse_chat_request,
+    stream_chat_completion,
+)
+from core.batch_app.metrics import inference_time_to_first_token
+
+
+def parse_sse(events):
+    return [event[len("data: "):].strip() for event in events]
+
+
+async def cumulative(*outputs):
+    for output in outputs:
+        yield output
+
+
+class TestParseChatRequest:
+    """Test request validation."""
+
+    def test_openai_parameters(self):
+        request = parse_chat_request({
+            "model": "m",
+            "messages": [{"role": "user", "content": "hi"}],
+            "max_completion_tokens": 20,
+            "temperature": 0,
+            "stop": "</s>",
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        })
+
+        assert request.params == {"max_tokens": 20, "temperature": 0.0, "top_p": 1.0, "stop": ["</s>"]}
+        assert request.stream and request.include_usage
+        assert request.id.startswith("chatcmpl-")
+
+    @pytest.mark.parametrize("body", [
+        [],
+        {"messages": []},
+        {"messages": [{"content": "no role"}]},
+        {"messages": [{"role": "user", "content": "hi"}], "n": 2},
+        {"messages": [{"role": "user", "content": "hi"}], "max_tokens": "abc"},
+        {"messages": [{"role": "user", "content": "hi"}], "max_tokens": 0},
+        {"messages": [{"role": "user", "content": "hi"}], "temperature": "hot"},
+        {"messages": [{"role": "user", "content": "hi"}], "top_p": [1]},
+        {"messages": [{"role": "user", "content": "hi"}], "stream_options": True},
+    ])
+    def test_invalid(self, body):
+        with pytest.raises(ChatRequestError):
+            parse_chat_request(body)
+
+
+class TestResponses:
+    """Test response shaping."""
+
+    def test_chat_completion(self):
+        request = parse_chat_request({"messages": [{"role": "user", "content": "hi"}], "max_tokens": 5})
+
+        response = build_chat_completion(request, "m", {
+            "text": "Hello", "usage": {"prompt_tokens": 3, "completion_tokens": 5}
+        })
+
+        assert response["object"] == "chat.completion"
+        assert response["choices"][0]["message"] == {"role": "assistant", "content": "Hello"}
+        assert response["choices"][0]["finish_reason"] == "length"
+        assert response["usage"]["total_tokens"] == 8
+
+    @pytest.mark.asyncio
+    async def test_stream_deltas(self):
+        request = parse_chat_request({
+            "messages": [{"role": "user", "content": "hi"}],
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        })
+        outputs = cumulative(
+            {"text": "Hel", "prompt_tokens": 3, "completion_tokens": 1},
+            {"text": "Hello", "prompt_tokens": 3, "completion_tokens": 2},
+            {"text": "Hello!", "prompt_tokens": 3, "completion_tokens": 3, "finish_reason": "stop"},
+        )
+        before = inference_time_to_first_token.labels(model="stream-model")._sum.get()
+
+        events = [event async for event in stream_chat_completion(request, "stream-model", outputs)]
+        payloads = parse_sse(events)
+
+        assert payloads[-1] == "[DONE]"
+        chunks = [json.loads(p) for p in payloads[:-1]]
+        assert chunks[0]["choices"][0]["delta"] == {"role": "assistant", "content": ""}
+        assert [c["choices"][0]["delta"]["content"] for c in chunks[1:4]] == ["Hel", "lo", "!"]
+        assert chunks[4]["choices"][0]["finish_reason"] == "stop"
+        assert chunks[5]["choices"] == [] and chunks[5]["usage"]["completion_tokens"] == 3
+        assert all(c["object"] == "chat.completion.chunk" for c in chunks)
+        assert inference_time_to_first_token.labels(model="stream-model")._sum.get() > before
+
+    @pytest.mark.asyncio
+    async def test_time_to_first_token_excludes_model_load(self):
+        request = parse_chat_request({"messages": [{"role": "user", "content": "hi"}], "stream": True})
+
+        async def outputs():
+            await asyncio.sleep(0.3)  # Engine load before the request is submitted
+            yield {"text": "Hi", "prompt_tokens": 3, "completion_tokens": 1, "submitted_at": time.monotonic()}
+
+        ttft = inference_time_to_first_token.labels(model="loading-model")
+        before = ttft._sum.get()
+        [event async for event in stream_chat_completion(request, "loading-model", outputs())]
+
+        assert 0 <= ttft._sum.get() - before < 0.2
+
+    @pytest.mark.asyncio
+    async def test_engine_error_reported_in_stream(self):
+        request = parse_chat_request({"messages": [{"role": "user", "content": "hi"}], "stream": True})
+
+        async def outputs():
+            yield {"text": "Hi", "prompt_tokens": 3, "completion_tokens": 1}
+            raise RuntimeError("CUDA out of memory")
+
+        events = [event async for event in stream_chat_completion(request, "m", outputs())]
+        payloads = parse_sse(events)
+
+        assert payloads[-1] == "[DONE]"
+        assert json.loads(payloads[-2])["error"]["message"] == "CUDA out of memory"
+        assert json.loads(payloads[1])["choices"][0]["delta"] == {"content": "Hi"}
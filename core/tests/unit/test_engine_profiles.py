@@ -0,0 +1,98 @@
+"""Unit tests for per-model engine tuning profiles.
+
+Tests cover:
+- Validation of profile keys and values
+- Storing a profile bumps its version
+- Engine kwargs merge the profile over global defaults
+- Invalid stored profiles are ignored
+
+Run with: pytest core/tests/unit/test_engine_profiles.py -v
+"""
+
+import json
+
+import pytest
+
+from core.batch_app.database import ModelRegistry
+from core.batch_app.engine_profiles import (
+    EngineProfileError,
+    get_engine_profile,
+    set_engine_profile,
+    validate_engine_profile,
+)
+
+
+@pytest.fixture
+def db(test_db_session):
+    test_db_session.add(ModelRegistry(model_id="model-a", name="A", size_gb=2, estimated_memory_gb=4))
+    test_db_session.commit()
+    return test_db_session
+
+
+class TestValidation:
+    """Test profile validation."""
+
+    def test_valid_profile(self):
+        profile = validate_engine_profile({
+            "max_num_seqs": 128,
+            "max_num_batched_tokens": 8192,
+            "kv_cache_dtype": "fp8",
+            "swap_space": 4,
+            "enforce_eager": False,
+            "speculative_config": {"method": "ngram", "num_speculative_tokens": 4, "prompt_lookup_max": 4},
+        })
+
+        assert profile["swap_space"] == 4.0
+        assert profile["speculative_config"]["num_speculative_tokens"] == 4
+
+    @pytest.mark.parametrize("profile, message", [
+        ({"max_num_seqs": 0}, "positive integer"),
+        ({"max_num_seqs": True}, "positive integer"),
+        ({"kv_cache_dtype": "int4"}, "kv_cache_dtype"),
+        ({"swap_space": -1}, "non-negative"),
+        ({"enforce_eager": "yes"}, "true or false"),
+        ({"speculative_config": {"num_speculative_tokens": 3}}, "method"),
+        ({"speculative_config": {"method": "ngram"}}, "num_speculative_tokens"),
+        ({"max_num_seqs": 256, "max_num_batched_tokens": 128}, "at least max_num_seqs"),
+        ({"gpu_memory_utilization": 0.5}, "Unknown engine profile keys"),
+        (["max_num_seqs"], "JSON object"),
+    ])
+    def test_invalid_profile(self, profile, message):
+        with pytest.raises(EngineProfileError, match=message):
+            validate_engine_profile(profile)
+
+
+class TestStoredProfiles:
+    """Test storing and reading profiles."""
+
+    def test_set_bumps_version(self, db):
+        set_engine_profile(db, "model-a", {"max_num_seqs": 64})
+        entry = set_engine_profile(db, "model-a", {"max_num_seqs": 128})
+
+        assert entry.engine_profile_version == 2
+        assert entry.to_dict()["engine_profile"] == {"max_num_seqs": 128}
+
+    def test_engine_kwargs(self, db, monkeypatch):
+        monkeypatch.setattr("core.batch_app.engine_profiles.settings.TENSOR_PARALLEL_SIZE", 2)
+        set_engine_profile(db, "model-a", {"enforce_eager": True})
+
+        profile = get_engine_profile(db, "model-a")
+
+        assert profile.version == 1
+        assert profile.engine_kwargs() == {"tensor_parallel_size": 2, "enforce_eager": True}
+
+    def test_unknown_model(self, db):
+        with pytest.raises(ValueError, match="not found"):
+            set_engine_profile(db, "missing", {})
+        assert get_engine_profile(db, "missing").version == 0
+
+    def test_invalid_stored_profile_ignored(self, db):
+        entry = db.query(ModelRegistry).filter_by(model_id="model-a").one()
+        entry.engine_profile = json.dumps({"max_num_seqs": -5})
+        entry.engine_profile_version = 3
+        db.commit()
+
+        profile = get_engine_profile(db, "model-a")
+
+        assert profile.settings == {}
+        assert profile.version == 3
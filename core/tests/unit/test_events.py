@@ -0,0 +1,170 @@
+"""Unit tests for the event bus.
+
+Tests cover:
+- Fan-out to multiple subscribers with type filters
+- Latest-state replay for new subscribers
+- Bounded queues for slow subscribers
+- Shared pollers that only run while subscribed
+- Event-driven snapshots built once per burst and replayed on connect
+- Cross-process delivery over the Unix datagram socket
+- A second API process not taking over a live socket
+
+Run with: pytest core/tests/unit/test_events.py -v
+"""
+
+import asyncio
+import socket
+
+import pytest
+
+from core.batch_app import events
+from core.batch_app.events import EventBus, EventSocketInUseError, make_event, publish_event
+
+
+class TestEventBus:
+    """Test in-process fan-out."""
+
+    @pytest.mark.asyncio
+    async def test_fan_out_with_filters(self):
+        bus = EventBus()
+        everything = bus.subscribe()
+        batches_only = bus.subscribe({"batch"})
+
+        bus.publish(make_event("batch.progress", batch_id="b1", completed_requests=10))
+        bus.publish(make_event("queue.changed", reason="created"))
+
+        assert [e["type"] for e in [await everything.get(0.1), await everything.get(0.1)]] == [
+            "batch.progress", "queue.changed"
+        ]
+        assert (await batches_only.get(0.1))["type"] == "batch.progress"
+        assert await batches_only.get(0.01) is None
+
+    @pytest.mark.asyncio
+    async def test_replays_latest_state(self):
+        bus = EventBus()
+        bus.publish(make_event("batch.progress", batch_id="b1", completed_requests=10))
+        bus.publish(make_event("batch.progress", batch_id="b1", completed_requests=20))
+        bus.publish(make_event("batch.status", batch_id="b2", status="completed", final=True))
+
+        late = bus.subscribe()
+
+        event = await late.get(0.1)
+        assert event["completed_requests"] == 20
+        assert await late.get(0.01) is None
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_drops_oldest(self):
+        bus = EventBus()
+        subscription = events.Subscription(bus, maxsize=2)
+        bus._subscribers.add(subscription)
+
+        for i in range(5):
+            bus.publish(make_event("queue.changed", n=i))
+
+        assert [(await subscription.get(0.1))["n"] for _ in range(2)] == [3, 4]
+        assert subscription.dropped == 3
+
+    @pytest.mark.asyncio
+    async def test_poller_runs_once_for_all_subscribers(self):
+        bus = EventBus()
+        calls = []
+
+        async def poll():
+            calls.append(1)
+            bus.publish(make_event("benchmark.snapshot", jobs=[]))
+
+        bus.add_poller("test", poll, interval=0.05)
+        assert calls == []  # No subscribers yet
+
+        subscribers = [bus.subscribe() for _ in range(10)]
+        await asyncio.sleep(0.12)
+        for subscription in subscribers:
+            subscription.close()
+        polls = len(calls)
+        await asyncio.sleep(0.1)
+
+        assert 1 <= polls <= 4
+        assert len(calls) == polls  # Stopped after last unsubscribe
+
+    @pytest.mark.asyncio
+    async def test_snapshot_built_once_per_burst(self):
+        bus = EventBus()
+        builds = []
+
+        async def build():
+            builds.append(1)
+            bus.publish(make_event("queue.snapshot", queue_length=len(builds)))
+
+        bus.add_snapshot("queue", build, triggers={"batch.progress", "queue.changed"}, debounce=0.05)
+        bus.publish(make_event("queue.changed", reason="created"))
+        await asyncio.sleep(0.1)
+        assert builds == []  # Nobody subscribed
+
+        subscribers = [bus.subscribe({"queue.snapshot"}) for _ in range(10)]
+        for i in range(5):
+            bus.publish(make_event("batch.progress", batch_id="b1", completed_requests=i))
+        await asyncio.sleep(0.1)
+
+        assert builds == [1]
+        for subscription in subscribers:
+            assert (await subscription.get(0.1))["queue_length"] == 1
+        # Late subscribers get the latest snapshot without a rebuild
+        assert (await bus.subscribe({"queue"}).get(0.1))["type"] == "queue.snapshot"
+        assert builds == [1]
+
+
+class TestCrossProcessPublish:
+    """Test publishing over the Unix datagram socket."""
+
+    @pytest.mark.asyncio
+    async def test_publish_event_delivered(self, temp_dir, monkeypatch):
+        socket_path = str(temp_dir / "events.sock")
+        monkeypatch.setattr(events.settings, "EVENT_SOCKET_PATH", socket_path)
+
+        bus = EventBus()
+        await bus.start(socket_path)
+        subscription = bus.subscribe()
+        try:
+            assert publish_event("batch.progress", batch_id="b1", completed_requests=5)
+            event = await subscription.get(1.0)
+        finally:
+            subscription.close()
+            await bus.stop()
+
+        assert event["type"] == "batch.progress"
+        assert event["completed_requests"] == 5
+
+    def test_publish_without_listener(self, temp_dir, monkeypatch):
+        """Publishing with no API running is a silent no-op."""
+        monkeypatch.setattr(events.settings, "EVENT_SOCKET_PATH", str(temp_dir / "missing.sock"))
+
+        assert publish_event("batch.progress", batch_id="b1") is False
+
+    @pytest.mark.asyncio
+    async def test_live_socket_not_taken_over(self, temp_dir, monkeypatch):
+        socket_path = str(temp_dir / "events.sock")
+        monkeypatch.setattr(events.settings, "EVENT_SOCKET_PATH", socket_path)
+
+        first, second = EventBus(), EventBus()
+        await first.start(socket_path)
+        subscription = first.subscribe()
+        try:
+            with pytest.raises(EventSocketInUseError):
+                await second.start(socket_path)
+            assert publish_event("batch.progress", batch_id="b1")
+            assert (await subscription.get(1.0))["batch_id"] == "b1"
+        finally:
+            subscription.close()
+            await second.stop()
+            await first.stop()
+
+    @pytest.mark.asyncio
+    async def test_stale_socket_replaced(self, temp_dir):
+        socket_path = str(temp_dir / "events.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        stale.bind(socket_path)
+        stale.close()  # File left behind, nobody bound
+
+        bus = EventBus()
+        await bus.start(socket_path)
+        await bus.stop()
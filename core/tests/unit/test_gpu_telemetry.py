@@ -0,0 +1,196 @@
+"""Unit tests for GPU telemetry (core/batch_app/gpu_telemetry.py).
+
+Tests cover:
+- Ring buffer capacity and time-window queries
+- Instant reads (buffered when fresh, otherwise through the held handle)
+- Background sampling and listeners
+- Health check thresholds and the no-telemetry fallback
+- Energy from the device counter and from integrated power
+- Per-job timeline sidecar written by the worker
+
+Run with: pytest core/tests/unit/test_gpu_telemetry.py -v
+"""
+
+import time
+
+import pytest
+
+from core.batch_app import gpu_telemetry
+from core.batch_app.gpu_telemetry import (
+    FakeGPUBackend,
+    GPUSample,
+    GPUTelemetry,
+    append_timeline,
+    check_gpu_health,
+    create_backend,
+    downsample,
+    gpu_memory_info,
+    read_timeline,
+    summarize_samples,
+    timeline_path_for,
+)
+
+GB = 1024 ** 3
+
+
+class Clock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def sample(t, power=None, energy=None, device=0, util=50.0):
+    return GPUSample(timestamp=t, device_index=device, memory_used_bytes=4 * GB, memory_total_bytes=16 * GB,
+                     utilization_percent=util, power_watts=power, energy_joules=energy)
+
+
+@pytest.fixture
+def fake_telemetry(monkeypatch):
+    """Process-wide telemetry on a fake backend."""
+    backend = FakeGPUBackend(memory_used_bytes=8 * GB, utilization_percent=90.0, power_watts=250.0)
+    telemetry = GPUTelemetry(backend=backend, interval=0.01, capacity=5)
+    monkeypatch.setattr(gpu_telemetry, "_telemetry", telemetry)
+    return telemetry
+
+
+def test_ring_buffer_keeps_latest_samples_per_device():
+    clock = Clock()
+    telemetry = GPUTelemetry(backend=FakeGPUBackend(devices=2, clock=clock), interval=1, capacity=3)
+    for _ in range(5):
+        telemetry.sample()
+        clock.now += 1
+
+    assert [s.timestamp for s in telemetry.series(device_index=0)] == [1002.0, 1003.0, 1004.0]
+    assert len(telemetry.series()) == 6
+    assert [s.timestamp for s in telemetry.series(device_index=1, since=1003.0)] == [1003.0, 1004.0]
+    assert telemetry.series(device_index=0, until=1002.5)[-1].timestamp == 1002.0
+
+
+def test_latest_reads_through_handle_when_not_sampling():
+    backend = FakeGPUBackend(memory_used_bytes=2 * GB)
+    telemetry = GPUTelemetry(backend=backend, interval=1)
+    telemetry.sample()
+    backend.memory_used_bytes = 6 * GB
+
+    # Sampler not running: the buffered sample may be stale
+    assert telemetry.latest().memory_used_bytes == 6 * GB
+    assert telemetry.read_now().memory_free_bytes == 10 * GB
+
+
+def test_background_sampler_fills_buffer_and_notifies(fake_telemetry):
+    seen = []
+    fake_telemetry.add_listener(seen.append)
+    assert fake_telemetry.start()
+    try:
+        deadline = time.time() + 5
+        while len(seen) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        assert fake_telemetry.running
+        latest = fake_telemetry.latest()
+        assert latest is fake_telemetry.series()[-1]  # Fresh buffered sample, no extra read
+    finally:
+        fake_telemetry.stop()
+    assert len(seen) >= 3
+    assert len(fake_telemetry.series()) <= 5
+
+
+def test_check_gpu_health_uses_thresholds(fake_telemetry, monkeypatch):
+    monkeypatch.setattr(gpu_telemetry.settings, "GPU_MEMORY_THRESHOLD", 95.0)
+    monkeypatch.setattr(gpu_telemetry.settings, "GPU_TEMP_THRESHOLD", 85.0)
+    status = check_gpu_health()
+    assert status['healthy'] is True
+    assert status['memory_percent'] == pytest.approx(50.0)
+    assert status['power_watts'] == 250.0
+
+    fake_telemetry.backend.temperature_c = 90
+    status = check_gpu_health()
+    assert status['healthy'] is False and "temperature" in status['reason']
+
+    fake_telemetry.backend.temperature_c = 40
+    fake_telemetry.backend.memory_used_bytes = int(15.5 * GB)
+    assert "memory" in check_gpu_health()['reason']
+    assert gpu_memory_info() == (int(0.5 * GB), 16 * GB)
+
+
+def test_check_gpu_health_without_telemetry(monkeypatch):
+    monkeypatch.setattr(gpu_telemetry, "_telemetry", GPUTelemetry(backend=None))
+    monkeypatch.setattr(gpu_telemetry.settings, "GPU_TELEMETRY_BACKEND", "none")
+    status = check_gpu_health()
+    assert status['healthy'] is True
+    assert status['memory_percent'] == 0 and status['temperature_c'] == 0
+    assert 'warning' in status
+    assert gpu_memory_info() is None
+
+
+def test_create_backend_selection(monkeypatch):
+    assert create_backend('none') is None
+    assert isinstance(create_backend('fake'), FakeGPUBackend)
+    with pytest.raises(ValueError, match="GPU_TELEMETRY_BACKEND"):
+        create_backend('rocm')
+
+    def no_nvml():
+        raise ImportError("pynvml")
+
+    monkeypatch.setattr(gpu_telemetry, "NVMLBackend", no_nvml)
+    monkeypatch.setattr(gpu_telemetry.settings, "INFERENCE_BACKEND", "simulated")
+    assert isinstance(create_backend('auto'), FakeGPUBackend)
+    monkeypatch.setattr(gpu_telemetry.settings, "INFERENCE_BACKEND", "vllm")
+    assert create_backend('auto') is None
+    assert create_backend('nvml') is None
+
+
+def test_summary_energy_prefers_counter_then_integrates_power():
+    counter = [sample(0, power=100, energy=500.0), sample(10, power=300, energy=2500.0)]
+    assert summarize_samples(counter)['energy_joules'] == 2000.0
+
+    integrated = [sample(0, power=100), sample(10, power=300), sample(20, power=300)]
+    summary = summarize_samples(integrated)
+    assert summary['energy_joules'] == pytest.approx(2000 + 3000)
+    assert summary['power_watts'] == {'mean': pytest.approx(233.33), 'max': 300}
+    assert summary['seconds'] == 20
+    assert summary['memory_used_gb']['max'] == 4.0
+
+    assert summarize_samples([]) == {'samples': 0, 'devices': 0}
+
+
+def test_timeline_round_trip_and_downsample(temp_dir):
+    results = temp_dir / "batch_1_results.jsonl"
+    clock = Clock()
+    backend = FakeGPUBackend(devices=2, clock=clock, utilization_percent=75.0)
+    samples = []
+    for _ in range(10):
+        samples += [backend.read(0), backend.read(1)]
+        clock.now += 0.5
+
+    assert append_timeline(results, samples[:8]) == 8
+    append_timeline(results, samples[8:])
+    with open(timeline_path_for(results), 'a') as f:
+        f.write("1000.5\t0\tnot-a-number")  # Torn last line
+
+    loaded = list(read_timeline(results))
+    assert loaded == samples
+    thinned = downsample(loaded, 4)
+    assert len([s for s in thinned if s.device_index == 0]) <= 4
+    assert {s.device_index for s in thinned} == {0, 1}
+
+
+def test_worker_writes_job_timeline(simulated_worker):
+    job, db = simulated_worker.submit(num_requests=8, chunk_size=4)
+    worker = simulated_worker.module.BatchWorker()
+    assert worker.telemetry.backend.name == 'fake'  # auto with the simulated engine
+
+    worker.telemetry.interval = 0.005
+    worker.telemetry.start()
+    try:
+        worker.process_job(job, db)
+    finally:
+        worker.telemetry.stop()
+
+    results = simulated_worker.results_dir / "batch_sim_results.jsonl"
+    timeline = list(read_timeline(results))
+    assert timeline
+    assert all(job.in_progress_at - 1 <= s.timestamp for s in timeline)
+    assert len({s.timestamp for s in timeline}) == len(timeline)  # No sample appended twice
+    assert "GPU TELEMETRY" in open(job.log_file).read()
@@ -0,0 +1,170 @@
+"""Unit tests for the API load test (benchmarks/loadtest).
+
+Tests cover:
+- Scenario loading and validation (including the shipped scenarios)
+- The stub worker moving jobs to completed with readable results
+- The load generator against an in-memory ASGI app
+- Per-endpoint stats, SLO checks and p95 regression comparison
+
+Run with: pytest core/tests/unit/test_loadtest_benchmark.py -v
+"""
+
+import random
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+
+from benchmarks.loadtest.__main__ import main
+from benchmarks.loadtest.generator import (
+    ACTIONS,
+    LoadState,
+    Recorder,
+    build_report,
+    check_slos,
+    compare_reports,
+    percentile,
+    run_load,
+    setup_batches,
+)
+from benchmarks.loadtest.scenarios import Scenario, SetupSpec, list_scenarios, load_scenario
+from benchmarks.loadtest.stub_worker import StubWorker
+from core.batch_app.database import BatchJob, File, WorkerHeartbeat
+from core.batch_app.result_files import get_result_index
+
+
+def test_shipped_scenarios_are_valid():
+    names = {load_scenario(str(path), list(ACTIONS)).name for path in list_scenarios()}
+    assert {"polling", "upload_burst", "mixed"} <= names
+    assert load_scenario("polling").total_clients >= 300
+
+
+def test_scenario_validation():
+    base = {"name": "s", "clients": [{"action": "poll_batch", "clients": 2}]}
+    assert Scenario.from_dict(base, list(ACTIONS)).clients[0].clients == 2
+    with pytest.raises(ValueError, match="Unknown action"):
+        Scenario.from_dict({**base, "clients": [{"action": "nope"}]}, list(ACTIONS))
+    with pytest.raises(ValueError, match="Unknown SLO fields"):
+        Scenario.from_dict({**base, "slo": {"*": {"p90_ms": 5}}})
+    with pytest.raises(ValueError, match="no clients"):
+        Scenario.from_dict({"name": "s", "clients": []})
+    with pytest.raises(ValueError, match="Invalid scenario"):
+        Scenario.from_dict({**base, "clients": [{"action": "poll_batch", "users": 5}]})
+    with pytest.raises(ValueError, match="No scenario"):
+        load_scenario("does-not-exist")
+
+
+def test_stub_worker_completes_jobs(simulated_worker):
+    simulated_worker.submit(num_requests=5, batch_id="batch_a")
+    simulated_worker.submit(num_requests=3, batch_id="batch_b")
+    stub = StubWorker(simulated_worker.session_factory, simulated_worker.results_dir,
+                      tick_seconds=1.0, requests_per_second=4)
+    simulated_worker.results_dir.mkdir()
+
+    advanced = [stub.tick() for _ in range(4)]
+    assert advanced == ["batch_a", "batch_a", "batch_b", None]  # 4 requests per tick
+    assert stub.completed == ["batch_a", "batch_b"]
+
+    with simulated_worker.session_factory() as db:
+        job = db.query(BatchJob).filter_by(batch_id="batch_a").one()
+        assert job.status == "completed" and job.completed_requests == 5
+        output = db.query(File).filter_by(file_id=job.output_file_id).one()
+        assert db.query(WorkerHeartbeat).one().status == "idle"
+
+    index = get_result_index(output.file_path)
+    assert len(index) == 5
+    assert b'"custom_id": "req-3"' in index.read_record("req-3")
+
+
+def batch_app():
+    """Just enough of the API for the actions used below."""
+    app = FastAPI()
+    polls = {"count": 0}
+
+    @app.post("/v1/files")
+    async def upload():
+        return {"id": "file-1"}
+
+    @app.post("/v1/batches")
+    async def create():
+        return {"id": f"batch_{random.randrange(10**6)}"}
+
+    @app.get("/v1/batches/{batch_id}")
+    async def get_batch(batch_id: str):
+        polls["count"] += 1
+        return {"id": batch_id, "status": "completed" if polls["count"] > 3 else "in_progress"}
+
+    @app.get("/v1/batches/{batch_id}/results/{custom_id}")
+    async def get_result(batch_id: str, custom_id: str):
+        return {"custom_id": custom_id}
+
+    @app.get("/health")
+    async def health():
+        return Response(status_code=503)
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_run_load_reports_per_endpoint():
+    scenario = Scenario.from_dict({
+        "name": "t", "duration_seconds": 0.5, "warmup_seconds": 0,
+        "clients": [
+            {"action": "poll_batch", "clients": 5, "think_time_ms": 10},
+            {"action": "get_result", "clients": 2, "think_time_ms": 10},
+            {"action": "health", "clients": 1, "think_time_ms": 50},
+        ],
+    }, list(ACTIONS))
+    state = LoadState(model="m", requests_per_batch=4, rng=random.Random(0))
+    transport = httpx.ASGITransport(app=batch_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert await setup_batches(client, state, SetupSpec(batches=2)) == 2
+        report = await run_load(scenario, client, state)
+
+    polls = report["endpoints"]["GET /v1/batches/{id}"]
+    assert polls["requests"] > 10 and polls["errors"] == 0
+    assert polls["p50_ms"] <= polls["p95_ms"] <= polls["p99_ms"] <= polls["max_ms"]
+    assert state.completed_ids and "GET /v1/batches/{id}/results/{custom_id}" in report["endpoints"]
+    assert report["endpoints"]["GET /health"]["error_rate"] == 1.0
+    assert "POST /v1/files" not in report["endpoints"]  # Setup isn't measured
+
+
+def test_build_report_stats():
+    recorder = Recorder()
+    for ms, status in ((10, 200), (20, 200), (30, 404), (40, "ConnectTimeout")):
+        recorder.latencies["GET /x"].append(ms / 1000)
+        recorder.statuses["GET /x"][str(status)] += 1
+    recorder.errors["GET /x"] = 1
+    report = build_report(recorder, seconds=2)
+
+    stats = report["endpoints"]["GET /x"]
+    assert stats["rps"] == 2 and stats["p50_ms"] == 20 and stats["max_ms"] == 40
+    assert stats["statuses"] == {"200": 2, "404": 1, "ConnectTimeout": 1}
+    assert report["error_rate"] == 0.25
+    assert percentile([1, 2, 3, 4], 95) == 4 and percentile([], 50) is None
+
+
+def test_check_slos_and_compare():
+    report = {"endpoints": {
+        "GET /a": {"p50_ms": 5, "p95_ms": 40, "p99_ms": 90, "error_rate": 0.0, "rps": 50},
+        "GET /b": {"p50_ms": 5, "p95_ms": 10, "p99_ms": 20, "error_rate": 0.1, "rps": 2},
+    }}
+    slo = {"GET /a": {"p95_ms": 30}, "GET /c": {"p95_ms": 10}, "*": {"max_error_rate": 0.0, "min_rps": 5}}
+    violations = check_slos(report, slo)
+    assert violations == [
+        "GET /a: p95_ms 40 (target 30)",
+        "GET /b: max_error_rate 0.1 (target 0.0)",
+        "GET /b: min_rps 2 (target 5)",
+        "GET /c: no requests measured",
+    ]
+
+    baseline = {"endpoints": {"GET /a": {"p95_ms": 20}, "GET /b": {"p95_ms": 10}}}
+    rows = {row["endpoint"]: row for row in compare_reports(baseline, report, threshold=0.2)}
+    assert rows["GET /a"]["regression"] and rows["GET /a"]["change"] == 1.0
+    assert not rows["GET /b"]["regression"]
+
+
+def test_cli_requires_url_for_postgres(monkeypatch, capsys):
+    monkeypatch.delenv("LOADTEST_DATABASE_URL", raising=False)
+    assert main(["run", "--database", "postgres", "--no-save"]) == 2
+    assert "--database-url" in capsys.readouterr().err
@@ -0,0 +1,187 @@
+"""Unit tests for log file access (tail, paging, stats, rotation).
+
+Tests cover:
+- Reverse-seek tail across block boundaries and partial last lines
+- Byte-cursor paging backwards and forwards
+- Incremental error/warning counts and reset on rotation
+- Size-based rotation with gzip
+
+Run with: pytest core/tests/unit/test_log_files.py -v
+"""
+
+import gzip
+import logging
+from logging.handlers import RotatingFileHandler
+
+import pytest
+
+from core.batch_app import log_files
+from core.batch_app.log_files import (
+    LogStats,
+    gzip_namer,
+    gzip_rotator,
+    read_forward,
+    rotate_log_file,
+    tail_lines,
+    worker_log_path,
+)
+
+
+@pytest.fixture
+def log_path(temp_dir):
+    path = temp_dir / "worker.log"
+    path.write_text(''.join(f"line {i}\n" for i in range(1000)))
+    return path
+
+
+class TestTail:
+    """Test reverse-seek tail reads."""
+
+    def test_last_lines(self, log_path):
+        lines, start, end = tail_lines(log_path, 3, block_size=16)
+
+        assert lines == ["line 997", "line 998", "line 999"]
+        assert end == log_path.stat().st_size
+        assert log_path.read_bytes()[start:end].decode().splitlines() == lines
+
+    def test_page_backwards(self, log_path):
+        _, start, _ = tail_lines(log_path, 3)
+
+        lines, _, _ = tail_lines(log_path, 2, before=start, block_size=8)
+
+        assert lines == ["line 995", "line 996"]
+
+    def test_more_lines_than_file(self, temp_dir):
+        path = temp_dir / "small.log"
+        path.write_text("a\nb\n")
+
+        lines, start, _ = tail_lines(path, 10)
+
+        assert lines == ["a", "b"]
+        assert start == 0
+
+    def test_partial_last_line_excluded(self, log_path):
+        with open(log_path, 'a') as f:
+            f.write("still writ")
+
+        lines, _, end = tail_lines(log_path, 1)
+
+        assert lines == ["line 999"]
+        assert log_path.read_bytes()[end:] == b"still writ"
+
+    def test_empty_file(self, temp_dir):
+        path = temp_dir / "empty.log"
+        path.write_text("")
+
+        assert tail_lines(path, 5) == ([], 0, 0)
+
+
+class TestReadForward:
+    """Test forward paging from a byte cursor."""
+
+    def test_follow_from_end_cursor(self, log_path):
+        _, _, end = tail_lines(log_path, 1)
+        with open(log_path, 'a') as f:
+            f.write("new 1\nnew 2\npart")
+
+        lines, next_cursor = read_forward(log_path, end)
+
+        assert lines == ["new 1", "new 2"]
+        assert read_forward(log_path, next_cursor) == ([], next_cursor)
+
+    def test_max_lines(self, log_path):
+        lines, next_cursor = read_forward(log_path, 0, max_lines=2)
+
+        assert lines == ["line 0", "line 1"]
+        assert next_cursor == len("line 0\nline 1\n")
+
+
+class TestLogStats:
+    """Test incrementally maintained counts."""
+
+    def test_incremental_counts(self, temp_dir):
+        path = temp_dir / "job.log"
+        path.write_text("ok\n❌ boom\nWARNING careful\n")
+        stats = LogStats()
+
+        assert stats.get(path) == {"total_lines": 3, "error_count": 1, "warning_count": 1, "size": path.stat().st_size}
+
+        with open(path, 'a') as f:
+            f.write("ERROR again\npartial")
+        result = stats.get(path)
+
+        assert result["total_lines"] == 4
+        assert result["error_count"] == 2
+
+    def test_reset_after_rotation(self, temp_dir):
+        path = temp_dir / "job.log"
+        path.write_text("ERROR one\nERROR two\n")
+        stats = LogStats()
+        stats.get(path)
+
+        rotate_log_file(path, max_bytes=1, backup_count=2)
+        path.write_text("fine\n")
+
+        assert stats.get(path)["error_count"] == 0
+
+    def test_line_longer_than_buffer(self, temp_dir):
+        path = temp_dir / "job.log"
+        path.write_bytes(b"ok\n" + b"a" * (log_files.MAX_PAGE_BYTES * 4 + 10) + b"\nERROR boom\n")
+        stats = LogStats()
+
+        assert stats.get(path)["total_lines"] == 3
+        result = stats.get(path)
+
+        assert result["total_lines"] == 3
+        assert result["error_count"] == 1
+
+
+class TestRotation:
+    """Test size-based rotation with gzip."""
+
+    def test_below_threshold(self, log_path):
+        assert rotate_log_file(log_path, max_bytes=10 ** 9, backup_count=3) is False
+
+    def test_rotates_and_shifts_generations(self, temp_dir):
+        path = temp_dir / "batch.log"
+
+        for generation in range(4):
+            path.write_text(f"generation {generation}\n")
+            assert rotate_log_file(path, max_bytes=1, backup_count=2)
+
+        assert not path.exists()
+        assert gzip.decompress((temp_dir / "batch.log.1.gz").read_bytes()) == b"generation 3\n"
+        assert gzip.decompress((temp_dir / "batch.log.2.gz").read_bytes()) == b"generation 2\n"
+        assert not (temp_dir / "batch.log.3.gz").exists()
+
+    def test_copytruncate(self, log_path):
+        rotate_log_file(log_path, max_bytes=1, backup_count=1, copytruncate=True)
+
+        assert log_path.exists() and log_path.stat().st_size == 0
+        assert gzip.decompress(log_path.with_name("worker.log.1.gz").read_bytes()).startswith(b"line 0\n")
+
+    def test_worker_log_path_ignores_cwd(self, temp_dir, monkeypatch):
+        monkeypatch.chdir(temp_dir)
+        monkeypatch.setattr(log_files.settings, "WORKER_LOG_FILE", "logs/worker.log")
+        assert worker_log_path() == log_files.PROJECT_ROOT / "logs" / "worker.log"
+
+        monkeypatch.setattr(log_files.settings, "WORKER_LOG_FILE", str(temp_dir / "worker.log"))
+        assert worker_log_path() == temp_dir / "worker.log"
+
+    def test_rotating_file_handler_gzip(self, temp_dir):
+        path = temp_dir / "app.log"
+        handler = RotatingFileHandler(path, maxBytes=50, backupCount=2)
+        handler.namer = gzip_namer
+        handler.rotator = gzip_rotator
+        test_logger = logging.getLogger("test_log_files.rotation")
+        test_logger.propagate = False
+        test_logger.addHandler(handler)
+        try:
+            for i in range(10):
+                test_logger.warning(f"message number {i}")
+        finally:
+            test_logger.removeHandler(handler)
+            handler.close()
+
+        assert (temp_dir / "app.log.1.gz").exists()
+        assert gzip.decompress((temp_dir / "app.log.1.gz").read_bytes()).startswith(b"message number")
@@ -0,0 +1,153 @@
+"""Unit tests for LoRA adapter serving.
+
+Tests cover:
+- Registering a fine-tune as an adapter on its base model
+- Resolving adapter jobs to base model + LoRA adapter
+- Engine LoRA config (rank rounded to a vLLM-supported value)
+- No swap cost between base and adapter jobs in the queue snapshot
+- Batch prompts carrying the adapter through the step loop
+
+Run with: pytest core/tests/unit/test_lora.py -v
+"""
+
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core.batch_app.database import BatchJob, ModelRegistry, WorkerHeartbeat
+from core.batch_app.lora import (
+    is_adapter_dir,
+    lora_enabled,
+    lora_engine_config,
+    register_adapter,
+    resident_model_id,
+    resolve_serving_model,
+    supported_lora_rank,
+)
+from core.batch_app.queue_model import refresh_queue_snapshot
+from core.batch_app.worker_ipc import run_step_loop
+
+BASE = "google/gemma-3-4b-it"
+
+
+def make_adapter(path, rank=16):
+    path.mkdir(parents=True)
+    (path / "adapter_config.json").write_text(json.dumps({"r": rank, "base_model_name_or_path": BASE}))
+    (path / "adapter_model.safetensors").write_bytes(b"\0" * 1024)
+    return path
+
+
+@pytest.fixture
+def db(test_db_session):
+    test_db_session.add(ModelRegistry(
+        model_id=BASE, name="Gemma", size_gb=8, estimated_memory_gb=10, max_model_len=8192, load_time_seconds=60.0
+    ))
+    test_db_session.commit()
+    return test_db_session
+
+
+class TestAdapterRegistry:
+    """Test registering and resolving adapters."""
+
+    def test_register_adapter(self, db, temp_dir):
+        path = make_adapter(temp_dir / "ft-support")
+
+        entry = register_adapter(db, "ft-support", "Support bot", BASE, path)
+
+        assert is_adapter_dir(path)
+        assert entry.base_model_id == BASE
+        assert entry.adapter_path == str(path.resolve())
+        assert entry.max_model_len == 8192  # Inherited from the base
+        assert entry.status == "ready"
+
+    def test_resolve_serving_model(self, db, temp_dir):
+        entry = register_adapter(db, "ft-support", "Support bot", BASE, make_adapter(temp_dir / "ft"))
+
+        serving = resolve_serving_model(db, "ft-support")
+
+        assert serving.base_model == BASE
+        assert serving.adapter.name == "ft-support"
+        assert serving.adapter.lora_id == entry.id
+        assert resolve_serving_model(db, BASE).adapter is None
+        assert resolve_serving_model(db, "unregistered").base_model == "unregistered"
+        assert resident_model_id(db, "ft-support") == BASE
+
+    def test_engine_config(self, db, temp_dir):
+        assert lora_engine_config(db, BASE) == {}
+
+        register_adapter(db, "ft-a", "A", BASE, make_adapter(temp_dir / "a", rank=8))
+        register_adapter(db, "ft-b", "B", BASE, make_adapter(temp_dir / "b", rank=48))
+
+        config = lora_engine_config(db, BASE)
+
+        assert config["enable_lora"] is True
+        assert config["max_lora_rank"] == 64
+        assert config["max_loras"] == 2
+
+    def test_supported_rank(self):
+        assert supported_lora_rank(4) == 8
+        assert supported_lora_rank(16) == 16
+        assert supported_lora_rank(1000) == 512
+
+    def test_lora_enabled(self):
+        def llm(lora_config):
+            return SimpleNamespace(llm_engine=SimpleNamespace(vllm_config=SimpleNamespace(lora_config=lora_config)))
+
+        assert lora_enabled(llm(object()))
+        assert not lora_enabled(llm(None))
+        assert not lora_enabled(None)
+        # AsyncLLMEngine: V1 keeps the config on the engine itself
+        assert lora_enabled(SimpleNamespace(vllm_config=SimpleNamespace(lora_config=object())))
+        assert not lora_enabled(SimpleNamespace(vllm_config=SimpleNamespace(lora_config=None)))
+
+
+class TestSharedResidentModel:
+    """Test that adapter jobs don't cost a model swap."""
+
+    def test_no_swap_between_base_and_adapters(self, db, temp_dir):
+        register_adapter(db, "ft-a", "A", BASE, make_adapter(temp_dir / "a"))
+        register_adapter(db, "ft-b", "B", BASE, make_adapter(temp_dir / "b"))
+        db.add(WorkerHeartbeat(id=1, status="idle", loaded_model=BASE))
+        for offset, (batch_id, model) in enumerate([("a", "ft-a"), ("base", BASE), ("b", "ft-b")]):
+            db.add(BatchJob(
+                batch_id=batch_id, input_file_id="file-in", status="validating",
+                created_at=int(time.time()) + offset, expires_at=int(time.time()) + 86400,
+                model=model, total_requests=0
+            ))
+        db.commit()
+
+        queued = refresh_queue_snapshot(db)
+
+        assert [job.estimated_duration_seconds for job in queued] == [0.0, 0.0, 0.0]
+
+
+class TestStepLoopAdapter:
+    """Test the adapter reaching the engine."""
+
+    def test_batch_requests_carry_lora_request(self):
+        added = []
+
+        class Engine:
+            def add_request(self, request_id, prompt, params, priority=0, lora_request=None):
+                added.append(lora_request)
+
+            def has_unfinished_requests(self):
+                return False
+
+        lora_request = object()
+        run_step_loop(Engine(), ["a", "b"], None, lambda params: params, lora_request=lora_request)
+
+        assert added == [lora_request, lora_request]
+
+    def test_interactive_adapter_resolves_to_loaded_base(self, simulated_worker, temp_dir):
+        db = simulated_worker.session_factory()
+        db.add(ModelRegistry(model_id=BASE, name="Gemma", size_gb=8, estimated_memory_gb=10))
+        register_adapter(db, "ft-support", "Support", BASE, make_adapter(temp_dir / "ft-support"))
+        db.close()
+        resolve = simulated_worker.module.BatchWorker.resolve_interactive_model
+
+        base_model, lora_request = resolve("ft-support")
+        assert base_model == BASE and lora_request.lora_name == "ft-support"
+        assert resolve(BASE) == (BASE, None)
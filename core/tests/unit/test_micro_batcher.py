@@ -0,0 +1,124 @@
+"""Unit tests for real-time inference micro-batching.
+
+Tests cover:
+- Concurrent requests collected into one engine call
+- Max batch size closing the window early
+- Grouping by model
+- Engine errors propagated to every caller in the batch
+- Queue time and batch size histograms
+
+Run with: pytest core/tests/unit/test_micro_batcher.py -v
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from core.batch_app.metrics import inference_batch_size
+from core.batch_app.micro_batcher import MicroBatcher
+
+
+class FakeEngine:
+    """Records each batch; echoes prompts back."""
+
+    def __init__(self, delay: float = 0.0):
+        self.batches = []
+        self.delay = delay
+        self.threads = set()
+
+    def generate_batch(self, model_id, prompts, params_list):
+        self.threads.add(threading.current_thread().name)
+        self.batches.append((model_id, list(prompts)))
+        if self.delay:
+            threading.Event().wait(self.delay)
+        return [
+            {"text": prompt.upper(), "model": model_id, "max_tokens": params.get("max_tokens")}
+            for prompt, params in zip(prompts, params_list)
+        ]
+
+
+class TestMicroBatcher:
+    """Test collecting and running micro-batches."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_batch(self):
+        engine = FakeEngine()
+        batcher = MicroBatcher(engine.generate_batch, window_ms=50, max_batch_size=32)
+
+        results = await asyncio.gather(*[
+            batcher.submit("m", f"p{i}", {"max_tokens": i}) for i in range(5)
+        ])
+        await batcher.close()
+
+        assert engine.batches == [("m", ["p0", "p1", "p2", "p3", "p4"])]
+        assert [r["text"] for r in results] == ["P0", "P1", "P2", "P3", "P4"]
+        assert [r["max_tokens"] for r in results] == [0, 1, 2, 3, 4]
+        assert all(r["batch_size"] == 5 for r in results)
+        assert engine.threads != {threading.current_thread().name}  # Ran off the event loop
+
+    @pytest.mark.asyncio
+    async def test_max_batch_size_closes_window(self):
+        engine = FakeEngine()
+        batcher = MicroBatcher(engine.generate_batch, window_ms=10_000, max_batch_size=2)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*[batcher.submit("m", f"p{i}") for i in range(4)]),
+            timeout=2.0
+        )
+        await batcher.close()
+
+        assert [len(prompts) for _, prompts in engine.batches] == [2, 2]
+        assert len(results) == 4
+
+    @pytest.mark.asyncio
+    async def test_groups_by_model(self):
+        engine = FakeEngine()
+        batcher = MicroBatcher(engine.generate_batch, window_ms=50)
+
+        results = await asyncio.gather(
+            batcher.submit("a", "x"), batcher.submit("b", "y"), batcher.submit("a", "z")
+        )
+        await batcher.close()
+
+        assert sorted(engine.batches) == [("a", ["x", "z"]), ("b", ["y"])]
+        assert [r["model"] for r in results] == ["a", "b", "a"]
+
+    @pytest.mark.asyncio
+    async def test_requests_during_running_batch_join_next(self):
+        engine = FakeEngine(delay=0.1)
+        batcher = MicroBatcher(engine.generate_batch, window_ms=1)
+
+        first = asyncio.ensure_future(batcher.submit("m", "first"))
+        await asyncio.sleep(0.03)  # First batch is running
+        later = await asyncio.gather(*[batcher.submit("m", f"later{i}") for i in range(3)])
+        await first
+        await batcher.close()
+
+        assert engine.batches[1] == ("m", ["later0", "later1", "later2"])
+        assert all(r["queue_ms"] >= 30 for r in later)
+
+    @pytest.mark.asyncio
+    async def test_engine_error_fails_whole_batch(self):
+        def broken(model_id, prompts, params_list):
+            raise RuntimeError("CUDA out of memory")
+
+        batcher = MicroBatcher(broken, window_ms=20)
+
+        results = await asyncio.gather(
+            batcher.submit("m", "a"), batcher.submit("m", "b"), return_exceptions=True
+        )
+        await batcher.close()
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_batch_size_histogram(self):
+        engine = FakeEngine()
+        batcher = MicroBatcher(engine.generate_batch, window_ms=50)
+        before = inference_batch_size.labels(model="hist-model")._sum.get()
+
+        await asyncio.gather(*[batcher.submit("hist-model", "p") for _ in range(3)])
+        await batcher.close()
+
+        assert inference_batch_size.labels(model="hist-model")._sum.get() - before == 3
@@ -0,0 +1,85 @@
+"""Unit tests for the host-RAM warm model cache.
+
+Tests cover:
+- LRU eviction within the RAM budget
+- Models larger than the budget (or of unknown size) are not cached
+- Warm models lowering the queue's swap-cost estimate
+
+Run with: pytest core/tests/unit/test_model_cache.py -v
+"""
+
+import json
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from core.batch_app.database import BatchJob, ModelRegistry, WorkerHeartbeat
+from core.batch_app.model_cache import GB, WarmModelCache, parse_warm_models
+from core.batch_app.queue_model import refresh_queue_snapshot
+
+NOW = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class TestWarmModelCache:
+    """Test LRU behaviour."""
+
+    def test_evicts_least_recently_used(self):
+        cache = WarmModelCache(budget_bytes=20 * GB)
+        assert cache.put("a", "llm-a", 8 * GB) == []
+        assert cache.put("b", "llm-b", 8 * GB) == []
+
+        evicted = cache.put("c", "llm-c", 8 * GB)
+
+        assert [entry.model_id for entry in evicted] == ["a"]
+        assert cache.warm_models() == ["c", "b"]
+        assert cache.used_bytes == 16 * GB
+
+    def test_take_removes(self):
+        cache = WarmModelCache(budget_bytes=20 * GB)
+        cache.put("a", "llm-a", 8 * GB)
+
+        entry = cache.take("a")
+
+        assert entry.llm == "llm-a"
+        assert "a" not in cache
+        assert cache.take("a") is None
+
+    def test_fits(self):
+        cache = WarmModelCache(budget_bytes=10 * GB)
+
+        assert cache.fits(8 * GB)
+        assert not cache.fits(12 * GB)
+        assert not cache.fits(0)  # Unknown size
+        assert not WarmModelCache(budget_bytes=0).fits(GB)
+
+    def test_parse_warm_models(self):
+        assert parse_warm_models(json.dumps(["a", "b"])) == ("a", "b")
+        assert parse_warm_models(None) == ()
+        assert parse_warm_models("not json") == ()
+
+
+class TestWarmSwapCost:
+    """Test the queue snapshot's use of warm models."""
+
+    def test_warm_model_uses_restore_time(self, test_db_session, monkeypatch):
+        monkeypatch.setattr("core.batch_app.queue_model.settings.MODEL_CACHE_RAM_GB", 32.0)
+        db = test_db_session
+        db.add(WorkerHeartbeat(id=1, status="idle", loaded_model="model-a", warm_models=json.dumps(["model-b"])))
+        for model_id in ("model-a", "model-b"):
+            db.add(ModelRegistry(
+                model_id=model_id, name=model_id, size_gb=8, estimated_memory_gb=10,
+                load_time_seconds=90.0, warm_load_time_seconds=4.0
+            ))
+        for i, model in enumerate(["model-b", "model-a"]):
+            db.add(BatchJob(
+                batch_id=f"job-{i}", input_file_id="file-in", status="validating",
+                created_at=int(time.time()) + i, expires_at=int(time.time()) + 86400,
+                model=model, total_requests=0
+            ))
+        db.commit()
+
+        to_b, back_to_a = refresh_queue_snapshot(db, now=NOW)
+
+        assert to_b.estimated_duration_seconds == pytest.approx(4.0)  # model-b is warm
+        assert back_to_a.estimated_duration_seconds == pytest.approx(4.0)  # model-a was slept on swap
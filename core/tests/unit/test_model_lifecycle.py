@@ -0,0 +1,104 @@
+"""Unit tests for model unload and GPU memory release polling.
+
+Tests cover:
+- Polling NVML until the next model's memory requirement is free
+- Timeout when memory is never released
+- Fixed fallback delay without NVML
+- Explicit engine shutdown
+- Measured unload time in the queue's swap cost
+
+Run with: pytest core/tests/unit/test_model_lifecycle.py -v
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from core.batch_app.database import ModelRegistry
+from core.batch_app.model_lifecycle import (
+    required_free_bytes,
+    shutdown_llm,
+    wait_for_free_memory,
+)
+from core.batch_app.queue_model import model_unload_seconds, record_model_unload_time
+
+GB = 1024 ** 3
+
+
+def memory_readings(*free_gb, total_gb=16):
+    """NVML stand-in returning successive free-memory readings."""
+    readings = list(free_gb)
+
+    def read():
+        free = readings.pop(0) if len(readings) > 1 else readings[0]
+        return int(free * GB), int(total_gb * GB)
+    return read
+
+
+class TestWaitForFreeMemory:
+    """Test polling for released memory."""
+
+    def test_returns_once_enough_is_free(self):
+        sleeps = []
+
+        release = wait_for_free_memory(
+            required_free_bytes(0.85, 16 * GB),
+            timeout=10, poll_interval=0.1,
+            memory_info=memory_readings(2, 6, 14), sleep=sleeps.append
+        )
+
+        assert release.released and release.measured
+        assert release.free_bytes == 14 * GB
+        assert sleeps == [0.1, 0.1]  # Two polls, not a fixed 3 s sleep
+
+    def test_timeout(self):
+        release = wait_for_free_memory(
+            15 * GB, timeout=0, poll_interval=0.1,
+            memory_info=memory_readings(2), sleep=lambda s: None
+        )
+
+        assert not release.released
+        assert release.free_bytes == 2 * GB
+
+    def test_fallback_without_nvml(self, monkeypatch):
+        monkeypatch.setattr("core.batch_app.model_lifecycle.settings.MODEL_UNLOAD_FALLBACK_SECONDS", 3.0)
+        sleeps = []
+
+        release = wait_for_free_memory(GB, memory_info=lambda: None, sleep=sleeps.append)
+
+        assert sleeps == [3.0]
+        assert not release.measured
+
+
+class TestShutdown:
+    """Test explicit engine shutdown."""
+
+    def test_shuts_down_engine_core(self):
+        calls = []
+        engine_core = SimpleNamespace(shutdown=lambda: calls.append("engine_core"))
+        llm = SimpleNamespace(llm_engine=SimpleNamespace(engine_core=engine_core))
+
+        shutdown_llm(llm)
+
+        assert calls == ["engine_core"]
+
+    def test_shutdown_errors_are_not_fatal(self):
+        def fail():
+            raise RuntimeError("already dead")
+
+        shutdown_llm(SimpleNamespace(llm_engine=SimpleNamespace(shutdown=fail)))
+
+
+class TestUnloadTime:
+    """Test recording measured release times."""
+
+    def test_recorded_and_smoothed(self, test_db_session):
+        test_db_session.add(ModelRegistry(model_id="m", name="M", size_gb=1, estimated_memory_gb=1))
+        test_db_session.commit()
+
+        assert model_unload_seconds(test_db_session, "m") == 0.0
+
+        record_model_unload_time(test_db_session, "m", 1.0)
+        record_model_unload_time(test_db_session, "m", 2.0)
+
+        assert model_unload_seconds(test_db_session, "m") == pytest.approx(1.5)
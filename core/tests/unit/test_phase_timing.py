@@ -0,0 +1,120 @@
+"""Unit tests for per-phase timing of batch jobs.
+
+Tests cover:
+- Span recording, merging and pipeline ordering
+- Job summaries (other time, GPU busy fraction) and the log table
+- Phase breakdown of a batch job run on the simulated engine
+
+Run with: pytest core/tests/unit/test_phase_timing.py -v
+"""
+
+import json
+
+from core.batch_app.phase_timing import PhaseTimer, format_summary_table, gpu_busy_fraction
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPhaseTimer:
+    """Test the span recorder."""
+
+    def test_spans_accumulate(self):
+        clock = FakeClock()
+        timer = PhaseTimer(clock)
+
+        for seconds in (1.0, 2.0):
+            with timer.span('generate'):
+                clock.now += seconds
+        with timer.span('parse'):
+            clock.now += 0.5
+
+        assert timer.seconds == {'generate': 3.0, 'parse': 0.5}
+        assert timer.total == 3.5
+
+    def test_span_records_on_error(self):
+        clock = FakeClock()
+        timer = PhaseTimer(clock)
+
+        try:
+            with timer.span('generate'):
+                clock.now += 2.0
+                raise RuntimeError("CUDA out of memory")
+        except RuntimeError:
+            pass
+
+        assert timer.seconds == {'generate': 2.0}
+
+    def test_merge_and_order(self):
+        chunk, job = PhaseTimer(), PhaseTimer()
+        chunk.add('write', 0.2)
+        chunk.add('read', 0.1)
+        chunk.add('custom', 0.3)
+        job.add('read', 1.0)
+
+        job.merge(chunk)
+
+        assert job.ordered() == [('read', 1.1), ('write', 0.2), ('custom', 0.3)]
+        assert job.format_line() == "read 1.10s · write 0.20s · custom 0.30s"
+
+    def test_summary(self):
+        timer = PhaseTimer()
+        timer.add('load', 20.0)
+        timer.add('generate', 60.0)
+        timer.add('write', 5.0)
+
+        summary = timer.summary(wall_seconds=100.0)
+
+        assert summary['phases'] == {'load': 20.0, 'generate': 60.0, 'write': 5.0}
+        assert summary['other_seconds'] == 15.0
+        assert summary['gpu_busy_fraction'] == 0.6
+        table = format_summary_table(summary)
+        assert table[0].split() == ['Phase', 'Seconds', '%', 'wall']
+        assert any(line.startswith('generate') and line.endswith('60.0%') for line in table)
+        assert table[-1] == "GPU busy:   60.0% of wall time in generate"
+
+    def test_gpu_busy_fraction_bounds(self):
+        assert gpu_busy_fraction(5.0, 0.0) is None
+        assert gpu_busy_fraction(10.0, 9.9) == 1.0
+
+
+class TestWorkerPhases:
+    """Test the worker's phase breakdown on the simulated engine."""
+
+    def test_job_records_phases(self, simulated_worker, temp_dir):
+        job, db = simulated_worker.submit(num_requests=10, chunk_size=4)
+
+        simulated_worker.module.BatchWorker().process_job(job, db)
+
+        db.refresh(job)
+        assert job.status == "completed", job.errors
+        summary = json.loads(job.phase_timings)
+        assert set(summary['phases']) == {'load', 'count', 'read', 'parse', 'render', 'generate',
+                                          'serialize', 'write', 'fsync', 'index', 'metrics', 'commit'}
+        assert 0 < job.gpu_busy_fraction <= 1
+        assert job.gpu_busy_fraction == summary['gpu_busy_fraction']
+        log = (temp_dir / "batch_sim.log").read_text()
+        assert log.count("⏱️  Phases: read") == 3
+        assert "PHASE BREAKDOWN" in log
+        db.close()
+
+    def test_failed_job_records_phases(self, simulated_worker, monkeypatch):
+        job, db = simulated_worker.submit(num_requests=10, chunk_size=4)
+        worker = simulated_worker.module.BatchWorker()
+
+        def fail(prompts, sampling_params):
+            raise RuntimeError("engine died")
+        monkeypatch.setattr(worker, "generate", fail)
+
+        worker.process_job(job, db)
+
+        db.refresh(job)
+        assert job.status == "failed"
+        summary = json.loads(job.phase_timings)
+        assert 'generate' in summary['phases'] and 'write' not in summary['phases']
+        db.close()
@@ -0,0 +1,201 @@
+"""Unit tests for the pipeline overhead benchmark suite.
+
+Tests cover:
+- Benchmark selection, timing and unavailable benchmarks
+- History store and run lookup
+- Regression comparison and the CLI's exit status
+- Running every suite at a tiny scale
+- The input helpers the suites time (submission scan, chunk reads)
+
+Run with: pytest core/tests/unit/test_pipeline_benchmarks.py -v
+"""
+
+import json
+from contextlib import contextmanager
+
+import pytest
+
+from benchmarks.pipeline import BENCHMARKS
+from benchmarks.pipeline.__main__ import main
+from benchmarks.pipeline.runner import (
+    Benchmark,
+    BenchmarkUnavailable,
+    Comparison,
+    compare_runs,
+    find_run,
+    load_history,
+    make_run,
+    regressions,
+    run_benchmark,
+    run_benchmarks,
+    save_run,
+    select_benchmarks,
+)
+from benchmarks.pipeline.suites import make_requests, write_input_file
+from core.batch_app.queue_model import scan_batch_input
+from core.batch_app.worker import BatchWorker
+
+
+def stored_run(run_id, medians, commit="abc1234", label=None):
+    return {
+        'run_id': run_id, 'timestamp': '2026-01-01T00:00:00+00:00', 'commit': commit, 'label': label,
+        'machine': {'host': 'bench'},
+        'results': [{'benchmark': name, 'scale': scale, 'median': median} for (name, scale), median in medians.items()],
+    }
+
+
+class TestRunner:
+    """Test selection and timing."""
+
+    def test_select_by_group_and_prefix(self):
+        assert {b.name for b in select_benchmarks(['checkpoint'])} == {
+            'checkpoint.count_completed', 'checkpoint.rebuild_index'}
+        assert [b.name for b in select_benchmarks(['results.wr'])] == ['results.write']
+        assert len(select_benchmarks()) == len(BENCHMARKS)
+        with pytest.raises(ValueError, match="No benchmarks match"):
+            select_benchmarks(['nope'])
+
+    def test_setup_not_timed(self):
+        calls = []
+
+        @contextmanager
+        def setup(scale, workdir):
+            calls.append('setup')
+            yield lambda: calls.append('run')
+            calls.append('teardown')
+
+        measurement = run_benchmark(Benchmark(name='fake', setup=setup, group='fake', ops=10), 1000, repeat=3)
+
+        assert calls == ['setup', 'run', 'run', 'run', 'teardown']
+        assert len(measurement.times) == 3
+        assert measurement.ops == 10
+        assert measurement.per_op_us == measurement.median / 10 * 1e6
+
+    def test_unavailable_benchmark_is_skipped(self):
+        @contextmanager
+        def setup(scale, workdir):
+            raise BenchmarkUnavailable("needs a GPU")
+            yield
+
+        measurement = run_benchmark(Benchmark(name='fake', setup=setup, group='fake'), 1000, repeat=3)
+
+        assert measurement.skipped == "needs a GPU"
+        assert measurement.median is None
+        assert measurement.to_dict()['median'] is None
+
+
+class TestHistory:
+    """Test the history store."""
+
+    def test_round_trip(self, temp_dir):
+        path = temp_dir / "history.jsonl"
+        save_run(stored_run('run-1', {('a', 1000): 1.0}), path)
+        save_run(stored_run('run-2', {('a', 1000): 2.0}, commit='def5678', label='after'), path)
+        with open(path, 'a') as f:
+            f.write('{"truncated\n')
+
+        history = load_history(path)
+
+        assert [run['run_id'] for run in history] == ['run-1', 'run-2']
+        assert load_history(temp_dir / "missing.jsonl") == []
+
+    def test_find_run(self):
+        history = [stored_run('run-1', {}), stored_run('run-2', {}, commit='def5678', label='after')]
+
+        assert find_run(history, 'latest')['run_id'] == 'run-2'
+        assert find_run(history, 'latest~1')['run_id'] == 'run-1'
+        assert find_run(history, 'after')['run_id'] == 'run-2'
+        assert find_run(history, 'abc')['run_id'] == 'run-1'
+        with pytest.raises(ValueError):
+            find_run(history, 'latest~2')
+        with pytest.raises(ValueError):
+            find_run(history, 'unknown')
+
+    def test_make_run_records_revision(self):
+        run = make_run([], label='x', repeat=3)
+
+        assert run['label'] == 'x'
+        assert 'commit' in run and 'dirty' in run
+        assert run['machine']['cpus']
+
+
+class TestCompare:
+    """Test regression detection."""
+
+    def test_statuses(self):
+        baseline = stored_run('base', {('a', 1000): 1.0, ('b', 1000): 1.0, ('c', 1000): 1.0, ('gone', 1000): 1.0})
+        current = stored_run('cur', {('a', 1000): 1.25, ('b', 1000): 0.5, ('c', 1000): 1.05, ('new', 1000): 1.0})
+
+        statuses = {(c.benchmark, c.status(0.10)) for c in compare_runs(baseline, current)}
+
+        assert statuses == {('a', 'regression'), ('b', 'improvement'), ('c', 'ok'),
+                            ('new', 'new'), ('gone', 'missing')}
+        assert [c.benchmark for c in regressions(compare_runs(baseline, current), 0.10)] == ['a']
+        assert regressions(compare_runs(baseline, current), 0.30) == []
+
+    def test_skipped_on_both_sides(self):
+        assert Comparison('api.poll_batch', 1000, None, None).status(0.1) == 'skipped'
+
+    def test_compare_command_gates(self, temp_dir, capsys):
+        path = temp_dir / "history.jsonl"
+        save_run(stored_run('run-1', {('a', 1000): 1.0}), path)
+        save_run(stored_run('run-2', {('a', 1000): 1.5}), path)
+
+        assert main(['--history', str(path), 'compare']) == 1
+        assert "regression" in capsys.readouterr().out
+        assert main(['--history', str(path), 'compare', 'run-1', 'run-2', '--threshold', '0.6']) == 0
+        assert main(['--history', str(path), 'compare', 'run-9']) == 2
+
+
+class TestSuites:
+    """Run the real suites at a tiny scale."""
+
+    def test_all_suites_run(self, temp_dir, monkeypatch):
+        monkeypatch.chdir(temp_dir)
+
+        measurements = run_benchmarks(select_benchmarks(), scales=[20], repeat=1)
+
+        assert len(measurements) == len(BENCHMARKS)
+        for measurement in measurements:
+            # The API app needs the full server environment; everything else must run
+            if measurement.skipped:
+                assert measurement.benchmark.startswith('api.')
+            else:
+                assert measurement.median > 0
+
+    def test_run_command_stores_and_gates(self, temp_dir, monkeypatch):
+        monkeypatch.chdir(temp_dir)
+        path = temp_dir / "history.jsonl"
+        save_run(stored_run('slow', {('prompts.render', 20): 1000.0}), path)
+
+        status = main(['--history', str(path), 'run', '-b', 'prompts', '--scale', '20', '--repeat', '1',
+                       '--label', 'fast', '--compare-to', 'slow'])
+
+        assert status == 0
+        runs = load_history(path)
+        assert runs[-1]['label'] == 'fast'
+        assert runs[-1]['results'][0]['benchmark'] == 'prompts.render'
+
+
+class TestInputHelpers:
+    """Test the code paths factored out for benchmarking."""
+
+    def test_scan_batch_input(self):
+        lines = [json.dumps(r) for r in make_requests(5)] + ['']
+
+        num_requests, model, prompt_tokens = scan_batch_input(lines)
+
+        assert num_requests == 5
+        assert model == "bench/model"
+        assert prompt_tokens > 5 * 50
+
+    def test_scan_batch_input_invalid_json(self):
+        with pytest.raises(ValueError, match="Invalid JSON on line 2"):
+            scan_batch_input(['{"body": {}}', '{oops'])
+
+    def test_read_request_chunk(self, temp_dir):
+        path = write_input_file(temp_dir / "input.jsonl", make_requests(10))
+
+        chunk = BatchWorker.read_request_chunk(str(path), 3, 7)
+
+        assert [r['custom_id'] for r in chunk] == [f"request-{i}" for i in range(3, 7)]
@@ -0,0 +1,115 @@
+"""Unit tests for predictive weight prefetch.
+
+Tests cover:
+- Locating weight files (local GGUF, local directory, HF cache snapshot)
+- Rate-limited reads and cancellation
+- Background prefetcher handing its result to the next load
+
+Run with: pytest core/tests/unit/test_prefetch.py -v
+"""
+
+import json
+import os
+
+from core.batch_app.prefetch import (
+    Prefetcher,
+    PrefetchResult,
+    model_weight_files,
+    read_into_page_cache,
+)
+
+
+def write_file(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(os.urandom(size))
+    return path
+
+
+class TestModelWeightFiles:
+    """Test locating weight files."""
+
+    def test_local_gguf(self, temp_dir):
+        gguf = write_file(temp_dir / "model.Q4_K_M.gguf", 10)
+
+        assert model_weight_files("org/model", str(gguf)) == [gguf]
+
+    def test_local_directory(self, temp_dir):
+        shard = write_file(temp_dir / "m" / "model-00001.safetensors", 10)
+        write_file(temp_dir / "m" / "README.md", 10)
+
+        assert model_weight_files("org/model", str(temp_dir / "m")) == [shard]
+
+    def test_hf_cache_snapshot(self, temp_dir):
+        repo = temp_dir / "models--org--model"
+        blob = write_file(repo / "blobs" / "abc123", 10)
+        snapshot = repo / "snapshots" / "rev1"
+        snapshot.mkdir(parents=True)
+        (snapshot / "model.safetensors").symlink_to(blob)
+
+        assert model_weight_files("org/model", cache_dir=temp_dir) == [blob.resolve()]
+
+    def test_only_the_format_vllm_loads(self, temp_dir):
+        model = temp_dir / "m"
+        shards = [write_file(model / f"model-0000{i}-of-00002.safetensors", 10) for i in (1, 2)]
+        write_file(model / "pytorch_model-00001-of-00002.bin", 10)
+        write_file(model / "training_args.bin", 10)
+        write_file(model / "consolidated.safetensors", 10)
+        (model / "model.safetensors.index.json").write_text(json.dumps(
+            {"weight_map": {"a": shards[0].name, "b": shards[1].name}}))
+
+        assert model_weight_files("org/model", str(model)) == shards
+
+    def test_bin_checkpoints_without_training_state(self, temp_dir):
+        model = temp_dir / "m"
+        weights = write_file(model / "pytorch_model.bin", 10)
+        write_file(model / "training_args.bin", 10)
+        write_file(model / "optimizer.pt", 10)
+
+        assert model_weight_files("org/model", str(model)) == [weights]
+
+    def test_not_downloaded(self, temp_dir):
+        assert model_weight_files("org/missing", cache_dir=temp_dir) == []
+
+
+class TestReadIntoPageCache:
+    """Test throttled reads."""
+
+    def test_rate_limited(self, temp_dir):
+        path = write_file(temp_dir / "w.safetensors", 3 * 1024 * 1024)
+        sleeps = []
+
+        read = read_into_page_cache([path], max_bytes_per_sec=1024 * 1024, sleep=sleeps.append)
+
+        assert read == 3 * 1024 * 1024
+        assert sum(sleeps) > 2.5  # ~3 s worth of throttling at 1 MB/s
+
+    def test_stop(self, temp_dir):
+        path = write_file(temp_dir / "w.safetensors", 1024)
+        result = PrefetchResult("m", total_bytes=1024)
+
+        assert read_into_page_cache([path], should_stop=lambda: True, result=result) == 0
+        assert result.bytes_read == 0
+
+
+class TestPrefetcher:
+    """Test the background prefetcher."""
+
+    def test_take_matching_model(self, temp_dir):
+        path = write_file(temp_dir / "w.gguf", 4096)
+        prefetcher = Prefetcher()
+
+        prefetcher.start("next-model", [path])
+        prefetcher.wait(5)
+        result = prefetcher.take("next-model")
+
+        assert result.completed
+        assert result.bytes_read == result.total_bytes == 4096
+        assert prefetcher.take("next-model") is None
+
+    def test_take_other_model(self, temp_dir):
+        path = write_file(temp_dir / "w.gguf", 4096)
+        prefetcher = Prefetcher()
+        prefetcher.start("model-a", [path])
+
+        assert prefetcher.take("model-b") is None
+        assert not prefetcher.running
@@ -0,0 +1,219 @@
+"""Unit tests for on-demand profiling (core/batch_app/profiling.py).
+
+Tests cover:
+- Sampling profiler writing speedscope JSON and folded stacks
+- tracemalloc snapshots and growth report
+- cProfile sessions started and stopped at main-thread checkpoints
+- Validation (modes per process, durations, one session at a time)
+- Control messages over worker IPC and from the worker's step loop
+
+Run with: pytest core/tests/unit/test_profiling.py -v
+"""
+
+import json
+import pstats
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from core.batch_app.profiling import (
+    CHECKPOINT_MODES,
+    PROFILE_MODES,
+    Profiler,
+    ProfilerError,
+    StackSampler,
+    handle_profile_message,
+)
+from core.batch_app.worker_ipc import WorkerIPCServer
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_sample_session_writes_speedscope_and_folded(temp_dir):
+    profiler = Profiler()
+    session = profiler.start('sample', 0.3, temp_dir / "profiles", label='batch_1', interval=0.005)
+    assert session.status == 'running'
+    busy_wait(0.1)
+
+    assert wait_until(lambda: session.status == 'completed')
+    assert profiler.active is None
+    assert profiler.history == [session]
+
+    speedscope_path, folded_path = map(Path, session.artifacts)
+    assert speedscope_path.name.startswith("batch_1-sample-") and speedscope_path.name.endswith(".speedscope.json")
+    speedscope = json.loads(speedscope_path.read_text())
+    frames = speedscope['shared']['frames']
+    assert any(frame['name'] == 'busy_wait' for frame in frames)
+    main = next(p for p in speedscope['profiles'] if p['name'] == 'MainThread')
+    assert main['type'] == 'sampled'
+    assert len(main['samples']) == len(main['weights'])
+    assert all(0 <= index < len(frames) for stack in main['samples'] for index in stack)
+    assert "busy_wait" in folded_path.read_text()
+
+
+def test_stack_sampler_aggregates_identical_stacks():
+    sampler = StackSampler(interval=0.01)
+    sampler.sample()
+    sampler.sample()
+    assert sampler.samples == 2
+    # Same caller, same stack: one entry per thread counted twice
+    main_stacks = [count for (thread, _), count in sampler.counts.items() if thread == 'MainThread']
+    assert sum(main_stacks) == 2
+    speedscope = sampler.to_speedscope("test")
+    assert sum(sum(p['weights']) for p in speedscope['profiles']) == pytest.approx(
+        sum(sampler.counts.values()) * 0.01)
+
+
+def test_memory_session_dumps_snapshot_and_growth(temp_dir):
+    profiler = Profiler()
+    session = profiler.start('memory', 60, temp_dir, label='api')
+    held = [bytearray(1024) for _ in range(2000)]  # noqa: F841 (kept alive until the snapshot)
+    profiler.stop()
+
+    assert session.status == 'completed'
+    assert not tracemalloc.is_tracing()  # Stopped again since the session started it
+    snapshot_path, report_path = session.artifacts
+    assert snapshot_path.endswith(".tracemalloc")
+    assert tracemalloc.Snapshot.load(snapshot_path).traces
+    report = Path(report_path).read_text()
+    assert "growth since the session started" in report
+    assert "test_profiling.py" in report
+
+
+def test_cprofile_starts_and_finishes_at_checkpoints(temp_dir):
+    profiler = Profiler(checkpoints=True)
+    session = profiler.start('cprofile', 0.05, temp_dir)
+    assert session.status == 'pending'  # Waits for the profiled thread
+
+    profiler.checkpoint()
+    assert session.status == 'running'
+    busy_wait(0.06)
+    profiler.checkpoint()
+
+    assert session.status == 'completed'
+    assert profiler.active is None
+    dump, summary = session.artifacts
+    stats = pstats.Stats(dump)
+    assert any(function == 'busy_wait' for (_, _, function) in stats.stats)
+    assert "cumulative" in Path(summary).read_text()
+
+
+def test_cprofile_stop_takes_effect_at_next_checkpoint(temp_dir):
+    profiler = Profiler(checkpoints=True)
+    session = profiler.start('cprofile', 60, temp_dir)
+    profiler.checkpoint()
+    profiler.stop()
+    assert session.status == 'running'
+    profiler.checkpoint()
+    assert session.status == 'completed'
+
+
+def test_checkpoint_is_noop_without_session():
+    profiler = Profiler(checkpoints=True)
+    profiler.checkpoint()
+    assert profiler.active is None and profiler.history == []
+
+
+def test_processes_without_checkpoints_only_offer_thread_agnostic_modes(temp_dir):
+    profiler = Profiler(checkpoints=False)
+    assert set(profiler.modes()) == set(PROFILE_MODES) - set(CHECKPOINT_MODES)
+    with pytest.raises(ProfilerError, match="unsupported"):
+        profiler.start('cprofile', 10, temp_dir)
+
+
+def test_start_validation(temp_dir):
+    profiler = Profiler(checkpoints=True, max_duration=60)
+    with pytest.raises(ProfilerError, match="mode"):
+        profiler.start('perf', 10, temp_dir)
+    with pytest.raises(ProfilerError, match="duration"):
+        profiler.start('sample', 61, temp_dir)
+    with pytest.raises(ProfilerError, match="interval"):
+        profiler.start('sample', 10, temp_dir, interval=0)
+
+    session = profiler.start('cprofile', 10, temp_dir)
+    with pytest.raises(ProfilerError, match="already"):
+        profiler.start('sample', 10, temp_dir)
+    profiler.checkpoint()
+    profiler.stop()
+    profiler.checkpoint()
+    assert session.status == 'completed'
+
+
+def test_handle_profile_message(temp_dir):
+    profiler = Profiler(checkpoints=True)
+    output_dir = lambda: (temp_dir / "profiles", "batch_x")  # noqa: E731
+
+    started = handle_profile_message(profiler, {'action': 'start', 'mode': 'cprofile', 'duration_seconds': 5},
+                                     output_dir)
+    assert started['ok'] and started['session']['status'] == 'pending'
+    assert started['session']['label'] == 'batch_x'
+
+    status = handle_profile_message(profiler, {'action': 'status'}, output_dir)
+    assert status['active']['id'] == started['session']['id']
+    assert 'cprofile' in status['modes']
+
+    rejected = handle_profile_message(profiler, {'action': 'start', 'mode': 'sample'}, output_dir)
+    assert not rejected['ok'] and "already" in rejected['error']
+    assert not handle_profile_message(profiler, {'action': 'rewind'}, output_dir)['ok']
+
+
+def test_ipc_routes_profile_messages():
+    received = []
+
+    def handle_profile(message):
+        received.append(message)
+        return {"ok": True, "active": None}
+
+    ipc = WorkerIPCServer(lambda: None, socket_path="unused.sock", handle_profile=handle_profile)
+    assert ipc.handle_message({'op': 'profile', 'action': 'status'}) == {"ok": True, "active": None}
+    assert received == [{'op': 'profile', 'action': 'status'}]
+    assert ipc.wait_for_pending(0) is False  # Woken, but nothing queued for generation
+
+    no_profiler = WorkerIPCServer(lambda: None, socket_path="unused.sock")
+    assert not no_profiler.handle_message({'op': 'profile'})['ok']
+
+
+def test_worker_profiles_engine_steps_into_batch_log_dir(simulated_worker, monkeypatch):
+    monkeypatch.setattr(simulated_worker.module.settings, "PROFILING_ENABLED", True)
+    job, db = simulated_worker.submit(num_requests=8, chunk_size=4)
+    worker = simulated_worker.module.BatchWorker()
+    worker.active_batch = (job.batch_id, job.log_file)
+
+    response = worker.handle_profile({'op': 'profile', 'action': 'start', 'mode': 'cprofile',
+                                      'duration_seconds': 60})
+    assert response['ok']
+    worker.process_job(job, db)
+    assert worker.profiler.active.status == 'running'  # Started at the first engine step
+
+    worker.handle_profile({'op': 'profile', 'action': 'stop'})
+    worker.profiler.checkpoint()  # Next step or idle poll
+    session = worker.profiler.history[-1]
+    assert session.status == 'completed'
+    profiles_dir = Path(job.log_file).parent / "profiles"
+    assert all(artifact.startswith(str(profiles_dir)) for artifact in session.artifacts)
+    stats = pstats.Stats(session.artifacts[0])
+    assert any('generate' in function for (_, _, function) in stats.stats)
+
+
+def test_worker_profile_dir_when_idle(simulated_worker, monkeypatch):
+    worker = simulated_worker.module.BatchWorker()
+    monkeypatch.setattr(simulated_worker.module.settings, "LOGS_DIR", "logs_here")
+    directory, label = worker.profile_output_dir()
+    assert str(directory) == "logs_here/profiles" and label == "worker"
+
+    assert not worker.handle_profile({'action': 'status'})['ok']  # Off by default
@@ -0,0 +1,175 @@
+"""Unit tests for the queue snapshot and per-model throughput model.
+
+Tests cover:
+- Fitting prompt/completion token costs from job history (and fallbacks)
+- Snapshot ordering (priority, then FIFO) matching the worker
+- Swap cost when consecutive jobs use different models
+- Running job remaining time feeding queued start times
+
+Run with: pytest core/tests/unit/test_queue_model.py -v
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.batch_app.database import BatchJob, ModelRegistry, WorkerHeartbeat
+from core.batch_app.queue_model import (
+    estimate_prompt_tokens,
+    fit_throughput_model,
+    load_throughput_model,
+    record_model_load_time,
+    refresh_queue_snapshot,
+)
+
+NOW = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def utc(value):
+    """SQLite returns naive datetimes; the app stores UTC."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def make_job(batch_id, model="model-a", status="validating", priority=0, created_offset=0, **fields):
+    return BatchJob(
+        batch_id=batch_id,
+        input_file_id="file-in",
+        status=status,
+        created_at=int(time.time()) + created_offset,
+        expires_at=int(time.time()) + 86400,
+        model=model,
+        priority=priority,
+        **fields
+    )
+
+
+def completed_job(batch_id, model, prompt_tokens, completion_tokens, seconds, requests=100):
+    return make_job(
+        batch_id,
+        model=model,
+        status="completed",
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+        throughput_tokens_per_sec=(prompt_tokens + completion_tokens) / seconds,
+        total_requests=requests,
+        completed_requests=requests,
+        completed_at=int(time.time())
+    )
+
+
+class TestThroughputModel:
+    """Test fitting the per-model throughput model."""
+
+    def test_fit_recovers_token_costs(self):
+        """Prompt and completion token costs are fit separately."""
+        # True model: 0.001 s/prompt token + 0.01 s/completion token + 5 s overhead
+        samples = [
+            (p, c, 0.001 * p + 0.01 * c + 5, 100)
+            for p, c in [(10000, 2000), (50000, 1000), (20000, 8000), (5000, 5000)]
+        ]
+
+        model = fit_throughput_model("m", samples)
+
+        assert model.source == "fit"
+        assert model.seconds_per_prompt_token == pytest.approx(0.001, rel=1e-6)
+        assert model.seconds_per_completion_token == pytest.approx(0.01, rel=1e-6)
+        assert model.overhead_seconds == pytest.approx(5, rel=1e-6)
+        assert model.completion_tokens_per_request == pytest.approx(16000 / 400)
+
+    def test_pooled_with_little_history(self):
+        model = fit_throughput_model("m", [(1000, 1000, 110.0, 10)])
+
+        assert model.source == "pooled"
+        assert model.predict(1000, 1000) == pytest.approx(110.0)
+
+    def test_registry_then_default(self):
+        assert fit_throughput_model("m", [], registry_tokens_per_sec=500).predict(0, 1000) == pytest.approx(2.0)
+
+        default = fit_throughput_model("m", [])
+        assert default.source == "default"
+        assert default.completion_tokens_per_request > 0
+
+    def test_load_from_history(self, test_db_session):
+        for i, (p, c) in enumerate([(1000, 100), (5000, 300), (2000, 900)]):
+            test_db_session.add(completed_job(f"done-{i}", "model-a", p, c, 0.002 * p + 0.02 * c + 1))
+        test_db_session.add(completed_job("other", "model-b", 1000, 1000, 999))
+        test_db_session.commit()
+
+        model = load_throughput_model(test_db_session, "model-a")
+
+        assert model.samples == 3
+        assert model.predict(1000, 100) == pytest.approx(0.002 * 1000 + 0.02 * 100 + 1, rel=1e-3)
+
+    def test_estimate_prompt_tokens(self):
+        request = {"body": {"messages": [{"role": "user", "content": "x" * 400}]}}
+
+        assert estimate_prompt_tokens(request) == 104
+
+
+class TestQueueSnapshot:
+    """Test the materialized queue snapshot."""
+
+    @pytest.fixture
+    def db(self, test_db_session):
+        test_db_session.add(WorkerHeartbeat(id=1, status="idle", loaded_model="model-a"))
+        test_db_session.add(ModelRegistry(
+            model_id="model-b", name="B", size_gb=1, estimated_memory_gb=1, load_time_seconds=120.0
+        ))
+        test_db_session.commit()
+        return test_db_session
+
+    def test_priority_order_and_swap_cost(self, db, monkeypatch):
+        monkeypatch.setattr("core.batch_app.queue_model.settings.QUEUE_DEFAULT_TOKENS_PER_SEC", 100.0)
+        monkeypatch.setattr("core.batch_app.queue_model.settings.QUEUE_DEFAULT_COMPLETION_TOKENS", 10)
+
+        db.add(make_job("first-fifo", "model-a", created_offset=0, total_requests=10, estimated_prompt_tokens=0))
+        db.add(make_job("urgent", "model-b", priority=1, created_offset=5, total_requests=10, estimated_prompt_tokens=0))
+        db.add(make_job("low", "model-a", priority=-1, created_offset=-5, total_requests=10, estimated_prompt_tokens=0))
+        db.commit()
+
+        queued = refresh_queue_snapshot(db, now=NOW)
+
+        assert [job.batch_id for job in queued] == ["urgent", "first-fifo", "low"]
+        urgent, fifo, low = queued
+        # 10 requests * 10 completion tokens at 100 tok/s = 1 s of inference
+        assert urgent.estimated_duration_seconds == pytest.approx(1 + 120)  # Swap to model-b (measured load)
+        assert fifo.estimated_duration_seconds == pytest.approx(1 + 60)  # Swap back (default load time)
+        assert low.estimated_duration_seconds == pytest.approx(1)  # model-a already resident
+        assert utc(urgent.estimated_start_time) == NOW
+        assert utc(fifo.estimated_start_time) == utc(urgent.estimated_completion_time)
+        assert [job.queue_position for job in queued] == [1, 2, 3]
+
+    def test_running_job_delays_queue(self, db):
+        db.add(make_job(
+            "running", "model-a", status="in_progress", total_requests=100, completed_requests=50,
+            estimated_completion_time=NOW + timedelta(minutes=10)
+        ))
+        db.add(make_job("next", "model-a", total_requests=1))
+        db.commit()
+
+        (job,) = refresh_queue_snapshot(db, now=NOW)
+
+        assert job.queue_position == 1
+        assert utc(job.estimated_start_time) == NOW + timedelta(minutes=10)
+
+    def test_record_load_time_smoothed(self, db):
+        record_model_load_time(db, "model-b", 60.0)
+
+        assert db.query(ModelRegistry).filter_by(model_id="model-b").one().load_time_seconds == pytest.approx(90.0)
+
+    def test_swap_cost_includes_unload_time(self, db):
+        db.query(ModelRegistry).filter_by(model_id="model-b").one().unload_time_seconds = 2.0
+        db.add(ModelRegistry(
+            model_id="model-a", name="A", size_gb=1, estimated_memory_gb=1,
+            load_time_seconds=30.0, unload_time_seconds=5.0
+        ))
+        db.add(make_job("to-b", "model-b", created_offset=0, total_requests=0))
+        db.add(make_job("back-to-a", "model-a", created_offset=5, total_requests=0))
+        db.commit()
+
+        to_b, back_to_a = refresh_queue_snapshot(db, now=NOW)
+
+        assert to_b.estimated_duration_seconds == pytest.approx(5.0 + 120)  # Release model-a, load model-b
+        assert back_to_a.estimated_duration_seconds == pytest.approx(2.0 + 30)
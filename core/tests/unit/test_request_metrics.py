@@ -0,0 +1,151 @@
+"""Unit tests for per-request latency and token metrics.
+
+Tests cover:
+- Building rows from RequestOutput metrics (and outputs without metrics)
+- The TSV sidecar: header, round trip, truncated lines
+- Percentile summaries, finish reasons and queue/prefill/decode time share
+- Rows written by the worker on the simulated engine
+
+Run with: pytest core/tests/unit/test_request_metrics.py -v
+"""
+
+from core.batch_app.request_metrics import (
+    COLUMNS,
+    append_request_rows,
+    format_summary,
+    metrics_path_for,
+    percentile,
+    read_request_rows,
+    request_row,
+    summarize_request_rows,
+)
+from core.batch_app.simulated_engine import (
+    SimCompletionOutput,
+    SimRequestMetrics,
+    SimRequestOutput,
+    SimSamplingParams,
+)
+
+
+def make_output(tokens=11, metrics=None, finish_reason="stop"):
+    return SimRequestOutput(
+        request_id="0", prompt="user: hi", prompt_token_ids=[1, 2, 3],
+        outputs=[SimCompletionOutput(index=0, text="x", token_ids=list(range(tokens)), finish_reason=finish_reason)],
+        finished=True, metrics=metrics, num_cached_tokens=2,
+    )
+
+
+def make_row(custom_id, queue, prefill, decode, tokens=11, finish_reason="stop"):
+    metrics = SimRequestMetrics(arrival_time=1000.0, last_token_time=1000.0 + queue + prefill + decode,
+                                first_scheduled_time=1000.0 + queue, first_token_time=1000.0 + queue + prefill,
+                                finished_time=1000.0 + queue + prefill + decode)
+    return request_row(custom_id, make_output(tokens, metrics, finish_reason))
+
+
+class TestRequestRow:
+    """Test row extraction."""
+
+    def test_timings(self):
+        row = make_row("req-1", queue=2.0, prefill=0.5, decode=3.0, tokens=11)
+
+        assert row['queue_s'] == 2.0
+        assert row['ttft_s'] == 2.5
+        assert row['prefill_s'] == 0.5
+        assert row['decode_s'] == 3.0
+        assert row['decode_per_token_s'] == 0.3
+        assert row['e2e_s'] == 5.5
+        assert (row['prompt_tokens'], row['completion_tokens'], row['cached_tokens']) == (3, 11, 2)
+        assert row['finish_reason'] == "stop"
+
+    def test_output_without_metrics(self):
+        row = request_row("req-1", make_output(metrics=None))
+
+        assert row['completion_tokens'] == 11
+        assert all(row[column] is None for column in ('arrival_time', 'queue_s', 'ttft_s', 'e2e_s'))
+
+    def test_single_token_has_no_decode_rate(self):
+        assert make_row("req-1", 0.0, 0.1, 0.0, tokens=1)['decode_per_token_s'] is None
+
+    def test_simulated_engine_metrics(self, simulated_llm):
+        outputs = simulated_llm.generate([f"user: question {i}" for i in range(8)], SimSamplingParams(max_tokens=16))
+
+        rows = [request_row(f"req-{i}", output) for i, output in enumerate(outputs)]
+
+        assert all(row['ttft_s'] is not None and row['e2e_s'] >= row['ttft_s'] for row in rows)
+
+
+class TestSidecar:
+    """Test the TSV sidecar."""
+
+    def test_round_trip(self, temp_dir):
+        results = temp_dir / "batch_results.jsonl"
+        rows = [make_row("req-1", 1.0, 0.5, 2.0), request_row("req\t2", make_output(metrics=None))]
+
+        append_request_rows(results, rows[:1])
+        append_request_rows(results, rows[1:])
+
+        lines = metrics_path_for(results).read_text().splitlines()
+        assert lines[0].split('\t') == list(COLUMNS)
+        assert len(lines) == 3
+        read = list(read_request_rows(results))
+        assert read[0] == {column: rows[0][column] for column in COLUMNS}
+        assert read[1]['custom_id'] == "req 2"
+        assert read[1]['ttft_s'] is None
+
+    def test_truncated_line_skipped(self, temp_dir):
+        results = temp_dir / "batch_results.jsonl"
+        append_request_rows(results, [make_row("req-1", 1.0, 0.5, 2.0)])
+        with open(metrics_path_for(results), 'a') as f:
+            f.write("req-2\t3\t11")
+
+        assert [row['custom_id'] for row in read_request_rows(results)] == ["req-1"]
+        assert list(read_request_rows(temp_dir / "missing.jsonl")) == []
+
+
+class TestSummary:
+    """Test summaries."""
+
+    def test_percentiles(self):
+        values = sorted(float(v) for v in range(1, 101))
+
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 99) == 99.0
+        assert percentile(values, 0) == 1.0
+        assert percentile([], 50) is None
+
+    def test_summary(self):
+        rows = [make_row(f"req-{i}", queue=8.0, prefill=0.5, decode=1.5) for i in range(9)]
+        rows.append(make_row("req-9", queue=8.0, prefill=0.5, decode=1.5, finish_reason="length"))
+
+        summary = summarize_request_rows(rows)
+
+        assert summary['requests'] == 10
+        assert summary['total_completion_tokens'] == 110
+        assert summary['finish_reasons'] == {'stop': 9, 'length': 1}
+        assert summary['latency']['ttft_s']['p95'] == 8.5
+        assert summary['time_share'] == {'queue': 0.8, 'prefill': 0.05, 'decode': 0.15}
+        lines = format_summary(summary)
+        assert lines[0] == "Requests: 10  finish reasons: stop=9, length=1"
+        assert "queue 80%" in lines[-1]
+
+    def test_summary_without_timings(self):
+        summary = summarize_request_rows([request_row("req-1", make_output(metrics=None))])
+
+        assert summary['latency'] == {}
+        assert summary['time_share'] is None
+
+
+class TestWorkerRows:
+    """Test rows written by the worker."""
+
+    def test_rows_saved_with_results(self, simulated_worker, temp_dir):
+        job, db = simulated_worker.submit(num_requests=10, chunk_size=4)
+
+        simulated_worker.module.BatchWorker().process_job(job, db)
+
+        results = simulated_worker.results_dir / "batch_sim_results.jsonl"
+        rows = list(read_request_rows(results))
+        assert [row['custom_id'] for row in rows] == [f"req-{i}" for i in range(10)]
+        assert all(row['ttft_s'] is not None for row in rows)
+        assert "REQUEST METRICS" in (temp_dir / "batch_sim.log").read_text()
+        db.close()
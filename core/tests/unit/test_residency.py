@@ -0,0 +1,128 @@
+"""Unit tests for co-resident models on one GPU.
+
+Tests cover:
+- Sizing a model's GPU slice from estimate_memory_requirements
+- Shrinking max_model_len so a model fits a shareable slice
+- Large models getting the GPU to themselves
+- LRU eviction when a new model doesn't fit
+- No swap cost for co-resident models in the queue snapshot
+
+Run with: pytest core/tests/unit/test_residency.py -v
+"""
+
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core.batch_app.database import BatchJob, ModelRegistry, WorkerHeartbeat
+from core.batch_app.queue_model import refresh_queue_snapshot
+from core.batch_app.residency import (
+    ResidencyPlanner,
+    ResidentEngine,
+    engine_memory_fraction,
+    parse_resident_models,
+)
+
+TOTAL_GB = 16.0
+
+
+@pytest.fixture
+def planner():
+    return ResidencyPlanner(budget_fraction=0.9, max_model_fraction=0.5, min_model_len=2048, batch_size=64)
+
+
+def load(planner, model_id, size_gb, quantization_type=None, max_model_len=4096):
+    plan = planner.plan(model_id, size_gb, quantization_type, max_model_len, TOTAL_GB)
+    for evicted in plan.evict:
+        planner.remove(evicted)
+    planner.add(ResidentEngine(model_id, object(), plan.gpu_memory_utilization or 0.9))
+    return plan
+
+
+class TestResidencyPlanner:
+    """Test packing models into one GPU."""
+
+    def test_small_models_share_gpu(self, planner):
+        first = load(planner, "llama-1b", 2.0)
+        second = load(planner, "qwen-1.5b", 3.0)
+
+        assert first.shared and second.shared
+        assert second.evict == []
+        assert planner.used_fraction <= 0.9
+        assert planner.resident_models() == ["qwen-1.5b", "llama-1b"]
+
+    def test_context_shrinks_to_fit(self):
+        planner = ResidencyPlanner(budget_fraction=0.9, max_model_fraction=0.4, min_model_len=2048, batch_size=64)
+
+        plan = planner.plan("gemma-2b", 4.0, None, 8192, TOTAL_GB)
+
+        assert plan.shared
+        assert plan.max_model_len < 8192
+        assert plan.gpu_memory_utilization <= 0.4
+
+    def test_large_model_is_exclusive(self, planner):
+        load(planner, "llama-1b", 2.0)
+
+        plan = planner.plan("gemma-4b", 8.0, None, 4096, TOTAL_GB)
+
+        assert not plan.shared
+        assert plan.evict == ["llama-1b"]
+
+    def test_unknown_size_is_exclusive(self, planner):
+        assert not planner.plan("mystery", None, None, 4096, TOTAL_GB).shared
+
+    def test_lru_eviction(self, planner):
+        load(planner, "a-1b", 2.0)
+        load(planner, "b-1b", 2.0)
+        planner.get("a-1b")  # a is now the most recently used
+
+        plan = load(planner, "c-4b-q4", 2.5, "Q4_0")
+
+        assert plan.shared
+        assert plan.evict == ["b-1b"]
+        assert "a-1b" in planner and "c-4b-q4" in planner
+
+    def test_plan_fraction_for_restored_engine(self, planner):
+        load(planner, "a-1b", 2.0)
+
+        plan = planner.plan_fraction("big", 0.9)
+
+        assert plan.evict == ["a-1b"]
+
+    def test_engine_memory_fraction(self):
+        llm = SimpleNamespace(llm_engine=SimpleNamespace(
+            vllm_config=SimpleNamespace(cache_config=SimpleNamespace(gpu_memory_utilization=0.3))
+        ))
+
+        assert engine_memory_fraction(llm, 0.9) == 0.3
+        assert engine_memory_fraction(object(), 0.9) == 0.9
+
+    def test_parse_resident_models(self):
+        assert parse_resident_models(json.dumps(["a", "b"])) == ("a", "b")
+        assert parse_resident_models("not json") == ()
+        assert parse_resident_models(None) == ()
+
+
+class TestQueueSnapshotResidency:
+    """Test swap cost with co-resident engines."""
+
+    def test_no_swap_to_resident_model(self, test_db_session):
+        db = test_db_session
+        db.add(WorkerHeartbeat(id=1, status="idle", loaded_model="a", resident_models=json.dumps(["a", "b"])))
+        db.add(ModelRegistry(model_id="c", name="C", size_gb=1, estimated_memory_gb=1, load_time_seconds=30.0))
+        for offset, (batch_id, model) in enumerate([("to-b", "b"), ("to-c", "c"), ("back-to-a", "a")]):
+            db.add(BatchJob(
+                batch_id=batch_id, input_file_id="file-in", status="validating",
+                created_at=int(time.time()) + offset, expires_at=int(time.time()) + 86400,
+                model=model, total_requests=0
+            ))
+        db.commit()
+
+        to_b, to_c, back_to_a = refresh_queue_snapshot(db)
+
+        assert to_b.estimated_duration_seconds == 0.0
+        assert to_c.estimated_duration_seconds == pytest.approx(30.0)
+        # Loading c may have evicted a: assume it did
+        assert back_to_a.estimated_duration_seconds > 0
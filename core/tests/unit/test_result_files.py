@@ -0,0 +1,242 @@
+"""Unit tests for result file access (custom_id index, Range, compression).
+
+Tests cover:
+- Index sidecar written by the worker
+- Self-healing index when the sidecar lags the results file
+- Record paging spans
+- Cutting off a record torn by a crash before resuming
+- Range header parsing and Accept-Encoding negotiation
+- Streaming responses (206 partial content, gzip)
+
+Run with: pytest core/tests/unit/test_result_files.py -v
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from core.batch_app.result_files import (
+    RangeNotSatisfiable,
+    ResultIndex,
+    append_index_entries,
+    build_file_response,
+    get_result_index,
+    index_path_for,
+    negotiate_encoding,
+    parse_range_header,
+    truncate_partial_line,
+)
+
+
+def write_results(path, custom_ids, with_index=True):
+    """Append result records the same way the worker does."""
+    entries = []
+    with open(path, 'ab') as f:
+        for custom_id in custom_ids:
+            line = (json.dumps({'custom_id': custom_id, 'response': {'status_code': 200}}) + '\n').encode()
+            entries.append((f.tell(), len(line), custom_id))
+            f.write(line)
+    if with_index:
+        append_index_entries(path, entries)
+
+
+@pytest.fixture
+def results_file(temp_dir):
+    path = temp_dir / "batch_test_results.jsonl"
+    write_results(path, [f"req-{i}" for i in range(10)])
+    return path
+
+
+# ============================================================================
+# Index
+# ============================================================================
+
+class TestResultIndex:
+    """Test the custom_id -> byte offset index."""
+
+    def test_lookup_from_sidecar(self, results_file):
+        """Records can be read back by custom_id."""
+        index = ResultIndex.load(results_file)
+
+        assert len(index) == 10
+        record = json.loads(index.read_record("req-7"))
+        assert record['custom_id'] == "req-7"
+        assert index.lookup("missing") is None
+
+    def test_rebuilds_missing_tail(self, results_file):
+        """Records appended without index entries are indexed by scanning the tail."""
+        write_results(results_file, ["late-1", "late-2"], with_index=False)
+
+        index = ResultIndex.load(results_file)
+
+        assert len(index) == 12
+        assert json.loads(index.read_record("late-2"))['custom_id'] == "late-2"
+
+    def test_builds_without_sidecar(self, results_file):
+        """Files written before the index existed are fully indexed."""
+        index_path_for(results_file).unlink()
+
+        index = ResultIndex.load(results_file)
+
+        assert len(index) == 10
+        assert index.lookup("req-0") == (0, index.lengths[0])
+
+    def test_ignores_partial_last_line(self, results_file):
+        """A record still being written is not indexed until it is complete."""
+        with open(results_file, 'ab') as f:
+            f.write(b'{"custom_id": "partial"')
+
+        index = ResultIndex.load(results_file)
+
+        assert len(index) == 10
+        assert index.lookup("partial") is None
+
+    def test_refresh_picks_up_appends(self, results_file):
+        """Cached indexes see records appended after they were loaded."""
+        index = get_result_index(results_file)
+        assert len(index) == 10
+
+        write_results(results_file, ["new"])
+
+        assert get_result_index(results_file) is index
+        assert len(index) == 11
+
+    def test_truncated_file_resets_index(self, results_file):
+        """A rewritten (shorter) results file invalidates the index."""
+        index = ResultIndex.load(results_file)
+        results_file.write_bytes(b'{"custom_id": "only"}\n')
+
+        index.refresh()
+
+        assert len(index) == 1
+        assert index.lookup("req-3") is None
+
+    def test_truncate_partial_line(self, results_file):
+        """A torn last record is cut off so the next append starts on a fresh line."""
+        complete = results_file.read_bytes()
+        with open(results_file, 'ab') as f:
+            f.write(b'{"custom_id": "torn", "resp')
+
+        assert truncate_partial_line(results_file) == len(b'{"custom_id": "torn", "resp')
+        assert results_file.read_bytes() == complete
+        assert truncate_partial_line(results_file) == 0  # Already clean
+
+        write_results(results_file, ["after-crash"])
+        index = ResultIndex.load(results_file)
+        assert len(index) == 11 and index.lookup("after-crash") is not None
+
+    def test_truncate_partial_line_without_newline(self, tmp_path):
+        """A file holding only a torn record is emptied; a missing file is left alone."""
+        path = tmp_path / "results.jsonl"
+        assert truncate_partial_line(path) == 0
+        path.write_bytes(b'{"custom_id": "x"')
+        assert truncate_partial_line(path) == len(b'{"custom_id": "x"')
+        assert path.read_bytes() == b''
+
+    def test_page_span(self, results_file):
+        """Page spans cover exactly the requested records."""
+        index = ResultIndex.load(results_file)
+        start, end = index.page_span(2, 3)
+
+        data = results_file.read_bytes()[start:end].decode().splitlines()
+        assert [json.loads(line)['custom_id'] for line in data] == ["req-2", "req-3", "req-4"]
+
+        # Past the end -> empty span
+        start, end = index.page_span(50, 5)
+        assert start == end
+
+
+# ============================================================================
+# Range / Accept-Encoding parsing
+# ============================================================================
+
+class TestRangeParsing:
+    """Test Range header parsing."""
+
+    def test_absent_header(self):
+        assert parse_range_header(None, 100) is None
+
+    def test_start_end(self):
+        assert parse_range_header("bytes=10-19", 100) == (10, 19)
+
+    def test_open_ended(self):
+        assert parse_range_header("bytes=90-", 100) == (90, 99)
+
+    def test_suffix(self):
+        assert parse_range_header("bytes=-5", 100) == (95, 99)
+
+    def test_end_clamped(self):
+        assert parse_range_header("bytes=50-500", 100) == (50, 99)
+
+    def test_multi_range_ignored(self):
+        assert parse_range_header("bytes=0-1,5-6", 100) is None
+
+    def test_unsatisfiable(self):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range_header("bytes=100-", 100)
+
+
+class TestEncodingNegotiation:
+    """Test Accept-Encoding negotiation."""
+
+    def test_identity_without_header(self):
+        assert negotiate_encoding(None) == 'identity'
+
+    def test_gzip(self):
+        assert negotiate_encoding("gzip, deflate") == 'gzip'
+
+    def test_gzip_refused(self):
+        assert negotiate_encoding("gzip;q=0") == 'identity'
+
+
+# ============================================================================
+# Streaming responses
+# ============================================================================
+
+class TestFileResponse:
+    """Test build_file_response through a minimal app."""
+
+    @pytest.fixture
+    def client(self, results_file):
+        app = FastAPI()
+
+        @app.get("/download")
+        async def download(request: Request):
+            return build_file_response(request, results_file, filename="results.jsonl")
+
+        return TestClient(app)
+
+    def test_range_request(self, client, results_file):
+        """Range requests return 206 with the exact bytes."""
+        response = client.get("/download", headers={"Range": "bytes=5-24", "Accept-Encoding": "identity"})
+
+        assert response.status_code == 206
+        assert response.content == results_file.read_bytes()[5:25]
+        assert response.headers["content-range"] == f"bytes 5-24/{results_file.stat().st_size}"
+
+    def test_stale_if_range_serves_full_file(self, client, results_file):
+        """A mismatched If-Range validator falls back to the full file."""
+        response = client.get(
+            "/download",
+            headers={"Range": "bytes=5-24", "If-Range": '"stale"', "Accept-Encoding": "identity"}
+        )
+
+        assert response.status_code == 200
+        assert response.content == results_file.read_bytes()
+
+    def test_unsatisfiable_range(self, client):
+        """Ranges past the end return 416."""
+        response = client.get("/download", headers={"Range": "bytes=999999-"})
+
+        assert response.status_code == 416
+
+    def test_gzip_download(self, client, results_file):
+        """Full downloads are gzip-compressed when accepted."""
+        response = client.get("/download", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        # httpx transparently decodes gzip
+        assert response.content == results_file.read_bytes()
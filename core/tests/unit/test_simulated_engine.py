@@ -0,0 +1,184 @@
+"""Unit tests for the simulated CPU engine and the engine backend switch.
+
+Tests cover:
+- RequestOutput-shaped results, deterministic across batch composition
+- Startup OOMs from the memory model and injected CUDA OOMs
+- Batch-size scaling, prefix caching and KV cache preemption
+- Output length distributions and finish reasons
+- Running the worker's batch pipeline end to end on the simulated backend
+
+Run with: pytest core/tests/unit/test_simulated_engine.py -v
+"""
+
+import json
+import time
+
+import pytest
+
+from core.batch_app.autotune import is_oom_error
+from core.batch_app.engines import batch_prompt, create_llm, engine_clock, make_sampling_params
+from core.batch_app.simulated_engine import (
+    SimSamplingParams,
+    SimulatedEngineConfig,
+    SimulatedLLM,
+    tokenize,
+)
+from core.batch_app.worker_ipc import run_step_loop
+
+PROMPTS = [f"user: Summarize document number {i} in two sentences." for i in range(20)]
+
+
+def run(llm, prompts, max_tokens=64):
+    return run_step_loop(llm.llm_engine, prompts, SimSamplingParams(max_tokens=max_tokens), SimSamplingParams)
+
+
+class TestSimulatedEngine:
+    """Test the engine model."""
+
+    def test_outputs_look_like_vllm(self, simulated_llm):
+        outputs = run(simulated_llm, PROMPTS)
+
+        assert len(outputs) == len(PROMPTS)
+        output = outputs[3]
+        assert output.finished
+        assert output.prompt_token_ids == tokenize(PROMPTS[3])
+        assert output.outputs[0].text
+        assert 1 <= len(output.outputs[0].token_ids) <= 64
+        assert output.outputs[0].finish_reason in ("stop", "length")
+        metrics = output.metrics
+        assert metrics.arrival_time <= metrics.first_scheduled_time <= metrics.first_token_time <= metrics.finished_time
+
+    def test_deterministic_across_batches(self):
+        together = run(SimulatedLLM("sim-model"), PROMPTS)
+        alone = run(SimulatedLLM("sim-model", max_num_seqs=2), PROMPTS[5:7])
+
+        assert [o.outputs[0].text for o in together[5:7]] == [o.outputs[0].text for o in alone]
+
+    def test_seed_changes_outputs(self):
+        first = run(SimulatedLLM("sim-model", simulation=SimulatedEngineConfig(seed=1)), PROMPTS[:3])
+        second = run(SimulatedLLM("sim-model", simulation=SimulatedEngineConfig(seed=2)), PROMPTS[:3])
+
+        assert [o.outputs[0].text for o in first] != [o.outputs[0].text for o in second]
+
+    def test_startup_oom(self):
+        with pytest.raises(ValueError) as low_memory:
+            SimulatedLLM("sim-model", gpu_memory_utilization=0.2)
+        with pytest.raises(ValueError) as long_context:
+            SimulatedLLM("sim-model", gpu_memory_utilization=0.4, max_model_len=200000)
+
+        assert is_oom_error(low_memory.value)
+        assert is_oom_error(long_context.value)
+
+    def test_injected_oom(self):
+        llm = SimulatedLLM("sim-model", simulation=SimulatedEngineConfig(oom_after_steps=3))
+
+        with pytest.raises(RuntimeError) as error:
+            run(llm, PROMPTS)
+
+        assert is_oom_error(error.value)
+
+    def test_batch_scaling(self):
+        def throughput(max_num_seqs):
+            llm = SimulatedLLM("sim-model", max_num_seqs=max_num_seqs)
+            outputs = run(llm, PROMPTS * 5)
+            tokens = sum(len(o.outputs[0].token_ids) for o in outputs)
+            return tokens / llm.llm_engine.stats["simulated_seconds"]
+
+        assert throughput(64) > 4 * throughput(4)
+
+    def test_prefix_cache_skips_prefill(self):
+        shared = "system: " + "You are a careful assistant who follows the style guide. " * 20
+        prompts = [f"{shared}\nuser: question {i}" for i in range(10)]
+
+        cached = SimulatedLLM("sim-model", max_num_seqs=1)
+        uncached = SimulatedLLM("sim-model", max_num_seqs=1, enable_prefix_caching=False)
+        outputs = run(cached, prompts)
+        run(uncached, prompts)
+
+        assert outputs[-1].num_cached_tokens > 0
+        assert cached.llm_engine.stats["prefill_tokens"] < uncached.llm_engine.stats["prefill_tokens"] / 2
+
+    def test_preemption_when_kv_cache_is_full(self):
+        sim = SimulatedEngineConfig(kv_tokens_per_gb=400, output_length='fixed', output_length_mean=200)
+        llm = SimulatedLLM("sim-model", gpu_memory_utilization=0.5, max_model_len=1024, simulation=sim)
+
+        outputs = run(llm, PROMPTS, max_tokens=200)
+
+        assert all(len(o.outputs[0].token_ids) == 200 for o in outputs)
+        assert llm.llm_engine.stats["preemptions"] > 0
+
+    def test_output_lengths(self):
+        fixed = SimulatedLLM("sim-model", simulation=SimulatedEngineConfig(output_length='fixed', output_length_mean=10))
+        outputs = run(fixed, PROMPTS, max_tokens=64)
+        assert {len(o.outputs[0].token_ids) for o in outputs} == {10}
+        assert {o.outputs[0].finish_reason for o in outputs} == {"stop"}
+
+        capped = run(SimulatedLLM("sim-model"), PROMPTS, max_tokens=5)
+        assert {o.outputs[0].finish_reason for o in capped} == {"length"}
+
+    def test_virtual_clock(self):
+        llm = SimulatedLLM("sim-model", simulation=SimulatedEngineConfig(decode_tokens_per_sec=1.0))
+        clock = engine_clock(llm)
+        start, wall_start = clock(), time.time()
+
+        run(llm, PROMPTS[:2], max_tokens=20)
+
+        assert clock() - start > 10
+        assert time.time() - wall_start < 5
+
+    def test_sleep_requires_sleep_mode(self):
+        with pytest.raises(ValueError):
+            SimulatedLLM("sim-model").sleep()
+        llm = SimulatedLLM("sim-model", enable_sleep_mode=True)
+        llm.sleep(level=1)
+        llm.wake_up()
+        assert len(llm.generate(PROMPTS[:2], SimSamplingParams(max_tokens=8))) == 2
+
+    def test_unknown_config_rejected(self):
+        with pytest.raises(ValueError, match="decode_rate"):
+            SimulatedEngineConfig.from_json(json.dumps({"decode_rate": 10}))
+
+
+class TestEngineBackends:
+    """Test backend selection."""
+
+    def test_simulated_backend(self, monkeypatch):
+        monkeypatch.setattr("core.batch_app.engines.settings.INFERENCE_BACKEND", "simulated")
+        monkeypatch.setattr("core.batch_app.engines.settings.SIMULATED_ENGINE_CONFIG", '{"seed": 7}')
+
+        llm = create_llm(model="sim-model", max_model_len=2048, disable_log_stats=True)
+
+        assert isinstance(llm, SimulatedLLM)
+        assert llm.sim.seed == 7
+        assert llm.llm_engine.vllm_config.model_config.max_model_len == 2048
+        assert isinstance(make_sampling_params(max_tokens=3), SimSamplingParams)
+
+    def test_unknown_backend(self, monkeypatch):
+        monkeypatch.setattr("core.batch_app.engines.settings.INFERENCE_BACKEND", "tgi")
+
+        with pytest.raises(ValueError, match="INFERENCE_BACKEND"):
+            create_llm(model="sim-model")
+
+    def test_batch_prompt(self):
+        request = {"body": {"messages": [{"role": "system", "content": "Be brief."},
+                                         {"role": "user", "content": "Hi"}]}}
+
+        assert batch_prompt(request) == "system: Be brief.\nuser: Hi"
+
+
+class TestWorkerPipeline:
+    """Test the worker's batch path on the simulated engine."""
+
+    def test_batch_job_end_to_end(self, simulated_worker, temp_dir):
+        job, db = simulated_worker.submit(num_requests=10, chunk_size=4)
+
+        simulated_worker.module.BatchWorker().process_job(job, db)
+
+        db.refresh(job)
+        assert job.status == "completed", job.errors
+        assert job.completed_requests == 10
+        assert job.total_tokens > 0
+        results = [json.loads(line) for line in open(simulated_worker.results_dir / "batch_sim_results.jsonl")]
+        assert [r["custom_id"] for r in results] == [f"req-{i}" for i in range(10)]
+        assert "CHUNK 3/3" in (temp_dir / "batch_sim.log").read_text()
+        db.close()
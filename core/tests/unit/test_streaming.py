@@ -0,0 +1,138 @@
+"""Unit tests for streaming helpers (file following and SSE formatting).
+
+Tests cover:
+- Only complete lines are emitted
+- Following appends from a byte cursor
+- Draining and stopping once the producer is finished
+- Truncated or replaced files reported as a reset
+- SSE event formatting
+
+Run with: pytest core/tests/unit/test_streaming.py -v
+"""
+
+import asyncio
+
+import pytest
+
+from core.batch_app.streaming import (
+    FileResetError,
+    follow_lines,
+    is_line_boundary,
+    read_complete_lines,
+    sse_event,
+)
+
+
+class TestReadCompleteLines:
+    """Test reading complete lines from a byte cursor."""
+
+    def test_partial_line_not_returned(self, temp_dir):
+        path = temp_dir / "results.jsonl"
+        path.write_bytes(b'{"a": 1}\n{"b": 2}\n{"c"')
+
+        offset, lines = read_complete_lines(path, 0)
+
+        assert [line for _, line in lines] == [b'{"a": 1}', b'{"b": 2}']
+        assert offset == len(b'{"a": 1}\n{"b": 2}\n')
+
+    def test_resume_from_cursor(self, temp_dir):
+        path = temp_dir / "results.jsonl"
+        path.write_bytes(b'first\nsecond\n')
+
+        offset, lines = read_complete_lines(path, 6)
+
+        assert lines == [(13, b'second')]
+        assert offset == 13
+
+    def test_line_boundary(self, temp_dir):
+        path = temp_dir / "results.jsonl"
+        path.write_bytes(b'first\nsecond\n')
+
+        assert is_line_boundary(path, 0)
+        assert is_line_boundary(path, 6)
+        assert not is_line_boundary(path, 3)
+
+
+class TestFollowLines:
+    """Test following a file that is being appended to."""
+
+    @pytest.mark.asyncio
+    async def test_follows_appends_until_finished(self, temp_dir):
+        """Lines appended while following are emitted, then the stream ends."""
+        path = temp_dir / "results.jsonl"
+        path.write_bytes(b'one\n')
+        done = asyncio.Event()
+
+        async def writer():
+            await asyncio.sleep(0.05)
+            with open(path, 'ab') as f:
+                f.write(b'two\nthr')
+            await asyncio.sleep(0.05)
+            with open(path, 'ab') as f:
+                f.write(b'ee\n')
+            done.set()
+
+        async def is_finished():
+            return done.is_set()
+
+        task = asyncio.create_task(writer())
+        received = [
+            line async for _, line in follow_lines(
+                path, poll_interval=0.01, is_finished=is_finished, finished_check_interval=0.0
+            )
+        ]
+        await task
+
+        assert received == [b'one', b'two', b'three']
+
+    @pytest.mark.asyncio
+    async def test_waits_for_missing_file(self, temp_dir):
+        """A file that does not exist yet is treated as empty."""
+        path = temp_dir / "not_yet.jsonl"
+
+        received = [
+            line async for _, line in follow_lines(path, poll_interval=0.01, idle_timeout=0.05)
+        ]
+
+        assert received == []
+
+    @pytest.mark.asyncio
+    async def test_keepalive(self, temp_dir):
+        """Idle followers yield empty keep-alive lines."""
+        path = temp_dir / "results.jsonl"
+        path.write_bytes(b'')
+
+        received = [
+            line async for _, line in follow_lines(
+                path, poll_interval=0.01, idle_timeout=0.1, keepalive_interval=0.02
+            )
+        ]
+
+        assert received and all(line == b'' for line in received)
+
+    @pytest.mark.asyncio
+    async def test_truncated_file_raises_reset(self, temp_dir):
+        """A file that shrinks below the cursor is reported, not treated as finished."""
+        path = temp_dir / "results.jsonl"
+        path.write_bytes(b'one\ntwo\n')
+        received = []
+
+        with pytest.raises(FileResetError):
+            async for _, line in follow_lines(path, poll_interval=0.01, idle_timeout=1.0):
+                received.append(line)
+                path.write_bytes(b'x\n')  # Replaced by a shorter file
+
+        assert received[0] == b'one'
+
+
+class TestSSEEvent:
+    """Test server-sent event formatting."""
+
+    def test_event_with_id(self):
+        assert sse_event('{"x": 1}', event="result", event_id=42) == 'id: 42\nevent: result\ndata: {"x": 1}\n\n'
+
+    def test_object_payload(self):
+        assert sse_event({"status": "completed"}) == 'data: {"status": "completed"}\n\n'
+
+    def test_multiline_payload(self):
+        assert sse_event("a\nb") == 'data: a\ndata: b\n\n'
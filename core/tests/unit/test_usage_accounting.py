@@ -0,0 +1,229 @@
+"""Unit tests for resource usage accounting (core/batch_app/usage_accounting.py).
+
+Tests cover:
+- Energy from the NVML-style counter and from integrated sampled power
+- Per-chunk usage round trip and totals across a resume
+- Rebuilding usage of results saved before a crash from the results file
+- Local cost ($/1M tokens, tokens per joule)
+- Usage and efficiency summaries from recorded jobs
+- Usage recorded by the worker on the simulated engine
+
+Run with: pytest core/tests/unit/test_usage_accounting.py -v
+"""
+
+import json
+import time
+
+import pytest
+
+from core.batch_app import cost_tracking
+from core.batch_app.cost_tracking import (
+    calculate_local_cost,
+    get_efficiency_summary,
+    get_job_usage,
+    get_usage_summary,
+)
+from core.batch_app.database import BatchJob
+from core.batch_app.gpu_telemetry import FakeGPUBackend, GPUTelemetry
+from core.batch_app.usage_accounting import (
+    ChunkUsage,
+    EnergyMeter,
+    JobUsage,
+    engine_gpu_count,
+    recover_chunk_usage,
+)
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class NoCounterBackend(FakeGPUBackend):
+    """GPU without an energy counter (pre-Volta): only power is sampled."""
+
+    def read(self, device_index):
+        sample = super().read(device_index)
+        sample.energy_joules = None
+        return sample
+
+
+def chunk(index, prompt=100, completion=50, energy=10.0):
+    return ChunkUsage(chunk=index, requests=4, prompt_tokens=prompt, completion_tokens=completion,
+                      generate_seconds=2.0, gpu_seconds=4.0, energy_joules=energy)
+
+
+def make_job(batch_id, model="Qwen-4B", status="completed", **fields):
+    now = int(time.time())
+    return BatchJob(batch_id=batch_id, input_file_id=f"file-{batch_id}", status=status, model=model,
+                    created_at=now, expires_at=now + 86400, completed_at=now, completed_requests=10, **fields)
+
+
+def test_energy_meter_uses_counter_delta_across_devices():
+    clock = Clock(1_000.0)
+    backend = FakeGPUBackend(devices=2, power_watts=200.0, clock=clock)
+    meter = EnergyMeter(GPUTelemetry(backend=backend, interval=60))
+
+    meter.start()
+    clock.now += 5
+    assert meter.stop() == pytest.approx(2 * 200.0 * 5)
+
+
+def test_energy_meter_integrates_power_without_counter():
+    clock = Clock(time.time() + 1)
+    backend = NoCounterBackend(power_watts=100.0, clock=clock)
+    telemetry = GPUTelemetry(backend=backend, interval=60)
+    meter = EnergyMeter(telemetry)
+
+    meter.start()
+    for _ in range(3):
+        telemetry.sample()
+        clock.now += 2
+    assert meter.stop() == pytest.approx(100.0 * 4)
+
+
+def test_energy_meter_without_telemetry():
+    meter = EnergyMeter(GPUTelemetry(backend=None))
+    assert meter.stop() is None  # Never started
+    meter.start()
+    assert meter.stop() is None
+
+
+def test_job_usage_round_trip_and_resume():
+    usage = JobUsage()
+    usage.add_chunk(chunk(0))
+    usage.add_chunk(chunk(1, energy=None))
+
+    resumed = JobUsage.from_json(usage.to_json())
+    resumed.add_chunk(chunk(2, prompt=200, energy=20.0))
+    resumed.add_overhead(15.0)
+    resumed.add_overhead(-3.0)  # Counter noise is ignored
+
+    totals = resumed.totals()
+    assert totals['chunks'] == 3 and totals['requests'] == 12
+    assert totals['prompt_tokens'] == 400 and totals['completion_tokens'] == 150
+    assert totals['gpu_seconds'] == 12.0
+    assert totals['energy_joules'] == pytest.approx(10.0 + 20.0 + 15.0)
+    assert resumed.chunk_energy(since_chunk=2) == 20.0
+
+    job = make_job("batch_usage")
+    resumed.apply_to(job)
+    assert job.prompt_tokens == 400 and job.energy_joules == pytest.approx(45.0)
+    assert json.loads(job.resource_usage)['overhead_energy_joules'] == 15.0
+
+    assert JobUsage.from_json(None).totals()['energy_joules'] is None
+
+
+def test_recover_chunk_usage(temp_dir):
+    path = temp_dir / "results.jsonl"
+    records = [{"custom_id": f"r{i}", "response": {"body": {"usage": {"prompt_tokens": 10 + i, "completion_tokens": i}}}}
+               for i in range(5)]
+    records.append({"custom_id": "failed", "response": None, "error": {"message": "x"}})
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    recovered = recover_chunk_usage(path, recorded_requests=3, chunk=1)
+    assert recovered.chunk == 1 and recovered.recovered
+    assert recovered.requests == 3  # Two results and the error
+    assert recovered.prompt_tokens == 13 + 14 and recovered.completion_tokens == 3 + 4
+    assert recovered.energy_joules is None and recovered.gpu_seconds == 0.0
+    assert recover_chunk_usage(path, recorded_requests=6, chunk=2) is None
+    assert recover_chunk_usage(temp_dir / "missing.jsonl", 0, 0) is None
+
+
+def test_engine_gpu_count():
+    assert engine_gpu_count(None) == 1
+    assert engine_gpu_count({'tensor_parallel_size': 2, 'pipeline_parallel_size': 2}) == 4
+
+
+def test_local_cost(monkeypatch):
+    monkeypatch.setattr(cost_tracking.settings, "ELECTRICITY_PRICE_PER_KWH", 0.20)
+    monkeypatch.setattr(cost_tracking.settings, "GPU_HOURLY_COST", 1.0)
+
+    cost = calculate_local_cost(energy_joules=3_600_000, gpu_seconds=1800, tokens=2_000_000)
+    assert cost['energy_kwh'] == 1.0
+    assert cost['energy_cost'] == pytest.approx(0.20)
+    assert cost['hardware_cost'] == pytest.approx(0.50)
+    assert cost['cost_per_1m_tokens'] == pytest.approx(0.35)
+    assert cost['tokens_per_joule'] == pytest.approx(2_000_000 / 3_600_000)
+
+    unmeasured = calculate_local_cost(None, 1800, 0)
+    assert unmeasured['energy_measured'] is False and unmeasured['total_cost'] == pytest.approx(0.50)
+    assert unmeasured['cost_per_1m_tokens'] is None and unmeasured['tokens_per_joule'] is None
+
+
+def test_usage_summary_uses_recorded_split(test_db_session):
+    test_db_session.add(make_job("recorded", total_tokens=1000, prompt_tokens=900, completion_tokens=100,
+                                 gpu_seconds=10.0, energy_joules=3600.0))
+    test_db_session.add(make_job("legacy", total_tokens=1000))
+    test_db_session.commit()
+
+    summary = get_usage_summary(test_db_session)
+    assert summary['prompt_tokens'] == 900 + 700
+    assert summary['completion_tokens'] == 100 + 300
+    assert summary['estimated_split_jobs'] == 1
+    model = summary['by_model']['Qwen-4B']
+    assert model['energy_joules'] == 3600.0 and model['local_cost'] > 0
+
+
+def test_efficiency_summary_groups_by_engine_config(test_db_session, monkeypatch):
+    monkeypatch.setattr(cost_tracking.settings, "GPU_HOURLY_COST", 0.0)
+    for batch_id, version, energy in [("v1-a", 1, 1000.0), ("v1-b", 1, 1000.0), ("v2", 2, 500.0)]:
+        test_db_session.add(make_job(batch_id, total_tokens=1000, prompt_tokens=800, completion_tokens=200,
+                                     gpu_seconds=20.0, energy_joules=energy, engine_profile_version=version))
+    test_db_session.add(make_job("no-usage", total_tokens=1000))  # Before usage was recorded
+    test_db_session.commit()
+
+    rows = get_efficiency_summary(test_db_session)['by_config']
+    assert [(r['model'], r['engine_profile_version'], r['jobs']) for r in rows] == [
+        ("Qwen-4B", 1, 2), ("Qwen-4B", 2, 1)]
+    v1, v2 = rows
+    assert v1['tokens_per_joule'] == pytest.approx(1.0)
+    assert v2['tokens_per_joule'] == pytest.approx(2.0)
+    assert v2['completion_tokens_per_joule'] == pytest.approx(0.4)
+    assert v1['tokens_per_gpu_second'] == pytest.approx(50.0)
+    assert v2['local_cost_per_1m_tokens'] < v1['local_cost_per_1m_tokens']
+    assert v1['hosted_cost_per_1m_tokens'] > 0
+
+
+def test_worker_records_usage_per_chunk(simulated_worker, monkeypatch):
+    job, db = simulated_worker.submit(num_requests=10, chunk_size=4)
+    worker = simulated_worker.module.BatchWorker()
+    monkeypatch.setattr(worker, "telemetry", GPUTelemetry(backend=FakeGPUBackend(power_watts=250.0)))
+    worker.process_job(job, db)
+
+    assert job.status == 'completed'
+    usage = JobUsage.from_json(job.resource_usage)
+    assert [c['requests'] for c in usage.chunks] == [4, 4, 2]
+    assert all(c['energy_joules'] is not None and c['gpu_seconds'] >= 0 for c in usage.chunks)
+    assert job.prompt_tokens == sum(c['prompt_tokens'] for c in usage.chunks) > 0
+    assert job.total_tokens == job.prompt_tokens + job.completion_tokens
+    assert job.energy_joules >= usage.chunk_energy()
+    assert "RESOURCE USAGE" in open(job.log_file).read()
+
+    report = get_job_usage(job)
+    assert report['totals']['chunks'] == 3 and len(report['chunks']) == 3
+    assert 'chunks' not in get_job_usage(job, include_chunks=False)
+
+
+def test_worker_recovers_usage_after_crash_before_commit(simulated_worker):
+    job, db = simulated_worker.submit(num_requests=10, chunk_size=4)
+    worker = simulated_worker.module.BatchWorker()
+    worker.process_job(job, db)
+    clean = (job.prompt_tokens, job.completion_tokens)
+
+    # Killed at the 'commit' crash point of the last chunk: results saved, usage not
+    usage = JobUsage.from_json(job.resource_usage)
+    JobUsage(usage.chunks[:2]).apply_to(job)
+    job.status = 'in_progress'
+    db.commit()
+
+    worker.requeue_interrupted_jobs(db)
+    worker.process_job(job, db)
+
+    usage = JobUsage.from_json(job.resource_usage)
+    assert job.status == 'completed'
+    assert [c['requests'] for c in usage.chunks] == [4, 4, 2] and usage.chunks[-1]['recovered']
+    assert (job.prompt_tokens, job.completion_tokens) == clean
@@ -89,7 +89,7 @@ class TestChunkProcessingFailures:
         assert worker.current_llm is None
         assert worker.current_model is None
 
-    @patch('core.batch_app.worker.LLM')
+    @patch('core.batch_app.worker.create_llm')
     def test_load_model_success(self, mock_llm_class, temp_log_file):
         """Test model loading succeeds."""
         worker = BatchWorker()
@@ -102,7 +102,7 @@ class TestChunkProcessingFailures:
         assert worker.current_model == "test-model"
         mock_llm_class.assert_called_once()
 
-    @patch('core.batch_app.worker.LLM')
+    @patch('core.batch_app.worker.create_llm')
     def test_load_model_failure(self, mock_llm_class, temp_log_file):
         """Test model loading handles errors."""
         worker = BatchWorker()
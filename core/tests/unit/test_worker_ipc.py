@@ -0,0 +1,248 @@
+"""Unit tests for worker IPC (real-time inference on the worker's model).
+
+Tests cover:
+- Step loop returning batch outputs in prompt order
+- Interactive requests injected mid-batch and scheduled ahead of it
+- Requests for a model the worker doesn't have
+- Requests for a LoRA fine-tune of the loaded base model
+- Streaming outputs step by step, and aborting abandoned streams
+- Round trip over the Unix socket from the API side
+
+Run with: pytest core/tests/unit/test_worker_ipc.py -v
+"""
+
+import queue
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from core.batch_app.request_metrics import request_row
+from core.batch_app.worker_ipc import (
+    BATCH_PRIORITY,
+    INTERACTIVE_PRIORITY,
+    MODEL_NOT_LOADED,
+    InteractiveRequest,
+    WorkerIPCServer,
+    forward_generate,
+    forward_stream,
+    run_step_loop,
+)
+
+
+class FakeEngine:
+    """
+    Priority scheduler stand-in: each step generates one token for up to
+    ``max_num_seqs`` requests, lowest priority value first.
+    """
+
+    def __init__(self, tokens_per_request=3, max_num_seqs=2, on_step=None):
+        self.tokens_per_request = tokens_per_request
+        self.max_num_seqs = max_num_seqs
+        self.on_step = on_step
+        self.requests = {}
+        self.finished_order = []
+        self.lora_requests = {}
+        self.steps = 0
+
+    def add_request(self, request_id, prompt, params, priority=0, lora_request=None):
+        self.requests[request_id] = {"prompt": prompt, "priority": priority, "generated": 0,
+                                     "order": len(self.requests)}
+        self.lora_requests[request_id] = lora_request
+
+    def abort_request(self, request_ids):
+        for request_id in request_ids:
+            self.requests.pop(request_id, None)
+
+    def has_unfinished_requests(self):
+        return bool(self.requests)
+
+    def step(self):
+        self.steps += 1
+        if self.on_step:
+            self.on_step(self.steps)
+
+        scheduled = sorted(self.requests.items(), key=lambda kv: (kv[1]["priority"], kv[1]["order"]))
+        outputs = []
+        for request_id, state in scheduled[:self.max_num_seqs]:
+            state["generated"] += 1
+            finished = state["generated"] >= self.tokens_per_request
+            outputs.append(SimpleNamespace(
+                request_id=request_id,
+                finished=finished,
+                prompt_token_ids=[1, 2],
+                metrics=None,  # vLLM V1 with stats logging disabled
+                outputs=[SimpleNamespace(
+                    text=state["prompt"].upper(),
+                    token_ids=[0] * state["generated"],
+                    finish_reason="stop" if finished else None
+                )]
+            ))
+            if finished:
+                self.finished_order.append(request_id)
+                del self.requests[request_id]
+        return outputs
+
+
+def make_params(params):
+    return params
+
+
+class TestStepLoop:
+    """Test batch generation with interactive injection."""
+
+    def test_outputs_in_prompt_order(self):
+        engine = FakeEngine(max_num_seqs=1)
+
+        outputs = run_step_loop(engine, ["a", "b", "c"], {"max_tokens": 3}, make_params)
+
+        assert [o.outputs[0].text for o in outputs] == ["A", "B", "C"]
+
+    def test_timings_without_engine_metrics(self):
+        engine = FakeEngine(tokens_per_request=3, max_num_seqs=1)
+
+        outputs = run_step_loop(engine, ["a", "b"], {}, make_params)
+
+        rows = [request_row(f"r{i}", output) for i, output in enumerate(outputs)]
+        for row in rows:
+            assert row['ttft_s'] is not None and row['decode_s'] is not None and row['e2e_s'] is not None
+            assert row['decode_per_token_s'] is not None
+            assert row['ttft_s'] <= row['e2e_s']
+            assert row['queue_s'] is None and row['prefill_s'] is None
+        # "b" waited for "a" (one sequence at a time), so its first token came later
+        assert rows[1]['ttft_s'] >= rows[0]['ttft_s']
+
+    def test_interactive_request_jumps_batch(self):
+        ipc = WorkerIPCServer(lambda: "m", socket_path="unused")
+        request = InteractiveRequest("m", "urgent", {"max_tokens": 3})
+
+        def arrive(step):
+            if step == 2:
+                ipc.pending.put(request)
+
+        engine = FakeEngine(on_step=arrive)
+        outputs = run_step_loop(engine, [f"p{i}" for i in range(6)], {}, make_params, ipc=ipc, model="m")
+
+        assert request.result["text"] == "URGENT"
+        assert request.result["served_by"] == "worker"
+        assert request.result["usage"]["completion_tokens"] == 3
+        # Finished right after the two batch requests already running
+        interactive_position = [r.startswith("interactive") for r in engine.finished_order].index(True)
+        assert interactive_position <= 2
+        assert all(o is not None for o in outputs)
+        assert INTERACTIVE_PRIORITY < BATCH_PRIORITY
+
+    def test_wrong_model_rejected(self):
+        ipc = WorkerIPCServer(lambda: "m", socket_path="unused")
+        request = InteractiveRequest("other", "x", {})
+        ipc.pending.put(request)
+
+        run_step_loop(FakeEngine(), [], None, make_params, ipc=ipc, model="m")
+
+        assert request.error == MODEL_NOT_LOADED
+
+    def test_streaming_request_gets_each_step(self):
+        ipc = WorkerIPCServer(lambda: "m", socket_path="unused")
+        request = InteractiveRequest("m", "hi", {}, outputs=queue.Queue())
+        ipc.pending.put(request)
+
+        run_step_loop(FakeEngine(tokens_per_request=3), [], None, make_params, ipc=ipc, model="m")
+
+        outputs = []
+        while (output := request.outputs.get_nowait()) is not None:
+            outputs.append(output)
+        assert [o["completion_tokens"] for o in outputs] == [1, 2, 3]
+        assert [o["finish_reason"] for o in outputs] == [None, None, "stop"]
+        assert outputs[-1]["text"] == "HI" and outputs[-1]["prompt_tokens"] == 2
+
+    def test_cancelled_stream_is_aborted(self):
+        ipc = WorkerIPCServer(lambda: "m", socket_path="unused")
+        request = InteractiveRequest("m", "gone", {}, outputs=queue.Queue())
+        ipc.pending.put(request)
+
+        def disconnect(step):
+            if step == 2:
+                request.cancelled = True
+
+        engine = FakeEngine(tokens_per_request=5, on_step=disconnect)
+        outputs = run_step_loop(engine, ["p0"], {}, make_params, ipc=ipc, model="m")
+
+        assert [o.outputs[0].text for o in outputs] == ["P0"]
+        assert not any(r.startswith("interactive") for r in engine.finished_order)
+        assert request.result is None
+
+
+class TestIPCRoundTrip:
+    """Test forwarding from the API side over the Unix socket."""
+
+    @pytest.fixture
+    def engine(self):
+        return FakeEngine()
+
+    @pytest.fixture
+    def worker(self, temp_dir, engine):
+        def resolve_model(model):
+            # "ft-adapter" is a fine-tune of the loaded model
+            return ("loaded-model", f"lora:{model}") if model == "ft-adapter" else (model, None)
+
+        socket_path = str(temp_dir / "worker.sock")
+        ipc = WorkerIPCServer(lambda: "loaded-model", socket_path=socket_path, request_timeout=5,
+                              resolve_model=resolve_model)
+        ipc.start()
+        stop = threading.Event()
+
+        def main_thread():
+            while not stop.is_set():
+                if ipc.wait_for_pending(0.05):
+                    run_step_loop(engine, [], None, make_params, ipc=ipc, model="loaded-model")
+
+        thread = threading.Thread(target=main_thread, daemon=True)
+        thread.start()
+        yield socket_path
+        stop.set()
+        thread.join(1)
+        ipc.stop()
+
+    @pytest.mark.asyncio
+    async def test_forward_to_loaded_model(self, worker):
+        result = await forward_generate("loaded-model", "hello", {"max_tokens": 3}, socket_path=worker)
+
+        assert result["text"] == "HELLO"
+        assert result["served_by"] == "worker"
+
+    @pytest.mark.asyncio
+    async def test_adapter_runs_on_loaded_base(self, worker, engine):
+        result = await forward_generate("ft-adapter", "tuned", {"max_tokens": 3}, socket_path=worker)
+
+        assert result["text"] == "TUNED" and result["model"] == "ft-adapter"
+        assert list(engine.lora_requests.values()) == ["lora:ft-adapter"]
+
+    @pytest.mark.asyncio
+    async def test_other_model_falls_back(self, worker):
+        assert await forward_generate("other-model", "hello", {}, socket_path=worker) is None
+
+    @pytest.mark.asyncio
+    async def test_no_worker_falls_back(self, temp_dir):
+        assert await forward_generate("m", "hello", {}, socket_path=str(temp_dir / "missing.sock")) is None
+
+    @pytest.mark.asyncio
+    async def test_stream_from_loaded_model(self, worker):
+        outputs = await forward_stream("loaded-model", "hello", {"max_tokens": 3}, socket_path=worker)
+
+        chunks = [output async for output in outputs]
+        assert [c["completion_tokens"] for c in chunks] == [1, 2, 3]
+        assert chunks[-1]["text"] == "HELLO" and chunks[-1]["finish_reason"] == "stop"
+        assert all("submitted_at" in c for c in chunks)
+
+    @pytest.mark.asyncio
+    async def test_stream_adapter_on_loaded_base(self, worker, engine):
+        outputs = await forward_stream("ft-adapter", "tuned", {}, socket_path=worker)
+
+        chunks = [output async for output in outputs]
+        assert chunks[-1]["text"] == "TUNED"
+        assert list(engine.lora_requests.values()) == ["lora:ft-adapter"]
+
+    @pytest.mark.asyncio
+    async def test_stream_other_model_falls_back(self, worker, temp_dir):
+        assert await forward_stream("other-model", "hello", {}, socket_path=worker) is None
+        assert await forward_stream("m", "hello", {}, socket_path=str(temp_dir / "missing.sock")) is None
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Add autotune job fields to BatchJob and the tuned chunk size to ModelRegistry."""
+
+from sqlalchemy import text
+from core.batch_app.database import engine
+
+COLUMNS = [
+    ("batch_jobs", "job_type", "VARCHAR(32) DEFAULT 'batch'"),
+    ("batch_jobs", "job_config", "TEXT DEFAULT NULL"),
+    ("model_registry", "chunk_size", "INTEGER DEFAULT NULL"),
+]
+
+
+def migrate():
+    """Add autotune fields."""
+
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN {column} {definition}
+                """))
+                conn.commit()
+                print(f"✅ Added {table}.{column} column")
+            except Exception as e:
+                conn.rollback()
+                if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
+                    print(f"⏭️  {table}.{column} column already exists")
+                else:
+                    raise
+
+        print("\n✅ Migration complete!")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Link benchmark runs to the worker job that executes them (job_type 'benchmark')."""
+
+from sqlalchemy import text
+from core.batch_app.database import engine
+
+COLUMNS = [
+    ("benchmarks", "batch_id", "VARCHAR DEFAULT NULL"),
+]
+
+
+def migrate():
+    """Add benchmark job link."""
+
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN {column} {definition}
+                """))
+                conn.commit()
+                print(f"✅ Added {table}.{column} column")
+            except Exception as e:
+                conn.rollback()
+                if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
+                    print(f"⏭️  {table}.{column} column already exists")
+                else:
+                    raise
+
+        print("\n✅ Migration complete!")
+
+if __name__ == "__main__":
+    migrate()
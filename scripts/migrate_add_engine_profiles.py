@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Add engine profile fields to ModelRegistry and BatchJob."""
+
+from sqlalchemy import text
+from core.batch_app.database import engine
+
+COLUMNS = [
+    ("model_registry", "engine_profile", "TEXT DEFAULT NULL"),
+    ("model_registry", "engine_profile_version", "INTEGER DEFAULT 0"),
+    ("batch_jobs", "engine_profile_version", "INTEGER DEFAULT NULL"),
+    ("batch_jobs", "engine_config", "TEXT DEFAULT NULL"),
+]
+
+
+def migrate():
+    """Add engine profile fields."""
+
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN {column} {definition}
+                """))
+                conn.commit()
+                print(f"✅ Added {table}.{column} column")
+            except Exception as e:
+                conn.rollback()
+                if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
+                    print(f"⏭️  {table}.{column} column already exists")
+                else:
+                    raise
+
+        print("\n✅ Migration complete!")
+
+if __name__ == "__main__":
+    migrate()
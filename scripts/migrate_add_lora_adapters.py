@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Add LoRA adapter fields to ModelRegistry."""
+
+from sqlalchemy import text
+from core.batch_app.database import engine
+
+COLUMNS = [
+    ("model_registry", "base_model_id", "VARCHAR(256) DEFAULT NULL"),
+    ("model_registry", "adapter_path", "VARCHAR(512) DEFAULT NULL"),
+]
+
+
+def migrate():
+    """Add LoRA adapter fields."""
+
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN {column} {definition}
+                """))
+                conn.commit()
+                print(f"✅ Added {table}.{column} column")
+            except Exception as e:
+                conn.rollback()
+                if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
+                    print(f"⏭️  {table}.{column} column already exists")
+                else:
+                    raise
+
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_model_registry_base_model_id ON model_registry (base_model_id)"))
+        conn.commit()
+
+        print("\n✅ Migration complete!")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Add warm model cache fields to WorkerHeartbeat and ModelRegistry."""
+
+from sqlalchemy import text
+from core.batch_app.database import engine
+
+COLUMNS = [
+    ("worker_heartbeat", "warm_models", "TEXT DEFAULT NULL"),
+    ("model_registry", "warm_load_time_seconds", "FLOAT DEFAULT NULL"),
+]
+
+
+def migrate():
+    """Add warm model cache fields."""
+
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN {column} {definition}
+                """))
+                conn.commit()
+                print(f"✅ Added {table}.{column} column")
+            except Exception as e:
+                conn.rollback()
+                if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
+                    print(f"⏭️  {table}.{column} column already exists")
+                else:
+                    raise
+
+        print("\n✅ Migration complete!")
+
+if __name__ == "__main__":
+    migrate()
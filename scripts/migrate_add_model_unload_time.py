@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Add measured unload (GPU memory release) time to ModelRegistry."""
+
+from sqlalchemy import text
+from core.batch_app.database import engine
+
+
+def migrate():
+    """Add unload_time_seconds column."""
+
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("""
+                ALTER TABLE model_registry
+                ADD COLUMN unload_time_seconds FLOAT DEFAULT NULL
+            """))
+            conn.commit()
+            print("✅ Added model_registry.unload_time_seconds column")
+        except Exception as e:
+            conn.rollback()
+            if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
+                print("⏭️  model_registry.unload_time_seconds column already exists")
+            else:
+                raise
+
+        print("\n✅ Migration complete!")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Add the per-phase timing breakdown and GPU busy fraction to BatchJob."""
+
+from sqlalchemy import text
+from core.batch_app.database import engine
+
+COLUMNS = [
+    ("batch_jobs", "phase_timings", "TEXT DEFAULT NULL"),
+    ("batch_jobs", "gpu_busy_fraction", "FLOAT DEFAULT NULL"),
+]
+
+
+def migrate():
+    """Add phase timing fields."""
+
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN {column} {definition}
+                """))
+                conn.commit()
+                print(f"✅ Added {table}.{column} column")
+            except Exception as e:
+                conn.rollback()
+                if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
+                    print(f"⏭️  {table}.{column} column already exists")
+                else:
+                    raise
+
+        print("\n✅ Migration complete!")
+
+if __name__ == "__main__":
+    migrate()
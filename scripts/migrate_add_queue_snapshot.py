@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Add queue snapshot and token usage fields to BatchJob, load time to ModelRegistry."""
+
+from sqlalchemy import text
+from core.batch_app.database import engine
+
+COLUMNS = [
+    ("batch_jobs", "estimated_start_time", "TIMESTAMP DEFAULT NULL"),
+    ("batch_jobs", "estimated_duration_seconds", "FLOAT DEFAULT NULL"),
+    ("batch_jobs", "estimated_prompt_tokens", "INTEGER DEFAULT NULL"),
+    ("batch_jobs", "prompt_tokens", "INTEGER DEFAULT NULL"),
+    ("batch_jobs", "completion_tokens", "INTEGER DEFAULT NULL"),
+    ("model_registry", "load_time_seconds", "FLOAT DEFAULT NULL"),
+]
+
+
+def migrate():
+    """Add queue snapshot fields."""
+
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN {column} {definition}
+                """))
+                conn.commit()
+                print(f"✅ Added {table}.{column} column")
+            except Exception as e:
+                conn.rollback()
+                if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
+                    print(f"⏭️  {table}.{column} column already exists")
+                else:
+                    raise
+
+        print("\n✅ Migration complete!")
+
+if __name__ == "__main__":
+    migrate()
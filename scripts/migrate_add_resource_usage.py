@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Add per-job resource usage (GPU seconds, energy, per-chunk JSON) to BatchJob."""
+
+from sqlalchemy import text
+from core.batch_app.database import engine
+
+COLUMNS = [
+    ("batch_jobs", "gpu_seconds", "FLOAT DEFAULT NULL"),
+    ("batch_jobs", "energy_joules", "FLOAT DEFAULT NULL"),
+    ("batch_jobs", "resource_usage", "TEXT DEFAULT NULL"),
+]
+
+
+def migrate():
+    """Add resource usage fields."""
+
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN {column} {definition}
+                """))
+                conn.commit()
+                print(f"✅ Added {table}.{column} column")
+            except Exception as e:
+                conn.rollback()
+                if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
+                    print(f"⏭️  {table}.{column} column already exists")
+                else:
+                    raise
+
+        print("\n✅ Migration complete!")
+
+if __name__ == "__main__":
+    migrate()
@@ -35,7 +35,8 @@ start_component() {
     local log_file=$3
     
     echo "▶️  Starting $name..."
-    nohup $command > "$log_file" 2>&1 &
+    # Append (>>) so in-process copytruncate log rotation keeps working
+    nohup $command >> "$log_file" 2>&1 &
     local pid=$!
     echo "   PID: $pid"
     echo "   Log: $log_file"
@@ -3,7 +3,9 @@
 GPU Monitoring Tool for vLLM Benchmarks
 
 Monitors GPU memory, utilization, and temperature during benchmark runs.
-Saves metrics to a log file for analysis.
+Saves metrics to a log file for analysis. Reads through the server's shared
+GPU telemetry (core/batch_app/gpu_telemetry.py): one NVML handle for the whole
+run instead of an nvidia-smi process per sample.
 
 Usage:
     # Start monitoring in background
@@ -17,41 +19,34 @@ Usage:
 """
 
 import argparse
+import sys
 import time
-import subprocess
 import json
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.batch_app.gpu_telemetry import get_gpu_telemetry
+
+
 def get_gpu_stats():
-    """Query nvidia-smi for GPU stats."""
-    try:
-        result = subprocess.run(
-            [
-                'nvidia-smi',
-                '--query-gpu=timestamp,memory.used,memory.total,utilization.gpu,utilization.memory,temperature.gpu,power.draw',
-                '--format=csv,noheader,nounits'
-            ],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        # Parse output: timestamp, mem_used, mem_total, gpu_util, mem_util, temp, power
-        parts = result.stdout.strip().split(', ')
-        
-        return {
-            'timestamp': datetime.now().isoformat(),
-            'memory_used_mb': int(parts[1]),
-            'memory_total_mb': int(parts[2]),
-            'memory_used_pct': round(int(parts[1]) / int(parts[2]) * 100, 1),
-            'gpu_utilization_pct': int(parts[3]),
-            'memory_utilization_pct': int(parts[4]),
-            'temperature_c': int(parts[5]),
-            'power_draw_w': float(parts[6])
-        }
-    except Exception as e:
-        return {'error': str(e), 'timestamp': datetime.now().isoformat()}
+    """Read GPU stats through the shared NVML handle."""
+    sample = get_gpu_telemetry().read_now()
+    if sample is None:
+        return {'error': 'GPU telemetry unavailable (NVML not found)', 'timestamp': datetime.now().isoformat()}
+
+    return {
+        'timestamp': datetime.fromtimestamp(sample.timestamp).isoformat(),
+        'memory_used_mb': sample.memory_used_bytes // (1024 * 1024),
+        'memory_total_mb': sample.memory_total_bytes // (1024 * 1024),
+        'memory_used_pct': round(sample.memory_percent, 1),
+        'gpu_utilization_pct': int(sample.utilization_percent or 0),
+        'memory_utilization_pct': int(sample.memory_utilization_percent or 0),
+        'temperature_c': int(sample.temperature_c or 0),
+        'power_draw_w': float(sample.power_watts or 0.0),
+        'sm_clock_mhz': sample.sm_clock_mhz
+    }
 
 def main():
     parser = argparse.ArgumentParser(description='Monitor GPU during benchmarks')